@@ -11,9 +11,19 @@ from PIL import Image
 
 from storage import get_storage
 
+from .artifact_service import get_artifact_service
 from .auth import APIKeyAuth
+from .cache_service import get_response_cache
+from .circuit_breaker import get_circuit_breakers
+from .directory_api import router as directory_router
+from .explanation_corpus import get_explanation_corpus
+from .facility_recommender import get_facility_recommender
 from .gemini_service import get_gemini_service
+from .llm_router import get_llm_router
 from .ml_service import get_ml_service
+from .rate_limiter import get_gemini_rate_limiter
+from .renderers import FastJSONRenderer
+from .report_service import get_report_service
 from .schemas import (
     AnalyzeRequest,
     AnalyzeResponse,
@@ -21,6 +31,7 @@ from .schemas import (
     DiagnoseResponse,
     HealthCheckResponse,
 )
+from .session_manager import get_session_manager
 from .workflow_api import router as workflow_router
 
 logger = logging.getLogger(__name__)
@@ -30,9 +41,11 @@ api = NinjaAPI(
     version="1.0.0",
     description="Cloud-hybrid IoT system for diabetes risk assessment",
     auth=APIKeyAuth(),
+    renderer=FastJSONRenderer(),
 )
 
 api.add_router("/session", workflow_router)
+api.add_router("/directory", directory_router)
 
 
 def _check_donation_eligibility(
@@ -87,7 +100,6 @@ def analyze_patient(request, data: AnalyzeRequest):
     try:
         # Get services
         ml_service = get_ml_service()
-        gemini_service = get_gemini_service()
         storage = get_storage()
 
         # Ensure models are loaded
@@ -148,20 +160,17 @@ def analyze_patient(request, data: AnalyzeRequest):
             "willing_to_donate": data.willing_to_donate,
         }
 
-        explanation = gemini_service.generate_patient_explanation(
+        explanation = get_llm_router().generate_patient_explanation(
             analysis_results, demographics
         )
 
         logger.info("📊 Analysis complete, generating additional features...")
 
-        # Generate health facility recommendations
-        logger.info(
-            f"🏥 Requesting facility recommendations for {analysis_results['diabetes_risk_level']} risk"
-        )
-        nearby_facilities = gemini_service.generate_health_facilities(
+        # Ranked locally from the verified directories; no LLM call
+        nearby_facilities = get_facility_recommender().recommend(
             analysis_results["diabetes_risk_level"]
         )
-        logger.info(f"✅ Received {len(nearby_facilities)} facility recommendations")
+        logger.info(f"✅ Ranked {len(nearby_facilities)} facility recommendations")
 
         # Get blood donation centers (only if user is willing)
         blood_centers = []
@@ -274,6 +283,28 @@ def health_check(request):
     return {
         "status": "healthy",  # API is always healthy if this endpoint responds
         "database_connected": db_connected,
+        "llm_circuits": {
+            name: breaker.state for name, breaker in get_circuit_breakers().items()
+        },
+        "timestamp": datetime.now(timezone.utc),
+    }
+
+
+@api.get("/metrics", tags=["System"])
+def metrics(request):
+    """Runtime metrics for in-process subsystems."""
+    return {
+        "sessions": get_session_manager().get_metrics(),
+        "artifacts": get_artifact_service().get_metrics(),
+        "reports": get_report_service().get_metrics(),
+        "llm_cache": get_response_cache().get_stats(),
+        "explanation_corpus": get_explanation_corpus().get_stats(),
+        "gemini_rate_limit": get_gemini_rate_limiter().get_metrics(),
+        "llm_router": get_llm_router().get_metrics(),
+        "llm_circuits": {
+            name: breaker.get_metrics()
+            for name, breaker in get_circuit_breakers().items()
+        },
         "timestamp": datetime.now(timezone.utc),
     }
 
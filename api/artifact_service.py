@@ -0,0 +1,246 @@
+"""Background work behind ``get_results``: report spec, QR code and record.
+
+``get_results`` used to render the PDF and the QR code, upload both and insert
+the patient record before answering. Now it hands all of that to a small
+executor here: storing the report's render spec, the QR render + upload and
+the record insert run in parallel while results are returned. Once the spec
+is stored the report no longer needs the session, so the job retires it;
+if the store fails the session is kept and results can be requested again.
+The artifact URLs are backend proxy URLs derived from the session id, so
+they are valid before any of this finishes. The PDF itself is rendered
+lazily on download (see ``report_service``); the spec and the QR bytes stay
+in memory for a while so the proxy endpoints can answer without a storage
+round trip. Every stage is timed.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from storage import get_storage
+
+from .constants import ARTIFACT_RETENTION_MINUTES, ARTIFACT_WORKERS
+from .pdf_service import get_pdf_generator
+from .report_service import get_report_service, spec_hash
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = "pending"
+STATUS_READY = "ready"
+STATUS_FAILED = "failed"
+
+STAGES = ("store_spec", "render_qr", "upload_qr", "save_record")
+
+
+class ArtifactJob:
+    """One session's report artifacts and their progress."""
+
+    def __init__(
+        self,
+        session_id: str,
+        spec: Dict,
+        download_url: str,
+        record_data: Optional[Dict] = None,
+        on_stored: Optional[Callable[[str], None]] = None,
+    ):
+        self.session_id = session_id
+        self.spec = spec
+        self.download_url = download_url
+        self.record_data = record_data
+        self.on_stored = on_stored
+        self.status = STATUS_PENDING
+        self.report_id = spec_hash(spec)
+        self.qr_bytes: Optional[bytes] = None
+        self.qr_url: Optional[str] = None
+        self.record_id: Optional[str] = None
+        self.spec_stored = False
+        self.errors: Dict[str, str] = {}
+        self.timings: Dict[str, float] = {}
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.qr_ready = threading.Event()
+        self.done = threading.Event()
+        self._remaining = 0
+        self._lock = threading.Lock()
+
+    @property
+    def saved(self) -> bool:
+        return self.record_id is not None
+
+    def wait_qr(self, timeout: float) -> bool:
+        """Block up to ``timeout`` seconds until the QR code is rendered."""
+        return self.qr_ready.wait(timeout)
+
+    def to_dict(self) -> dict:
+        return {
+            "session_id": self.session_id,
+            "status": self.status,
+            "report_id": self.report_id,
+            "qr_ready": self.qr_ready.is_set(),
+            "spec_stored": self.spec_stored,
+            "qr_code_url": self.qr_url,
+            "saved_to_database": self.saved,
+            "record_id": self.record_id,
+            "errors": dict(self.errors),
+            "timings_ms": dict(self.timings),
+        }
+
+
+class ArtifactService:
+    """Runs artifact jobs on a bounded thread pool, one job per session."""
+
+    def __init__(self, max_workers: int = ARTIFACT_WORKERS):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="artifacts"
+        )
+        self._jobs: Dict[str, ArtifactJob] = {}
+        self._lock = threading.Lock()
+        self._stage_stats = {
+            stage: {"count": 0, "total_ms": 0.0, "max_ms": 0.0} for stage in STAGES
+        }
+        self._totals = {"submitted": 0, "ready": 0, "failed": 0}
+
+    def submit(
+        self,
+        session_id: str,
+        spec: Dict,
+        download_url: str,
+        record_data: Optional[Dict] = None,
+        on_stored: Optional[Callable[[str], None]] = None,
+    ) -> ArtifactJob:
+        """Queue the spec store, QR code and (with ``record_data``) record insert.
+
+        The job keeps ``spec`` for the download proxy until it is stored;
+        ``on_stored(session_id)`` runs once the store succeeds.
+        """
+        job = ArtifactJob(session_id, spec, download_url, record_data, on_stored)
+        tasks = [self._store_spec, self._build_qr]
+        if record_data is not None:
+            tasks.append(self._save_record)
+        job._remaining = len(tasks)
+
+        with self._lock:
+            self._prune()
+            self._jobs[session_id] = job
+            self._totals["submitted"] += 1
+
+        for task in tasks:
+            self._executor.submit(self._run, job, task)
+        return job
+
+    def get_job(self, session_id: str) -> Optional[ArtifactJob]:
+        with self._lock:
+            return self._jobs.get(session_id)
+
+    def get_metrics(self) -> dict:
+        """Job totals and per-stage count, average and worst time."""
+        with self._lock:
+            stages = {
+                stage: {
+                    "count": stats["count"],
+                    "avg_ms": round(stats["total_ms"] / stats["count"], 1)
+                    if stats["count"]
+                    else 0.0,
+                    "max_ms": round(stats["max_ms"], 1),
+                }
+                for stage, stats in self._stage_stats.items()
+            }
+            return {**self._totals, "in_memory": len(self._jobs), "stages": stages}
+
+    def _prune(self) -> None:
+        """Drop finished jobs past the retention window (caller holds _lock)."""
+        cutoff = time.time() - ARTIFACT_RETENTION_MINUTES * 60
+        for session_id in [
+            sid
+            for sid, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]:
+            del self._jobs[session_id]
+
+    def _timed(self, job: ArtifactJob, stage: str, fn: Callable):
+        start = time.perf_counter()
+        try:
+            return fn()
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            job.timings[stage] = round(elapsed_ms, 1)
+            with self._lock:
+                stats = self._stage_stats[stage]
+                stats["count"] += 1
+                stats["total_ms"] += elapsed_ms
+                stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+
+    def _store_spec(self, job: ArtifactJob) -> None:
+        self._timed(
+            job,
+            "store_spec",
+            lambda: get_report_service().store_spec(job.session_id, job.spec),
+        )
+        job.spec_stored = True
+        if job.on_stored is not None:
+            job.on_stored(job.session_id)
+
+    def _build_qr(self, job: ArtifactJob) -> None:
+        try:
+            job.qr_bytes = self._timed(
+                job,
+                "render_qr",
+                lambda: get_pdf_generator().generate_qr_code(job.download_url),
+            )
+        finally:
+            job.qr_ready.set()
+        job.qr_url = self._timed(
+            job,
+            "upload_qr",
+            lambda: get_storage().save_file(
+                job.qr_bytes, f"qr_{job.session_id}.png", folder="qr_codes"
+            ),
+        )
+
+    def _save_record(self, job: ArtifactJob) -> None:
+        job.record_id = self._timed(
+            job,
+            "save_record",
+            lambda: get_storage().save_patient_record(job.record_data),
+        )
+
+    def _run(self, job: ArtifactJob, task: Callable[[ArtifactJob], None]) -> None:
+        name = task.__name__.lstrip("_")
+        try:
+            task(job)
+        except Exception as e:
+            logger.error(
+                f"[ARTIFACTS] {name} failed for session {job.session_id}: {e}",
+                exc_info=True,
+            )
+            job.errors[name] = str(e)
+
+        with job._lock:
+            job._remaining -= 1
+            if job._remaining:
+                return
+        self._finish(job)
+
+    def _finish(self, job: ArtifactJob) -> None:
+        job.status = STATUS_FAILED if job.errors else STATUS_READY
+        job.finished_at = time.time()
+        with self._lock:
+            self._totals[job.status] += 1
+        job.done.set()
+        logger.info(
+            f"📄 Artifacts {job.status} for session {job.session_id} "
+            f"in {job.finished_at - job.created_at:.2f}s {job.timings}"
+        )
+
+
+_artifact_service = None
+
+
+def get_artifact_service() -> ArtifactService:
+    """Singleton pattern for the artifact service."""
+    global _artifact_service
+    if _artifact_service is None:
+        _artifact_service = ArtifactService()
+    return _artifact_service
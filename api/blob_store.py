@@ -0,0 +1,271 @@
+"""Encrypted binary storage for fingerprint images.
+
+Raw image bytes are sealed with AES-GCM and written as binary sidecar files,
+one per finger, under ``<root>/<session_id>/<finger_name>.fpb``. Nothing is
+base64 encoded on the way in or out.
+
+Blob layout::
+
+    MAGIC (4) | key id length (1) | key id (ascii) | nonce (12) | ciphertext+tag
+
+The header (everything before the ciphertext) and the blob's session/finger
+path are bound as associated data, so a blob cannot be moved to another
+session or have its key id swapped without failing authentication.
+
+Sealed blobs are also kept resident in memory so analysis does not have to
+go back to disk. Resident bytes are capped by a memory budget: when it is
+exceeded the least recently used blobs are spilled (dropped from memory; the
+encrypted sidecar file is the spill copy) and faulted back in on access.
+"""
+
+import base64
+import hashlib
+import logging
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+from .exceptions import FingerprintBlobError
+from .security_utils import sanitize_filename
+
+logger = logging.getLogger(__name__)
+
+BLOB_MAGIC = b"FPB1"
+NONCE_SIZE = 12
+TAG_SIZE = 16  # AES-GCM authentication tag
+BLOB_SUFFIX = ".fpb"
+TOMBSTONE_LIMIT = 1024  # Recently deleted sessions that reads may not re-admit
+
+
+def derive_blob_key(secret: bytes) -> bytes:
+    """Derive a 256-bit AES key from an existing secret (e.g. the session key)."""
+    return HKDF(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=None,
+        info=b"fingerprint-blob-store",
+    ).derive(secret)
+
+
+def key_id_for(key: bytes) -> str:
+    """Short, non-secret identifier for a key, stored in each blob header."""
+    return hashlib.sha256(key).hexdigest()[:8]
+
+
+class FingerprintBlobStore:
+    """AES-GCM encrypted fingerprint blobs in binary sidecar files."""
+
+    def __init__(
+        self,
+        root: Path,
+        active_key: bytes,
+        retired_keys=(),
+        memory_budget_bytes: int = 64 * 1024 * 1024,
+    ):
+        self.root = Path(root)
+        self._active_key_id = key_id_for(active_key)
+        self._ciphers: Dict[str, AESGCM] = {self._active_key_id: AESGCM(active_key)}
+        for key in retired_keys:
+            self._ciphers.setdefault(key_id_for(key), AESGCM(key))
+
+        # Resident sealed blobs in LRU order (oldest first), keyed by
+        # (session_id, finger_name).
+        self._resident: OrderedDict[tuple, bytes] = OrderedDict()
+        self._resident_bytes = 0
+        self._session_resident_bytes: Dict[str, int] = {}
+        # Deleted session ids, oldest first; a fault-in racing delete_session
+        # must not make the deleted blob resident again
+        self._tombstones: OrderedDict[str, None] = OrderedDict()
+        self.memory_budget_bytes = memory_budget_bytes
+        self._lock = threading.Lock()
+
+        self._spill_events = 0
+        self._spilled_bytes = 0
+        self._fault_ins = 0
+        self._hits = 0
+
+    @property
+    def active_key_id(self) -> str:
+        return self._active_key_id
+
+    def _session_dir(self, session_id: str) -> Path:
+        return self.root / sanitize_filename(session_id)
+
+    def _blob_path(self, session_id: str, finger_name: str) -> Path:
+        return self._session_dir(session_id) / (
+            sanitize_filename(finger_name) + BLOB_SUFFIX
+        )
+
+    @staticmethod
+    def _aad(session_id: str, finger_name: str, header: bytes) -> bytes:
+        return f"{session_id}/{finger_name}".encode() + header
+
+    def seal(self, session_id: str, finger_name: str, data: bytes) -> bytes:
+        """Encrypt raw bytes into a self-describing blob."""
+        key_id = self._active_key_id.encode("ascii")
+        nonce = os.urandom(NONCE_SIZE)
+        header = BLOB_MAGIC + bytes([len(key_id)]) + key_id + nonce
+        ciphertext = self._ciphers[self._active_key_id].encrypt(
+            nonce, data, self._aad(session_id, finger_name, header)
+        )
+        return header + ciphertext
+
+    def unseal(self, session_id: str, finger_name: str, blob: bytes) -> bytes:
+        """Authenticate and decrypt a blob produced by seal()."""
+        if len(blob) < 5 or blob[:4] != BLOB_MAGIC:
+            raise FingerprintBlobError("Not a fingerprint blob")
+
+        key_id_len = blob[4]
+        header_end = 5 + key_id_len + NONCE_SIZE
+        if len(blob) < header_end + TAG_SIZE:
+            raise FingerprintBlobError("Truncated fingerprint blob")
+        key_id = blob[5 : 5 + key_id_len].decode("ascii", errors="replace")
+        nonce = blob[5 + key_id_len : header_end]
+
+        cipher = self._ciphers.get(key_id)
+        if cipher is None:
+            raise FingerprintBlobError(f"Unknown blob key id: {key_id}")
+
+        try:
+            return cipher.decrypt(
+                nonce,
+                blob[header_end:],
+                self._aad(session_id, finger_name, blob[:header_end]),
+            )
+        except InvalidTag as e:
+            raise FingerprintBlobError("Fingerprint blob failed authentication") from e
+
+    def _admit(self, key: tuple, blob: bytes) -> None:
+        """Make a blob resident as most recently used (caller holds _lock)."""
+        self._discard(key)
+        self._resident[key] = blob
+        self._resident_bytes += len(blob)
+        self._session_resident_bytes[key[0]] = self._session_resident_bytes.get(
+            key[0], 0
+        ) + len(blob)
+        self._enforce_budget()
+
+    def _discard(self, key: tuple) -> int:
+        """Drop a resident blob; returns its size (caller holds _lock)."""
+        blob = self._resident.pop(key, None)
+        if blob is None:
+            return 0
+
+        self._resident_bytes -= len(blob)
+        remaining = self._session_resident_bytes.get(key[0], 0) - len(blob)
+        if remaining > 0:
+            self._session_resident_bytes[key[0]] = remaining
+        else:
+            self._session_resident_bytes.pop(key[0], None)
+        return len(blob)
+
+    def _enforce_budget(self) -> None:
+        """Spill least recently used blobs until within budget (holds _lock).
+
+        Blobs are written through to their encrypted sidecar file on put, so
+        spilling only releases the resident copy.
+        """
+        while self._resident_bytes > self.memory_budget_bytes and self._resident:
+            oldest = next(iter(self._resident))
+            self._spilled_bytes += self._discard(oldest)
+            self._spill_events += 1
+
+    def put(self, session_id: str, finger_name: str, data: bytes) -> dict:
+        """Encrypt and store raw image bytes. Returns the session metadata entry."""
+        blob = self.seal(session_id, finger_name, data)
+
+        path = self._blob_path(session_id, finger_name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(blob)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._admit((session_id, finger_name), blob)
+
+        return {"key_id": self._active_key_id, "bytes": len(data)}
+
+    def get(self, session_id: str, finger_name: str) -> bytes:
+        """Return the decrypted raw image bytes, faulting spilled blobs in."""
+        key = (session_id, finger_name)
+        with self._lock:
+            blob = self._resident.get(key)
+            if blob is not None:
+                self._resident.move_to_end(key)
+                self._hits += 1
+
+        if blob is None:
+            try:
+                blob = self._blob_path(session_id, finger_name).read_bytes()
+            except FileNotFoundError as e:
+                raise FingerprintBlobError(
+                    f"Fingerprint blob missing: {session_id}/{finger_name}"
+                ) from e
+            with self._lock:
+                self._fault_ins += 1
+                if session_id not in self._tombstones:
+                    self._admit(key, blob)
+
+        return self.unseal(session_id, finger_name, blob)
+
+    def delete_session(self, session_id: str) -> None:
+        """Remove every blob belonging to a session (best-effort)."""
+        with self._lock:
+            self._tombstones[session_id] = None
+            self._tombstones.move_to_end(session_id)
+            if len(self._tombstones) > TOMBSTONE_LIMIT:
+                self._tombstones.popitem(last=False)
+            for key in [k for k in self._resident if k[0] == session_id]:
+                self._discard(key)
+
+        session_dir = self._session_dir(session_id)
+        if session_dir.exists():
+            shutil.rmtree(session_dir, ignore_errors=True)
+
+    def session_resident_bytes(self, session_id: str) -> int:
+        """Bytes of a session's blobs currently held in memory."""
+        with self._lock:
+            return self._session_resident_bytes.get(session_id, 0)
+
+    def get_metrics(self) -> dict:
+        """Resident memory and spill/fault counters."""
+        with self._lock:
+            return {
+                "memory_budget_bytes": self.memory_budget_bytes,
+                "resident_bytes": self._resident_bytes,
+                "resident_blobs": len(self._resident),
+                "resident_sessions": len(self._session_resident_bytes),
+                "spill_events": self._spill_events,
+                "spilled_bytes": self._spilled_bytes,
+                "fault_ins": self._fault_ins,
+                "resident_hits": self._hits,
+            }
+
+
+def load_blob_key(fallback_secret: bytes) -> tuple[bytes, list[bytes]]:
+    """Resolve the active blob key and any retired keys from the environment.
+
+    FINGERPRINT_BLOB_KEY / FINGERPRINT_BLOB_RETIRED_KEYS hold urlsafe-base64
+    32-byte keys. Without them the key is derived from ``fallback_secret``.
+    """
+    env_key: Optional[str] = os.getenv("FINGERPRINT_BLOB_KEY")
+    active = (
+        base64.urlsafe_b64decode(env_key)
+        if env_key
+        else derive_blob_key(fallback_secret)
+    )
+
+    retired = [
+        base64.urlsafe_b64decode(k.strip())
+        for k in os.getenv("FINGERPRINT_BLOB_RETIRED_KEYS", "").split(",")
+        if k.strip()
+    ]
+    return active, retired
@@ -1,58 +1,311 @@
-"""Simple in-memory cache for Gemini responses."""
+"""Persistent, bounded cache for LLM responses.
+
+Responses are keyed by prompt type plus the discretized inputs that shape
+that prompt (risk level, pattern counts, BMI bucket, blood group, gender), so
+patients with equivalent results share one generation. Entries live in a
+SQLite file (LLM_CACHE_PATH) which survives restarts and is shared by every
+gunicorn worker. Each entry has a TTL, and the file is held under a byte
+budget by evicting the least recently used entries.
+
+Concurrent misses for the same key are coalesced (see single_flight): one
+caller generates and stores the response while the others wait for it, so
+identical prompts from several kiosks cost a single LLM call.
+
+Cache failures never break generation: a SQLite error is logged and treated
+as a miss.
+"""
 
 import hashlib
 import json
-from datetime import datetime, timedelta, timezone
-from typing import Dict, Optional
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from .constants import (
+    LLM_CACHE_KEY_VERSION,
+    LLM_CACHE_MAX_MB,
+    LLM_CACHE_TTL_MINUTES,
+)
+from .single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+PROMPT_RISK_EXPLANATION = "risk_explanation"
+PROMPT_PATIENT_EXPLANATION = "patient_explanation"
+
+
+def bmi_bucket(bmi: float) -> str:
+    """WHO BMI category, used where the prompt does not echo the exact BMI."""
+    if bmi < 18.5:
+        return "underweight"
+    if bmi < 25:
+        return "normal"
+    if bmi < 30:
+        return "overweight"
+    return "obese"
+
+
+def risk_explanation_inputs(data: Dict) -> Dict:
+    """Cache inputs for generate_risk_explanation.
+
+    That prompt quotes age and BMI back to the patient, so they are only
+    coarsened to the decade and the whole number.
+    """
+    return {
+        "age_bucket": (data["age"] // 10) * 10,  # Group by decade
+        "bmi_bucket": round(data["bmi"], 0),  # Round to nearest integer
+        "risk_level": data["risk_level"],
+        "pattern_arc": data.get("pattern_arc", 0),
+        "pattern_whorl": data.get("pattern_whorl", 0),
+        "pattern_loop": data.get("pattern_loop", 0),
+    }
+
+
+def patient_explanation_inputs(analysis_results: Dict, demographics: Dict) -> Dict:
+    """Cache inputs for the multi-section patient explanation."""
+    counts = analysis_results["pattern_counts"]
+    return {
+        "risk_level": analysis_results["diabetes_risk_level"],
+        "pattern_arc": counts.get("Arc", 0),
+        "pattern_whorl": counts.get("Whorl", 0),
+        "pattern_loop": counts.get("Loop", 0),
+        "bmi_bucket": bmi_bucket(analysis_results["bmi"]),
+        "blood_group": analysis_results["predicted_blood_group"],
+        "gender": demographics.get("gender"),
+    }
 
 
 class ResponseCache:
-    def __init__(self, ttl_minutes: int = 60):
-        self.cache = {}
-        self.ttl = timedelta(minutes=ttl_minutes)
-
-    def _generate_key(self, data: Dict) -> str:
-        """Generate cache key from patient data."""
-        # Only use risk-relevant fields for caching
-        cache_data = {
-            "age_bucket": (data["age"] // 10) * 10,  # Group by decade
-            "bmi_bucket": round(data["bmi"], 0),  # Round to nearest integer
-            "risk_level": data["risk_level"],
-            "pattern_arc": data.get("pattern_arc", 0),
-            "pattern_whorl": data.get("pattern_whorl", 0),
-            "pattern_loop": data.get("pattern_loop", 0),
-        }
-        json_str = json.dumps(cache_data, sort_keys=True)
-        return hashlib.md5(json_str.encode()).hexdigest()
+    """LRU + TTL cache of JSON-serializable LLM responses backed by SQLite."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl_minutes: float = 60,
+        max_bytes: int = LLM_CACHE_MAX_MB * 1024 * 1024,
+    ):
+        self.path = path or ":memory:"
+        self.ttl_seconds = ttl_minutes * 60
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            self.path, timeout=5, check_same_thread=False, isolation_level=None
+        )
+        if self.path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS llm_cache_last_used ON llm_cache (last_used)"
+        )
+
+        self._hits: Dict[str, int] = {}
+        self._misses: Dict[str, int] = {}
+        self._evictions = 0
+        self._expirations = 0
+        self._errors = 0
+        self.inflight = SingleFlight()
+
+    @staticmethod
+    def make_key(kind: str, inputs: Dict) -> str:
+        """Stable key for a prompt type and its discretized inputs."""
+        payload = json.dumps(
+            {"v": LLM_CACHE_KEY_VERSION, "kind": kind, **inputs}, sort_keys=True
+        )
+        return f"{kind}:{hashlib.sha256(payload.encode()).hexdigest()[:32]}"
+
+    def _read(self, key: str) -> Optional[Any]:
+        """Fetch a live entry and mark it used; None if absent or expired."""
+        now = time.time()
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                if row[1] <= now:
+                    self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._expirations += 1
+                    return None
+                self._conn.execute(
+                    "UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, key)
+                )
+                return json.loads(row[0])
+        except sqlite3.Error as e:
+            self._errors += 1
+            logger.warning(f"LLM cache lookup failed: {e}")
+            return None
+
+    def lookup(self, kind: str, inputs: Dict) -> Optional[Any]:
+        """Return the cached response for a prompt, or None."""
+        value = self._read(self.make_key(kind, inputs))
+        counter = self._misses if value is None else self._hits
+        counter[kind] = counter.get(kind, 0) + 1
+        return value
+
+    def peek(self, kind: str, inputs: Dict) -> Optional[Any]:
+        """Like lookup() but not counted in the hit-rate stats."""
+        return self._read(self.make_key(kind, inputs))
+
+    def get_or_generate(
+        self,
+        kind: str,
+        inputs: Dict,
+        generate: Callable[[], Any],
+        cacheable: Callable[[Any], bool] = bool,
+    ) -> Any:
+        """Cached response, else one generation shared by concurrent callers.
+
+        The leader re-checks the cache (a flight may have just landed), runs
+        ``generate`` and stores the result if ``cacheable`` accepts it.
+        Exceptions from ``generate`` reach every waiter and are not cached.
+        """
+        cached = self.lookup(kind, inputs)
+        if cached is not None:
+            return cached
+
+        def _lead():
+            value = self.peek(kind, inputs)
+            if value is None:
+                value = generate()
+                if cacheable(value):
+                    self.store(kind, inputs, value)
+            return value
+
+        return self.inflight.do(self.make_key(kind, inputs), _lead)
+
+    def store(self, kind: str, inputs: Dict, value: Any) -> None:
+        """Cache a response, evicting least recently used entries over budget."""
+        key = self.make_key(kind, inputs)
+        encoded = json.dumps(value)
+        size = len(encoded.encode())
+        if size > self.max_bytes:
+            return
+
+        now = time.time()
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache "
+                    "(key, kind, value, size, expires_at, last_used) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, kind, encoded, size, now + self.ttl_seconds, now),
+                )
+                self._enforce_budget()
+        except sqlite3.Error as e:
+            self._errors += 1
+            logger.warning(f"LLM cache store failed: {e}")
+
+    def _enforce_budget(self) -> None:
+        """Drop least recently used entries until within max_bytes (holds _lock)."""
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM llm_cache"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        victims = []
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM llm_cache ORDER BY last_used"
+        ):
+            if total <= self.max_bytes:
+                break
+            victims.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM llm_cache WHERE key = ?", victims)
+        self._evictions += len(victims)
 
     def get(self, data: Dict) -> Optional[str]:
-        """Get cached response if available and not expired."""
-        key = self._generate_key(data)
-        if key in self.cache:
-            cached_item = self.cache[key]
-            if datetime.now(timezone.utc) - cached_item["timestamp"] < self.ttl:
-                return cached_item["response"]
-            else:
-                # Expired, remove from cache
-                del self.cache[key]
-        return None
+        """Get cached risk explanation if available and not expired."""
+        return self.lookup(PROMPT_RISK_EXPLANATION, risk_explanation_inputs(data))
 
     def set(self, data: Dict, response: str):
-        """Store response in cache."""
-        key = self._generate_key(data)
-        self.cache[key] = {
-            "response": response,
-            "timestamp": datetime.now(timezone.utc),
+        """Store risk explanation in cache."""
+        self.store(PROMPT_RISK_EXPLANATION, risk_explanation_inputs(data), response)
+
+    def clear_expired(self) -> int:
+        """Remove expired entries; returns how many were removed."""
+        with self._lock:
+            removed = self._conn.execute(
+                "DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),)
+            ).rowcount
+            self._expirations += removed
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+
+    def get_stats(self) -> dict:
+        """Hit rate per prompt type plus size and eviction counters."""
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache"
+            ).fetchone()
+            hits = dict(self._hits)
+            misses = dict(self._misses)
+
+        total_hits = sum(hits.values())
+        total_lookups = total_hits + sum(misses.values())
+        by_prompt = {}
+        for kind in sorted(set(hits) | set(misses)):
+            lookups = hits.get(kind, 0) + misses.get(kind, 0)
+            by_prompt[kind] = {
+                "hits": hits.get(kind, 0),
+                "misses": misses.get(kind, 0),
+                "hit_rate": round(hits.get(kind, 0) / lookups, 4),
+            }
+
+        return {
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": total_hits,
+            "misses": total_lookups - total_hits,
+            "hit_rate": round(total_hits / total_lookups, 4) if total_lookups else 0.0,
+            "by_prompt": by_prompt,
+            "evictions": self._evictions,
+            "expirations": self._expirations,
+            "errors": self._errors,
+            "single_flight": self.inflight.get_metrics(),
         }
 
-    def clear_expired(self):
-        """Remove expired entries."""
-        now = datetime.now(timezone.utc)
-        expired_keys = [
-            k for k, v in self.cache.items() if now - v["timestamp"] >= self.ttl
-        ]
-        for k in expired_keys:
-            del self.cache[k]
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _default_cache_path() -> str:
+    """LLM_CACHE_PATH, else llm_cache.sqlite3 next to the session store."""
+    path = os.getenv("LLM_CACHE_PATH")
+    if path:
+        return path
+    try:
+        from django.conf import settings
+
+        base_dir = Path(settings.BASE_DIR)
+    except Exception:
+        base_dir = Path(__file__).resolve().parent.parent
+    return str(base_dir / "llm_cache.sqlite3")
 
 
 _cache_instance = None
@@ -62,5 +315,7 @@ def get_response_cache() -> ResponseCache:
     """Singleton pattern for response cache."""
     global _cache_instance  # noqa: PLW0603
     if _cache_instance is None:
-        _cache_instance = ResponseCache(ttl_minutes=120)  # 2 hour cache
+        _cache_instance = ResponseCache(
+            _default_cache_path(), ttl_minutes=LLM_CACHE_TTL_MINUTES
+        )
     return _cache_instance
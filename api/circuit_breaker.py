@@ -0,0 +1,240 @@
+"""Circuit breaker and latency budget for external LLM calls.
+
+A breaker counts consecutive failures of one provider: errors, timeouts and
+429s alike. At ``failure_threshold`` it opens and calls fail fast with
+CircuitOpenError, so callers go straight to their template fallbacks instead
+of sitting through retries against an exhausted quota. Once the cool-down
+(or the provider's "retry in" hint, if longer) has passed it half-opens and
+lets a single probe through; success closes it, failure opens it again.
+
+Breaker state is per worker process. ``LatencyBudget`` bounds the wall-clock
+time of one logical call, retries included; SDK calls that take no timeout of
+their own run on a worker thread and are abandoned when the budget runs out.
+"""
+
+import logging
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+
+from .constants import (
+    LLM_BREAKER_COOLDOWN_SECONDS,
+    LLM_BREAKER_FAILURE_THRESHOLD,
+    LLM_CALL_WORKERS,
+    LLM_LATENCY_BUDGET_SECONDS,
+)
+from .exceptions import CircuitOpenError, LatencyBudgetExceededError
+
+logger = logging.getLogger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+_call_executor = None
+_call_executor_lock = threading.Lock()
+
+
+def _get_call_executor() -> ThreadPoolExecutor:
+    global _call_executor
+    with _call_executor_lock:
+        if _call_executor is None:
+            _call_executor = ThreadPoolExecutor(
+                max_workers=LLM_CALL_WORKERS, thread_name_prefix="llm-call"
+            )
+        return _call_executor
+
+
+class LatencyBudget:
+    """Wall-clock allowance for one logical call, retries included."""
+
+    def __init__(self, service: str, seconds: Optional[float] = None):
+        self.service = service
+        self.seconds = LLM_LATENCY_BUDGET_SECONDS if seconds is None else seconds
+        self.deadline = time.monotonic() + self.seconds
+
+    def remaining(self) -> float:
+        """Seconds left; raises LatencyBudgetExceededError once spent."""
+        left = self.deadline - time.monotonic()
+        if left <= 0:
+            raise LatencyBudgetExceededError(self.service, self.seconds)
+        return left
+
+    def allows(self, seconds: float) -> bool:
+        """Whether waiting ``seconds`` still leaves time for another call."""
+        return time.monotonic() + seconds < self.deadline
+
+    def run(self, fn: Callable):
+        """``fn()`` within the remaining budget, else LatencyBudgetExceededError.
+
+        A call that overruns cannot be cancelled; it finishes on its worker
+        thread and the result is dropped.
+        """
+        future = _get_call_executor().submit(fn)
+        try:
+            return future.result(timeout=self.remaining())
+        except FutureTimeoutError:
+            future.cancel()
+            raise LatencyBudgetExceededError(self.service, self.seconds) from None
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker around one external service."""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = LLM_BREAKER_FAILURE_THRESHOLD,
+        cooldown_seconds: float = LLM_BREAKER_COOLDOWN_SECONDS,
+        retry_after: Optional[Callable[[Exception], Optional[float]]] = None,
+    ):
+        """
+        Args:
+            name: Service name used in errors, logs and metrics
+            failure_threshold: Consecutive failures that open the circuit
+            cooldown_seconds: Minimum time open before a half-open probe
+            retry_after: Maps a failure to the provider's retry hint, if any
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._retry_after = retry_after
+
+        self._lock = threading.Lock()
+        self._state = STATE_CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._open_for = 0.0
+        self._probe_in_flight = False
+        self._last_error = None
+        self._stats = {"successes": 0, "failures": 0, "rejected": 0, "opened": 0}
+
+    def _current_state(self, now: float) -> str:
+        if self._state == STATE_OPEN and now - self._opened_at >= self._open_for:
+            return STATE_HALF_OPEN
+        return self._state
+
+    def _seconds_until_probe(self, now: float) -> float:
+        return max(0.0, self._opened_at + self._open_for - now)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def _admit(self) -> bool:
+        """Let a call through (True if it is the half-open probe) or raise."""
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            if state == STATE_CLOSED:
+                return False
+            if state == STATE_HALF_OPEN and not self._probe_in_flight:
+                self._state = STATE_HALF_OPEN
+                self._probe_in_flight = True
+                return True
+            self._stats["rejected"] += 1
+            retry_after = math.ceil(self._seconds_until_probe(now)) or None
+        raise CircuitOpenError(self.name, retry_after=retry_after)
+
+    def _record_success(self, probe: bool) -> None:
+        with self._lock:
+            if probe:
+                self._probe_in_flight = False
+            self._stats["successes"] += 1
+            self._consecutive_failures = 0
+            if self._state != STATE_CLOSED:
+                logger.info(f"🔌 {self.name} circuit closed")
+            self._state = STATE_CLOSED
+
+    def _record_failure(self, error: Exception, probe: bool) -> None:
+        hint = self._retry_after(error) if self._retry_after else None
+        with self._lock:
+            if probe:
+                self._probe_in_flight = False
+            self._stats["failures"] += 1
+            self._consecutive_failures += 1
+            self._last_error = f"{type(error).__name__}: {error}"[:200]
+            if probe or self._consecutive_failures >= self.failure_threshold:
+                self._state = STATE_OPEN
+                self._opened_at = time.monotonic()
+                self._open_for = max(self.cooldown_seconds, hint or 0.0)
+                self._stats["opened"] += 1
+                logger.warning(
+                    f"🔌 {self.name} circuit open for {self._open_for:.0f}s "
+                    f"after {self._consecutive_failures} failures: {self._last_error}"
+                )
+
+    def _release(self, probe: bool) -> None:
+        """Give back an abandoned probe slot without judging the service."""
+        if probe:
+            with self._lock:
+                self._probe_in_flight = False
+
+    @contextmanager
+    def guard(self) -> Iterator[None]:
+        """Run the block as one call to the service.
+
+        Raises CircuitOpenError without running the block while the circuit
+        is open. An exception from the block counts as a failure; a block
+        abandoned by GeneratorExit (a client that stopped streaming) counts
+        as neither.
+        """
+        probe = self._admit()
+        try:
+            yield
+        except Exception as e:
+            self._record_failure(e, probe)
+            raise
+        except BaseException:
+            self._release(probe)
+            raise
+        self._record_success(probe)
+
+    def call(self, fn: Callable, *args, **kwargs):
+        """``fn(*args, **kwargs)`` inside guard()."""
+        with self.guard():
+            return fn(*args, **kwargs)
+
+    def get_metrics(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            return {
+                "state": state,
+                "consecutive_failures": self._consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "cooldown_seconds": self.cooldown_seconds,
+                "retry_after_seconds": (
+                    round(self._seconds_until_probe(now), 1)
+                    if state == STATE_OPEN
+                    else 0.0
+                ),
+                "times_opened": self._stats["opened"],
+                "successes": self._stats["successes"],
+                "failures": self._stats["failures"],
+                "rejected": self._stats["rejected"],
+                "last_error": self._last_error,
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str, **kwargs) -> CircuitBreaker:
+    """Process-wide breaker for ``name``; ``kwargs`` apply on first use only."""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name, **kwargs)
+        return _breakers[name]
+
+
+def get_circuit_breakers() -> Dict[str, CircuitBreaker]:
+    """Every breaker created so far, by name."""
+    with _breakers_lock:
+        return dict(_breakers)
@@ -8,7 +8,64 @@ API_DESCRIPTION = "Cloud-hybrid IoT system for diabetes risk assessment"
 # Session Configuration
 SESSION_TIMEOUT_HOURS = 1
 SESSION_CLEANUP_INTERVAL_MINUTES = 30
+SESSION_LOCK_STRIPES = 64
+SESSION_FLUSH_INTERVAL_MS = 250  # Group-commit window; 0 = write on every change
+SESSION_FLUSH_MAX_PENDING = 32
+SESSION_BLOB_MEMORY_BUDGET_MB = 64  # Resident encrypted fingerprints per worker
 REQUIRED_FINGERPRINTS_COUNT = 10
+FINGER_NAMES = (
+    "right_thumb",
+    "right_index",
+    "right_middle",
+    "right_ring",
+    "right_pinky",
+    "left_thumb",
+    "left_index",
+    "left_middle",
+    "left_ring",
+    "left_pinky",
+)
+RAW_UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# Explanation Generation (background LLM calls)
+EXPLANATION_WORKERS = 2
+EXPLANATION_RESULTS_DEADLINE_SECONDS = 10  # get_results wait before fallback
+EXPLANATION_STREAM_TIMEOUT_SECONDS = 60  # SSE stream gives up after this
+
+# Report Artifacts (background report spec, QR code and record insert)
+ARTIFACT_WORKERS = 4
+ARTIFACT_WAIT_SECONDS = 10  # qr-code wait before answering 503
+ARTIFACT_RETENTION_MINUTES = 30  # Finished jobs kept in memory for downloads
+
+# PDF Reports (rendered lazily on first download, cached by content hash)
+REPORT_TEMPLATE_VERSION = 1  # Bump when the report layout changes
+REPORT_DOWNLOAD_WINDOW_HOURS = 24  # Matches signed URL expiry; then "never downloaded"
+
+# LLM Response Cache (SQLite, shared across workers)
+LLM_CACHE_TTL_MINUTES = 120
+LLM_CACHE_MAX_MB = 32
+LLM_CACHE_KEY_VERSION = 2  # Bump when prompt templates change (cache + corpus)
+
+# Gemini Rate Limiting (token bucket shared by all workers)
+GEMINI_REQUESTS_PER_MINUTE = 10  # Free tier allows 15 RPM
+GEMINI_BURST = 10
+GEMINI_BACKGROUND_RESERVE = 3  # Tokens background precompute may not take
+GEMINI_INTERACTIVE_ACQUIRE_TIMEOUT_SECONDS = 30
+
+# LLM Circuit Breaker and Latency Budget (per worker process)
+LLM_BREAKER_FAILURE_THRESHOLD = 3  # Consecutive failures or 429s that open it
+LLM_BREAKER_COOLDOWN_SECONDS = 60  # Open time before a half-open probe
+LLM_LATENCY_BUDGET_SECONDS = 20  # Per call, retries included
+LLM_CALL_WORKERS = 8  # Threads that run budgeted SDK calls
+
+# LLM Routing (hedged requests across Gemini and OpenAI)
+LLM_PROVIDER_WEIGHTS = {"gemini": 3.0, "openai": 1.0}  # Preference at full quota
+LLM_HEDGE_QUANTILE = 0.9  # Hedge once the primary is slower than its p90
+LLM_HEDGE_MIN_SAMPLES = 20  # First-chunk samples before the quantile is used
+LLM_HEDGE_DEFAULT_DELAY_SECONDS = 4.0
+LLM_HEDGE_MIN_DELAY_SECONDS = 0.5
+LLM_HEDGE_MAX_DELAY_SECONDS = 10.0
+LLM_ROUTER_WORKERS = 8  # Threads that pump provider streams
 
 # ML Model Configuration
 PATTERN_CLASSES = ["Arc", "Loop", "Whorl"]
@@ -24,6 +81,8 @@ ERROR_INSUFFICIENT_FINGERPRINTS = "Not enough fingerprints collected"
 # Healthcare Facilities Database - Pampanga, Philippines
 # Verification Standard: DOH, PhilHealth, PRC, official websites/Facebook pages only
 # Last Updated: 2025-01
+# Coordinates (lat/lng, WGS84) are geocoded from each address or plus code;
+# doctors share their clinic's coordinates
 
 HOSPITALS_DB = [
     {
@@ -36,6 +95,8 @@ HOSPITALS_DB = [
         "facebook": "https://www.facebook.com/JBLMGHOfficial",
         "google_query": "Jose B. Lingad Memorial General Hospital San Fernando Pampanga",
         "city": "San Fernando",
+        "lat": 15.052,
+        "lng": 120.696,
         "verification_status": "verified",
     },
     {
@@ -48,6 +109,8 @@ HOSPITALS_DB = [
         "facebook": "https://www.facebook.com/TheMedicalCityClark/",
         "google_query": "The Medical City Clark Mabalacat Pampanga",
         "city": "Mabalacat",
+        "lat": 15.1745,
+        "lng": 120.529,
         "verification_status": "verified",
     },
     {
@@ -58,6 +121,8 @@ HOSPITALS_DB = [
         "website": "https://pmsh.com.ph",
         "google_query": "Pampanga Medical Specialist Hospital Guagua",
         "city": "Guagua",
+        "lat": 14.9655,
+        "lng": 120.6335,
         "verification_status": "verified",
     },
     {
@@ -67,6 +132,8 @@ HOSPITALS_DB = [
         "phone": "+63 45 961 2239",
         "google_query": "V. L. Makabali Memorial Hospital San Fernando Pampanga",
         "city": "San Fernando",
+        "lat": 15.033,
+        "lng": 120.685,
         "verification_status": "verified",
     },
     {
@@ -76,6 +143,8 @@ HOSPITALS_DB = [
         "phone": "+63 45 961 3456",
         "google_query": "R. P. Rodriguez Memorial Hospital San Fernando Pampanga",
         "city": "San Fernando",
+        "lat": 15.068,
+        "lng": 120.668,
         "verification_status": "verified",
     },
     # --- Added from Facilities list: Diabetes Hospitals ---
@@ -89,6 +158,8 @@ HOSPITALS_DB = [
         "website": "http://www.aufmc.com.ph/",
         "google_query": "Angeles University Foundation Medical Center Angeles",
         "city": "Angeles",
+        "lat": 15.1452,
+        "lng": 120.5951,
         "verification_status": "community",
     },
     {
@@ -101,6 +172,8 @@ HOSPITALS_DB = [
         "facebook": "https://www.facebook.com/acshmcofficial/",
         "google_query": "Sacred Heart Medical Center Angeles",
         "city": "Angeles",
+        "lat": 15.1425,
+        "lng": 120.5985,
         "verification_status": "community",
     },
     {
@@ -113,6 +186,8 @@ HOSPITALS_DB = [
         "website": "https://primedical.com.ph/",
         "google_query": "PRI Medical Center Angeles",
         "city": "Angeles",
+        "lat": 15.1395,
+        "lng": 120.604,
         "verification_status": "community",
     },
     {
@@ -125,6 +200,8 @@ HOSPITALS_DB = [
         "facebook": "https://www.facebook.com/p/Ospital-Ning-Angeles-Management-100068082903021/",
         "google_query": "Ospital Ning Angeles Multipurpose Cooperative Angeles",
         "city": "Angeles",
+        "lat": 15.139,
+        "lng": 120.61,
         "verification_status": "community",
     },
     {
@@ -135,6 +212,8 @@ HOSPITALS_DB = [
         "website": "https://olmcmc.com/services/clark",
         "google_query": "Our Lady of Mt. Carmel Medical Center Clark",
         "city": "Mabalacat",
+        "lat": 15.1822,
+        "lng": 120.5301,
         "verification_status": "community",
     },
     {
@@ -146,6 +225,8 @@ HOSPITALS_DB = [
         "facebook": "https://www.facebook.com/maliwatentmedicalclinic/",
         "google_query": "Maliwat ENT Medical Clinic Angeles",
         "city": "Angeles",
+        "lat": 15.148,
+        "lng": 120.586,
         "verification_status": "community",
     },
     {
@@ -156,6 +237,8 @@ HOSPITALS_DB = [
         "website": "https://www.themedicalcity.com/",
         "google_query": "The Medical City Angeles",
         "city": "Angeles",
+        "lat": 15.1382,
+        "lng": 120.5935,
         "verification_status": "community",
     },
     {
@@ -166,6 +249,8 @@ HOSPITALS_DB = [
         "website": "https://www.angelesmed.com/",
         "google_query": "Angeles Medical Center Angeles",
         "city": "Angeles",
+        "lat": 15.137,
+        "lng": 120.5895,
         "verification_status": "community",
     },
     {
@@ -176,6 +261,8 @@ HOSPITALS_DB = [
         "facebook": "https://www.facebook.com/profile.php?id=100092741389883",
         "google_query": "Pineda Medical Clinic Angeles",
         "city": "Angeles",
+        "lat": 15.1415,
+        "lng": 120.5745,
         "verification_status": "community",
     },
     {
@@ -186,6 +273,8 @@ HOSPITALS_DB = [
         "facebook": "https://www.facebook.com/p/Tiglao-Medical-Center-Foundation-Inc-100071678898209/",
         "google_query": "Tiglao Medical Center Foundation Mabalacat",
         "city": "Mabalacat",
+        "lat": 15.219,
+        "lng": 120.576,
         "verification_status": "community",
     },
     {
@@ -196,6 +285,8 @@ HOSPITALS_DB = [
         "website": "https://sanfernandinohospitalinc.com/",
         "google_query": "San Fernandino Hospital San Fernando",
         "city": "San Fernando",
+        "lat": 15.038,
+        "lng": 120.684,
         "verification_status": "community",
     },
 ]
@@ -212,6 +303,8 @@ BLOOD_CENTERS_DB = [
         "email": "pampanga@redcross.org.ph",
         "google_query": "Philippine Red Cross Pampanga Blood Center San Fernando",
         "city": "San Fernando",
+        "lat": 15.062,
+        "lng": 120.657,
         "verification_status": "verified",
         "general_requirements": [
             "Age 18-65 years",
@@ -229,6 +322,8 @@ BLOOD_CENTERS_DB = [
         "facebook": "https://www.facebook.com/centralluzonregionalbloodcenter/",
         "google_query": "Central Luzon Regional Blood Center San Fernando",
         "city": "San Fernando",
+        "lat": 15.06,
+        "lng": 120.658,
         "verification_status": "verified",
         "general_requirements": [
             "Age 18-65 years",
@@ -247,6 +342,8 @@ BLOOD_CENTERS_DB = [
         "facebook": "https://www.facebook.com/scafmc.philippines/",
         "google_query": "St. Catherine of Alexandria Foundation and Medical Center Angeles",
         "city": "Angeles",
+        "lat": 15.132,
+        "lng": 120.58,
         "verification_status": "community",
     },
     {
@@ -259,6 +356,8 @@ BLOOD_CENTERS_DB = [
         "website": "http://www.aufmc.com.ph/",
         "google_query": "Angeles University Foundation Medical Center Blood Bank",
         "city": "Angeles",
+        "lat": 15.1452,
+        "lng": 120.5951,
         "verification_status": "community",
     },
     {
@@ -271,6 +370,8 @@ BLOOD_CENTERS_DB = [
         "website": "https://primedical.com.ph/",
         "google_query": "PRI Medical Center Blood Bank Angeles",
         "city": "Angeles",
+        "lat": 15.1395,
+        "lng": 120.604,
         "verification_status": "community",
     },
     {
@@ -283,6 +384,8 @@ BLOOD_CENTERS_DB = [
         "facebook": "https://www.facebook.com/p/Ospital-Ning-Angeles-Management-100068082903021/",
         "google_query": "Ospital Ning Angeles Multipurpose Cooperative Blood Angeles",
         "city": "Angeles",
+        "lat": 15.139,
+        "lng": 120.61,
         "verification_status": "community",
     },
     {
@@ -292,6 +395,8 @@ BLOOD_CENTERS_DB = [
         "mobile": ["0949-654-8521"],
         "google_query": "Philippine Rehabilitation Center Medical Clinic Angeles",
         "city": "Angeles",
+        "lat": 15.1395,
+        "lng": 120.6035,
         "verification_status": "community",
     },
     {
@@ -302,6 +407,8 @@ BLOOD_CENTERS_DB = [
         "website": "https://www.angelescity.gov.ph/",
         "google_query": "Angeles City Hall",
         "city": "Angeles",
+        "lat": 15.1655,
+        "lng": 120.6083,
         "verification_status": "community",
     },
     {
@@ -314,6 +421,8 @@ BLOOD_CENTERS_DB = [
         "facebook": "https://www.facebook.com/acshmcofficial/",
         "google_query": "Sacred Heart Medical Center Blood Bank Angeles",
         "city": "Angeles",
+        "lat": 15.1425,
+        "lng": 120.5985,
         "verification_status": "community",
     },
     # --- Mabalacat ---
@@ -327,6 +436,8 @@ BLOOD_CENTERS_DB = [
         "website": "https://straphaelmc.com/",
         "google_query": "St. Raphael Foundation and Medical Center Mabalacat",
         "city": "Mabalacat",
+        "lat": 15.183,
+        "lng": 120.587,
         "verification_status": "community",
     },
     {
@@ -337,6 +448,8 @@ BLOOD_CENTERS_DB = [
         "facebook": "https://www.facebook.com/profile.php?id=100090356352203",
         "google_query": "Mabalacat District Hospital",
         "city": "Mabalacat",
+        "lat": 15.1845,
+        "lng": 120.586,
         "verification_status": "community",
     },
     {
@@ -347,6 +460,8 @@ BLOOD_CENTERS_DB = [
         "facebook": "https://www.facebook.com/profile.php?id=100059135710735",
         "google_query": "Mabalacat City Rural Health Unit IV",
         "city": "Mabalacat",
+        "lat": 15.205,
+        "lng": 120.565,
         "verification_status": "community",
     },
     {
@@ -357,6 +472,8 @@ BLOOD_CENTERS_DB = [
         "facebook": "https://www.facebook.com/mchclgu/",
         "google_query": "Mabalacat City Hemodialysis Center",
         "city": "Mabalacat",
+        "lat": 15.215,
+        "lng": 120.6,
         "verification_status": "community",
     },
     {
@@ -368,6 +485,8 @@ BLOOD_CENTERS_DB = [
         "facebook": "https://www.facebook.com/acmc2018/",
         "google_query": "Adult and Child Medical Clinic ACMC Mabalacat",
         "city": "Mabalacat",
+        "lat": 15.171,
+        "lng": 120.595,
         "verification_status": "community",
     },
     {
@@ -379,6 +498,8 @@ BLOOD_CENTERS_DB = [
         "website": "http://www.centrallemedical.com/",
         "google_query": "Centralle Medical Diagnostics and Polyclinic Mabalacat",
         "city": "Mabalacat",
+        "lat": 15.1782,
+        "lng": 120.5883,
         "verification_status": "community",
     },
 ]
@@ -391,6 +512,8 @@ LABORATORIES_DB = [
         "address": "1232 Miranda Street, Pulung Bulu, Angeles City, Pampanga",
         "phone": "+63 45 322 2898",
         "city": "Angeles",
+        "lat": 15.138,
+        "lng": 120.594,
         "google_query": "Bio R9L Diagnostic Center Angeles",
         "verification_status": "community",
     },
@@ -401,6 +524,8 @@ LABORATORIES_DB = [
         "email": "acemedlaboratory@gmail.com",
         "facebook": "https://www.facebook.com/acemedlab/",
         "city": "Angeles",
+        "lat": 15.146,
+        "lng": 120.589,
         "google_query": "Ace Hub Medical Diagnostic Laboratory Angeles",
         "verification_status": "community",
     },
@@ -409,6 +534,8 @@ LABORATORIES_DB = [
         "address": "Block 23, Lot 11, 1st St, Angeles, 2009 Pampanga",
         "phone": "+63 45 458 2614",
         "city": "Angeles",
+        "lat": 15.151,
+        "lng": 120.592,
         "google_query": "MDLab Diagnostic Center Inc Angeles",
         "verification_status": "community",
     },
@@ -420,6 +547,8 @@ LABORATORIES_DB = [
         "email": "bioviediagnostic.medcorp@gmail.com",
         "facebook": "https://www.facebook.com/BioVieDiagnostic/",
         "city": "Mabalacat",
+        "lat": 15.1775,
+        "lng": 120.5885,
         "google_query": "BioVie Diagnostic and Medical Corporation Mabalacat",
         "verification_status": "community",
     },
@@ -430,6 +559,8 @@ LABORATORIES_DB = [
         "facebook": "https://www.facebook.com/biochemph/",
         "website": "https://www.biochem.ph/",
         "city": "Mabalacat",
+        "lat": 15.176,
+        "lng": 120.5905,
         "google_query": "BioChem Healthcare Services Inc Mabalacat",
         "verification_status": "community",
     },
@@ -438,6 +569,8 @@ LABORATORIES_DB = [
         "name": "Medisense Laboratory Center Inc",
         "address": "Plaza Garcia, San Fernando, 2000 Pampanga",
         "city": "San Fernando",
+        "lat": 15.029,
+        "lng": 120.6935,
         "google_query": "Medisense Laboratory Center Inc San Fernando",
         "verification_status": "community",
     },
@@ -446,6 +579,8 @@ LABORATORIES_DB = [
         "address": "442 MacArthur Hwy, San Fernando, Pampanga",
         "mobile": ["0942-833-3854"],
         "city": "San Fernando",
+        "lat": 15.042,
+        "lng": 120.687,
         "google_query": "PDDL Diagnostic Laboratory San Fernando",
         "verification_status": "community",
     },
@@ -454,6 +589,8 @@ LABORATORIES_DB = [
         "address": "Sto Rosario, Abad Santos St., OPM, San Fernando, Pampanga",
         "phone": "+63 45 477 9443",
         "city": "San Fernando",
+        "lat": 15.0325,
+        "lng": 120.688,
         "google_query": "Fhey Laboratory Diagnostic Clinic San Fernando",
         "verification_status": "community",
     },
@@ -463,6 +600,8 @@ LABORATORIES_DB = [
         "phone": "+63 45 455 3413",
         "website": "https://www.rnrdiagnostics.com/",
         "city": "San Fernando",
+        "lat": 15.046,
+        "lng": 120.686,
         "google_query": "R & R Holistic Laboratory and Diagnostic Center San Fernando",
         "verification_status": "community",
     },
@@ -472,6 +611,8 @@ LABORATORIES_DB = [
         "phone": "+63 45 961 1555",
         "facebook": "https://facebook.com/clinitechofficial",
         "city": "San Fernando",
+        "lat": 15.0395,
+        "lng": 120.686,
         "google_query": "Clinitech Medical Laboratory San Fernando",
         "verification_status": "community",
     },
@@ -480,6 +621,8 @@ LABORATORIES_DB = [
         "address": "2MHJ+GPP, Venus Street, San Fernando Subdivision, San Nicolas, San Fernando, 2000 Pampanga",
         "phone": "+63 45 861 3615",
         "city": "San Fernando",
+        "lat": 15.0288,
+        "lng": 120.6818,
         "google_query": "Macapagal Pampanga Doctor's Laboratory San Fernando",
         "verification_status": "community",
     },
@@ -489,6 +632,8 @@ LABORATORIES_DB = [
         "mobile": ["0956-546-6667"],
         "facebook": "https://www.facebook.com/idealhealthdiagnostics",
         "city": "San Fernando",
+        "lat": 15.044,
+        "lng": 120.6865,
         "google_query": "Ideal Health Diagnostics San Fernando",
         "verification_status": "community",
     },
@@ -502,30 +647,40 @@ DIABETES_DOCTORS_DB = [
         "clinic": "Room 228, AUF Medical Center, MacArthur Hwy, Angeles, 2009 Pampanga",
         "mobile": ["0985-833-0379"],
         "city": "Angeles",
+        "lat": 15.1452,
+        "lng": 120.5951,
     },
     {
         "name": "Dr. Edgar S. Nicolas Jr.",
         "clinic": "Room 216, AUF Medical Center, MacArthur Hwy, Angeles, 2009 Pampanga",
         "phone": "+63 45 625 2999",
         "city": "Angeles",
+        "lat": 15.1452,
+        "lng": 120.5951,
     },
     {
         "name": "Carlo Rodrigo S. Carreon, M.D.",
         "clinic": "Room 228, Medical Tower Clinic, AUFMC, MacArthur Highway, Angeles City, Pampanga, 2009",
         "phone": "+63 45 625 2999",
         "city": "Angeles",
+        "lat": 15.1452,
+        "lng": 120.5951,
     },
     {
         "name": "Nines P. Bautista",
         "clinic": "Room 209, AUF Medical Center, Angeles City",
         "mobile": ["0998-308-1425"],
         "city": "Angeles",
+        "lat": 15.1452,
+        "lng": 120.5951,
     },
     {
         "name": "Jose Tranquilino P. Jr., MD",
         "clinic": "Room 213, Angeles Medical Center, 641 Rizal Street, Angeles City, Pampanga",
         "mobile": ["0932-725-3024"],
         "city": "Angeles",
+        "lat": 15.137,
+        "lng": 120.5895,
     },
     {
         "name": "Eric B. Cruz, MD",
@@ -533,12 +688,16 @@ DIABETES_DOCTORS_DB = [
         "mobile": ["0915-626-6013"],
         "website": "https://thefilipinodoctor.com/doctor/eric-cruz/clinic-schedule",
         "city": "Angeles",
+        "lat": 15.1452,
+        "lng": 120.5951,
     },
     {
         "name": "Leonardo Dungca, M.D.",
         "clinic": "Room 218, Angeles Medical Center Inc., Rizal St, Angeles, 2009 Pampanga",
         "mobile": ["0969-646-2687"],
         "city": "Angeles",
+        "lat": 15.137,
+        "lng": 120.5895,
     },
     {
         "name": "Dr. Amiel S. Valerio",
@@ -546,12 +705,16 @@ DIABETES_DOCTORS_DB = [
         "phone": "+63 45 860 5956",
         "website": "https://ph948296-dr-amiel-s-valerio.contact.page/",
         "city": "Angeles",
+        "lat": 15.069,
+        "lng": 120.66,
     },
     {
         "name": "Carlo Rodrigo Carreon, M.D., FPCP, FPSEDM",
         "clinic": "Room 210, Angeles Medical Center",
         "mobile": ["0919-316-9646"],
         "city": "Angeles",
+        "lat": 15.137,
+        "lng": 120.5895,
     },
     # Mabalacat
     {
@@ -559,18 +722,29 @@ DIABETES_DOCTORS_DB = [
         "clinic": "AccuMed Diagnostic Center, MacArthur Hwy, Mabalacat City, Pampanga",
         "mobile": ["0916-362-4447"],
         "city": "Mabalacat",
+        "lat": 15.178,
+        "lng": 120.59,
     },
 ]
 
-# Legacy compatibility - map cities to hospitals
-FACILITIES_DB = {
-    "San Fernando": [h for h in HOSPITALS_DB if h.get("city") == "San Fernando"],
-    "Mabalacat": [h for h in HOSPITALS_DB if h.get("city") == "Mabalacat"],
-    "Guagua": [h for h in HOSPITALS_DB if h.get("city") == "Guagua"],
-    # Fallback uses first 3 hospitals
-    "Angeles": HOSPITALS_DB[:3],
+# Kiosk Deployments - one entry per installed kiosk (kiosk_id -> location)
+KIOSK_LOCATIONS = {
+    "auf-angeles": {
+        "name": "Angeles University Foundation",
+        "city": "Angeles",
+        "lat": 15.1452,
+        "lng": 120.5951,
+    },
 }
 
+# Nearest-Facility Lookup
+NEAREST_FACILITIES_K = 3  # Labs and blood centers returned per kiosk location
+PROXIMITY_SCALE_KM = 10.0  # Distance at which the proximity score halves
+
+# Reference Directory (GET /api/directory)
+DIRECTORY_MAX_AGE_SECONDS = 3600  # Latest version; revalidated by ETag after
+DIRECTORY_VERSIONED_MAX_AGE_SECONDS = 31536000  # /directory/{version} never changes
+
 
 # Risk Level Thresholds
 RISK_THRESHOLD_LOW = 0.3
@@ -594,6 +768,18 @@ MAX_DIABETES_RISK_FOR_DONATION = 0.7  # Allow moderate risk, not high
 MAX_IMAGE_SIZE_MB = 10
 MAX_IMAGE_SIZE_BYTES = MAX_IMAGE_SIZE_MB * 1024 * 1024
 ALLOWED_IMAGE_FORMATS = ["JPEG", "JPG", "PNG", "BMP"]
+ALLOWED_IMAGE_MODES = ["1", "L", "LA", "P", "RGB", "RGBA", "I;16"]
+MAX_IMAGE_DIMENSION = 8192  # px per side; header check before pixel decode
+
+# Fingerprint Quality Gate (computed on the 128x128 grayscale tensor, 0-1 scale)
+QUALITY_BLOCK_SIZE = 16  # px; blocks for coverage and ridge orientation
+QUALITY_FOREGROUND_STD = 0.05  # block intensity std that counts as ridges
+QUALITY_MIN_SHARPNESS = 0.002  # Laplacian variance
+QUALITY_MIN_CONTRAST = 0.2  # 5th-95th percentile intensity spread
+QUALITY_MIN_COVERAGE = 0.5  # fraction of blocks with ridges
+QUALITY_MIN_COHERENCE = 0.5  # mean ridge-orientation coherence in foreground
+BULK_DECODE_WORKERS = 4  # Image decode threads (shared ImageDecoder pool)
+MODEL_INPUT_SIZE = (128, 128)  # Pattern CNN and blood group embedding input
 
 # Gemini AI Configuration
 GEMINI_MODEL = "gemini-1.5-flash"
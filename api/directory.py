@@ -0,0 +1,146 @@
+"""Versioned reference directory of the facility catalogs.
+
+HOSPITALS_DB, LABORATORIES_DB, BLOOD_CENTERS_DB and DIABETES_DOCTORS_DB are
+serialized once into compact JSON (and a gzip copy) with a stable id per
+entry. The version is a hash of that content, so clients can cache it for
+as long as it does not change, and analyze results only carry
+``{"id", "distance_km"}`` references plus ``directory_version``.
+"""
+
+import gzip
+import hashlib
+import json
+import re
+import threading
+from typing import Dict, List, Optional
+
+from .constants import (
+    BLOOD_CENTERS_DB,
+    DIABETES_DOCTORS_DB,
+    HOSPITALS_DB,
+    LABORATORIES_DB,
+)
+from .facility_recommender import get_facility_recommender
+from .geo_index import KIND_BLOOD_CENTER, KIND_DOCTOR, KIND_HOSPITAL, KIND_LABORATORY
+
+# Catalog kind -> key in the directory document
+SECTIONS = {
+    KIND_HOSPITAL: "hospitals",
+    KIND_LABORATORY: "laboratories",
+    KIND_BLOOD_CENTER: "blood_centers",
+    KIND_DOCTOR: "diabetes_doctors",
+}
+
+
+def _slug(text: Optional[str]) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", (text or "").lower()).strip("-")
+
+
+def _key(entry: Dict) -> tuple:
+    return entry.get("name"), entry.get("city"), entry.get("clinic")
+
+
+class Directory:
+    """Catalogs with stable ids, pre-serialized for the /directory endpoint."""
+
+    def __init__(
+        self,
+        catalogs: Dict[str, List[Dict]],
+        doctors_at: Optional[Dict[str, List[Dict]]] = None,
+    ):
+        """
+        Args:
+            catalogs: Entries by kind (see SECTIONS)
+            doctors_at: Hospital name -> doctor entries practising there
+        """
+        doctors_at = doctors_at or {}
+        self._ids: Dict[str, Dict[tuple, str]] = {}
+        document = {}
+        for kind, entries in catalogs.items():
+            ids = self._assign_ids(kind, entries)
+            self._ids[kind] = {_key(e): i for e, i in zip(entries, ids)}
+            document[SECTIONS[kind]] = [{"id": i, **e} for e, i in zip(entries, ids)]
+
+        for hospital in document.get(SECTIONS[KIND_HOSPITAL], []):
+            hospital["doctor_ids"] = [
+                self.id_of(KIND_DOCTOR, doctor)
+                for doctor in doctors_at.get(hospital["name"], [])
+            ]
+
+        content = json.dumps(document, sort_keys=True, separators=(",", ":"))
+        self.version = hashlib.sha256(content.encode()).hexdigest()[:16]
+        document["version"] = self.version
+        self.body = json.dumps(
+            document, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+        ).encode("utf-8")
+        self.gzip_body = gzip.compress(self.body, compresslevel=9, mtime=0)
+        # Strong validators differ per content-coding
+        self.etag = f'"{self.version}"'
+        self.gzip_etag = f'"{self.version}-gzip"'
+
+    @staticmethod
+    def _assign_ids(kind: str, entries: List[Dict]) -> List[str]:
+        """``kind:name-slug``; the city (then a counter) disambiguates repeats."""
+        names = [_slug(e.get("name")) for e in entries]
+        ids = [
+            f"{kind}:{name}"
+            if names.count(name) == 1
+            else f"{kind}:{name}-{_slug(e.get('city'))}"
+            for name, e in zip(names, entries)
+        ]
+        seen: Dict[str, int] = {}
+        for i, entry_id in enumerate(ids):
+            seen[entry_id] = seen.get(entry_id, 0) + 1
+            if seen[entry_id] > 1:
+                ids[i] = f"{entry_id}-{seen[entry_id]}"
+        return ids
+
+    def id_of(self, kind: str, entry: Dict) -> Optional[str]:
+        """Directory id of a catalog entry (or a copy of one)."""
+        return self._ids.get(kind, {}).get(_key(entry))
+
+    def refs(self, kind: str, entries: List[Dict]) -> List[Dict]:
+        """``{"id", "distance_km"}`` references for entries of one catalog."""
+        refs = []
+        for entry in entries:
+            ref = {"id": self.id_of(kind, entry)}
+            if "distance_km" in entry:
+                ref["distance_km"] = entry["distance_km"]
+            refs.append(ref)
+        return refs
+
+    def etag_matches(self, if_none_match: Optional[str]) -> bool:
+        """Whether an If-None-Match header names this version (weak compare)."""
+        if not if_none_match:
+            return False
+        tags = {t.strip() for t in if_none_match.split(",")}
+        tags = {t[2:] if t.startswith("W/") else t for t in tags}
+        return "*" in tags or bool(tags & {self.etag, self.gzip_etag})
+
+
+_directory = None
+_directory_lock = threading.Lock()
+
+
+def get_directory() -> Directory:
+    """Directory over the built-in catalogs (built on first use)."""
+    global _directory
+    with _directory_lock:
+        if _directory is None:
+            recommender = get_facility_recommender()
+            doctors_at = {
+                recommender.records[rid]["entry"]["name"]: [
+                    recommender.records[d]["entry"] for d in doctor_ids
+                ]
+                for rid, doctor_ids in recommender.doctors_at.items()
+            }
+            _directory = Directory(
+                {
+                    KIND_HOSPITAL: HOSPITALS_DB,
+                    KIND_LABORATORY: LABORATORIES_DB,
+                    KIND_BLOOD_CENTER: BLOOD_CENTERS_DB,
+                    KIND_DOCTOR: DIABETES_DOCTORS_DB,
+                },
+                doctors_at,
+            )
+        return _directory
@@ -0,0 +1,78 @@
+"""Reference directory endpoints.
+
+Serves the pre-serialized facility catalogs from ``directory``. The latest
+version is revalidated with its ETag; a versioned URL is immutable.
+"""
+
+from django.http import HttpResponse, JsonResponse
+from ninja import Router
+
+from .constants import DIRECTORY_MAX_AGE_SECONDS, DIRECTORY_VERSIONED_MAX_AGE_SECONDS
+from .directory import get_directory
+
+router = Router()
+
+
+def _quality(params: list) -> float:
+    """q-value from an Accept-Encoding entry's parameters (default 1)."""
+    for param in params:
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "q":
+            try:
+                return float(value)
+            except ValueError:
+                return 0.0
+    return 1.0
+
+
+def _accepts_gzip(request) -> bool:
+    """True unless gzip is absent from Accept-Encoding or refused with q=0."""
+    encodings = request.headers.get("Accept-Encoding", "")
+    for part in encodings.split(","):
+        coding, *params = part.split(";")
+        if coding.strip().lower() == "gzip":
+            return _quality(params) > 0
+    return False
+
+
+def _directory_response(request, cache_control: str) -> HttpResponse:
+    directory = get_directory()
+    gzipped = _accepts_gzip(request)
+    etag = directory.gzip_etag if gzipped else directory.etag
+
+    if directory.etag_matches(request.headers.get("If-None-Match")):
+        response = HttpResponse(status=304)
+    else:
+        response = HttpResponse(
+            directory.gzip_body if gzipped else directory.body,
+            content_type="application/json",
+        )
+        if gzipped:
+            response["Content-Encoding"] = "gzip"
+    response["ETag"] = etag
+    response["Cache-Control"] = cache_control
+    response["Vary"] = "Accept-Encoding"
+    response["X-Directory-Version"] = directory.version
+    return response
+
+
+@router.get("", tags=["Directory"])
+def get_latest_directory(request):
+    """Facility catalogs at the current version."""
+    return _directory_response(
+        request, f"private, max-age={DIRECTORY_MAX_AGE_SECONDS}, must-revalidate"
+    )
+
+
+@router.get("/{version}", tags=["Directory"])
+def get_directory_version(request, version: str):
+    """Facility catalogs at a specific version (immutable)."""
+    current = get_directory().version
+    if version != current:
+        return JsonResponse(
+            {"error": "Unknown directory version", "version": current}, status=404
+        )
+    return _directory_response(
+        request,
+        f"private, max-age={DIRECTORY_VERSIONED_MAX_AGE_SECONDS}, immutable",
+    )
@@ -131,6 +131,20 @@ class NoValidImagesError(ImageProcessingError):
         )
 
 
+class LowQualityFingerprintError(ImageProcessingError):
+    """Raised when a scan fails the quality gate and rejection was requested."""
+
+    def __init__(self, finger_name: str, quality: dict):
+        super().__init__(
+            message=(
+                f"Fingerprint {finger_name} failed quality checks: "
+                f"{', '.join(quality['issues'])}"
+            ),
+            status_code=422,
+            details={"finger_name": finger_name, "quality": quality},
+        )
+
+
 # Storage Exceptions
 class StorageError(BaseAPIException):
     """Base class for storage errors."""
@@ -171,6 +185,17 @@ class StorageSaveError(StorageError):
         )
 
 
+class FingerprintBlobError(StorageError):
+    """Raised when an encrypted fingerprint blob is missing or corrupt."""
+
+    def __init__(self, reason: str):
+        super().__init__(
+            message=f"Fingerprint blob error: {reason}",
+            status_code=500,
+            details={"reason": reason},
+        )
+
+
 # Validation Exceptions
 class ValidationError(BaseAPIException):
     """Base class for validation errors."""
@@ -211,6 +236,23 @@ class InvalidGenderError(ValidationError):
         )
 
 
+class InvalidFingerNameError(ValidationError):
+    """Raised when a finger name is not one of FINGER_NAMES."""
+
+    def __init__(self, finger_name: str | None):
+        super().__init__(
+            field="finger_name", message=f"Unknown finger: '{finger_name}'"
+        )
+        self.status_code = 422
+
+
+class UnknownKioskError(ValidationError):
+    """Raised when a kiosk id is not a registered deployment."""
+
+    def __init__(self, kiosk_id: str):
+        super().__init__(field="kiosk_id", message=f"Unknown kiosk: '{kiosk_id}'")
+
+
 # External Service Exceptions
 class ExternalServiceError(BaseAPIException):
     """Base class for external service errors."""
@@ -244,6 +286,43 @@ class QuotaExceededError(ExternalServiceError):
         )
 
 
+class CircuitOpenError(ExternalServiceError):
+    """Raised when a service's circuit breaker is refusing calls."""
+
+    def __init__(self, service: str, retry_after: int | None = None):
+        message = f"{service} temporarily unavailable"
+        if retry_after:
+            message += f". Retry after {retry_after} seconds"
+
+        super().__init__(
+            message=message,
+            status_code=503,
+            details={"service": service, "retry_after": retry_after},
+        )
+
+
+class LatencyBudgetExceededError(ExternalServiceError):
+    """Raised when a call to an external service runs out of time."""
+
+    def __init__(self, service: str, budget_seconds: float):
+        super().__init__(
+            message=f"{service} did not respond within {budget_seconds:g} seconds",
+            status_code=504,
+            details={"service": service, "budget_seconds": budget_seconds},
+        )
+
+
+class LLMUnavailableError(ExternalServiceError):
+    """Raised when no LLM provider can take a request."""
+
+    def __init__(self, providers: list[str]):
+        super().__init__(
+            message="No LLM provider available",
+            status_code=503,
+            details={"providers": providers},
+        )
+
+
 # Rate Limiting
 class RateLimitExceeded(BaseAPIException):
     """Raised when rate limit is exceeded."""
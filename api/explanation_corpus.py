@@ -0,0 +1,190 @@
+"""Precomputed patient explanations for the discrete input space.
+
+The patient explanation depends only on the discretized inputs used for the
+LLM cache key: risk level, Arc/Loop/Whorl counts over ten fingers (66
+combinations), predicted blood group, gender and WHO BMI band. The offline
+job in ``build_explanation_corpus.py`` walks that space and generates one
+explanation per point into a gzipped JSON corpus. At analyze time the corpus
+is a dict lookup, so the LLM is only called for inputs it does not cover.
+
+A corpus records the prompt version it was generated with; a corpus built
+for another prompt version is ignored rather than served.
+"""
+
+import gzip
+import itertools
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+from .cache_service import patient_explanation_inputs
+from .constants import (
+    BLOOD_GROUPS,
+    LLM_CACHE_KEY_VERSION,
+    PATTERN_CLASSES,
+    REQUIRED_FINGERPRINTS_COUNT,
+)
+
+logger = logging.getLogger(__name__)
+
+CORPUS_FORMAT_VERSION = 1
+
+RISK_LEVELS = ("Low", "Moderate", "High")
+# Any BMI inside the band; only its bmi_bucket() reaches the prompt
+BMI_BAND_VALUES = {
+    "underweight": 17.5,
+    "normal": 22.0,
+    "overweight": 27.5,
+    "obese": 32.5,
+}
+GENDERS = ("male", "female", "other", "prefer_not_say")
+
+
+def corpus_key(analysis_results: Dict, demographics: Dict) -> str:
+    """Corpus key: the discretized explanation inputs in a fixed order."""
+    inputs = patient_explanation_inputs(analysis_results, demographics)
+    return "|".join(str(inputs[name]) for name in sorted(inputs))
+
+
+def _pattern_counts() -> Iterator[Dict[str, int]]:
+    """Every Arc/Loop/Whorl split of the ten fingers."""
+    total = REQUIRED_FINGERPRINTS_COUNT
+    for arc in range(total + 1):
+        for loop in range(total - arc + 1):
+            yield {"Arc": arc, "Loop": loop, "Whorl": total - arc - loop}
+
+
+def enumerate_corpus_inputs() -> Iterator[Tuple[Dict, Dict]]:
+    """Yield one (analysis_results, demographics) per corpus key.
+
+    Only the keyed fields are filled in: the prompt is built from the key
+    alone, so a corpus entry is the same text a live patient would get.
+    """
+    for risk_level, counts, blood_group, gender, bmi in itertools.product(
+        RISK_LEVELS,
+        list(_pattern_counts()),
+        BLOOD_GROUPS,
+        GENDERS,
+        BMI_BAND_VALUES.values(),
+    ):
+        analysis_results = {
+            "diabetes_risk_level": risk_level,
+            "predicted_blood_group": blood_group,
+            "pattern_counts": {name: counts[name] for name in PATTERN_CLASSES},
+            "bmi": bmi,
+        }
+        demographics = {"gender": gender}
+        yield analysis_results, demographics
+
+
+class ExplanationCorpus:
+    """In-memory corpus of explanation text keyed by corpus_key()."""
+
+    def __init__(
+        self,
+        entries: Optional[Dict[str, str]] = None,
+        prompt_version: int = LLM_CACHE_KEY_VERSION,
+    ):
+        self.entries: Dict[str, str] = dict(entries or {})
+        self.prompt_version = prompt_version
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.entries
+
+    def lookup(self, analysis_results: Dict, demographics: Dict) -> Optional[str]:
+        """Return the precomputed explanation for these inputs, or None."""
+        text = self.entries.get(corpus_key(analysis_results, demographics))
+        with self._lock:
+            if text is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        return text
+
+    def add(self, analysis_results: Dict, demographics: Dict, text: str) -> None:
+        self.entries[corpus_key(analysis_results, demographics)] = text
+
+    @classmethod
+    def load(cls, path: Path) -> "ExplanationCorpus":
+        """Load a corpus file; missing or stale files give an empty corpus."""
+        path = Path(path)
+        if not path.exists():
+            logger.info(f"📚 No explanation corpus at {path}")
+            return cls()
+
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"📚 Could not read explanation corpus {path}: {e}")
+            return cls()
+
+        if data.get("prompt_version") != LLM_CACHE_KEY_VERSION:
+            logger.warning(
+                f"📚 Ignoring explanation corpus for prompt version "
+                f"{data.get('prompt_version')} (current {LLM_CACHE_KEY_VERSION})"
+            )
+            return cls()
+
+        corpus = cls(data.get("entries", {}), data["prompt_version"])
+        logger.info(f"📚 Loaded {len(corpus)} precomputed explanations")
+        return corpus
+
+    def save(self, path: Path) -> None:
+        """Write the corpus atomically."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "format_version": CORPUS_FORMAT_VERSION,
+            "prompt_version": self.prompt_version,
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "entries": self.entries,
+        }
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            hits, misses = self._hits, self._misses
+        lookups = hits + misses
+        return {
+            "entries": len(self.entries),
+            "prompt_version": self.prompt_version,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def default_corpus_path() -> Path:
+    """EXPLANATION_CORPUS_PATH, else a versioned file in the project root."""
+    path = os.getenv("EXPLANATION_CORPUS_PATH")
+    if path:
+        return Path(path)
+    return (
+        Path(__file__).resolve().parent.parent
+        / f"explanation_corpus_v{LLM_CACHE_KEY_VERSION}.json.gz"
+    )
+
+
+_corpus = None
+
+
+def get_explanation_corpus() -> ExplanationCorpus:
+    """Singleton pattern for the explanation corpus."""
+    global _corpus
+    if _corpus is None:
+        _corpus = ExplanationCorpus.load(default_corpus_path())
+    return _corpus
@@ -0,0 +1,205 @@
+"""Background generation of patient explanations.
+
+``analyze`` stores the ML results straight away and hands the LLM call to a
+small executor here, so a request thread is never parked in the Gemini rate
+limiter or a 429 back-off. The LLM router (Gemini, hedged with OpenAI) is
+called in streaming mode: sanitized chunks are appended to the job as they
+arrive so the SSE endpoint can relay them to the kiosk. When a job finishes
+it writes the final text into the session predictions; callers can poll the
+job, wait on it with a deadline and fall back to the template explanation,
+or follow its chunks.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional
+
+from .constants import EXPLANATION_WORKERS, SESSION_TIMEOUT_HOURS
+from .security_utils import StreamingSanitizer, sanitize_ai_content
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = "pending"
+STATUS_READY = "ready"
+STATUS_FAILED = "failed"
+
+
+def fallback_explanation(analysis_results: Dict, demographics: Dict) -> str:
+    """Template explanation used when the LLM is unavailable or too slow.
+
+    Sanitized like LLM output, since the template interpolates request data.
+    """
+    from .gemini_service import GeminiService
+
+    return sanitize_ai_content(
+        GeminiService._fallback_comprehensive_explanation(
+            analysis_results, demographics
+        )
+    )
+
+
+class ExplanationJob:
+    """One session's explanation request and its outcome."""
+
+    def __init__(self, session_id: str, analysis_results: Dict, demographics: Dict):
+        self.session_id = session_id
+        self.analysis_results = analysis_results
+        self.demographics = demographics
+        self.status = STATUS_PENDING
+        self.text: Optional[str] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.done = threading.Event()
+        self.chunks: List[str] = []
+        self._cond = threading.Condition()
+
+    def append(self, text: str) -> None:
+        """Publish a sanitized chunk to followers."""
+        with self._cond:
+            self.chunks.append(text)
+            self._cond.notify_all()
+
+    def finish(self) -> None:
+        with self._cond:
+            self.done.set()
+            self._cond.notify_all()
+
+    def follow(self, timeout: float) -> Iterator[str]:
+        """Yield chunks from the start as they arrive, until the job is done.
+
+        Stops early, without raising, once ``timeout`` seconds have passed.
+        """
+        deadline = time.monotonic() + timeout
+        index = 0
+        while True:
+            with self._cond:
+                while index == len(self.chunks) and not self.done.is_set():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return
+                    self._cond.wait(remaining)
+                new = self.chunks[index:]
+                finished = self.done.is_set()
+            index += len(new)
+            yield from new
+            if finished:
+                return
+
+    def to_dict(self) -> dict:
+        return {
+            "session_id": self.session_id,
+            "status": self.status,
+            "explanation": self.text,
+            "error": self.error,
+        }
+
+
+class ExplanationService:
+    """Runs explanation jobs on a bounded thread pool, one job per session."""
+
+    def __init__(self, max_workers: int = EXPLANATION_WORKERS):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="explain"
+        )
+        self._jobs: Dict[str, ExplanationJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(
+        self, session_id: str, analysis_results: Dict, demographics: Dict
+    ) -> ExplanationJob:
+        """Queue an explanation; a job already pending for the session is reused."""
+        with self._lock:
+            self._prune()
+            job = self._jobs.get(session_id)
+            if job is not None and job.status == STATUS_PENDING:
+                return job
+            job = ExplanationJob(session_id, analysis_results, demographics)
+            self._jobs[session_id] = job
+
+        self._executor.submit(self._run, job)
+        return job
+
+    def get_job(self, session_id: str) -> Optional[ExplanationJob]:
+        with self._lock:
+            return self._jobs.get(session_id)
+
+    def wait(self, session_id: str, timeout: float) -> Optional[str]:
+        """Block up to ``timeout`` seconds for the text; None if not ready."""
+        job = self.get_job(session_id)
+        if job is None or not job.done.wait(timeout):
+            return None
+        return job.text
+
+    def discard(self, session_id: str) -> None:
+        with self._lock:
+            self._jobs.pop(session_id, None)
+
+    def _prune(self) -> None:
+        """Drop finished jobs older than a session lifetime (caller holds _lock)."""
+        cutoff = time.time() - SESSION_TIMEOUT_HOURS * 3600
+        for session_id in [
+            sid
+            for sid, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]:
+            del self._jobs[session_id]
+
+    def _generate(self, job: ExplanationJob) -> str:
+        from .llm_router import get_llm_router
+
+        # Sanitize AI-generated content to prevent XSS, chunk by chunk
+        sanitizer = StreamingSanitizer()
+        for piece in get_llm_router().stream_patient_explanation(
+            job.analysis_results, job.demographics
+        ):
+            text = sanitizer.feed(piece)
+            if text:
+                job.append(text)
+        tail = sanitizer.flush()
+        if tail:
+            job.append(tail)
+        text = "".join(job.chunks).strip()
+        if not text:
+            raise ValueError("LLM returned an empty explanation")
+        return text
+
+    def _run(self, job: ExplanationJob) -> None:
+        from .session_manager import get_session_manager
+
+        # Waiters block on the job, so it is finished even if recording fails
+        try:
+            try:
+                job.text = self._generate(job)
+                job.status = STATUS_READY
+            except Exception as e:
+                logger.error(f"Explanation failed for session {job.session_id}: {e}")
+                job.text = fallback_explanation(job.analysis_results, job.demographics)
+                job.error = str(e)
+                job.status = STATUS_FAILED
+            finally:
+                job.finished_at = time.time()
+
+            get_session_manager().update_predictions(
+                job.session_id,
+                {"explanation": job.text, "explanation_status": job.status},
+            )
+        finally:
+            job.finish()
+        logger.info(
+            f"🤖 Explanation {job.status} for session {job.session_id} "
+            f"in {job.finished_at - job.created_at:.1f}s"
+        )
+
+
+_explanation_service = None
+
+
+def get_explanation_service() -> ExplanationService:
+    """Singleton pattern for the explanation service."""
+    global _explanation_service
+    if _explanation_service is None:
+        _explanation_service = ExplanationService()
+    return _explanation_service
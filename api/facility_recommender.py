@@ -0,0 +1,336 @@
+"""Deterministic facility recommendations from the verified directories.
+
+Replaces asking Gemini to pick facilities out of a prompt-serialized
+facility list. ``FacilityRecommender`` flattens HOSPITALS_DB, LABORATORIES_DB
+and DIABETES_DOCTORS_DB once into records with derived attributes (category,
+specialization keywords, emergency capability, diabetes doctors practising
+on site) and indexes them by kind, city, category, specialization and
+emergency capability. ``recommend`` scores candidates for a risk level and
+an optional kiosk city and location (distances via ``geo_index``); results
+are memoized, so repeat calls are dict lookups.
+
+Only directory data is returned; nothing is invented.
+"""
+
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .constants import (
+    DIABETES_DOCTORS_DB,
+    HOSPITALS_DB,
+    LABORATORIES_DB,
+    PROXIMITY_SCALE_KM,
+)
+from .geo_index import (
+    KIND_DOCTOR,
+    KIND_HOSPITAL,
+    KIND_LABORATORY,
+    coordinates,
+    haversine_km,
+)
+
+# Facility category -> level of care (0-1)
+CATEGORY_LEVELS = {
+    "general_hospital": 1.0,
+    "medical_center": 0.8,
+    "hospital": 0.6,
+    "clinic": 0.2,
+    "laboratory": 0.0,
+    "doctor": 0.0,
+}
+
+# Specialization -> tokens that mark it in a name, type or clinic address
+SPECIALTY_KEYWORDS = {
+    "diabetes": {"diabetes", "diabetic", "endocrinology", "endocrine", "diaserv"},
+    "diagnostics": {"diagnostic", "diagnostics", "laboratory", "lab"},
+    "emergency": {"er", "emergency", "24/7"},
+    "ent": {"ent"},
+}
+OFF_SPECIALTIES = {"ent"}  # Not relevant to a diabetes screening
+
+# Attribute weights per risk level; attributes are scored 0-1
+RANKING_WEIGHTS = {
+    "high": {
+        "emergency": 4.0,
+        "diabetes_care": 3.0,
+        "level_of_care": 2.0,
+        "same_city": 2.5,
+        "proximity": 3.0,
+        "diagnostics": 0.5,
+        "verified": 1.0,
+    },
+    "moderate": {
+        "emergency": 1.0,
+        "diabetes_care": 4.0,
+        "level_of_care": 1.0,
+        "same_city": 2.5,
+        "proximity": 3.0,
+        "diagnostics": 1.5,
+        "verified": 1.0,
+    },
+    "low": {
+        "emergency": 0.0,
+        "diabetes_care": 1.5,
+        "level_of_care": 0.5,
+        "same_city": 3.0,
+        "proximity": 4.0,
+        "diagnostics": 1.0,
+        "verified": 1.0,
+    },
+}
+OFF_SPECIALTY_PENALTY = 3.0
+CITY_REPEAT_PENALTY = 1.0  # Spreads picks across cities with no kiosk location
+MEMO_MAX_ENTRIES = 1024  # Explicit coordinates make the key space open-ended
+
+
+def normalize_city(city: Optional[str]) -> Optional[str]:
+    """'City of San Fernando' / 'Angeles City' -> 'san fernando' / 'angeles'."""
+    if not city:
+        return None
+    name = re.sub(r"\b(city of|city)\b", " ", city.lower())
+    return " ".join(name.split()) or None
+
+
+def _tokens(*texts: Optional[str]) -> set:
+    words = set()
+    for text in texts:
+        if text:
+            words.update(re.findall(r"[a-z0-9/]+", text.lower()))
+    return words
+
+
+def _category(facility_type: str) -> str:
+    text = facility_type.lower()
+    if "general hospital" in text:
+        return "general_hospital"
+    if "medical center" in text:
+        return "medical_center"
+    if "hospital" in text:
+        return "hospital"
+    return "clinic"
+
+
+def _aliases(name: str) -> List[str]:
+    """Ways a doctor's clinic address may refer to a hospital."""
+    aliases = [name.lower()]
+    words = [w for w in re.findall(r"[A-Za-z]+", name) if w[0].isupper()]
+    if len(words) >= 3:
+        aliases.append("".join(w[0] for w in words).lower())  # AUFMC
+        if name.endswith("Medical Center"):
+            prefix = "".join(w[0] for w in words[:-2])
+            aliases.append(f"{prefix} medical center".lower())  # AUF Medical Center
+    return aliases
+
+
+class FacilityRecommender:
+    """Indexed facility directory with a risk-aware ranking."""
+
+    def __init__(self, hospitals=None, laboratories=None, doctors=None):
+        hospitals = HOSPITALS_DB if hospitals is None else hospitals
+        laboratories = LABORATORIES_DB if laboratories is None else laboratories
+        doctors = DIABETES_DOCTORS_DB if doctors is None else doctors
+
+        self.records: List[Dict] = []
+        self.by_kind: Dict[str, List[int]] = {}
+        self.by_city: Dict[str, List[int]] = {}
+        self.by_category: Dict[str, List[int]] = {}
+        self.by_specialty: Dict[str, List[int]] = {}
+        self.emergency: set = set()
+        self.doctors_at: Dict[int, List[int]] = {}
+
+        for entry in hospitals:
+            self._add(
+                entry, KIND_HOSPITAL, _category(entry.get("type", "")), entry["type"]
+            )
+        for entry in laboratories:
+            self._add(entry, KIND_LABORATORY, "laboratory", "diagnostic laboratory")
+        for entry in doctors:
+            self._add(entry, KIND_DOCTOR, "doctor", "diabetes", entry.get("clinic"))
+        self._link_doctors()
+        self._lat, self._lng = coordinates([r["entry"] for r in self.records])
+
+        self._memo: Dict[tuple, List[Dict]] = {}
+        self._memo_lock = threading.Lock()
+
+    def _add(self, entry: Dict, kind: str, category: str, *texts) -> None:
+        rid = len(self.records)
+        specialties = {
+            specialty
+            for specialty, words in SPECIALTY_KEYWORDS.items()
+            if words & _tokens(entry.get("name"), *texts)
+        }
+        if entry.get("emergency"):
+            specialties.add("emergency")
+        city = normalize_city(entry.get("city"))
+
+        self.records.append(
+            {
+                "kind": kind,
+                "city": city,
+                "category": category,
+                "specialties": frozenset(specialties),
+                "verified": entry.get("verification_status") == "verified",
+                "entry": entry,
+            }
+        )
+        self.by_kind.setdefault(kind, []).append(rid)
+        self.by_city.setdefault(city, []).append(rid)
+        self.by_category.setdefault(category, []).append(rid)
+        for specialty in specialties:
+            self.by_specialty.setdefault(specialty, []).append(rid)
+        if "emergency" in specialties:
+            self.emergency.add(rid)
+
+    def _link_doctors(self) -> None:
+        """Attach each diabetes doctor to the hospital their clinic is in."""
+        hospitals = [
+            (rid, _aliases(self.records[rid]["entry"]["name"]))
+            for rid in self.by_kind.get(KIND_HOSPITAL, [])
+        ]
+        for doctor_id in self.by_kind.get(KIND_DOCTOR, []):
+            clinic = (self.records[doctor_id]["entry"].get("clinic") or "").lower()
+            for rid, aliases in hospitals:
+                if any(re.search(rf"\b{re.escape(a)}\b", clinic) for a in aliases):
+                    self.doctors_at.setdefault(rid, []).append(doctor_id)
+                    break
+
+    def _features(
+        self, rid: int, city: Optional[str], distance_km: Optional[float]
+    ) -> Dict[str, float]:
+        record = self.records[rid]
+        level = CATEGORY_LEVELS[record["category"]]
+        specialties = record["specialties"]
+        if rid in self.emergency:
+            emergency = 1.0
+        else:
+            emergency = 0.5 if level >= CATEGORY_LEVELS["hospital"] else 0.0
+        doctors_on_site = len(self.doctors_at.get(rid, []))
+        diabetes_care = min(
+            1.0, doctors_on_site / 2 + (0.5 if "diabetes" in specialties else 0.0)
+        )
+        labs_nearby = sum(
+            1
+            for other in self.by_city.get(record["city"], [])
+            if self.records[other]["kind"] == KIND_LABORATORY
+        )
+        diagnostics = 1.0 if "diagnostics" in specialties else min(1.0, labs_nearby / 3)
+        return {
+            "emergency": emergency,
+            "diabetes_care": diabetes_care,
+            "level_of_care": level,
+            "same_city": 1.0 if city is not None and record["city"] == city else 0.0,
+            # Halves every PROXIMITY_SCALE_KM; unknown distance scores 0
+            "proximity": (
+                1.0 / (1.0 + distance_km / PROXIMITY_SCALE_KM)
+                if distance_km is not None and np.isfinite(distance_km)
+                else 0.0
+            ),
+            "diagnostics": diagnostics,
+            "verified": 1.0 if record["verified"] else 0.0,
+        }
+
+    def score(
+        self,
+        rid: int,
+        risk_level: str,
+        city: Optional[str] = None,
+        distance_km: Optional[float] = None,
+    ) -> float:
+        """Ranking score of record ``rid`` for a patient at ``risk_level``."""
+        weights = RANKING_WEIGHTS.get(risk_level.lower(), RANKING_WEIGHTS["moderate"])
+        features = self._features(rid, normalize_city(city), distance_km)
+        total = sum(weights[name] * value for name, value in features.items())
+        if self.records[rid]["specialties"] & OFF_SPECIALTIES:
+            total -= OFF_SPECIALTY_PENALTY
+        return total
+
+    def _result(self, rid: int, distances: Optional[np.ndarray]) -> Dict:
+        entry = self.records[rid]["entry"]
+        result = dict(entry)
+        if self.records[rid]["kind"] == KIND_HOSPITAL:
+            result["doctors"] = [
+                self.records[d]["entry"]["name"] for d in self.doctors_at.get(rid, [])
+            ]
+        if distances is not None and np.isfinite(distances[rid]):
+            result["distance_km"] = round(float(distances[rid]), 1)
+        return result if len(result) > len(entry) else entry
+
+    def _rank(
+        self,
+        risk_level: str,
+        city: Optional[str],
+        location: Optional[Tuple[float, float]],
+        limit: int,
+        kind: str,
+    ) -> List[Dict]:
+        distances = haversine_km(self._lat, self._lng, *location) if location else None
+        scores = {
+            rid: self.score(
+                rid,
+                risk_level,
+                city,
+                float(distances[rid]) if distances is not None else None,
+            )
+            for rid in self.by_kind.get(kind, [])
+        }
+        spread = city is None and location is None
+        picked: List[int] = []
+        cities_used: Dict[Optional[str], int] = {}
+        while scores and len(picked) < limit:
+
+            def adjusted(rid):
+                if not spread:
+                    return scores[rid]
+                repeats = cities_used.get(self.records[rid]["city"], 0)
+                return scores[rid] - CITY_REPEAT_PENALTY * repeats
+
+            # Highest score first; name breaks ties so output is stable
+            best = min(
+                scores,
+                key=lambda rid: (-adjusted(rid), self.records[rid]["entry"]["name"]),
+            )
+            picked.append(best)
+            del scores[best]
+            best_city = self.records[best]["city"]
+            cities_used[best_city] = cities_used.get(best_city, 0) + 1
+        return [self._result(rid, distances) for rid in picked]
+
+    def recommend(
+        self,
+        risk_level: str,
+        city: Optional[str] = None,
+        limit: int = 3,
+        kind: str = KIND_HOSPITAL,
+        location: Optional[Tuple[float, float]] = None,
+    ) -> List[Dict]:
+        """Top ``limit`` facilities of ``kind`` for a patient at ``risk_level``.
+
+        ``city`` and ``location`` (lat, lng) describe the kiosk, if known;
+        local and nearby facilities rank higher and results carry
+        ``distance_km``. Without either, picks are spread across cities. The
+        returned dicts are shared; do not modify them.
+        """
+        if location is not None:
+            location = (round(location[0], 3), round(location[1], 3))  # ~100 m
+        key = (risk_level.lower(), normalize_city(city), location, limit, kind)
+        result = self._memo.get(key)
+        if result is None:
+            result = self._rank(key[0], key[1], location, limit, kind)
+            if len(self._memo) < MEMO_MAX_ENTRIES:
+                with self._memo_lock:
+                    self._memo[key] = result
+        return list(result)
+
+
+_recommender = None
+
+
+def get_facility_recommender() -> FacilityRecommender:
+    """Singleton recommender over the built-in directories."""
+    global _recommender
+    if _recommender is None:
+        _recommender = FacilityRecommender()
+    return _recommender
@@ -2,10 +2,21 @@
 
 import logging
 import os
-from typing import Dict
+import re
+from typing import Dict, Iterator, Optional
 
 import google.generativeai as genai
 
+from .cache_service import patient_explanation_inputs
+from .circuit_breaker import (
+    STATE_CLOSED,
+    CircuitBreaker,
+    LatencyBudget,
+    get_circuit_breaker,
+)
+from .constants import GEMINI_MAX_RETRIES
+from .rate_limiter import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE
+
 logger = logging.getLogger(__name__)
 
 
@@ -20,16 +31,18 @@ class GeminiService:
         self.model = genai.GenerativeModel("gemini-flash-latest")
         logger.info("Gemini Flash service initialized")
 
+    @property
+    def breaker(self) -> CircuitBreaker:
+        """Circuit breaker shared by every Gemini call in this process."""
+        return get_circuit_breaker("Gemini", retry_after=self._breaker_retry_after)
+
     def generate_risk_explanation(self, patient_data: Dict) -> str:
         """Generate personalized risk explanation."""
-        from .cache_service import get_response_cache  # noqa: PLC0415
-
-        # Check cache first
-        cache = get_response_cache()
-        cached_response = cache.get(patient_data)
-        if cached_response:
-            logger.info("Gemini: Using cached explanation")
-            return cached_response
+        from .cache_service import (
+            PROMPT_RISK_EXPLANATION,
+            get_response_cache,
+            risk_explanation_inputs,
+        )
 
         prompt = f"""
 You are a medical AI assistant. Generate a brief, professional explanation of diabetes risk assessment.
@@ -49,30 +62,26 @@ Generate a 2-3 sentence explanation for the patient that:
 Do not include medical advice or recommendations.
 """
 
-        try:
+        def generate() -> str:
             # Apply rate limiting
-            import time  # noqa: PLC0415
-
-            from .rate_limiter import get_gemini_rate_limiter  # noqa: PLC0415
-
-            rate_limiter = get_gemini_rate_limiter()
-            wait_time = rate_limiter.wait_if_needed()
-            if wait_time:
-                logger.warning(f"Gemini: Rate limited, waiting {wait_time:.2f}s")
-                time.sleep(wait_time)
-
-            response = self.model.generate_content(prompt)
-            explanation = response.text.strip()
-            # Cache the successful response
-            cache.set(patient_data, explanation)
-            logger.info("Gemini: Generated and cached new explanation")
-            return explanation
+            self._acquire_slot()
+            with self.breaker.guard():
+                response = LatencyBudget("Gemini").run(
+                    lambda: self.model.generate_content(prompt)
+                )
+                text = response.text.strip()
+            logger.info("Gemini: Generated new explanation")
+            return text
+
+        try:
+            # Cached, or generated once for all concurrent identical requests
+            return get_response_cache().get_or_generate(
+                PROMPT_RISK_EXPLANATION, risk_explanation_inputs(patient_data), generate
+            )
         except Exception as e:
+            # Not cached: the circuit breaker keeps repeated failures cheap
             logger.error(f"Gemini generation failed: {e}")
-            fallback = self._fallback_explanation(patient_data)
-            # Cache fallback to avoid repeated failures
-            cache.set(patient_data, fallback)
-            return fallback
+            return self._fallback_explanation(patient_data)
 
     def _fallback_explanation(self, data: Dict) -> str:
         """Template-based fallback if Gemini fails."""
@@ -86,25 +95,25 @@ Do not include medical advice or recommendations.
 
         return templates.get(risk_level, "Risk assessment completed.")
 
-    def generate_patient_explanation(
-        self, analysis_results: Dict, demographics: Dict
-    ) -> str:
-        """Generate comprehensive explanation for patient results."""
+    @staticmethod
+    def _patient_explanation_prompt(analysis_results: Dict, demographics: Dict) -> str:
+        """Prompt for the multi-section patient report.
 
-        prompt = f"""
+        Built only from the discretized cache/corpus key, so a cached or
+        precomputed report never quotes another patient's exact values.
+        """
+        inputs = patient_explanation_inputs(analysis_results, demographics)
+        return f"""
 You are a medical health screening assistant. Generate a scientifically accurate, calm health screening report.
 
 PATIENT PROFILE:
-- Age: {demographics["age"]} years
-- Gender: {demographics["gender"]}
-- BMI: {analysis_results["bmi"]}
-- Blood Type: {demographics.get("blood_type", "Unknown")} (Patient reported)
+- Gender: {inputs["gender"]}
+- BMI category: {inputs["bmi_bucket"]}
 
 ANALYSIS RESULTS:
-- Diabetes Risk Score: {analysis_results["diabetes_risk_score"]:.1%}
-- Risk Level: {analysis_results["diabetes_risk_level"]}
-- Predicted Blood Group (from fingerprint AI): {analysis_results["predicted_blood_group"]}
-- Fingerprint Patterns: {analysis_results["pattern_counts"]["Whorl"]} Whorls, {analysis_results["pattern_counts"]["Loop"]} Loops, {analysis_results["pattern_counts"]["Arc"]} Arcs
+- Risk Level: {inputs["risk_level"]}
+- Predicted Blood Group (from fingerprint AI): {inputs["blood_group"]}
+- Fingerprint Patterns: {inputs["pattern_whorl"]} Whorls, {inputs["pattern_loop"]} Loops, {inputs["pattern_arc"]} Arcs
 
 SCIENTIFIC CONTEXT:
 Dermatoglyphic research suggests that fingerprint patterns may show statistical correlations with certain genetic and metabolic conditions at a population level.
@@ -121,9 +130,9 @@ INSTRUCTIONS - Generate a report with this clean structure (NO markdown symbols
 📊 Your Fingerprint Pattern Summary
 
 Based on your scanned fingerprints:
-- Whorls: {analysis_results["pattern_counts"]["Whorl"]}
-- Loops: {analysis_results["pattern_counts"]["Loop"]}
-- Arches: {analysis_results["pattern_counts"]["Arc"]}
+- Whorls: {inputs["pattern_whorl"]}
+- Loops: {inputs["pattern_loop"]}
+- Arches: {inputs["pattern_arc"]}
 
 [Provide 1-2 sentences explaining what this pattern distribution suggests in correlation with the risk level, without claiming causation]
 
@@ -153,54 +162,153 @@ TONE GUIDELINES:
 - Use only plain text with emoji icons for visual organization
 """
 
-        try:
-            # Apply rate limiting
-            import re  # noqa: PLC0415
-            import time  # noqa: PLC0415
+    @staticmethod
+    def _quota_retry_delay(error_str: str) -> float:
+        """Seconds to wait after a 429, from the error's "retry in" hint."""
+        # Try to extract retry delay or default to 30s
+        sleep_for = 30
+        if "retry in" in error_str:
+            try:
+                match = re.search(r"retry in (\d+(\.\d+)?)s", error_str)
+                if match:
+                    sleep_for = float(match.group(1)) + 1  # Add mild buffer
+            except Exception:
+                pass
+        return sleep_for
+
+    @staticmethod
+    def _breaker_retry_after(error: Exception) -> Optional[float]:
+        """The 429 "retry in" hint, so the circuit stays open at least that long."""
+        error_str = str(error)
+        if "429" not in error_str:
+            return None
+        return GeminiService._quota_retry_delay(error_str)
+
+    def _retry_delay(
+        self, error: Exception, budget: LatencyBudget, attempt: int
+    ) -> Optional[float]:
+        """Seconds to wait before retrying ``error``, or None to give up.
+
+        Only 429s are retried, and only while the circuit is closed and the
+        hinted wait leaves room in the latency budget.
+        """
+        error_str = str(error)
+        if "429" not in error_str or attempt >= GEMINI_MAX_RETRIES - 1:
+            return None
+        sleep_for = self._quota_retry_delay(error_str)
+        if self.breaker.state != STATE_CLOSED or not budget.allows(sleep_for):
+            return None
+        return sleep_for
+
+    @staticmethod
+    def _acquire_slot(priority: str = PRIORITY_INTERACTIVE) -> None:
+        """Take a token from the shared Gemini rate limiter.
+
+        Interactive calls wait at most GEMINI_INTERACTIVE_ACQUIRE_TIMEOUT_SECONDS
+        and then raise RateLimitExceeded (callers fall back); background
+        precompute waits as long as it takes.
+        """
+        from .constants import (
+            GEMINI_INTERACTIVE_ACQUIRE_TIMEOUT_SECONDS,
+            GEMINI_REQUESTS_PER_MINUTE,
+        )
+        from .exceptions import RateLimitExceeded
+        from .rate_limiter import get_gemini_rate_limiter
 
-            from .rate_limiter import get_gemini_rate_limiter  # noqa: PLC0415
+        timeout = (
+            None
+            if priority == PRIORITY_BACKGROUND
+            else GEMINI_INTERACTIVE_ACQUIRE_TIMEOUT_SECONDS
+        )
+        if not get_gemini_rate_limiter().acquire(priority, timeout=timeout):
+            raise RateLimitExceeded(GEMINI_REQUESTS_PER_MINUTE, "minute")
 
-            rate_limiter = get_gemini_rate_limiter()
+    def _generate_with_retries(
+        self, prompt: str, priority: str = PRIORITY_INTERACTIVE
+    ) -> str:
+        """Call Gemini behind the rate limiter and circuit breaker; raises on failure.
 
-            # Simple retry loop for 429 errors
-            max_retries = 3
-            for attempt in range(max_retries):
-                wait_time = rate_limiter.wait_if_needed()
-                if wait_time:
-                    logger.warning(
-                        f"Gemini: Local rate limit, waiting {wait_time:.2f}s"
-                    )
-                    time.sleep(wait_time)
+        The whole call, retries included, runs within LLM_LATENCY_BUDGET_SECONDS.
+        """
+        import time
 
-                try:
-                    response = self.model.generate_content(prompt)
+        budget = LatencyBudget("Gemini")
+        for attempt in range(GEMINI_MAX_RETRIES):
+            self._acquire_slot(priority)
+            budget.remaining()  # Spent waiting for a token: not Gemini's fault
+
+            try:
+                with self.breaker.guard():
+                    response = budget.run(lambda: self.model.generate_content(prompt))
                     return response.text.strip()
-                except Exception as e:
-                    error_str = str(e)
-                    if "429" in error_str and attempt < max_retries - 1:
-                        print(
-                            f"⚠️ Gemini Quota Exceeded (Attempt {attempt + 1}/{max_retries}). Retrying..."
-                        )
-                        logger.warning(f"Gemini 429 error: {e}")
-
-                        # Try to extract retry delay or default to 30s
-                        sleep_for = 30
-                        if "retry in" in error_str:
-                            try:
-                                match = re.search(r"retry in (\d+(\.\d+)?)s", error_str)
-                                if match:
-                                    sleep_for = (
-                                        float(match.group(1)) + 1
-                                    )  # Add mild buffer
-                            except Exception:
-                                pass
-
-                        print(f"⏳ Sleeping for {sleep_for:.1f}s before retry...")
-                        time.sleep(sleep_for)
-                        continue
-                    else:
-                        raise e  # Re-raise if not 429 or out of retries
+            except Exception as e:
+                sleep_for = self._retry_delay(e, budget, attempt)
+                if sleep_for is None:
+                    raise  # Not a 429, out of retries, circuit open or no time left
+                print(
+                    f"⚠️ Gemini Quota Exceeded (Attempt {attempt + 1}/{GEMINI_MAX_RETRIES}). Retrying..."
+                )
+                logger.warning(f"Gemini 429 error: {e}")
+                print(f"⏳ Sleeping for {sleep_for:.1f}s before retry...")
+                time.sleep(sleep_for)
+
+    def _stream_with_retries(
+        self, prompt: str, priority: str = PRIORITY_INTERACTIVE
+    ) -> Iterator[str]:
+        """Stream Gemini chunks behind the rate limiter; raises on failure.
+
+        A 429 is only retried before the first chunk has been yielded. The
+        latency budget bounds the wait for the stream to start, not its length.
+        """
+        import time
+
+        budget = LatencyBudget("Gemini")
+        for attempt in range(GEMINI_MAX_RETRIES):
+            self._acquire_slot(priority)
+            budget.remaining()  # Spent waiting for a token: not Gemini's fault
+
+            started = False
+            try:
+                with self.breaker.guard():
+                    # The SDK fetches the first chunk before returning
+                    response = budget.run(
+                        lambda: self.model.generate_content(prompt, stream=True)
+                    )
+                    for chunk in response:
+                        text = chunk.text
+                        if text:
+                            started = True
+                            yield text
+                return
+            except Exception as e:
+                sleep_for = None if started else self._retry_delay(e, budget, attempt)
+                if sleep_for is None:
+                    raise
+                logger.warning(f"Gemini 429 error: {e}")
+                time.sleep(sleep_for)
 
+    def generate_patient_explanation(
+        self,
+        analysis_results: Dict,
+        demographics: Dict,
+        priority: str = PRIORITY_INTERACTIVE,
+    ) -> str:
+        """Generate comprehensive explanation for patient results."""
+        from .cache_service import (
+            PROMPT_PATIENT_EXPLANATION,
+            get_response_cache,
+            patient_explanation_inputs,
+        )
+
+        prompt = self._patient_explanation_prompt(analysis_results, demographics)
+
+        try:
+            # Cached, or generated once for all concurrent identical requests
+            return get_response_cache().get_or_generate(
+                PROMPT_PATIENT_EXPLANATION,
+                patient_explanation_inputs(analysis_results, demographics),
+                lambda: self._generate_with_retries(prompt, priority),
+            )
         except Exception as e:
             print(f"❌ GEMINI ERROR: {e!s}")  # Visible in console
             logger.error(f"Gemini generation failed: {e}")
@@ -208,82 +316,63 @@ TONE GUIDELINES:
                 analysis_results, demographics
             )
 
-    def generate_health_facilities(self, risk_level: str) -> list:
-        """Generate recommended health facilities based on risk level."""
-        import json  # noqa: PLC0415
-
-        from .constants import FACILITIES_DB  # noqa: PLC0415
-
-        logger.info(
-            f"🏥 Starting health facilities generation for risk level: {risk_level}"
+    def stream_patient_explanation(
+        self,
+        analysis_results: Dict,
+        demographics: Dict,
+        priority: str = PRIORITY_INTERACTIVE,
+    ) -> Iterator[str]:
+        """Stream the patient explanation as text chunks as Gemini produces them.
+
+        A cached explanation is yielded as a single chunk, as is the result
+        of an identical generation already in flight. Errors are raised so
+        the caller can fall back. ``priority`` is the rate limiter class.
+        """
+        from .cache_service import (
+            PROMPT_PATIENT_EXPLANATION,
+            get_response_cache,
+            patient_explanation_inputs,
         )
 
-        # Prepare the context from our verified database
-        facilities_context = json.dumps(FACILITIES_DB, indent=2)
-        logger.debug(f"📋 Facilities database loaded with {len(FACILITIES_DB)} cities")
-
-        prompt = f"""
-You are a medical referral assistant for a patient in Central Luzon, Philippines.
-Patient Status: {risk_level} Diabetes Risk.
-
-Verified Hospital Database:
-{facilities_context}
-
-Task:
-1. Select exactly 3 facilities from the database that are best suited for this patient.
-2. Prioritize facilities with Endocrinology/Diabetes specializations.
-3. Provide a mix of locations if appropriate.
-4. For each selected facility, add these SIMULATED details:
-   - "doctors": List of 2 realistic Filipino doctor names with specializations (e.g., "Dr. Maria Santos - Endocrinologist")
-   - "operating_hours": Operating hours (e.g., "24/7 Emergency, Clinics: Mon-Sat 8AM-5PM")
-   - "availability": Status like "High Capacity", "Walk-ins Welcome", or "By Appointment"
-   - "current_status": "Open" or "Closed"
-   - "city": The city from the database
-
-Return ONLY a valid JSON list. Each object must have: name, type, address, google_query, operating_hours, current_status, availability, doctors (list), city.
-"""
-
-        logger.info("🤖 Calling Gemini API for facility recommendations...")
+        cache = get_response_cache()
+        cache_inputs = patient_explanation_inputs(analysis_results, demographics)
+        cached_response = cache.lookup(PROMPT_PATIENT_EXPLANATION, cache_inputs)
+        if cached_response:
+            logger.info("Gemini: Using cached patient explanation")
+            yield cached_response
+            return
+
+        key = cache.make_key(PROMPT_PATIENT_EXPLANATION, cache_inputs)
+        future, leader = cache.inflight.acquire(key)
+        if not leader:
+            logger.info("Gemini: Sharing in-flight patient explanation")
+            yield future.result()
+            return
+
+        pieces = []
         try:
-            response = self.model.generate_content(prompt)
-            text = response.text.strip()
-
-            logger.debug(f"✅ Gemini response received (length: {len(text)} chars)")
-            logger.debug(f"📄 Raw response preview: {text[:200]}...")
-
-            # Clean markdown formatting
-            if text.startswith("```json"):
-                text = text[7:-3]
-                logger.debug("🧹 Cleaned JSON markdown formatting")
-            elif text.startswith("```"):
-                text = text[3:-3]
-                logger.debug("🧹 Cleaned generic markdown formatting")
-
-            facilities = json.loads(text.strip())
-            logger.info(
-                f"✅ Successfully parsed {len(facilities)} facilities from Gemini"
-            )
-            for idx, fac in enumerate(facilities):
-                logger.debug(
-                    f"  {idx + 1}. {fac.get('name', 'Unknown')} ({fac.get('city', 'Unknown')})"
+            cached_response = cache.peek(PROMPT_PATIENT_EXPLANATION, cache_inputs)
+            if cached_response:
+                pieces.append(cached_response)
+                yield cached_response
+            else:
+                prompt = self._patient_explanation_prompt(
+                    analysis_results, demographics
                 )
-
-            return facilities
-        except Exception as e:
-            logger.error(f"❌ Gemini facility generation failed: {e}")
-            logger.warning("⚠️ Falling back to static facilities list")
-            return self._fallback_facilities()
-
-    def _fallback_facilities(self) -> list:
-        """Fallback to static list from Angeles if AI fails - REAL DATA ONLY."""
-        from .constants import FACILITIES_DB  # noqa: PLC0415
-
-        # Return first 3 facilities from Angeles - NO SIMULATED FIELDS
-        return FACILITIES_DB.get("Angeles", [])[:3]
-
-    def _fallback_comprehensive_explanation(
-        self, results: Dict, demographics: Dict
-    ) -> str:
+                for text in self._stream_with_retries(prompt, priority):
+                    pieces.append(text)
+                    yield text
+        except BaseException as e:
+            cache.inflight.resolve(key, future, error=e)
+            raise
+
+        explanation = "".join(pieces).strip()
+        if explanation and not cached_response:
+            cache.store(PROMPT_PATIENT_EXPLANATION, cache_inputs, explanation)
+        cache.inflight.resolve(key, future, explanation)
+
+    @staticmethod
+    def _fallback_comprehensive_explanation(results: Dict, demographics: Dict) -> str:
         """Fallback explanation if Gemini fails."""
         risk = results["diabetes_risk_level"]
         blood_group = results["predicted_blood_group"]
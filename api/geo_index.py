@@ -0,0 +1,129 @@
+"""Nearest-facility lookup from a kiosk location.
+
+The coordinates of every catalog (HOSPITALS_DB, LABORATORIES_DB,
+BLOOD_CENTERS_DB, DIABETES_DOCTORS_DB) are packed into NumPy arrays once, at
+import. A query is one vectorized haversine over the catalog plus an
+argpartition; with a few dozen facilities that beats maintaining a tree.
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .constants import (
+    BLOOD_CENTERS_DB,
+    DIABETES_DOCTORS_DB,
+    HOSPITALS_DB,
+    KIOSK_LOCATIONS,
+    LABORATORIES_DB,
+    NEAREST_FACILITIES_K,
+)
+from .exceptions import UnknownKioskError, ValidationError
+
+KIND_HOSPITAL = "hospital"
+KIND_LABORATORY = "laboratory"
+KIND_BLOOD_CENTER = "blood_center"
+KIND_DOCTOR = "doctor"
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat_rad: np.ndarray, lng_rad: np.ndarray, lat: float, lng: float):
+    """Great-circle distances (km) from (lat, lng) degrees to points in radians."""
+    lat0, lng0 = np.radians(lat), np.radians(lng)
+    a = (
+        np.sin((lat_rad - lat0) / 2) ** 2
+        + np.cos(lat0) * np.cos(lat_rad) * np.sin((lng_rad - lng0) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def coordinates(entries: List[Dict]) -> tuple:
+    """(lat, lng) arrays in radians; NaN where an entry has no coordinates."""
+    points = np.array(
+        [[e.get("lat", np.nan), e.get("lng", np.nan)] for e in entries], dtype=float
+    ).reshape(-1, 2)
+    radians = np.radians(points)
+    return radians[:, 0], radians[:, 1]
+
+
+class GeoIndex:
+    """Coordinate arrays over several catalogs, queryable by kind."""
+
+    def __init__(self, catalogs: Dict[str, List[Dict]]):
+        self.entries: Dict[str, List[Dict]] = {}
+        self._coords: Dict[str, tuple] = {}
+        for kind, entries in catalogs.items():
+            located = [e for e in entries if e.get("lat") is not None]
+            self.entries[kind] = located
+            self._coords[kind] = coordinates(located)
+
+    def distances_km(self, kind: str, lat: float, lng: float) -> np.ndarray:
+        """Distance from (lat, lng) to every located entry of ``kind``."""
+        lat_rad, lng_rad = self._coords[kind]
+        return haversine_km(lat_rad, lng_rad, lat, lng)
+
+    def nearest(
+        self, kind: str, lat: float, lng: float, k: int = NEAREST_FACILITIES_K
+    ) -> List[Dict]:
+        """The ``k`` entries of ``kind`` closest to (lat, lng), nearest first.
+
+        Returns copies of the catalog entries with ``distance_km`` added.
+        """
+        entries = self.entries.get(kind, [])
+        if not entries or k <= 0:
+            return []
+        distances = self.distances_km(kind, lat, lng)
+        if k < len(entries):
+            top = np.argpartition(distances, k)[:k]
+        else:
+            top = np.arange(len(entries))
+        top = top[np.argsort(distances[top], kind="stable")]
+        return [
+            {**entries[i], "distance_km": round(float(distances[i]), 1)} for i in top
+        ]
+
+
+def resolve_location(
+    kiosk_id: Optional[str] = None,
+    latitude: Optional[float] = None,
+    longitude: Optional[float] = None,
+) -> Optional[Dict]:
+    """Location of a session from its kiosk id or explicit coordinates.
+
+    Returns ``{"kiosk_id", "city", "lat", "lng"}`` or None when neither is
+    given. Explicit coordinates override the kiosk's registered ones.
+    """
+    if (latitude is None) != (longitude is None):
+        raise ValidationError(
+            "latitude" if latitude is None else "longitude",
+            "latitude and longitude must be given together",
+        )
+    kiosk = None
+    if kiosk_id is not None:
+        kiosk = KIOSK_LOCATIONS.get(kiosk_id)
+        if kiosk is None:
+            raise UnknownKioskError(kiosk_id)
+    if kiosk is None and latitude is None:
+        return None
+    return {
+        "kiosk_id": kiosk_id,
+        "city": kiosk["city"] if kiosk else None,
+        "lat": latitude if latitude is not None else kiosk["lat"],
+        "lng": longitude if longitude is not None else kiosk["lng"],
+    }
+
+
+_geo_index = GeoIndex(
+    {
+        KIND_HOSPITAL: HOSPITALS_DB,
+        KIND_LABORATORY: LABORATORIES_DB,
+        KIND_BLOOD_CENTER: BLOOD_CENTERS_DB,
+        KIND_DOCTOR: DIABETES_DOCTORS_DB,
+    }
+)
+
+
+def get_geo_index() -> GeoIndex:
+    """Index over the built-in catalogs (built at import)."""
+    return _geo_index
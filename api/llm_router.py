@@ -0,0 +1,462 @@
+"""Hedged routing of LLM requests between Gemini and OpenAI.
+
+Both services sit behind the ``LLMProvider`` interface. For each request the
+router ranks providers by weight: a configured preference scaled by quota
+headroom (rate-limiter tokens left; zero while the provider's circuit is
+open). The best one gets the request. If it has not produced a first chunk
+within the hedge delay (the LLM_HEDGE_QUANTILE of its own recent
+time-to-first-chunk), the runner-up is asked as well and whichever answers
+first wins; the other is abandoned. A primary that fails before answering is
+failed over at once.
+
+Per-provider latency histograms feed the hedge delay and /metrics.
+"""
+
+import logging
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional
+
+from .circuit_breaker import STATE_OPEN, get_circuit_breakers
+from .constants import (
+    LLM_HEDGE_DEFAULT_DELAY_SECONDS,
+    LLM_HEDGE_MAX_DELAY_SECONDS,
+    LLM_HEDGE_MIN_DELAY_SECONDS,
+    LLM_HEDGE_MIN_SAMPLES,
+    LLM_HEDGE_QUANTILE,
+    LLM_PROVIDER_WEIGHTS,
+    LLM_ROUTER_WORKERS,
+)
+from .exceptions import LLMUnavailableError
+from .rate_limiter import PRIORITY_INTERACTIVE
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS_SECONDS = (0.1, 0.25, 0.5, 1, 2, 3, 5, 8, 13, 20, 30, 60)
+
+_CHUNK = "chunk"
+_DONE = "done"
+_ERROR = "error"
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with interpolated quantiles."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_SECONDS):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)  # Last bucket is overflow
+        self._count = 0
+        self._sum = 0.0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._counts[bisect_left(self.buckets, seconds)] += 1
+            self._count += 1
+            self._sum += seconds
+            self._max = max(self._max, seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimated ``q`` quantile (linear within a bucket); None if empty."""
+        with self._lock:
+            if not self._count:
+                return None
+            rank = q * self._count
+            cumulative = 0
+            for i, bucket_count in enumerate(self._counts):
+                if bucket_count and cumulative + bucket_count >= rank:
+                    lower = self.buckets[i - 1] if i else 0.0
+                    upper = self.buckets[i] if i < len(self.buckets) else self._max
+                    fraction = (rank - cumulative) / bucket_count
+                    return lower + (upper - lower) * fraction
+                cumulative += bucket_count
+            return self._max
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            count, total, maximum = self._count, self._sum, self._max
+        p50, p90 = self.quantile(0.5), self.quantile(0.9)
+        return {
+            "count": count,
+            "mean_seconds": round(total / count, 3) if count else None,
+            "p50_seconds": round(p50, 3) if p50 is not None else None,
+            "p90_seconds": round(p90, 3) if p90 is not None else None,
+            "max_seconds": round(maximum, 3),
+        }
+
+
+class LLMProvider(ABC):
+    """What the router needs from an LLM service."""
+
+    name = ""
+    # True if the provider serves and fills the response cache itself
+    caches_responses = False
+
+    @abstractmethod
+    def stream_patient_explanation(
+        self, analysis_results: Dict, demographics: Dict, priority: str
+    ) -> Iterator[str]:
+        """Text chunks of the patient explanation; raises on failure."""
+        pass
+
+    @abstractmethod
+    def quota_headroom(self) -> float:
+        """Share of quota left, from 0 (do not call) to 1."""
+        pass
+
+
+def _circuit_open(name: str) -> bool:
+    breaker = get_circuit_breakers().get(name)
+    return breaker is not None and breaker.state == STATE_OPEN
+
+
+class GeminiProvider(LLMProvider):
+    name = "gemini"
+    caches_responses = True
+
+    @staticmethod
+    def _service():
+        from . import gemini_service
+
+        return gemini_service.get_gemini_service()
+
+    def stream_patient_explanation(self, analysis_results, demographics, priority):
+        return self._service().stream_patient_explanation(
+            analysis_results, demographics, priority=priority
+        )
+
+    def quota_headroom(self) -> float:
+        from .rate_limiter import get_gemini_rate_limiter
+
+        if _circuit_open("Gemini"):
+            return 0.0
+        try:
+            self._service()
+            limiter = get_gemini_rate_limiter()
+            return max(0.0, min(1.0, limiter.available_tokens() / limiter.capacity))
+        except Exception:
+            return 0.0  # Not configured, or limiter store unreadable
+
+
+class OpenAIProvider(LLMProvider):
+    name = "openai"
+
+    @staticmethod
+    def _service():
+        from . import openai_service
+
+        return openai_service.get_openai_service()
+
+    def stream_patient_explanation(self, analysis_results, demographics, priority):
+        return self._service().stream_patient_explanation(
+            analysis_results, demographics
+        )
+
+    def quota_headroom(self) -> float:
+        # No local limiter for OpenAI; its circuit breaker tracks 429s
+        if _circuit_open("OpenAI"):
+            return 0.0
+        try:
+            return 1.0 if self._service().client is not None else 0.0
+        except Exception:
+            return 0.0
+
+
+class _Attempt:
+    """One provider's run within a routed request."""
+
+    def __init__(self, provider: LLMProvider, hedge: bool):
+        self.provider = provider
+        self.hedge = hedge
+        self.started = time.monotonic()
+        self.cancelled = threading.Event()
+
+
+class _Race:
+    """One routed request: the primary, any hedge or failover, and the winner."""
+
+    def __init__(
+        self,
+        router: "LLMRouter",
+        ranked: List[LLMProvider],
+        open_stream: Callable[[LLMProvider], Iterator[str]],
+    ):
+        self.router = router
+        self.primary = ranked[0]
+        self.backups = list(ranked[1:])
+        self.open_stream = open_stream
+        self.events = queue.Queue()
+        self.attempts: List[_Attempt] = []
+        self.running = 0
+        self.winner: Optional[_Attempt] = None
+
+    def _launch(self, provider: LLMProvider, hedge: bool) -> None:
+        attempt = _Attempt(provider, hedge)
+        self.attempts.append(attempt)
+        self.running += 1
+        self.router._count(provider, "requests")
+        self.router._executor.submit(self._pump, attempt)
+
+    def _pump(self, attempt: _Attempt) -> None:
+        """Relay one provider's chunks into the queue until done or cancelled."""
+        latency = self.router._latency[attempt.provider.name]
+        chunks = None
+        first = True
+        try:
+            chunks = self.open_stream(attempt.provider)
+            for chunk in chunks:
+                if attempt.cancelled.is_set():
+                    return
+                if first:
+                    first = False
+                    latency["first_chunk"].observe(time.monotonic() - attempt.started)
+                self.events.put((attempt, _CHUNK, chunk))
+            latency["total"].observe(time.monotonic() - attempt.started)
+            self.events.put((attempt, _DONE, None))
+        except Exception as e:
+            self.events.put((attempt, _ERROR, e))
+        finally:
+            if chunks is not None and hasattr(chunks, "close"):
+                chunks.close()
+
+    def _next_event(self, hedge_at: float) -> tuple:
+        """Next queued event, hedging to a backup if the primary is too slow."""
+        while True:
+            timeout = None
+            if self.winner is None and self.backups:
+                timeout = max(0.0, hedge_at - time.monotonic())
+            try:
+                return self.events.get(timeout=timeout)
+            except queue.Empty:
+                logger.info(
+                    f"🔀 {self.primary.name} slow to answer; hedging to "
+                    f"{self.backups[0].name}"
+                )
+                self.router._bump("hedges")
+                self._launch(self.backups.pop(0), hedge=True)
+
+    def _settle(self, attempt: _Attempt, kind: str, value) -> bool:
+        """Judge an event that arrives before any winner; True if it wins."""
+        if kind == _ERROR:
+            self.router._count(attempt.provider, "errors")
+            logger.warning(f"LLM {attempt.provider.name} failed: {value}")
+            self.running -= 1
+            if self.backups:
+                self.router._bump("failovers")
+                self._launch(self.backups.pop(0), hedge=True)
+            elif self.running == 0:
+                raise value
+            return False
+
+        self.winner = attempt
+        self.router._count(attempt.provider, "wins")
+        if attempt.hedge:
+            self.router._bump("hedge_wins")
+        for other in self.attempts:
+            if other is not attempt:
+                other.cancelled.set()
+                self.router._count(other.provider, "abandoned")
+        return True
+
+    def chunks(self) -> Iterator[str]:
+        """Chunks from the first provider to answer; raises if all fail."""
+        self._launch(self.primary, hedge=False)
+        hedge_at = time.monotonic() + self.router.hedge_delay(self.primary)
+        try:
+            while True:
+                attempt, kind, value = self._next_event(hedge_at)
+                if self.winner is None and not self._settle(attempt, kind, value):
+                    continue
+                if attempt is not self.winner:
+                    continue
+                if kind == _CHUNK:
+                    yield value
+                elif kind == _DONE:
+                    return
+                else:
+                    self.router._count(attempt.provider, "errors")
+                    raise value
+        finally:
+            for attempt in self.attempts:
+                attempt.cancelled.set()
+
+
+class LLMRouter:
+    """Routes LLM requests to the best provider, hedging slow ones."""
+
+    def __init__(
+        self,
+        providers: List[LLMProvider],
+        weights: Optional[Dict[str, float]] = None,
+        hedge_quantile: float = LLM_HEDGE_QUANTILE,
+        min_samples: int = LLM_HEDGE_MIN_SAMPLES,
+        default_delay: float = LLM_HEDGE_DEFAULT_DELAY_SECONDS,
+        min_delay: float = LLM_HEDGE_MIN_DELAY_SECONDS,
+        max_delay: float = LLM_HEDGE_MAX_DELAY_SECONDS,
+    ):
+        """
+        Args:
+            providers: Candidates, in tie-break order
+            weights: Preference per provider name at full quota
+            hedge_quantile: First-chunk latency quantile that triggers a hedge
+            min_samples: Samples needed before the quantile replaces the default
+            default_delay: Hedge delay while a provider has too few samples
+            min_delay: Lower clamp on the hedge delay
+            max_delay: Upper clamp on the hedge delay
+        """
+        self.providers = list(providers)
+        self.weights = LLM_PROVIDER_WEIGHTS if weights is None else weights
+        self.hedge_quantile = hedge_quantile
+        self.min_samples = min_samples
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=LLM_ROUTER_WORKERS, thread_name_prefix="llm-router"
+        )
+        self._latency = {
+            p.name: {"first_chunk": LatencyHistogram(), "total": LatencyHistogram()}
+            for p in self.providers
+        }
+        self._lock = threading.Lock()
+        self._stats = {
+            p.name: {"requests": 0, "wins": 0, "errors": 0, "abandoned": 0}
+            for p in self.providers
+        }
+        self._totals = {"hedges": 0, "hedge_wins": 0, "failovers": 0}
+
+    def _count(self, provider: LLMProvider, stat: str) -> None:
+        with self._lock:
+            self._stats[provider.name][stat] += 1
+
+    def _bump(self, total: str) -> None:
+        with self._lock:
+            self._totals[total] += 1
+
+    def weight(self, provider: LLMProvider) -> float:
+        return self.weights.get(provider.name, 1.0) * provider.quota_headroom()
+
+    def rank(self) -> List[LLMProvider]:
+        """Usable providers, highest weight first."""
+        scored = [(self.weight(p), i, p) for i, p in enumerate(self.providers)]
+        scored.sort(key=lambda s: (-s[0], s[1]))
+        return [p for weight, _, p in scored if weight > 0]
+
+    def hedge_delay(self, provider: LLMProvider) -> float:
+        """Seconds to wait for ``provider``'s first chunk before hedging."""
+        histogram = self._latency[provider.name]["first_chunk"]
+        delay = self.default_delay
+        if histogram.count >= self.min_samples:
+            delay = histogram.quantile(self.hedge_quantile)
+        return min(max(delay, self.min_delay), self.max_delay)
+
+    def stream_patient_explanation(
+        self,
+        analysis_results: Dict,
+        demographics: Dict,
+        priority: str = PRIORITY_INTERACTIVE,
+    ) -> Iterator[str]:
+        """Stream the patient explanation from whichever provider answers first.
+
+        Raises LLMUnavailableError if no provider has quota, and the last
+        provider error if every attempt fails.
+        """
+        from .cache_service import (
+            PROMPT_PATIENT_EXPLANATION,
+            get_response_cache,
+            patient_explanation_inputs,
+        )
+
+        ranked = self.rank()
+        if not ranked:
+            raise LLMUnavailableError([p.name for p in self.providers])
+
+        # Providers that do not cache are cached here
+        cache = get_response_cache()
+        if not ranked[0].caches_responses:
+            cached_response = cache.lookup(
+                PROMPT_PATIENT_EXPLANATION,
+                patient_explanation_inputs(analysis_results, demographics),
+            )
+            if cached_response:
+                yield cached_response
+                return
+
+        race = _Race(
+            self,
+            ranked,
+            lambda p: p.stream_patient_explanation(
+                analysis_results, demographics, priority
+            ),
+        )
+        pieces = []
+        for text in race.chunks():
+            pieces.append(text)
+            yield text
+
+        explanation = "".join(pieces).strip()
+        if explanation and not race.winner.provider.caches_responses:
+            cache.store(
+                PROMPT_PATIENT_EXPLANATION,
+                patient_explanation_inputs(analysis_results, demographics),
+                explanation,
+            )
+
+    def generate_patient_explanation(
+        self,
+        analysis_results: Dict,
+        demographics: Dict,
+        priority: str = PRIORITY_INTERACTIVE,
+    ) -> str:
+        """Whole patient explanation, or the template if every provider fails."""
+        from .explanation_service import fallback_explanation
+
+        try:
+            text = "".join(
+                self.stream_patient_explanation(
+                    analysis_results, demographics, priority
+                )
+            ).strip()
+            if text:
+                return text
+        except Exception as e:
+            logger.error(f"LLM routing failed: {e}")
+        return fallback_explanation(analysis_results, demographics)
+
+    def get_metrics(self) -> dict:
+        """Per-provider weight, latency and outcome counts, plus hedging totals."""
+        providers = {}
+        for provider in self.providers:
+            with self._lock:
+                stats = dict(self._stats[provider.name])
+            latency = self._latency[provider.name]
+            providers[provider.name] = {
+                **stats,
+                "weight": round(self.weight(provider), 3),
+                "hedge_delay_seconds": round(self.hedge_delay(provider), 3),
+                "first_chunk_latency": latency["first_chunk"].snapshot(),
+                "total_latency": latency["total"].snapshot(),
+            }
+        with self._lock:
+            return {"providers": providers, **self._totals}
+
+
+_llm_router = None
+
+
+def get_llm_router() -> LLMRouter:
+    """Singleton router over Gemini and OpenAI."""
+    global _llm_router
+    if _llm_router is None:
+        _llm_router = LLMRouter([GeminiProvider(), OpenAIProvider()])
+    return _llm_router
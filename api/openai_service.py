@@ -1,6 +1,10 @@
-import json
 import logging
 import os
+from typing import Iterator
+
+from .cache_service import patient_explanation_inputs
+from .circuit_breaker import CircuitBreaker, get_circuit_breaker
+from .constants import LLM_LATENCY_BUDGET_SECONDS
 
 logger = logging.getLogger(__name__)
 
@@ -42,9 +46,13 @@ class OpenAIService:
             # We don't raise here to allow application to start, but calls will fail
 
         try:
-            from openai import OpenAI  # noqa: PLC0415
+            from openai import OpenAI
 
-            self.client = OpenAI(api_key=api_key)
+            # Each call is bounded by the latency budget; the circuit breaker,
+            # not client-side retries, handles a struggling API
+            self.client = OpenAI(
+                api_key=api_key, timeout=LLM_LATENCY_BUDGET_SECONDS, max_retries=0
+            )
             self.model_name = "gpt-3.5-turbo"
             logger.info(f"OpenAI service initialized with model {self.model_name}")
         except ImportError:
@@ -55,6 +63,11 @@ class OpenAIService:
 
         self._initialized = True
 
+    @property
+    def breaker(self) -> CircuitBreaker:
+        """Circuit breaker shared by every OpenAI call in this process."""
+        return get_circuit_breaker("OpenAI")
+
     def generate_risk_explanation(self, patient_data: dict) -> str:
         """Generate risk explanation using OpenAI."""
         if not self.client:
@@ -63,7 +76,8 @@ class OpenAIService:
         prompt = self._build_explanation_prompt(patient_data)
 
         try:
-            response = self.client.chat.completions.create(
+            response = self.breaker.call(
+                self.client.chat.completions.create,
                 model=self.model_name,
                 messages=[
                     {
@@ -80,40 +94,34 @@ class OpenAIService:
             logger.error(f"OpenAI explanation generation failed: {e}")
             return self._fallback_explanation(patient_data)
 
-    def generate_patient_explanation(
-        self, analysis_results: dict, demographics: dict
-    ) -> str:
-        """Generate comprehensive explanation for patient results."""
-        if not self.client:
-            return self._fallback_comprehensive_explanation(
-                analysis_results, demographics
-            )
+    @staticmethod
+    def _patient_explanation_prompt(analysis_results: dict, demographics: dict) -> str:
+        """Prompt for the patient report.
 
-        # Re-use the prompt construction logic from Gemini service for consistency
-        # In a real refactor, this prompt should be central, but duplication is safer for now to avoid breaking Gemini
-        prompt = f"""
+        Built only from the discretized cache/corpus key, like the Gemini
+        prompt, so cached text never quotes another patient's exact values.
+        """
+        inputs = patient_explanation_inputs(analysis_results, demographics)
+        return f"""
 You are a compassionate medical AI assistant. Generate a clear, personable health report for a patient.
 
 PATIENT PROFILE:
-- Age: {demographics["age"]} years
-- Gender: {demographics["gender"]}
-- BMI: {analysis_results["bmi"]}
-- Blood Type: {demographics.get("blood_type", "Unknown")} (Patient reported)
+- Gender: {inputs["gender"]}
+- BMI category: {inputs["bmi_bucket"]}
 
 ANALYSIS RESULTS:
-- Diabetes Risk Score: {analysis_results["diabetes_risk_score"]:.1%}
-- Risk Level: {analysis_results["diabetes_risk_level"]}
-- Predicted Blood Group (from fingerprint AI): {analysis_results["predicted_blood_group"]}
-- Fingerprint Patterns: {analysis_results["pattern_counts"]["Whorl"]} Whorls, {analysis_results["pattern_counts"]["Loop"]} Loops, {analysis_results["pattern_counts"]["Arc"]} Arcs
+- Risk Level: {inputs["risk_level"]}
+- Predicted Blood Group (from fingerprint AI): {inputs["blood_group"]}
+- Fingerprint Patterns: {inputs["pattern_whorl"]} Whorls, {inputs["pattern_loop"]} Loops, {inputs["pattern_arc"]} Arcs
 
 SCIENTIFIC CONTEXT (Use this to explain HOW the result was calculated):
 1. **"No-Age" Diabetes Model**:
    - The model EXPLICITLY excludes age to prevent discrimination. It relies on biology, not age.
-   - **Key Features by Importance**: 1. #1 Height ({demographics.get("height_cm", "N/A")}cm) - Strongest predictor.
-     2. #2 Whorl Patterns (Patient has {analysis_results["pattern_counts"]["Whorl"]}) - Specific variations correlate with insulin resistance.
-     3. #3 Loop Patterns (Patient has {analysis_results["pattern_counts"]["Loop"]}) - Secondary marker.
-     4. #4 Arch Patterns (Patient has {analysis_results["pattern_counts"]["Arc"]}).
-     5. #5 Weight ({demographics.get("weight_kg", "N/A")}kg) - Metabolic indicator.
+   - **Key Features by Importance**: 1. #1 Height - Strongest predictor.
+     2. #2 Whorl Patterns (Patient has {inputs["pattern_whorl"]}) - Specific variations correlate with insulin resistance.
+     3. #3 Loop Patterns (Patient has {inputs["pattern_loop"]}) - Secondary marker.
+     4. #4 Arch Patterns (Patient has {inputs["pattern_arc"]}).
+     5. #5 Weight - Metabolic indicator.
    - **Logic**: Fetal development of fingerprints (weeks 13-19) overlaps with pancreas development, creating a permanent biological marker.
 
 2. **Blood Group Prediction**:
@@ -134,14 +142,13 @@ Generate a health report in the following structure:
 
 3. **Key Findings** (bullet points):
    - Fingerprint Analysis: Specific count of Whorls/Loops and what it suggests.
-   - Blood Group: Mention the AI prediction and confidence.
-   - BMI: Mention if it contributes to the risk.
+   - Blood Group: Mention the AI prediction.
+   - BMI: Mention if their BMI category contributes to the risk.
 
 4. **Recommendations** (3-4 actionable tips):
    - Based on risk level, provide specific health advice.
    - If moderate/high: recommend doctor visit.
    - If low: encourage healthy habits.
-   - If willing to donate: mention blood donation.
 
 TONE GUIDELINES:
 - **Be Calm and Reassuring**: Do NOT use alarmist words like "Warning", "Danger", "Critical", or "Severe".
@@ -152,8 +159,20 @@ TONE GUIDELINES:
 Keep the tone friendly, professional, encouraging, but scientifically transparent. Use simple language.
 """
 
+    def generate_patient_explanation(
+        self, analysis_results: dict, demographics: dict
+    ) -> str:
+        """Generate comprehensive explanation for patient results."""
+        if not self.client:
+            return self._fallback_comprehensive_explanation(
+                analysis_results, demographics
+            )
+
+        prompt = self._patient_explanation_prompt(analysis_results, demographics)
+
         try:
-            response = self.client.chat.completions.create(
+            response = self.breaker.call(
+                self.client.chat.completions.create,
                 model=self.model_name,
                 messages=[
                     {
@@ -171,66 +190,37 @@ Keep the tone friendly, professional, encouraging, but scientifically transparen
                 analysis_results, demographics
             )
 
-    def generate_health_facilities(self, risk_level: str) -> list:
-        """Generate recommended health facilities based on risk level."""
-        from .constants import FACILITIES_DB  # noqa: PLC0415
-
+    def stream_patient_explanation(
+        self, analysis_results: dict, demographics: dict
+    ) -> Iterator[str]:
+        """Stream the patient explanation as text deltas; errors are raised."""
         if not self.client:
-            return self._fallback_facilities()
-
-        logger.info(
-            f"🏥 Starting health facilities generation for risk level: {risk_level}"
-        )
-        facilities_context = json.dumps(FACILITIES_DB, indent=2)
-
-        prompt = f"""
-You are a medical referral assistant for a patient in Central Luzon, Philippines.
-Patient Status: {risk_level} Diabetes Risk.
-
-Verified Hospital Database:
-{facilities_context}
-
-Task:
-1. Select exactly 3 facilities from the database that are best suited for this patient.
-2. Prioritize facilities with Endocrinology/Diabetes specializations.
-3. Provide a mix of locations if appropriate.
-4. For each selected facility, add these SIMULATED details:
-   - "doctors": List of 2 realistic Filipino doctor names with specializations (e.g., "Dr. Maria Santos - Endocrinologist")
-   - "operating_hours": Operating hours (e.g., "24/7 Emergency, Clinics: Mon-Sat 8AM-5PM")
-   - "availability": Status like "High Capacity", "Walk-ins Welcome", or "By Appointment"
-   - "current_status": "Open" or "Closed"
-   - "city": The city from the database
-
-Return ONLY a valid JSON list. Each object must have: name, type, address, google_query, operating_hours, current_status, availability, doctors (list), city.
-"""
-        try:
-            response = self.client.chat.completions.create(
+            yield self._fallback_comprehensive_explanation(
+                analysis_results, demographics
+            )
+            return
+
+        with self.breaker.guard():
+            stream = self.client.chat.completions.create(
                 model=self.model_name,
                 messages=[
-                    {"role": "system", "content": "You are a JSON generator."},
-                    {"role": "user", "content": prompt},
+                    {
+                        "role": "system",
+                        "content": "You are a helpful medical assistant.",
+                    },
+                    {
+                        "role": "user",
+                        "content": self._patient_explanation_prompt(
+                            analysis_results, demographics
+                        ),
+                    },
                 ],
                 temperature=0.7,
-                response_format={"type": "json_object"},
+                stream=True,
             )
-
-            text = response.choices[0].message.content.strip()
-
-            # OpenAI typically returns straight JSON if instructed, but handle wrapping just in case
-            if text.startswith("```json"):
-                text = text[7:-3]
-            elif text.startswith("```"):
-                text = text[3:-3]
-
-            facilities = json.loads(text)
-            # Sometimes OpenAI wraps in {"facilities": [...]} if not explicit
-            if isinstance(facilities, dict) and "facilities" in facilities:
-                facilities = facilities["facilities"]
-
-            return facilities
-        except Exception as e:
-            logger.error(f"OpenAI facility generation failed: {e}")
-            return self._fallback_facilities()
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
 
     def _build_explanation_prompt(self, data: dict) -> str:
         # Same as Gemini prompt but simplified for text reuse
@@ -282,12 +272,6 @@ Your diabetes risk assessment indicates a {risk} risk level (confidence: {result
 
         return explanation.strip()
 
-    def _fallback_facilities(self) -> list:
-        """Fallback to static list from Angeles if AI fails."""
-        from .constants import FACILITIES_DB  # noqa: PLC0415
-
-        return FACILITIES_DB.get("Angeles", [])[:3]
-
 
 _openai_service = None
 
@@ -3,7 +3,7 @@
 import io
 import re
 from datetime import datetime, timezone
-from typing import Dict
+from typing import Dict, Optional
 from xml.sax.saxutils import escape
 
 import qrcode
@@ -22,37 +22,153 @@ from reportlab.platypus import (
     TableStyle,
 )
 
+PAGE_CHROME_FORM = "PageChrome"
+
+BRAND_TEAL = colors.HexColor("#00c2cb")
+FOOTER_GRAY = colors.HexColor("#6b7280")
+BRANDING_GRAY = colors.HexColor("#9ca3af")
+
+
+def _table_style(header_color: str) -> TableStyle:
+    """Two-column info table with a colored header row."""
+    return TableStyle(
+        [
+            ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor(header_color)),
+            ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+            ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+            ("FONTSIZE", (0, 0), (-1, 0), 14),
+            ("BOTTOMPADDING", (0, 0), (-1, 0), 14),
+            ("TOPPADDING", (0, 0), (-1, 0), 14),
+            ("BACKGROUND", (0, 1), (-1, -1), colors.white),
+            (
+                "ROWBACKGROUNDS",
+                (0, 1),
+                (-1, -1),
+                [colors.white, colors.HexColor("#f9fafb")],
+            ),
+            ("BOX", (0, 0), (-1, -1), 1, colors.HexColor("#d1d5db")),
+            ("INNERGRID", (0, 0), (-1, -1), 0.5, colors.HexColor("#e5e7eb")),
+            ("LEFTPADDING", (0, 0), (-1, -1), 12),
+            ("RIGHTPADDING", (0, 0), (-1, -1), 12),
+            ("TOPPADDING", (0, 1), (-1, -1), 9),
+            ("BOTTOMPADDING", (0, 1), (-1, -1), 9),
+        ]
+    )
 
-class PDFReportGenerator:
-    def _draw_page_chrome(self, canvas, doc):
-        """Lightweight header/footer for a more polished look."""
-        canvas.saveState()
+
+class ReportTemplate:
+    """Styles, table styles and page chrome shared by every report.
+
+    Built once per generator; ReportLab only reads styles while laying out a
+    document, so concurrent renders can share them. The static header and
+    footer are recorded as a form XObject on each document's first page and
+    referenced from every page, leaving only the page number to draw.
+    """
+
+    def __init__(self):
+        styles = getSampleStyleSheet()
+        self.body = styles["BodyText"]
+        self.title = ParagraphStyle(
+            "CustomTitle",
+            parent=styles["Heading1"],
+            fontSize=26,
+            leading=30,
+            alignment=TA_CENTER,
+            textColor=BRAND_TEAL,
+            fontName="Helvetica-Bold",
+            spaceAfter=20,
+        )
+        self.subtitle = ParagraphStyle(
+            "Subtitle",
+            parent=styles["Normal"],
+            fontSize=11,
+            leading=14,
+            alignment=TA_CENTER,
+            textColor=FOOTER_GRAY,
+            spaceAfter=20,
+        )
+        self.section = ParagraphStyle(
+            "SectionHeading",
+            parent=styles["Heading2"],
+            fontSize=15,
+            leading=20,
+            textColor=BRAND_TEAL,
+            fontName="Helvetica-Bold",
+            spaceBefore=12,
+            spaceAfter=10,
+        )
+        self.ai_body = ParagraphStyle(
+            "AI_Body",
+            parent=styles["BodyText"],
+            fontSize=11,
+            leading=15,
+            textColor=colors.HexColor("#1f2937"),
+            spaceAfter=8,
+        )
+        self.ai_heading = ParagraphStyle(
+            "AI_Heading",
+            parent=styles["Heading3"],
+            fontSize=13,
+            leading=17,
+            textColor=BRAND_TEAL,
+            fontName="Helvetica-Bold",
+            spaceBefore=10,
+            spaceAfter=8,
+        )
+        self.disclaimer = ParagraphStyle(
+            "Disclaimer",
+            parent=styles["Italic"],
+            fontSize=9,
+            leading=12,
+            textColor=colors.HexColor("#5f6b7a"),
+            spaceBefore=12,
+        )
+        self.patient_table = _table_style("#00c2cb")
+        self.results_table = _table_style("#0d9488")
+        self.pattern_table = _table_style("#06b6d4")
+
+    def _draw_static_chrome(self, canvas) -> None:
         width, height = letter
 
         # Header with app branding
         canvas.setFont("Helvetica-Bold", 11)
-        canvas.setFillColor(colors.HexColor("#00c2cb"))
+        canvas.setFillColor(BRAND_TEAL)
         canvas.drawString(0.75 * inch, height - 0.65 * inch, "Printalyzer")
-        
+
         # Header divider with teal accent
-        canvas.setStrokeColor(colors.HexColor("#00c2cb"))
+        canvas.setStrokeColor(BRAND_TEAL)
         canvas.setLineWidth(2)
         canvas.line(
             0.75 * inch, height - 0.85 * inch, width - 0.75 * inch, height - 0.85 * inch
         )
 
-        # Footer page number
-        canvas.setFont("Helvetica", 9)
-        canvas.setFillColor(colors.HexColor("#6b7280"))
-        canvas.drawRightString(width - 0.75 * inch, 0.65 * inch, f"Page {doc.page}")
-        
         # Footer branding
         canvas.setFont("Helvetica", 8)
-        canvas.setFillColor(colors.HexColor("#9ca3af"))
+        canvas.setFillColor(BRANDING_GRAY)
         canvas.drawString(0.75 * inch, 0.65 * inch, "Generated by Printalyzer AI")
-        
+
+    def draw_page_chrome(self, canvas, doc):
+        """Lightweight header/footer for a more polished look."""
+        if not canvas.hasForm(PAGE_CHROME_FORM):
+            canvas.beginForm(PAGE_CHROME_FORM)
+            self._draw_static_chrome(canvas)
+            canvas.endForm()
+        canvas.doForm(PAGE_CHROME_FORM)
+
+        # Footer page number
+        canvas.saveState()
+        width, _ = letter
+        canvas.setFont("Helvetica", 9)
+        canvas.setFillColor(FOOTER_GRAY)
+        canvas.drawRightString(width - 0.75 * inch, 0.65 * inch, f"Page {doc.page}")
         canvas.restoreState()
 
+
+class PDFReportGenerator:
+    def __init__(self):
+        self.template = ReportTemplate()
+
     def _is_section_heading(self, text: str) -> bool:
         # Common headings from the AI output, e.g. emoji-led headings.
         if not text:
@@ -63,7 +179,7 @@ class PDFReportGenerator:
             "recommendations",
         }
 
-    def _build_ai_analysis_flowables(self, explanation: str, styles) -> list:
+    def _build_ai_analysis_flowables(self, explanation: str) -> list:
         """Convert AI explanation text into nicely formatted flowables.
 
         Supports:
@@ -72,7 +188,7 @@ class PDFReportGenerator:
         - paragraphs (blank-line separated)
         """
         if not explanation:
-            return [Paragraph("No AI analysis available.", styles["BodyText"])]
+            return [Paragraph("No AI analysis available.", self.template.body)]
 
         text = explanation.replace("\r\n", "\n").replace("\r", "\n")
         text = text.replace("\\n", "\n")
@@ -80,24 +196,8 @@ class PDFReportGenerator:
         while "\n\n\n" in text:
             text = text.replace("\n\n\n", "\n\n")
 
-        body_style = ParagraphStyle(
-            "AI_Body",
-            parent=styles["BodyText"],
-            fontSize=11,
-            leading=15,
-            textColor=colors.HexColor("#1f2937"),
-            spaceAfter=8,
-        )
-        heading_style = ParagraphStyle(
-            "AI_Heading",
-            parent=styles["Heading3"],
-            fontSize=13,
-            leading=17,
-            textColor=colors.HexColor("#00c2cb"),
-            fontName="Helvetica-Bold",
-            spaceBefore=10,
-            spaceAfter=8,
-        )
+        body_style = self.template.ai_body
+        heading_style = self.template.ai_heading
 
         flowables = []
         blocks = [b.strip() for b in text.split("\n\n") if b.strip()]
@@ -141,12 +241,21 @@ class PDFReportGenerator:
 
         return flowables
 
-    def _build_explanation_flowables(self, explanation: str, styles) -> list:
+    def _build_explanation_flowables(self, explanation: str) -> list:
         """Backward-compatible alias (now uses richer AI formatting)."""
-        return self._build_ai_analysis_flowables(explanation, styles)
-
-    def generate_report(self, patient_data: Dict, explanation: str) -> bytes:
-        """Generate PDF report from patient data."""
+        return self._build_ai_analysis_flowables(explanation)
+
+    def generate_report(
+        self,
+        patient_data: Dict,
+        explanation: str,
+        generated_at: Optional[datetime] = None,
+    ) -> bytes:
+        """Generate PDF report from patient data.
+
+        ``generated_at`` is the assessment time printed on the report; it
+        defaults to now.
+        """
 
         buffer = io.BytesIO()
         doc = SimpleDocTemplate(
@@ -158,48 +267,15 @@ class PDFReportGenerator:
             bottomMargin=0.85 * inch,
             title="Diabetes Risk Assessment Report",
         )
-        styles = getSampleStyleSheet()
+        template = self.template
         story = []
 
-        title_style = ParagraphStyle(
-            "CustomTitle",
-            parent=styles["Heading1"],
-            fontSize=26,
-            leading=30,
-            alignment=TA_CENTER,
-            textColor=colors.HexColor("#00c2cb"),
-            fontName="Helvetica-Bold",
-            spaceAfter=20,
-        )
-
-        subtitle_style = ParagraphStyle(
-            "Subtitle",
-            parent=styles["Normal"],
-            fontSize=11,
-            leading=14,
-            alignment=TA_CENTER,
-            textColor=colors.HexColor("#6b7280"),
-            spaceAfter=20,
-        )
-
-        section_style = ParagraphStyle(
-            "SectionHeading",
-            parent=styles["Heading2"],
-            fontSize=15,
-            leading=20,
-            textColor=colors.HexColor("#00c2cb"),
-            fontName="Helvetica-Bold",
-            spaceBefore=12,
-            spaceAfter=10,
-        )
-
-        story.append(Paragraph("Diabetes Risk Assessment Report", title_style))
-        story.append(Paragraph("AI-assisted health screening summary", subtitle_style))
+        story.append(Paragraph("Diabetes Risk Assessment Report", template.title))
+        story.append(Paragraph("AI-assisted health screening summary", template.subtitle))
 
-        date_text = (
-            f"Generated: {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M UTC')}"
-        )
-        story.append(Paragraph(date_text, subtitle_style))
+        generated_at = generated_at or datetime.now(timezone.utc)
+        date_text = f"Generated: {generated_at.strftime('%Y-%m-%d %H:%M UTC')}"
+        story.append(Paragraph(date_text, template.subtitle))
 
         patient_info = [
             ["Patient Information", ""],
@@ -211,32 +287,7 @@ class PDFReportGenerator:
         ]
 
         patient_table = Table(patient_info, colWidths=[2.5 * inch, 3 * inch])
-        patient_table.setStyle(
-            TableStyle(
-                [
-                    ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#00c2cb")),
-                    ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-                    ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-                    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                    ("FONTSIZE", (0, 0), (-1, 0), 14),
-                    ("BOTTOMPADDING", (0, 0), (-1, 0), 14),
-                    ("TOPPADDING", (0, 0), (-1, 0), 14),
-                    ("BACKGROUND", (0, 1), (-1, -1), colors.white),
-                    (
-                        "ROWBACKGROUNDS",
-                        (0, 1),
-                        (-1, -1),
-                        [colors.white, colors.HexColor("#f9fafb")],
-                    ),
-                    ("BOX", (0, 0), (-1, -1), 1, colors.HexColor("#d1d5db")),
-                    ("INNERGRID", (0, 0), (-1, -1), 0.5, colors.HexColor("#e5e7eb")),
-                    ("LEFTPADDING", (0, 0), (-1, -1), 12),
-                    ("RIGHTPADDING", (0, 0), (-1, -1), 12),
-                    ("TOPPADDING", (0, 1), (-1, -1), 9),
-                    ("BOTTOMPADDING", (0, 1), (-1, -1), 9),
-                ]
-            )
-        )
+        patient_table.setStyle(template.patient_table)
 
         story.append(patient_table)
         story.append(Spacer(1, 0.22 * inch))
@@ -249,39 +300,14 @@ class PDFReportGenerator:
         ]
 
         results_table = Table(results_data, colWidths=[2.5 * inch, 3 * inch])
-        results_table.setStyle(
-            TableStyle(
-                [
-                    ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#0d9488")),
-                    ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-                    ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-                    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                    ("FONTSIZE", (0, 0), (-1, 0), 14),
-                    ("BOTTOMPADDING", (0, 0), (-1, 0), 14),
-                    ("TOPPADDING", (0, 0), (-1, 0), 14),
-                    ("BACKGROUND", (0, 1), (-1, -1), colors.white),
-                    (
-                        "ROWBACKGROUNDS",
-                        (0, 1),
-                        (-1, -1),
-                        [colors.white, colors.HexColor("#f9fafb")],
-                    ),
-                    ("BOX", (0, 0), (-1, -1), 1, colors.HexColor("#d1d5db")),
-                    ("INNERGRID", (0, 0), (-1, -1), 0.5, colors.HexColor("#e5e7eb")),
-                    ("LEFTPADDING", (0, 0), (-1, -1), 12),
-                    ("RIGHTPADDING", (0, 0), (-1, -1), 12),
-                    ("TOPPADDING", (0, 1), (-1, -1), 9),
-                    ("BOTTOMPADDING", (0, 1), (-1, -1), 9),
-                ]
-            )
-        )
+        results_table.setStyle(template.results_table)
 
         story.append(results_table)
         story.append(Spacer(1, 0.22 * inch))
 
         # AI Health Analysis (matches what the UI shows)
-        story.append(Paragraph("AI Health Analysis", section_style))
-        story.extend(self._build_ai_analysis_flowables(explanation, styles))
+        story.append(Paragraph("AI Health Analysis", template.section))
+        story.extend(self._build_ai_analysis_flowables(explanation))
         story.append(Spacer(1, 0.22 * inch))
 
         pattern_data = [
@@ -292,54 +318,21 @@ class PDFReportGenerator:
         ]
 
         pattern_table = Table(pattern_data, colWidths=[2.5 * inch, 3 * inch])
-        pattern_table.setStyle(
-            TableStyle(
-                [
-                    ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#06b6d4")),
-                    ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-                    ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-                    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                    ("FONTSIZE", (0, 0), (-1, 0), 14),
-                    ("BOTTOMPADDING", (0, 0), (-1, 0), 14),
-                    ("TOPPADDING", (0, 0), (-1, 0), 14),
-                    ("BACKGROUND", (0, 1), (-1, -1), colors.white),
-                    (
-                        "ROWBACKGROUNDS",
-                        (0, 1),
-                        (-1, -1),
-                        [colors.white, colors.HexColor("#f9fafb")],
-                    ),
-                    ("BOX", (0, 0), (-1, -1), 1, colors.HexColor("#d1d5db")),
-                    ("INNERGRID", (0, 0), (-1, -1), 0.5, colors.HexColor("#e5e7eb")),
-                    ("LEFTPADDING", (0, 0), (-1, -1), 12),
-                    ("RIGHTPADDING", (0, 0), (-1, -1), 12),
-                    ("TOPPADDING", (0, 1), (-1, -1), 9),
-                    ("BOTTOMPADDING", (0, 1), (-1, -1), 9),
-                ]
-            )
-        )
+        pattern_table.setStyle(template.pattern_table)
 
         story.append(pattern_table)
         story.append(Spacer(1, 0.5 * inch))
 
-        disclaimer_style = ParagraphStyle(
-            "Disclaimer",
-            parent=styles["Italic"],
-            fontSize=9,
-            leading=12,
-            textColor=colors.HexColor("#5f6b7a"),
-            spaceBefore=12,
-        )
         disclaimer = (
             "This assessment is for informational purposes only and does not constitute medical advice. "
             "Please consult with a healthcare professional for proper medical evaluation and diagnosis."
         )
-        story.append(Paragraph(disclaimer, disclaimer_style))
+        story.append(Paragraph(disclaimer, template.disclaimer))
 
         doc.build(
             story,
-            onFirstPage=self._draw_page_chrome,
-            onLaterPages=self._draw_page_chrome,
+            onFirstPage=template.draw_page_chrome,
+            onLaterPages=template.draw_page_chrome,
         )
         pdf_bytes = buffer.getvalue()
         buffer.close()
@@ -1,52 +1,260 @@
-"""Rate limiter for Gemini API calls."""
+"""Token-bucket rate limiter for Gemini API calls.
 
+Bucket state (tokens left, last refill time) lives in a store shared by every
+gunicorn worker, so the configured rate is the real rate against the API no
+matter how many processes run. ``SQLiteBucketStore`` updates it in an
+IMMEDIATE transaction; ``MemoryBucketStore`` is the process-local fake used
+in tests and single-process setups.
+
+Callers either try for a token without waiting (``try_acquire``) or wait up to
+a deadline (``acquire`` / ``acquire_async``) instead of being handed a sleep.
+Background work (precomputing the explanation corpus) may not take the last
+``background_reserve`` tokens, so an interactive request is never queued
+behind it.
+"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
 import time
-from collections import deque
-from threading import Lock
-from typing import Optional
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+
+from .constants import (
+    GEMINI_BACKGROUND_RESERVE,
+    GEMINI_BURST,
+    GEMINI_REQUESTS_PER_MINUTE,
+)
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BACKGROUND = "background"
+
+BucketState = Tuple[float, float]  # (tokens, updated_at wall-clock seconds)
+
+
+class MemoryBucketStore:
+    """Process-local bucket state."""
 
+    def __init__(self):
+        self._state = {}
+        self._lock = threading.Lock()
 
-class RateLimiter:
-    def __init__(self, max_requests: int, time_window_seconds: int):
+    def update(self, name: str, step: Callable[[Optional[BucketState]], tuple]):
+        """Atomically apply ``step(state) -> (new_state, result)``."""
+        with self._lock:
+            new_state, result = step(self._state.get(name))
+            self._state[name] = new_state
+            return result
+
+
+class SQLiteBucketStore:
+    """Bucket state in a SQLite file shared by every worker process."""
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            path, timeout=5, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets "
+            "(name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._lock = threading.Lock()
+
+    def update(self, name: str, step: Callable[[Optional[BucketState]], tuple]):
+        """Atomically apply ``step(state) -> (new_state, result)``."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT tokens, updated_at FROM buckets WHERE name = ?", (name,)
+                ).fetchone()
+                (tokens, updated_at), result = step(row)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO buckets (name, tokens, updated_at) "
+                    "VALUES (?, ?, ?)",
+                    (name, tokens, updated_at),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            return result
+
+
+class TokenBucketLimiter:
+    """Token bucket with priority reserve and throttled-time metrics."""
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: float,
+        burst: int,
+        store=None,
+        background_reserve: float = 0,
+    ):
         """
         Args:
-            max_requests: Maximum number of requests allowed in the time window
-            time_window_seconds: Time window in seconds
+            name: Bucket name in the shared store
+            requests_per_minute: Sustained refill rate
+            burst: Bucket capacity (requests allowed back to back)
+            store: MemoryBucketStore or SQLiteBucketStore
+            background_reserve: Tokens only interactive callers may take
         """
-        self.max_requests = max_requests
-        self.time_window = time_window_seconds
-        self.requests = deque()
-        self.lock = Lock()
+        self.name = name
+        self.capacity = float(burst)
+        self.refill_per_second = requests_per_minute / 60.0
+        self.background_reserve = float(background_reserve)
+        self.store = store or MemoryBucketStore()
 
-    def wait_if_needed(self) -> Optional[float]:
-        """
-        Check if we need to wait before making another request.
-        Returns the wait time in seconds if rate limited, None otherwise.
-        """
-        with self.lock:
-            now = time.time()
+        self._lock = threading.Lock()
+        self._stats = {
+            priority: {
+                "acquired": 0,
+                "rejected": 0,
+                "throttled_seconds": 0.0,
+                "max_wait_seconds": 0.0,
+            }
+            for priority in (PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND)
+        }
+        self._store_errors = 0
+
+    def _refilled(self, state: Optional[BucketState], now: float) -> float:
+        if state is None:
+            return self.capacity
+        tokens, updated_at = state
+        return min(
+            self.capacity, tokens + max(0.0, now - updated_at) * self.refill_per_second
+        )
+
+    def _take(self, priority: str) -> float:
+        """Take a token if one is free; else seconds until one will be (0 = taken)."""
+        floor = self.background_reserve if priority == PRIORITY_BACKGROUND else 0.0
 
-            # Remove requests outside the time window
-            while self.requests and self.requests[0] < now - self.time_window:
-                self.requests.popleft()
+        def step(state):
+            now = time.time()
+            tokens = self._refilled(state, now)
+            if tokens - 1 >= floor:
+                return (tokens - 1, now), 0.0
+            return (tokens, now), (floor + 1 - tokens) / self.refill_per_second
 
-            # Check if we're at the limit
-            if len(self.requests) >= self.max_requests:
-                # Calculate how long to wait
-                oldest_request = self.requests[0]
-                wait_time = self.time_window - (now - oldest_request)
-                if wait_time > 0:
-                    return wait_time
+        try:
+            return self.store.update(self.name, step)
+        except sqlite3.Error as e:
+            # Fail open: a 429 from the API is retried, a stuck limiter is not
+            with self._lock:
+                self._store_errors += 1
+            logger.warning(f"Rate limiter store unavailable, admitting: {e}")
+            return 0.0
 
-            # Record this request
-            self.requests.append(now)
+    def _next_wait(self, priority: str, deadline: Optional[float]) -> Optional[float]:
+        """0.0 once a token is taken, None past the deadline, else time to sleep."""
+        wait = self._take(priority)
+        if wait == 0.0 or deadline is None:
+            return wait
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
             return None
+        return min(wait, remaining)
+
+    def _record(self, priority: str, started: float, acquired: bool) -> bool:
+        waited = time.monotonic() - started
+        with self._lock:
+            stats = self._stats[priority]
+            stats["acquired" if acquired else "rejected"] += 1
+            stats["throttled_seconds"] += waited
+            stats["max_wait_seconds"] = max(stats["max_wait_seconds"], waited)
+        if waited >= 1:
+            logger.warning(f"Gemini: {priority} call throttled for {waited:.2f}s")
+        return acquired
+
+    def try_acquire(self, priority: str = PRIORITY_INTERACTIVE) -> bool:
+        """Take a token only if one is available right now."""
+        return self._record(priority, time.monotonic(), self._take(priority) == 0.0)
+
+    def acquire(
+        self, priority: str = PRIORITY_INTERACTIVE, timeout: Optional[float] = None
+    ) -> bool:
+        """Wait for a token; False if none is free within ``timeout`` seconds."""
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        while True:
+            wait = self._next_wait(priority, deadline)
+            if wait is None or wait == 0.0:
+                return self._record(priority, started, wait == 0.0)
+            time.sleep(wait)
+
+    async def acquire_async(
+        self, priority: str = PRIORITY_INTERACTIVE, timeout: Optional[float] = None
+    ) -> bool:
+        """acquire() for async callers; waits without blocking the event loop."""
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        while True:
+            wait = self._next_wait(priority, deadline)
+            if wait is None or wait == 0.0:
+                return self._record(priority, started, wait == 0.0)
+            await asyncio.sleep(wait)
+
+    def available_tokens(self) -> float:
+        def step(state):
+            now = time.time()
+            tokens = self._refilled(state, now)
+            return (tokens, now), tokens
+
+        return self.store.update(self.name, step)
+
+    def get_metrics(self) -> dict:
+        """Admission counts and time spent throttled, per priority class."""
+        try:
+            tokens = round(self.available_tokens(), 2)
+        except sqlite3.Error:
+            tokens = None
+        with self._lock:
+            by_priority = {
+                priority: {
+                    **stats,
+                    "throttled_seconds": round(stats["throttled_seconds"], 3),
+                    "max_wait_seconds": round(stats["max_wait_seconds"], 3),
+                }
+                for priority, stats in self._stats.items()
+            }
+            store_errors = self._store_errors
+        return {
+            "requests_per_minute": self.refill_per_second * 60,
+            "burst": self.capacity,
+            "background_reserve": self.background_reserve,
+            "tokens": tokens,
+            "by_priority": by_priority,
+            "store_errors": store_errors,
+        }
+
+
+def _default_store():
+    """RATE_LIMIT_STATE_PATH (":memory:" for process-local), else a file."""
+    path = os.getenv("RATE_LIMIT_STATE_PATH")
+    if path == ":memory:":
+        return MemoryBucketStore()
+    if not path:
+        try:
+            from django.conf import settings
+
+            base_dir = Path(settings.BASE_DIR)
+        except Exception:
+            base_dir = Path(__file__).resolve().parent.parent
+        path = str(base_dir / "rate_limits.sqlite3")
+    return SQLiteBucketStore(path)
 
 
 _gemini_rate_limiter = None
 
 
-def get_gemini_rate_limiter() -> RateLimiter:
+def get_gemini_rate_limiter() -> TokenBucketLimiter:
     """
     Singleton rate limiter for Gemini API.
     Free tier limits: 15 RPM (requests per minute)
@@ -54,5 +262,11 @@ def get_gemini_rate_limiter() -> RateLimiter:
     global _gemini_rate_limiter  # noqa: PLW0603
     if _gemini_rate_limiter is None:
         # Allow 10 requests per minute to stay well under the 15 RPM limit
-        _gemini_rate_limiter = RateLimiter(max_requests=10, time_window_seconds=60)
+        _gemini_rate_limiter = TokenBucketLimiter(
+            "gemini",
+            requests_per_minute=GEMINI_REQUESTS_PER_MINUTE,
+            burst=GEMINI_BURST,
+            store=_default_store(),
+            background_reserve=GEMINI_BACKGROUND_RESERVE,
+        )
     return _gemini_rate_limiter
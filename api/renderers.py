@@ -0,0 +1,25 @@
+"""Ninja response renderer on top of ``serialization``."""
+
+from ninja.renderers import BaseRenderer
+from ninja.responses import NinjaJSONEncoder
+
+import serialization
+
+
+class FastJSONRenderer(BaseRenderer):
+    """JSON renderer using orjson when available.
+
+    Types neither backend handles natively (Pydantic models, Decimal, UUIDs
+    under stdlib json, datetimes) go through Ninja's encoder, so output
+    matches the default renderer.
+    """
+
+    media_type = "application/json"
+
+    def __init__(self):
+        self._default = NinjaJSONEncoder().default
+
+    def render(self, request, data, *, response_status):
+        return serialization.dumps(
+            data, default=self._default, passthrough_datetime=True
+        )
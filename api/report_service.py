@@ -0,0 +1,177 @@
+"""Lazy, content-addressed PDF reports.
+
+Most patients never scan the QR code, so reports are no longer rendered when
+results are shown. Instead a small render spec (patient data, explanation
+text, assessment time and template version) is stored per session, encrypted
+with the application key (next to the reports, in the existing ``reports``
+bucket), and the PDF is rendered on the first ``download-pdf`` hit. Rendered bytes are cached in storage under a hash of
+the spec: a second download or an identical ``/generate-pdf`` is a cache hit,
+and concurrent first downloads share a single render.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from cryptography.fernet import InvalidToken
+
+import serialization
+from storage import get_storage
+
+from .constants import REPORT_DOWNLOAD_WINDOW_HOURS, REPORT_TEMPLATE_VERSION
+from .encryption import get_encryption_manager
+from .pdf_service import get_pdf_generator
+from .single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+REPORT_FOLDER = "reports"
+
+
+def build_report_spec(patient_data: Dict, explanation: str, generated_at: str) -> Dict:
+    """Everything a report is rendered from (``generated_at`` is ISO 8601)."""
+    return {
+        "patient_data": patient_data,
+        "explanation": explanation,
+        "generated_at": generated_at,
+        "template_version": REPORT_TEMPLATE_VERSION,
+    }
+
+
+def spec_hash(spec: Dict) -> str:
+    """Content hash identifying the rendered report."""
+    return hashlib.sha256(serialization.dumps(spec, sort_keys=True)).hexdigest()
+
+
+def report_filename(digest: str) -> str:
+    return f"report_{digest}.pdf"
+
+
+def spec_filename(session_id: str) -> str:
+    return f"spec_{session_id}.bin"
+
+
+class ReportService:
+    """Stores render specs and renders reports through a storage-backed cache.
+
+    Also tracks, per process, which prepared reports get downloaded: a
+    session still undownloaded after REPORT_DOWNLOAD_WINDOW_HOURS (when its
+    signed links expire) counts as never downloaded, i.e. a render saved.
+    """
+
+    def __init__(self):
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self._awaiting: Dict[str, float] = {}
+        self._stats = {
+            "prepared": 0,
+            "downloaded": 0,
+            "never_downloaded": 0,
+            "renders": 0,
+            "cache_hits": 0,
+        }
+        self._render_ms = {"total": 0.0, "max": 0.0}
+
+    def store_spec(self, session_id: str, spec: Dict) -> str:
+        """Encrypt and save a session's render spec; returns its content hash."""
+        cipher = get_encryption_manager().cipher
+        get_storage().save_file(
+            cipher.encrypt(serialization.dumps(spec)),
+            spec_filename(session_id),
+            folder=REPORT_FOLDER,
+        )
+        with self._lock:
+            self._prune()
+            if session_id not in self._awaiting:
+                self._awaiting[session_id] = time.time()
+                self._stats["prepared"] += 1
+        return spec_hash(spec)
+
+    def load_spec(self, session_id: str) -> Optional[Dict]:
+        """Stored render spec for a session, or None if missing/unreadable."""
+        token = get_storage().get_file(spec_filename(session_id), folder=REPORT_FOLDER)
+        if token is None:
+            return None
+        try:
+            return serialization.loads(get_encryption_manager().cipher.decrypt(token))
+        except InvalidToken:
+            logger.error(f"Report spec for session {session_id} failed to decrypt")
+            return None
+
+    def get_report(self, spec: Dict) -> Tuple[bytes, str]:
+        """PDF bytes and storage filename for ``spec``, rendering on a miss."""
+        filename = report_filename(spec_hash(spec))
+        return self._flight.do(filename, lambda: self._fetch_or_render(spec, filename))
+
+    def mark_downloaded(self, session_id: str) -> None:
+        with self._lock:
+            if self._awaiting.pop(session_id, None) is not None:
+                self._stats["downloaded"] += 1
+
+    def get_metrics(self) -> dict:
+        with self._lock:
+            self._prune()
+            stats = dict(self._stats)
+            awaiting = len(self._awaiting)
+            render_ms = dict(self._render_ms)
+        settled = stats["downloaded"] + stats["never_downloaded"]
+        return {
+            **stats,
+            "awaiting_download": awaiting,
+            "never_downloaded_ratio": round(stats["never_downloaded"] / settled, 3)
+            if settled
+            else 0.0,
+            "avg_render_ms": round(render_ms["total"] / stats["renders"], 1)
+            if stats["renders"]
+            else 0.0,
+            "max_render_ms": round(render_ms["max"], 1),
+            "single_flight": self._flight.get_metrics(),
+        }
+
+    def _prune(self) -> None:
+        """Settle sessions past the download window (caller holds _lock)."""
+        cutoff = time.time() - REPORT_DOWNLOAD_WINDOW_HOURS * 3600
+        for session_id in [
+            sid for sid, prepared_at in self._awaiting.items() if prepared_at < cutoff
+        ]:
+            del self._awaiting[session_id]
+            self._stats["never_downloaded"] += 1
+
+    def _fetch_or_render(self, spec: Dict, filename: str) -> Tuple[bytes, str]:
+        storage = get_storage()
+        cached = storage.get_file(filename, folder=REPORT_FOLDER)
+        if cached is not None:
+            with self._lock:
+                self._stats["cache_hits"] += 1
+            return cached, filename
+
+        start = time.perf_counter()
+        pdf_bytes = get_pdf_generator().generate_report(
+            spec["patient_data"],
+            spec["explanation"],
+            generated_at=datetime.fromisoformat(spec["generated_at"]),
+        )
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        storage.save_file(pdf_bytes, filename, folder=REPORT_FOLDER)
+        with self._lock:
+            self._stats["renders"] += 1
+            self._render_ms["total"] += elapsed_ms
+            self._render_ms["max"] = max(self._render_ms["max"], elapsed_ms)
+        logger.info(
+            f"📄 Rendered {filename} ({len(pdf_bytes)} bytes, {elapsed_ms:.0f}ms)"
+        )
+        return pdf_bytes, filename
+
+
+_report_service = None
+
+
+def get_report_service() -> ReportService:
+    """Singleton pattern for the report service."""
+    global _report_service
+    if _report_service is None:
+        _report_service = ReportService()
+    return _report_service
@@ -41,6 +41,7 @@ class DiagnoseResponse(BaseModel):
 class HealthCheckResponse(BaseModel):
     status: str
     database_connected: bool
+    llm_circuits: dict[str, str] = {}  # Breaker state per LLM provider
     timestamp: datetime
 
 
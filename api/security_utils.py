@@ -54,6 +54,54 @@ def sanitize_ai_content(content: str) -> str:
     return text
 
 
+class StreamingSanitizer:
+    """Apply sanitize_ai_content to text that arrives in chunks.
+
+    Text is released only up to a point where no pattern sanitize_ai_content
+    looks for can still be completed by a later chunk: an unclosed
+    ``<script`` block, a trailing word that might become ``onclick=``, or a
+    trailing backslash are held back until more text (or flush()) arrives.
+    """
+
+    _SCRIPT_OPEN = "<script"
+    _SCRIPT_CLOSE = "</script>"
+
+    def __init__(self):
+        self._pending = ""
+
+    def _safe_length(self, text: str) -> int:
+        lower = text.lower()
+        cut = len(text)
+
+        # Hold an unterminated <script ...> block, or the start of one
+        start = lower.rfind(self._SCRIPT_OPEN)
+        if start != -1 and lower.find(self._SCRIPT_CLOSE, start) == -1:
+            cut = start
+        tag = lower.rfind("<", 0, cut)
+        if tag != -1 and self._SCRIPT_OPEN.startswith(lower[tag:cut]):
+            cut = tag
+
+        # Hold a trailing word (and whitespace) that could still become on\w+=
+        cut = re.search(r"\w*\s*$", text[:cut]).start()
+
+        # Hold a trailing backslash that could become a literal "\n"
+        if text[:cut].endswith("\\"):
+            cut -= 1
+        return cut
+
+    def feed(self, chunk: str) -> str:
+        """Add a raw chunk; return the sanitized text that is safe to emit."""
+        self._pending += chunk
+        cut = self._safe_length(self._pending)
+        ready, self._pending = self._pending[:cut], self._pending[cut:]
+        return sanitize_ai_content(ready)
+
+    def flush(self) -> str:
+        """Sanitize and return whatever is still held back."""
+        ready, self._pending = self._pending, ""
+        return sanitize_ai_content(ready)
+
+
 def validate_uuid(value: str) -> bool:
     """Validate UUID v4 format to prevent path traversal.
     
@@ -1,24 +1,93 @@
 """Session management with encryption for multi-step workflow."""
 
-import json
+import atexit
+import base64
+import heapq
 import logging
 import os
 import threading
+import time
 import uuid
+from collections import deque
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Dict, Optional
 
 from cryptography.fernet import Fernet
 
+import serialization
+
+from .blob_store import FingerprintBlobStore, load_blob_key
+from .constants import (
+    SESSION_BLOB_MEMORY_BUDGET_MB,
+    SESSION_CLEANUP_INTERVAL_MINUTES,
+    SESSION_FLUSH_INTERVAL_MS,
+    SESSION_FLUSH_MAX_PENDING,
+    SESSION_LOCK_STRIPES,
+    SESSION_TIMEOUT_HOURS,
+)
+from .utils.image_processing import base64_to_bytes
+
 logger = logging.getLogger(__name__)
 
 
 class SessionManager:
-    """Manages encrypted sessions for multi-step kiosk workflow."""
-
-    def __init__(self):
-        self._lock = threading.Lock()
+    """Manages encrypted sessions for multi-step kiosk workflow.
+
+    Concurrency model:
+    - Mutations take a per-session lock from a striped lock table, so kiosks
+      working on different sessions do not contend with each other.
+    - Stored session dicts are copy-on-write snapshots: a mutation builds a new
+      dict and swaps it in, so readers never see a dict being modified.
+      Callers must treat the dicts returned by get_session as read-only and
+      go through the mutator methods instead.
+    - The store is persisted after the session lock is released. Writers
+      serialize on a dedicated I/O lock and skip snapshots that are already
+      older than what is on disk.
+
+    Persistence is group-committed: mutations only mark the store dirty and a
+    background writer flushes it every ``flush_interval_ms`` or after
+    ``flush_max_pending`` changes, whichever comes first. flush() is an
+    explicit durability barrier. An interval of 0 writes synchronously on
+    every mutation.
+    """
+
+    def __init__(
+        self,
+        lock_stripes: int = SESSION_LOCK_STRIPES,
+        flush_interval_ms: Optional[int] = None,
+        flush_max_pending: Optional[int] = None,
+    ):
+        self._stripes = [threading.Lock() for _ in range(max(1, lock_stripes))]
+        # Guards the expiry index and metrics (never held across I/O).
+        self._index_lock = threading.Lock()
+        # Serializes store writes; held only outside session locks.
+        self._io_lock = threading.Lock()
+        self._version = 0
+        self._persisted_version = 0
+
+        self._flush_interval = (
+            flush_interval_ms
+            if flush_interval_ms is not None
+            else int(
+                os.getenv("SESSION_FLUSH_INTERVAL_MS", str(SESSION_FLUSH_INTERVAL_MS))
+            )
+        ) / 1000
+        self._flush_max_pending = (
+            flush_max_pending
+            if flush_max_pending is not None
+            else int(
+                os.getenv("SESSION_FLUSH_MAX_PENDING", str(SESSION_FLUSH_MAX_PENDING))
+            )
+        )
+        self._dirty = threading.Condition()
+        self._pending = 0
+        self._first_pending_at = 0.0
+        self._writer_thread: Optional[threading.Thread] = None
+        self._writer_stop = False
+        self._persist_requests = 0
+        self._store_writes = 0
+        self._bytes_written = 0
 
         base_dir = self._get_base_dir()
         self._key_path = Path(
@@ -31,13 +100,43 @@ class SessionManager:
         key = self._load_or_create_key()
         self.cipher = Fernet(key)
 
+        blob_key, retired_blob_keys = load_blob_key(key)
+        self.blob_store = FingerprintBlobStore(
+            Path(os.getenv("SESSION_BLOB_DIR", str(base_dir / "session_blobs"))),
+            blob_key,
+            retired_blob_keys,
+            memory_budget_bytes=int(
+                float(
+                    os.getenv(
+                        "SESSION_BLOB_MEMORY_BUDGET_MB",
+                        str(SESSION_BLOB_MEMORY_BUDGET_MB),
+                    )
+                )
+                * 1024
+                * 1024
+            ),
+        )
+
         self.sessions: dict[str, dict] = {}
+
+        # Expiry index: min-heap of (expires_ts, session_id). Entries are never
+        # removed in place; _expiry holds the authoritative deadline and stale
+        # heap entries are skipped when popped.
+        self._expiry_heap: list[tuple[float, str]] = []
+        self._expiry: dict[str, float] = {}
+        self._session_bytes: dict[str, int] = {}
+        self._eviction_times: deque[float] = deque()
+        self._evictions_total = 0
+
+        self._sweeper_thread: Optional[threading.Thread] = None
+        self._sweeper_stop = threading.Event()
+
         self._load_sessions()
 
     def _get_base_dir(self) -> Path:
         """Best-effort BASE_DIR resolution without requiring Django settings."""
         try:
-            from django.conf import settings  # noqa: PLC0415
+            from django.conf import settings
 
             base_dir = getattr(settings, "BASE_DIR", None)
             if base_dir:
@@ -77,121 +176,419 @@ class SessionManager:
         try:
             if not self._store_path.exists():
                 return
-            raw = self._store_path.read_text(encoding="utf-8")
+            raw = self._store_path.read_bytes()
             if not raw.strip():
                 return
-            data = json.loads(raw)
+            data = serialization.loads(raw)
             if isinstance(data, dict):
                 self.sessions = data
         except Exception as e:
             logger.warning("Failed to load session store: %s", e)
 
-    def _save_sessions(self) -> None:
-        """Persist sessions to disk (best-effort)."""
+        for session_id, session in self.sessions.items():
+            self._index_session(session_id, session)
+
+    @staticmethod
+    def _payload_bytes(session: dict) -> int:
+        """Approximate bytes held by a session's fingerprint payloads."""
+        total = 0
+        for entry in (session.get("fingerprints") or {}).values():
+            # Blob metadata dicts, or legacy inline Fernet strings
+            total += entry.get("bytes", 0) if isinstance(entry, dict) else len(entry)
+        return total
+
+    def _session_lock(self, session_id: str) -> threading.Lock:
+        """Lock stripe guarding mutations of one session."""
+        return self._stripes[hash(session_id) % len(self._stripes)]
+
+    @staticmethod
+    def _expires_ts(session: dict) -> float:
+        """A session's deadline as a timestamp."""
         try:
-            self._store_path.parent.mkdir(parents=True, exist_ok=True)
-            self._store_path.write_text(
-                json.dumps(self.sessions, ensure_ascii=False), encoding="utf-8"
-            )
-        except Exception as e:
-            logger.warning("Failed to persist session store: %s", e)
+            return datetime.fromisoformat(session["expires_at"]).timestamp()
+        except (KeyError, TypeError, ValueError):
+            # Unparseable deadline: expire on the next sweep.
+            return 0.0
+
+    def _index_session(self, session_id: str, session: dict) -> None:
+        """Register a session's deadline in the expiry heap."""
+        expires_ts = self._expires_ts(session)
+
+        with self._index_lock:
+            if self._expiry.get(session_id) != expires_ts:
+                self._expiry[session_id] = expires_ts
+                heapq.heappush(self._expiry_heap, (expires_ts, session_id))
+            self._session_bytes[session_id] = self._payload_bytes(session)
+
+    def _unindex_session(self, session_id: str) -> None:
+        """Forget a session's deadline; its heap entry becomes stale."""
+        with self._index_lock:
+            self._expiry.pop(session_id, None)
+            self._session_bytes.pop(session_id, None)
+
+    def _bump_version(self) -> None:
+        with self._index_lock:
+            self._version += 1
 
-    def create_session(self, consent: bool) -> str:
-        """Create new session with consent flag."""
-        session_id = str(uuid.uuid4())
+    def _save_sessions(self) -> None:
+        """Persist sessions to disk (best-effort).
+
+        Must be called without holding a session lock. The snapshot is taken
+        under the I/O lock, so a writer that queued behind another one skips
+        the write if the store on disk is already at least as new.
+        """
+        with self._io_lock:
+            version = self._version
+            if version <= self._persisted_version:
+                return
+            snapshot = dict(self.sessions)
+            try:
+                payload = serialization.dumps(snapshot)
+                self._store_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self._store_path.with_suffix(".tmp")
+                tmp_path.write_bytes(payload)
+                os.replace(tmp_path, self._store_path)
+                self._persisted_version = version
+                self._store_writes += 1
+                self._bytes_written += len(payload)
+            except Exception as e:
+                logger.warning("Failed to persist session store: %s", e)
+
+    def _persist(self) -> None:
+        """Request persistence of the latest mutation.
+
+        In group-commit mode this only marks the store dirty; the background
+        writer batches the actual write.
+        """
+        with self._dirty:
+            self._persist_requests += 1
+            group_commit = self._flush_interval > 0
+            if group_commit:
+                if self._pending == 0:
+                    self._first_pending_at = time.monotonic()
+                self._pending += 1
+                if self._writer_thread is None:
+                    self._start_writer()
+                self._dirty.notify()
+
+        if not group_commit:
+            self._save_sessions()
+
+    def _start_writer(self) -> None:
+        """Start the background group-commit writer (caller holds _dirty)."""
+        self._writer_stop = False
+        self._writer_thread = threading.Thread(
+            target=self._writer_loop, name="session-writer", daemon=True
+        )
+        self._writer_thread.start()
+        atexit.register(self.flush)
+
+    def _writer_loop(self) -> None:
+        while True:
+            with self._dirty:
+                while not self._pending and not self._writer_stop:
+                    self._dirty.wait()
+                if self._writer_stop and not self._pending:
+                    return
+
+                deadline = self._first_pending_at + self._flush_interval
+                while self._pending < self._flush_max_pending and not self._writer_stop:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._dirty.wait(remaining)
+                self._pending = 0
 
-        with self._lock:
-            self.sessions[session_id] = {
-                "consent": consent,
-                "created_at": datetime.now(timezone.utc).isoformat(),
-                "expires_at": (
-                    datetime.now(timezone.utc) + timedelta(hours=1)
-                ).isoformat(),
-                "demographics": None,
-                "fingerprints": {},
-                "predictions": None,
-                "completed": False,
-            }
             self._save_sessions()
 
+    def flush(self) -> None:
+        """Durability barrier: write any pending changes before returning."""
+        with self._dirty:
+            self._pending = 0
+        self._save_sessions()
+
+    def close(self) -> None:
+        """Stop background threads and flush pending changes."""
+        self.stop_sweeper()
+        with self._dirty:
+            self._writer_stop = True
+            self._dirty.notify_all()
+            writer, self._writer_thread = self._writer_thread, None
+        if writer:
+            writer.join(timeout=5)
+        self.flush()
+
+    def _mutate(self, session_id: str, changes) -> Optional[Dict]:
+        """Apply a copy-on-write update to a live session and persist it.
+
+        ``changes`` receives the current snapshot and returns the fields to
+        replace. Returns the new snapshot, or None if the session is gone.
+        """
+        if not self.get_session(session_id):
+            return None
+
+        with self._session_lock(session_id):
+            current = self.sessions.get(session_id)
+            if current is None:
+                return None
+            updated = {**current, **changes(current)}
+            self.sessions[session_id] = updated
+            self._bump_version()
+            self._index_session(session_id, updated)
+
+        self._persist()
+        return updated
+
+    def create_session(self, consent: bool, location: Optional[Dict] = None) -> str:
+        """Create new session with consent flag and optional kiosk location."""
+        session_id = str(uuid.uuid4())
+        session = {
+            "consent": consent,
+            "location": location,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "expires_at": (
+                datetime.now(timezone.utc) + timedelta(hours=SESSION_TIMEOUT_HOURS)
+            ).isoformat(),
+            "demographics": None,
+            "fingerprints": {},
+            "predictions": None,
+            "completed": False,
+        }
+
+        with self._session_lock(session_id):
+            self.sessions[session_id] = session
+            self._bump_version()
+            self._index_session(session_id, session)
+        self._persist()
+
         logger.info(f"Session created: {session_id} (consent={consent})")
         return session_id
 
     def get_session(self, session_id: str) -> Optional[Dict]:
-        """Retrieve session data."""
+        """Retrieve a read-only snapshot of the session data."""
         session = self.sessions.get(session_id)
 
         if not session:
             return None
 
-        expires_at = datetime.fromisoformat(session["expires_at"])
-        if datetime.now(timezone.utc) > expires_at:
+        expires_ts = self._expiry.get(session_id)
+        if expires_ts is None:
+            self._index_session(session_id, session)
+            expires_ts = self._expiry[session_id]
+        if time.time() > expires_ts:
             self.delete_session(session_id)
             return None
 
         return session
 
-    def update_demographics(self, session_id: str, data: dict):
+    def update_session(self, session_id: str, **fields) -> Optional[Dict]:
+        """Replace top-level session fields (e.g. consent, pdf_url)."""
+        return self._mutate(session_id, lambda _current: fields)
+
+    def update_demographics(self, session_id: str, data: dict) -> Optional[Dict]:
         """Store demographics in session."""
-        session = self.get_session(session_id)
-        if session:
-            with self._lock:
-                session["demographics"] = data
-                self.sessions[session_id] = session
-                self._save_sessions()
-
-    def add_fingerprint(self, session_id: str, finger_name: str, image_data: str):
-        """Store fingerprint image in session (encrypted)."""
-        session = self.get_session(session_id)
-        if session:
-            encrypted_data = self.cipher.encrypt(image_data.encode())
-            with self._lock:
-                session["fingerprints"][finger_name] = encrypted_data.decode()
-                self.sessions[session_id] = session
-                self._save_sessions()
+        return self._mutate(session_id, lambda _current: {"demographics": data})
+
+    def add_fingerprint(
+        self, session_id: str, finger_name: str, image_data: str
+    ) -> Optional[Dict]:
+        """Store a base64 fingerprint image in session (encrypted)."""
+        return self.add_fingerprint_bytes(
+            session_id, finger_name, base64_to_bytes(image_data)
+        )
 
-    def get_fingerprints(self, session_id: str) -> dict[str, str]:
-        """Retrieve decrypted fingerprint images."""
+    def add_fingerprint_bytes(
+        self, session_id: str, finger_name: str, image_bytes: bytes
+    ) -> Optional[Dict]:
+        """Store raw fingerprint image bytes as an encrypted blob.
+
+        The session only keeps the blob metadata; the image itself lives in
+        the blob store.
+        """
+        if not self.get_session(session_id):
+            return None
+
+        blob_meta = self.blob_store.put(session_id, finger_name, image_bytes)
+        session = self._mutate(
+            session_id,
+            lambda current: {
+                "fingerprints": {
+                    **current["fingerprints"],
+                    finger_name: blob_meta,
+                }
+            },
+        )
+        if session is None:
+            # Deleted while the blob was written; don't leave it orphaned
+            self.blob_store.delete_session(session_id)
+        return session
+
+    def add_fingerprints_bytes(
+        self, session_id: str, images: dict[str, bytes]
+    ) -> Optional[Dict]:
+        """Store several raw fingerprint images with a single session update."""
+        if not self.get_session(session_id):
+            return None
+
+        blob_meta = {
+            finger_name: self.blob_store.put(session_id, finger_name, image_bytes)
+            for finger_name, image_bytes in images.items()
+        }
+        session = self._mutate(
+            session_id,
+            lambda current: {"fingerprints": {**current["fingerprints"], **blob_meta}},
+        )
+        if session is None:
+            self.blob_store.delete_session(session_id)
+        return session
+
+    def get_fingerprint_bytes(self, session_id: str) -> dict[str, bytes]:
+        """Retrieve decrypted raw fingerprint images."""
         session = self.get_session(session_id)
         if not session:
             return {}
 
-        decrypted = {}
-        for finger, encrypted_data in session["fingerprints"].items():
-            decrypted_bytes = self.cipher.decrypt(encrypted_data.encode())
-            decrypted[finger] = decrypted_bytes.decode()
+        images = {}
+        for finger, entry in session["fingerprints"].items():
+            if isinstance(entry, dict):
+                images[finger] = self.blob_store.get(session_id, finger)
+            else:
+                # Legacy entry: Fernet-encrypted base64 string
+                decrypted = self.cipher.decrypt(entry.encode()).decode()
+                images[finger] = base64_to_bytes(decrypted)
 
-        return decrypted
+        return images
 
-    def store_predictions(self, session_id: str, predictions: dict):
+    def get_fingerprints(self, session_id: str) -> dict[str, str]:
+        """Retrieve decrypted fingerprint images as base64 strings."""
+        return {
+            finger: base64.b64encode(data).decode()
+            for finger, data in self.get_fingerprint_bytes(session_id).items()
+        }
+
+    def store_predictions(self, session_id: str, predictions: dict) -> Optional[Dict]:
         """Store analysis results."""
-        session = self.get_session(session_id)
-        if session:
-            with self._lock:
-                session["predictions"] = predictions
-                session["completed"] = True
-                self.sessions[session_id] = session
-                self._save_sessions()
+        return self._mutate(
+            session_id,
+            lambda _current: {"predictions": predictions, "completed": True},
+        )
+
+    def update_predictions(self, session_id: str, fields: dict) -> Optional[Dict]:
+        """Merge fields into stored predictions (e.g. a late explanation)."""
+        return self._mutate(
+            session_id,
+            lambda current: {
+                "predictions": {**(current["predictions"] or {}), **fields}
+            },
+        )
 
     def delete_session(self, session_id: str):
         """Delete session (for non-consent or after completion)."""
-        with self._lock:
-            if session_id in self.sessions:
-                del self.sessions[session_id]
-                self._save_sessions()
-                logger.info(f"Session deleted: {session_id}")
-
-    def cleanup_expired(self):
+        with self._session_lock(session_id):
+            removed = self.sessions.pop(session_id, None)
+            if removed is not None:
+                self._bump_version()
+                self._unindex_session(session_id)
+
+        if removed is not None:
+            self.blob_store.delete_session(session_id)
+            self._persist()
+            logger.info(f"Session deleted: {session_id}")
+
+    def sweep_expired(self, now: Optional[float] = None) -> int:
+        """Evict every expired session with a single store write.
+
+        Pops due entries off the expiry heap, so the cost is proportional to
+        the number of expired (plus stale) entries rather than to all sessions.
+        Returns the number of sessions evicted.
+        """
+        now = time.time() if now is None else now
+
+        due = []
+        with self._index_lock:
+            while self._expiry_heap and self._expiry_heap[0][0] <= now:
+                expires_ts, session_id = heapq.heappop(self._expiry_heap)
+                if self._expiry.get(session_id) != expires_ts:
+                    continue  # Stale entry (deleted or rescheduled session)
+                del self._expiry[session_id]
+                self._session_bytes.pop(session_id, None)
+                due.append(session_id)
+
+        evicted = 0
+        for session_id in due:
+            with self._session_lock(session_id):
+                # A refresh may have landed between the heap pop and here
+                current = self.sessions.get(session_id)
+                if current is not None and self._expires_ts(current) > now:
+                    self._index_session(session_id, current)
+                    continue
+                removed = self.sessions.pop(session_id, None)
+                self._unindex_session(session_id)
+            if removed is not None:
+                self.blob_store.delete_session(session_id)
+                evicted += 1
+
+        if evicted:
+            with self._index_lock:
+                self._version += 1
+                self._evictions_total += evicted
+                self._eviction_times.extend([now] * evicted)
+            self._persist()
+            logger.info(f"Expired sessions evicted: {evicted}")
+        return evicted
+
+    def cleanup_expired(self) -> int:
         """Remove expired sessions."""
-        now = datetime.now(timezone.utc)
-        expired = [
-            sid
-            for sid, session in self.sessions.items()
-            if datetime.fromisoformat(session["expires_at"]) < now
-        ]
+        return self.sweep_expired()
 
-        for sid in expired:
-            self.delete_session(sid)
+    def start_sweeper(self, interval_seconds: float) -> None:
+        """Start the background thread that evicts expired sessions."""
+        if self._sweeper_thread and self._sweeper_thread.is_alive():
+            return
+
+        self._sweeper_stop.clear()
+
+        def _run():
+            while not self._sweeper_stop.wait(interval_seconds):
+                try:
+                    self.sweep_expired()
+                except Exception as e:
+                    logger.warning("Session sweeper failed: %s", e)
+
+        self._sweeper_thread = threading.Thread(
+            target=_run, name="session-sweeper", daemon=True
+        )
+        self._sweeper_thread.start()
+
+    def stop_sweeper(self) -> None:
+        """Stop the background sweeper thread (used by tests and shutdown)."""
+        self._sweeper_stop.set()
+        if self._sweeper_thread:
+            self._sweeper_thread.join(timeout=5)
+            self._sweeper_thread = None
+
+    def get_metrics(self) -> dict:
+        """Live session count, payload bytes held and recent evictions."""
+        cutoff = time.time() - 60
+        with self._index_lock:
+            while self._eviction_times and self._eviction_times[0] < cutoff:
+                self._eviction_times.popleft()
+            return {
+                "live_sessions": len(self.sessions),
+                "bytes_held": sum(self._session_bytes.values()),
+                "evictions_per_minute": len(self._eviction_times),
+                "evictions_total": self._evictions_total,
+                "expiry_heap_size": len(self._expiry_heap),
+                "persist_requests": self._persist_requests,
+                "store_writes": self._store_writes,
+                "store_bytes_written": self._bytes_written,
+                "write_amplification": (
+                    self._store_writes / self._persist_requests
+                    if self._persist_requests
+                    else 0.0
+                ),
+                "blobs": self.blob_store.get_metrics(),
+            }
 
 
 _session_manager = None
@@ -202,4 +599,12 @@ def get_session_manager() -> SessionManager:
     global _session_manager  # noqa: PLW0603
     if _session_manager is None:
         _session_manager = SessionManager()
+        interval = float(
+            os.getenv(
+                "SESSION_SWEEP_INTERVAL_SECONDS",
+                str(SESSION_CLEANUP_INTERVAL_MINUTES * 60),
+            )
+        )
+        if interval > 0:
+            _session_manager.start_sweeper(interval)
     return _session_manager
@@ -0,0 +1,83 @@
+"""Coalesce concurrent identical calls onto a single execution.
+
+The first caller for a key becomes the leader and runs the work; callers that
+arrive while it is in flight wait on the leader's future and share its result
+(or its exception). The registry only spans one process; across workers the
+persistent response cache picks up the result once the leader stores it.
+"""
+
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class SingleFlight:
+    """In-flight registry of futures keyed by a normalized request key."""
+
+    def __init__(self):
+        self._calls: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._leaders = 0
+        self._coalesced = 0
+
+    def acquire(self, key: str) -> Tuple[Future, bool]:
+        """Join the flight for ``key``; returns (future, is_leader).
+
+        A leader must call resolve() with the outcome, including on failure.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self._coalesced += 1
+                return future, False
+
+            future = Future()
+            self._calls[key] = future
+            self._leaders += 1
+            return future, True
+
+    def resolve(
+        self,
+        key: str,
+        future: Future,
+        value: Any = None,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        """Publish the leader's outcome to waiters and close the flight."""
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+        if error is None:
+            future.set_result(value)
+        elif isinstance(error, Exception):
+            future.set_exception(error)
+        else:
+            # e.g. GeneratorExit when a streaming leader is abandoned
+            future.set_exception(RuntimeError(f"In-flight call {key} was abandoned"))
+
+    def do(self, key: str, fn: Callable[[], Any], timeout: Optional[float] = None):
+        """Run ``fn`` once for all concurrent callers with the same key."""
+        future, leader = self.acquire(key)
+        if not leader:
+            return future.result(timeout)
+
+        try:
+            value = fn()
+        except BaseException as e:
+            self.resolve(key, future, error=e)
+            raise
+        self.resolve(key, future, value)
+        return value
+
+    def get_metrics(self) -> dict:
+        with self._lock:
+            in_flight = len(self._calls)
+            leaders, coalesced = self._leaders, self._coalesced
+        calls = leaders + coalesced
+        return {
+            "in_flight": in_flight,
+            "leaders": leaders,
+            "coalesced": coalesced,
+            "coalesce_rate": round(coalesced / calls, 4) if calls else 0.0,
+        }
@@ -1,13 +1,35 @@
 """Utility modules for the API."""
 
 from .image_processing import (
+    ImageDecoder,
+    ImageHeader,
+    assess_fingerprint_quality,
+    base64_to_bytes,
     decode_base64_image,
     decode_base64_images,
+    decode_fingerprints_from_bytes,
     decode_fingerprints_from_dict,
+    decode_image_bytes,
+    decode_images_bytes,
+    decode_images_parallel,
+    get_image_decoder,
+    get_quality_decoder,
+    validate_image_header,
 )
 
 __all__ = [
+    "ImageDecoder",
+    "ImageHeader",
+    "assess_fingerprint_quality",
+    "base64_to_bytes",
     "decode_base64_image",
     "decode_base64_images",
+    "decode_fingerprints_from_bytes",
     "decode_fingerprints_from_dict",
+    "decode_image_bytes",
+    "decode_images_bytes",
+    "decode_images_parallel",
+    "get_image_decoder",
+    "get_quality_decoder",
+    "validate_image_header",
 ]
@@ -3,26 +3,147 @@
 import base64
 import io
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 
 import numpy as np
 from PIL import Image
 
 from ..constants import (
     ALLOWED_IMAGE_FORMATS,
+    ALLOWED_IMAGE_MODES,
+    BULK_DECODE_WORKERS,
+    MAX_IMAGE_DIMENSION,
     MAX_IMAGE_SIZE_BYTES,
     MAX_IMAGE_SIZE_MB,
+    MODEL_INPUT_SIZE,
+    QUALITY_BLOCK_SIZE,
+    QUALITY_FOREGROUND_STD,
+    QUALITY_MIN_COHERENCE,
+    QUALITY_MIN_CONTRAST,
+    QUALITY_MIN_COVERAGE,
+    QUALITY_MIN_SHARPNESS,
 )
 from ..exceptions import ImageSizeLimitError, InvalidImageError, NoValidImagesError
 
 logger = logging.getLogger(__name__)
 
+# Leading bytes of the formats in ALLOWED_IMAGE_FORMATS
+IMAGE_MAGIC_BYTES = {
+    b"\x89PNG\r\n\x1a\n": "PNG",
+    b"\xff\xd8\xff": "JPEG",
+    b"BM": "BMP",
+}
 
-def decode_base64_image(b64_string: str) -> np.ndarray:
+
+def base64_to_bytes(b64_string: str) -> bytes:
     """
-    Decode a base64 string to numpy array.
+    Decode a base64 image string (with or without data URI prefix) to bytes.
+
+    Raises:
+        InvalidImageError: If the string is not valid base64
+        ImageSizeLimitError: If the decoded size would exceed the limit
+    """
+    # Remove data URI prefix if present
+    if "," in b64_string:
+        b64_string = b64_string.split(",", 1)[1]
+
+    # Reject oversized payloads before spending CPU on the decode
+    decoded_size = len(b64_string) * 3 // 4
+    if decoded_size > MAX_IMAGE_SIZE_BYTES:
+        raise ImageSizeLimitError(decoded_size / (1024 * 1024), MAX_IMAGE_SIZE_MB)
+
+    try:
+        return base64.b64decode(b64_string)
+    except base64.binascii.Error as e:
+        raise InvalidImageError(f"Invalid base64 encoding: {e!s}") from e
+
+
+class ImageHeader:
+    """Format, size and mode read from an image header, plus the lazy handle.
+
+    ``image`` is the PIL image opened by validate_image_header(); its pixels
+    have not been decoded yet, so the decoder can pick up from here instead
+    of parsing the header again.
+    """
+
+    def __init__(self, image: Image.Image, num_bytes: int):
+        self.image = image
+        self.format = image.format
+        self.width, self.height = image.size
+        self.mode = image.mode
+        self.num_bytes = num_bytes
+
+    def to_dict(self) -> dict:
+        return {
+            "format": self.format,
+            "width": self.width,
+            "height": self.height,
+            "mode": self.mode,
+            "bytes": self.num_bytes,
+        }
+
+
+def validate_image_header(img_bytes: bytes) -> ImageHeader:
+    """
+    Validate an image from its magic bytes and header, without decoding pixels.
 
     Args:
-        b64_string: Base64 encoded image string (with or without data URI prefix)
+        img_bytes: Encoded image file contents
+
+    Returns:
+        ImageHeader: Verified header info, to hand to decode_image_bytes()
+
+    Raises:
+        InvalidImageError: If the bytes are not an allowed, sane image
+        ImageSizeLimitError: If the file exceeds the size limit
+    """
+    if len(img_bytes) > MAX_IMAGE_SIZE_BYTES:
+        raise ImageSizeLimitError(len(img_bytes) / (1024 * 1024), MAX_IMAGE_SIZE_MB)
+
+    if not any(img_bytes.startswith(magic) for magic in IMAGE_MAGIC_BYTES):
+        raise InvalidImageError("Unrecognized image signature")
+
+    try:
+        img = Image.open(io.BytesIO(img_bytes))
+    except (OSError, ValueError) as e:
+        raise InvalidImageError(f"Cannot open image: {e!s}") from e
+
+    if img.format not in ALLOWED_IMAGE_FORMATS:
+        raise InvalidImageError(
+            f"Unsupported format: {img.format}. Allowed: {ALLOWED_IMAGE_FORMATS}"
+        )
+    if img.mode not in ALLOWED_IMAGE_MODES:
+        raise InvalidImageError(f"Unsupported image mode: {img.mode}")
+
+    width, height = img.size
+    if not (0 < width <= MAX_IMAGE_DIMENSION and 0 < height <= MAX_IMAGE_DIMENSION):
+        raise InvalidImageError(
+            f"Invalid image size {width}x{height} (max {MAX_IMAGE_DIMENSION}px)"
+        )
+
+    return ImageHeader(img, len(img_bytes))
+
+
+def decode_image_bytes(
+    img_bytes: bytes,
+    target_size: Optional[tuple[int, int]] = None,
+    mode: Optional[str] = None,
+    header: Optional[ImageHeader] = None,
+) -> np.ndarray:
+    """
+    Decode raw image bytes to numpy array.
+
+    Args:
+        img_bytes: Encoded image file contents (PNG, JPEG, BMP)
+        target_size: Smallest (width, height) the caller needs. JPEGs are
+            decoded directly at the largest 1/2, 1/4 or 1/8 scale that still
+            covers it; other formats are decoded at full size.
+        mode: PIL mode to decode into (e.g. "L"); None keeps the source mode
+        header: Result of validate_image_header() for these bytes; its checks
+            are not repeated and its opened image is decoded directly
 
     Returns:
         numpy.ndarray: Decoded image as numpy array
@@ -32,26 +153,29 @@ def decode_base64_image(b64_string: str) -> np.ndarray:
         ImageSizeLimitError: If image exceeds size limit
     """
     try:
-        # Remove data URI prefix if present
-        if "," in b64_string:
-            b64_string = b64_string.split(",", 1)[1]
-
-        # Decode base64
-        img_bytes = base64.b64decode(b64_string)
-
-        # Check file size
         size_mb = len(img_bytes) / (1024 * 1024)
-        if len(img_bytes) > MAX_IMAGE_SIZE_BYTES:
-            raise ImageSizeLimitError(size_mb, MAX_IMAGE_SIZE_MB)
+        if header is not None:
+            img = header.image
+        else:
+            # Check file size
+            if len(img_bytes) > MAX_IMAGE_SIZE_BYTES:
+                raise ImageSizeLimitError(size_mb, MAX_IMAGE_SIZE_MB)
 
-        # Open and validate image
-        img = Image.open(io.BytesIO(img_bytes))
+            # Open and validate image
+            img = Image.open(io.BytesIO(img_bytes))
 
-        # Validate format
-        if img.format and img.format not in ALLOWED_IMAGE_FORMATS:
-            raise InvalidImageError(
-                f"Unsupported format: {img.format}. Allowed: {ALLOWED_IMAGE_FORMATS}"
-            )
+            # Validate format
+            if img.format and img.format not in ALLOWED_IMAGE_FORMATS:
+                raise InvalidImageError(
+                    f"Unsupported format: {img.format}. "
+                    f"Allowed: {ALLOWED_IMAGE_FORMATS}"
+                )
+
+        # Reduced-scale DCT decode (no-op for non-JPEG formats)
+        if target_size is not None:
+            img.draft(mode or img.mode, target_size)
+        if mode is not None and img.mode != mode:
+            img = img.convert(mode)
 
         # Convert to numpy array
         img_array = np.array(img)
@@ -63,8 +187,6 @@ def decode_base64_image(b64_string: str) -> np.ndarray:
         logger.debug(f"Decoded image: shape={img_array.shape}, size={size_mb:.2f}MB")
         return img_array
 
-    except base64.binascii.Error as e:
-        raise InvalidImageError(f"Invalid base64 encoding: {e!s}") from e
     except OSError as e:
         raise InvalidImageError(f"Cannot open image: {e!s}") from e
     except Exception as e:
@@ -73,6 +195,23 @@ def decode_base64_image(b64_string: str) -> np.ndarray:
         raise InvalidImageError(f"Image decoding failed: {e!s}") from e
 
 
+def decode_base64_image(b64_string: str) -> np.ndarray:
+    """
+    Decode a base64 string to numpy array.
+
+    Args:
+        b64_string: Base64 encoded image string (with or without data URI prefix)
+
+    Returns:
+        numpy.ndarray: Decoded image as numpy array
+
+    Raises:
+        InvalidImageError: If image cannot be decoded or is invalid
+        ImageSizeLimitError: If image exceeds size limit
+    """
+    return decode_image_bytes(base64_to_bytes(b64_string))
+
+
 def decode_base64_images(b64_strings: list[str]) -> list[np.ndarray]:
     """
     Decode multiple base64 images, skipping invalid ones.
@@ -86,23 +225,19 @@ def decode_base64_images(b64_strings: list[str]) -> list[np.ndarray]:
     Raises:
         NoValidImagesError: If no valid images could be decoded
     """
-    images = []
-    errors = []
+    images_bytes = []
 
     for idx, b64_string in enumerate(b64_strings):
         try:
-            img_array = decode_base64_image(b64_string)
-            images.append(img_array)
+            images_bytes.append(base64_to_bytes(b64_string))
         except (InvalidImageError, ImageSizeLimitError) as e:
             logger.warning(f"Failed to decode image {idx}: {e}")
-            errors.append((idx, str(e)))
             continue
 
-    if len(images) == 0:
+    if not images_bytes:
         raise NoValidImagesError()
 
-    logger.info(f"Decoded {len(images)}/{len(b64_strings)} images successfully")
-    return images
+    return decode_images_bytes(images_bytes)
 
 
 def decode_fingerprints_from_dict(fingerprints_dict: dict) -> list[np.ndarray]:
@@ -120,3 +255,260 @@ def decode_fingerprints_from_dict(fingerprints_dict: dict) -> list[np.ndarray]:
     """
     b64_images = list(fingerprints_dict.values())
     return decode_base64_images(b64_images)
+
+
+def decode_images_bytes(images_bytes: list[bytes]) -> list[np.ndarray]:
+    """
+    Decode multiple raw images in parallel, skipping invalid ones.
+
+    Args:
+        images_bytes: List of encoded image file contents
+
+    Returns:
+        list[np.ndarray]: Decoded images as numpy arrays, in input order
+
+    Raises:
+        NoValidImagesError: If no valid images could be decoded
+    """
+    decoded, _errors, _timings = get_image_decoder().decode_many(
+        dict(enumerate(images_bytes))
+    )
+    images = [decoded[idx] for idx in sorted(decoded)]
+
+    if len(images) == 0:
+        raise NoValidImagesError()
+
+    logger.info(f"Decoded {len(images)}/{len(images_bytes)} images successfully")
+    return images
+
+
+def decode_fingerprints_from_bytes(fingerprints_dict: dict) -> list[np.ndarray]:
+    """
+    Decode fingerprints from a dictionary of finger names to raw image bytes.
+
+    Args:
+        fingerprints_dict: Dict mapping finger names to encoded image bytes
+
+    Returns:
+        list[np.ndarray]: List of decoded fingerprint images
+
+    Raises:
+        NoValidImagesError: If no valid images could be decoded
+    """
+    return decode_images_bytes(list(fingerprints_dict.values()))
+
+
+def decode_images_parallel(
+    images: dict[str, bytes],
+    decoder: Optional["ImageDecoder"] = None,
+) -> tuple[dict[str, np.ndarray], dict[str, str], dict[str, ImageHeader]]:
+    """
+    Validate headers, then decode the survivors on the shared decoder pool.
+
+    Args:
+        images: Dict mapping names (e.g. finger names) to encoded image bytes
+        decoder: Decoder to use; defaults to the full-resolution one
+
+    Returns:
+        tuple: (decoded images by name, error messages by name,
+        verified headers by name)
+    """
+    headers: dict[str, ImageHeader] = {}
+    errors: dict[str, str] = {}
+    for name, data in images.items():
+        try:
+            headers[name] = validate_image_header(data)
+        except (InvalidImageError, ImageSizeLimitError) as e:
+            errors[name] = e.message
+
+    decoded, decode_errors, _timings = (decoder or get_image_decoder()).decode_many(
+        {name: images[name] for name in headers}, headers
+    )
+    errors.update(decode_errors)
+    return decoded, errors, headers
+
+
+def _block_sums(values: np.ndarray, block: int) -> np.ndarray:
+    """Sum a square array over non-overlapping block x block tiles."""
+    n = values.shape[0] // block
+    return values.reshape(n, block, n, block).sum(axis=(1, 3))
+
+
+def assess_fingerprint_quality(image: np.ndarray) -> dict:
+    """
+    Score a fingerprint scan before it is sent to the models.
+
+    All measures are computed on the 128x128 grayscale tensor the CNNs see:
+
+    - sharpness: variance of the Laplacian (blur drives it towards 0)
+    - contrast: spread between the 5th and 95th intensity percentiles
+    - coverage: fraction of blocks whose intensity varies like ridges do
+    - coherence: mean ridge-orientation coherence of the foreground blocks
+      (structure-tensor anisotropy; ~1 for clean ridges, ~0 for noise)
+
+    Args:
+        image: Decoded image (grayscale or color)
+
+    Returns:
+        dict: The four measures, an overall ``score`` in [0, 1], ``acceptable``
+        and the list of failed checks in ``issues``
+    """
+    import cv2
+
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+    gray = cv2.resize(
+        gray.astype(np.float32) / 255.0, MODEL_INPUT_SIZE, interpolation=cv2.INTER_AREA
+    )
+
+    sharpness = float(cv2.Laplacian(gray, cv2.CV_32F).var())
+    p5, p95 = np.percentile(gray, (5, 95))
+    contrast = float(p95 - p5)
+
+    block = QUALITY_BLOCK_SIZE
+    area = block * block
+    mean = _block_sums(gray, block) / area
+    block_std = np.sqrt(
+        np.maximum(_block_sums(gray * gray, block) / area - mean * mean, 0)
+    )
+    foreground = block_std > QUALITY_FOREGROUND_STD
+    coverage = float(foreground.mean())
+
+    gx = cv2.Sobel(gray, cv2.CV_32F, 1, 0, ksize=3)
+    gy = cv2.Sobel(gray, cv2.CV_32F, 0, 1, ksize=3)
+    gxx = _block_sums(gx * gx, block)
+    gyy = _block_sums(gy * gy, block)
+    gxy = _block_sums(gx * gy, block)
+    block_coherence = np.sqrt((gxx - gyy) ** 2 + 4 * gxy**2) / (gxx + gyy + 1e-9)
+    coherence = float(block_coherence[foreground].mean()) if foreground.any() else 0.0
+
+    checks = {
+        "sharpness": (sharpness, QUALITY_MIN_SHARPNESS),
+        "contrast": (contrast, QUALITY_MIN_CONTRAST),
+        "coverage": (coverage, QUALITY_MIN_COVERAGE),
+        "coherence": (coherence, QUALITY_MIN_COHERENCE),
+    }
+    issues = [name for name, (value, minimum) in checks.items() if value < minimum]
+    # Each measure counts fully once it reaches twice its minimum
+    score = float(
+        np.mean([min(value / (2 * minimum), 1.0) for value, minimum in checks.values()])
+    )
+
+    return {
+        "score": round(score, 3),
+        "acceptable": not issues,
+        "issues": issues,
+        **{name: round(value, 4) for name, (value, _minimum) in checks.items()},
+    }
+
+
+class ImageDecoder:
+    """
+    Reusable parallel decoder for model-bound fingerprint images.
+
+    PIL releases the GIL while decoding, so a small long-lived thread pool
+    overlaps the per-image cost of a ten-finger batch. By default images are
+    decoded at full resolution in their source mode, exactly as the models
+    (and the blood group support set) were built against. ``target_size``
+    and ``mode`` opt into JPEG draft decoding at a reduced DCT scale and
+    straight into e.g. grayscale, for callers that don't feed the models.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = BULK_DECODE_WORKERS,
+        target_size: Optional[tuple[int, int]] = None,
+        mode: Optional[str] = None,
+    ):
+        self.max_workers = max_workers
+        self.target_size = target_size
+        self.mode = mode
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="img-decode"
+        )
+
+    def decode(
+        self, img_bytes: bytes, header: Optional[ImageHeader] = None
+    ) -> np.ndarray:
+        """Decode one image in the calling thread."""
+        return decode_image_bytes(img_bytes, self.target_size, self.mode, header)
+
+    def _decode_timed(
+        self, img_bytes: bytes, header: Optional[ImageHeader]
+    ) -> tuple[np.ndarray, float]:
+        start = time.perf_counter()
+        image = self.decode(img_bytes, header)
+        return image, (time.perf_counter() - start) * 1000
+
+    def decode_many(
+        self, images: dict, headers: Optional[dict] = None
+    ) -> tuple[dict, dict, dict]:
+        """
+        Decode named images concurrently.
+
+        Args:
+            images: Dict mapping names to encoded image bytes
+            headers: Optional validate_image_header() results by name
+
+        Returns:
+            tuple: (decoded arrays by name, error messages by name,
+            decode time in milliseconds by name)
+        """
+        decoded: dict = {}
+        errors: dict = {}
+        timings_ms: dict = {}
+
+        futures = {
+            name: self._executor.submit(
+                self._decode_timed, data, (headers or {}).get(name)
+            )
+            for name, data in images.items()
+        }
+        for name, future in futures.items():
+            try:
+                decoded[name], timings_ms[name] = future.result()
+            except (InvalidImageError, ImageSizeLimitError) as e:
+                logger.warning(f"Failed to decode image {name}: {e}")
+                errors[name] = e.message
+
+        if timings_ms:
+            logger.debug(
+                f"Decoded {len(decoded)}/{len(images)} images, "
+                f"max {max(timings_ms.values()):.1f}ms per image"
+            )
+        return decoded, errors, timings_ms
+
+    def shutdown(self) -> None:
+        """Stop the worker threads."""
+        self._executor.shutdown(wait=True)
+
+
+_image_decoder = None
+_image_decoder_lock = threading.Lock()
+
+
+def get_image_decoder() -> ImageDecoder:
+    """Get or create the shared image decoder."""
+    global _image_decoder
+    if _image_decoder is None:
+        with _image_decoder_lock:
+            if _image_decoder is None:
+                _image_decoder = ImageDecoder()
+    return _image_decoder
+
+
+_quality_decoder = None
+
+
+def get_quality_decoder() -> ImageDecoder:
+    """Get or create the shared reduced decoder for the quality gate.
+
+    The gate only looks at the MODEL_INPUT_SIZE grayscale image, so JPEGs
+    are draft-decoded straight to that scale; model inputs still go through
+    get_image_decoder() at full resolution.
+    """
+    global _quality_decoder
+    if _quality_decoder is None:
+        with _image_decoder_lock:
+            if _quality_decoder is None:
+                _quality_decoder = ImageDecoder(target_size=MODEL_INPUT_SIZE, mode="L")
+    return _quality_decoder
@@ -1,24 +1,53 @@
 """Multi-step workflow API endpoints."""
 
+import io
+import json
 import logging
 import os
+import re
 from pathlib import Path
+from typing import Optional
 
 from django.conf import settings
-from django.http import FileResponse, HttpResponseRedirect, JsonResponse
+from django.http import (
+    FileResponse,
+    HttpResponse,
+    HttpResponseRedirect,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from ninja import Router
 
 from storage import get_storage
 
-from .gemini_service import get_gemini_service
+from .artifact_service import get_artifact_service
+from .directory import get_directory
+from .explanation_corpus import get_explanation_corpus
+from .explanation_service import (
+    STATUS_PENDING,
+    STATUS_READY,
+    fallback_explanation,
+    get_explanation_service,
+)
+from .facility_recommender import get_facility_recommender
+from .geo_index import (
+    KIND_BLOOD_CENTER,
+    KIND_HOSPITAL,
+    KIND_LABORATORY,
+    get_geo_index,
+    resolve_location,
+)
 from .pdf_schemas import PDFGenerateResponse
 from .pdf_service import get_pdf_generator
+from .report_service import build_report_spec, get_report_service
 from .security_utils import sanitize_ai_content
 from .session_manager import get_session_manager
 from .workflow_schemas import (
     AnalysisResponse,
+    BulkFingerprintResponse,
     ConsentUpdateRequest,
     DemographicsRequest,
+    ExplanationStatusResponse,
     FingerprintRequest,
     FingerprintResponse,
     ResultsResponse,
@@ -49,9 +78,16 @@ def _get_public_base_url(request) -> str:
 
 @router.post("/start", response=SessionStartResponse, tags=["Workflow"])
 def start_session(request, data: SessionStartRequest):
-    """Step 0: Create session with user consent."""
+    """Step 0: Create session with user consent and kiosk location."""
+    from .exceptions import ValidationError
+
+    try:
+        location = resolve_location(data.kiosk_id, data.latitude, data.longitude)
+    except ValidationError as e:
+        return JsonResponse({"error": e.message}, status=e.status_code)
+
     session_mgr = get_session_manager()
-    session_id = session_mgr.create_session(consent=data.consent)
+    session_id = session_mgr.create_session(consent=data.consent, location=location)
 
     return {
         "session_id": session_id,
@@ -97,9 +133,7 @@ def update_consent(request, session_id: str, data: ConsentUpdateRequest):
         return JsonResponse({"error": "Invalid or expired session"}, status=404)
 
     # Update consent in the session
-    session["consent"] = data.consent
-    session_mgr.sessions[session_id] = session
-    session_mgr._save_sessions()
+    session_mgr.update_session(session_id, consent=data.consent)
 
     logger.info(
         f"[CONSENT UPDATE] Session {session_id} consent updated to: {data.consent}"
@@ -144,6 +178,38 @@ def submit_demographics(request, session_id: str, data: DemographicsRequest):
     }
 
 
+def _assess_quality(
+    finger_name: str, image, reject: bool, header=None, image_bytes=b""
+) -> dict:
+    """Run the quality gate on a decoded scan (or decode it from bytes first).
+
+    Bytes are decoded with the reduced quality-gate decoder. Raises
+    LowQualityFingerprintError when ``reject`` is set and the scan fails;
+    otherwise the quality report is returned for the response.
+    """
+    from .exceptions import LowQualityFingerprintError
+    from .utils.image_processing import (
+        assess_fingerprint_quality,
+        get_quality_decoder,
+    )
+
+    if image is None:
+        image = get_quality_decoder().decode(image_bytes, header)
+
+    quality = assess_fingerprint_quality(image)
+    if not quality["acceptable"]:
+        logger.info(f"[QUALITY] {finger_name} below threshold: {quality['issues']}")
+        if reject:
+            raise LowQualityFingerprintError(finger_name, quality)
+    return quality
+
+
+def _low_quality_response(e):
+    return JsonResponse(
+        {"error": e.message, "quality": e.details["quality"]}, status=e.status_code
+    )
+
+
 @router.post(
     "/{session_id}/fingerprint", response=FingerprintResponse, tags=["Workflow"]
 )
@@ -155,7 +221,35 @@ def submit_fingerprint(request, session_id: str, data: FingerprintRequest):
     if not session:
         return JsonResponse({"error": "Invalid or expired session"}, status=404)
 
-    session_mgr.add_fingerprint(session_id, data.finger_name, data.image)
+    from .exceptions import (
+        ImageProcessingError,
+        LowQualityFingerprintError,
+    )
+    from .utils.image_processing import (
+        base64_to_bytes,
+        validate_image_header,
+    )
+
+    try:
+        image_bytes = base64_to_bytes(data.image)
+        header = validate_image_header(image_bytes)
+        quality = _assess_quality(
+            data.finger_name,
+            None,
+            data.reject_low_quality,
+            header=header,
+            image_bytes=image_bytes,
+        )
+    except LowQualityFingerprintError as e:
+        return _low_quality_response(e)
+    except ImageProcessingError as e:
+        return JsonResponse({"error": e.message}, status=e.status_code)
+
+    session = session_mgr.add_fingerprint_bytes(
+        session_id, data.finger_name, image_bytes
+    )
+    if not session:
+        return JsonResponse({"error": "Invalid or expired session"}, status=404)
 
     total = len(session["fingerprints"])
     remaining = max(0, 10 - total)
@@ -165,9 +259,330 @@ def submit_fingerprint(request, session_id: str, data: FingerprintRequest):
         "received": True,
         "total_collected": total,
         "remaining": remaining,
+        "quality": quality,
     }
 
 
+def _request_flag(request, name: str) -> bool:
+    """Boolean option from the query string or a form field."""
+    value = request.GET.get(name) or request.POST.get(name) or ""
+    return value.lower() in ("1", "true", "yes")
+
+
+def _read_raw_image(request) -> tuple:
+    """Pull (finger_name, image bytes) out of a multipart or octet-stream body.
+
+    Multipart files are handled by Django's upload handlers (spooled to disk
+    past FILE_UPLOAD_MAX_MEMORY_SIZE); octet-stream bodies are read in chunks
+    straight from the request stream, so neither path goes through
+    ``request.body`` or DATA_UPLOAD_MAX_MEMORY_SIZE. The finger name is
+    checked before any image bytes are read.
+    """
+    from .constants import (
+        FINGER_NAMES,
+        MAX_IMAGE_SIZE_BYTES,
+        MAX_IMAGE_SIZE_MB,
+        RAW_UPLOAD_CHUNK_SIZE,
+    )
+    from .exceptions import (
+        ImageSizeLimitError,
+        InvalidFingerNameError,
+        InvalidImageError,
+    )
+
+    content_type = request.content_type or ""
+
+    # Refuse declared-oversized bodies before reading them
+    declared = int(request.META.get("CONTENT_LENGTH") or 0)
+    if declared > MAX_IMAGE_SIZE_BYTES + RAW_UPLOAD_CHUNK_SIZE:
+        raise ImageSizeLimitError(declared / (1024 * 1024), MAX_IMAGE_SIZE_MB)
+
+    if content_type == "multipart/form-data":
+        finger_name = request.POST.get("finger_name") or request.GET.get("finger_name")
+        if finger_name not in FINGER_NAMES:
+            raise InvalidFingerNameError(finger_name)
+        upload = request.FILES.get("image")
+        if upload is None:
+            raise InvalidImageError("Missing 'image' file field")
+        if upload.size > MAX_IMAGE_SIZE_BYTES:
+            raise ImageSizeLimitError(upload.size / (1024 * 1024), MAX_IMAGE_SIZE_MB)
+        chunks = upload.chunks(RAW_UPLOAD_CHUNK_SIZE)
+    elif content_type in ("application/octet-stream", "image/png", "image/jpeg"):
+        finger_name = request.GET.get("finger_name")
+        if finger_name not in FINGER_NAMES:
+            raise InvalidFingerNameError(finger_name)
+        chunks = iter(lambda: request.read(RAW_UPLOAD_CHUNK_SIZE), b"")
+    else:
+        raise InvalidImageError(
+            "Expected multipart/form-data or application/octet-stream body"
+        )
+
+    buffer = bytearray()
+    for chunk in chunks:
+        buffer += chunk
+        if len(buffer) > MAX_IMAGE_SIZE_BYTES:
+            raise ImageSizeLimitError(len(buffer) / (1024 * 1024), MAX_IMAGE_SIZE_MB)
+
+    if not buffer:
+        raise InvalidImageError("Empty image body")
+
+    return finger_name, bytes(buffer)
+
+
+@router.post(
+    "/{session_id}/fingerprint/raw", response=FingerprintResponse, tags=["Workflow"]
+)
+def submit_fingerprint_raw(request, session_id: str):
+    """Step 2 (binary): Submit a fingerprint scan as raw image bytes.
+
+    Accepts ``multipart/form-data`` (``image`` file + ``finger_name`` field) or
+    ``application/octet-stream`` with ``?finger_name=``. Skips the base64/JSON
+    round trip of ``/fingerprint``. ``reject_low_quality=true`` refuses scans
+    that fail the quality gate.
+    """
+    from .exceptions import (
+        ImageProcessingError,
+        LowQualityFingerprintError,
+        ValidationError,
+    )
+    from .utils.image_processing import validate_image_header
+
+    session_mgr = get_session_manager()
+    if not session_mgr.get_session(session_id):
+        return JsonResponse({"error": "Invalid or expired session"}, status=404)
+
+    try:
+        finger_name, image_bytes = _read_raw_image(request)
+        header = validate_image_header(image_bytes)
+    except (ImageProcessingError, ValidationError) as e:
+        return JsonResponse({"error": e.message}, status=e.status_code)
+
+    try:
+        quality = _assess_quality(
+            finger_name,
+            None,
+            _request_flag(request, "reject_low_quality"),
+            header=header,
+            image_bytes=image_bytes,
+        )
+    except LowQualityFingerprintError as e:
+        return _low_quality_response(e)
+    except ImageProcessingError as e:
+        return JsonResponse({"error": e.message}, status=e.status_code)
+
+    session = session_mgr.add_fingerprint_bytes(session_id, finger_name, image_bytes)
+    if not session:
+        return JsonResponse({"error": "Invalid or expired session"}, status=404)
+
+    total = len(session["fingerprints"])
+
+    return {
+        "finger_name": finger_name,
+        "received": True,
+        "total_collected": total,
+        "remaining": max(0, 10 - total),
+        "quality": quality,
+    }
+
+
+def _open_bulk_archive(request) -> tuple:
+    """Buffer a zip upload and return (archive, file members).
+
+    Member count and total uncompressed size are checked against the
+    central directory, so an oversized or zip-bomb archive is refused
+    before anything is inflated.
+    """
+    import zipfile
+
+    from .constants import (
+        FINGER_NAMES,
+        MAX_IMAGE_SIZE_BYTES,
+        RAW_UPLOAD_CHUNK_SIZE,
+    )
+    from .exceptions import ImageSizeLimitError, InvalidImageError
+
+    max_archive = MAX_IMAGE_SIZE_BYTES * len(FINGER_NAMES)
+    buffer = io.BytesIO()
+    for chunk in iter(lambda: request.read(RAW_UPLOAD_CHUNK_SIZE), b""):
+        buffer.write(chunk)
+        if buffer.tell() > max_archive:
+            raise ImageSizeLimitError(
+                buffer.tell() / (1024 * 1024), max_archive / (1024 * 1024)
+            )
+    try:
+        archive = zipfile.ZipFile(buffer)
+    except zipfile.BadZipFile as e:
+        raise InvalidImageError(f"Bad archive: {e!s}") from e
+
+    members = [m for m in archive.infolist() if not m.is_dir()]
+    if len(members) > len(FINGER_NAMES):
+        archive.close()
+        raise InvalidImageError(
+            f"Archive has {len(members)} files; expected at most {len(FINGER_NAMES)}"
+        )
+    uncompressed = sum(
+        m.file_size for m in members if Path(m.filename).stem in FINGER_NAMES
+    )
+    if uncompressed > max_archive:
+        archive.close()
+        raise ImageSizeLimitError(
+            uncompressed / (1024 * 1024), max_archive / (1024 * 1024)
+        )
+    return archive, members
+
+
+def _read_bulk_images(request) -> tuple:
+    """Collect finger images from a bulk upload body.
+
+    Accepts ``multipart/form-data`` with one file field per finger (field
+    name = finger name) or an ``application/zip`` archive whose members are
+    named ``<finger_name>.<ext>``. Returns (images by finger, errors by
+    finger) where errors cover unknown, duplicate and oversized images;
+    those are never read into memory.
+    """
+    from .constants import (
+        FINGER_NAMES,
+        MAX_IMAGE_SIZE_BYTES,
+        MAX_IMAGE_SIZE_MB,
+        RAW_UPLOAD_CHUNK_SIZE,
+    )
+    from .exceptions import ImageSizeLimitError, InvalidImageError
+
+    images: dict = {}
+    errors: dict = {}
+    content_type = request.content_type or ""
+
+    def accept(name: str, size: int) -> bool:
+        """Record an error and return False for names/sizes we won't read."""
+        if name not in FINGER_NAMES:
+            errors[name] = f"Unknown finger_name: {name}"
+        elif name in images or name in errors:
+            images.pop(name, None)
+            errors[name] = f"Duplicate image for finger_name: {name}"
+        elif size > MAX_IMAGE_SIZE_BYTES:
+            errors[name] = ImageSizeLimitError(
+                size / (1024 * 1024), MAX_IMAGE_SIZE_MB
+            ).message
+        else:
+            return True
+        return False
+
+    if content_type == "multipart/form-data":
+        for name, uploads in request.FILES.lists():
+            for upload in uploads:
+                if accept(name, upload.size):
+                    images[name] = b"".join(upload.chunks(RAW_UPLOAD_CHUNK_SIZE))
+    elif content_type in ("application/zip", "application/x-zip-compressed"):
+        archive, members = _open_bulk_archive(request)
+        with archive:
+            for member in members:
+                name = Path(member.filename).stem
+                if accept(name, member.file_size):
+                    images[name] = archive.read(member)
+    else:
+        raise InvalidImageError("Expected multipart/form-data or application/zip body")
+
+    return images, errors
+
+
+@router.post(
+    "/{session_id}/fingerprints", response=BulkFingerprintResponse, tags=["Workflow"]
+)
+def submit_fingerprints_bulk(request, session_id: str):
+    """Step 2 (bulk): Submit all fingerprint scans in one request.
+
+    Images are decoded and validated in parallel and every valid finger is
+    stored with a single session write. Pass ``analyze=true`` (query or form
+    field) to run analysis immediately once all fingers are collected, and
+    ``reject_low_quality=true`` to refuse scans that fail the quality gate.
+    """
+    from .constants import REQUIRED_FINGERPRINTS_COUNT
+    from .exceptions import (
+        BaseAPIException,
+        ImageProcessingError,
+        LowQualityFingerprintError,
+    )
+    from .utils.image_processing import (
+        decode_images_parallel,
+        get_quality_decoder,
+    )
+
+    session_mgr = get_session_manager()
+    if not session_mgr.get_session(session_id):
+        return JsonResponse({"error": "Invalid or expired session"}, status=404)
+
+    try:
+        images, errors = _read_bulk_images(request)
+    except ImageProcessingError as e:
+        return JsonResponse({"error": e.message}, status=e.status_code)
+
+    # Decoded scans only feed the quality gate; the stored bytes are what
+    # the models decode later at full resolution
+    decoded, decode_errors, headers = decode_images_parallel(
+        images, get_quality_decoder()
+    )
+    errors.update(decode_errors)
+
+    reject = _request_flag(request, "reject_low_quality")
+    qualities = {}
+    for name in list(decoded):
+        try:
+            qualities[name] = _assess_quality(name, decoded[name], reject)
+        except LowQualityFingerprintError as e:
+            qualities[name] = e.details["quality"]
+            errors[name] = e.message
+            del decoded[name]
+
+    valid = {name: images[name] for name in decoded}
+    session = session_mgr.add_fingerprints_bytes(session_id, valid) if valid else None
+    if session is None:
+        session = session_mgr.get_session(session_id)
+    if not session:
+        return JsonResponse({"error": "Invalid or expired session"}, status=404)
+
+    results = [
+        {
+            "finger_name": name,
+            "valid": True,
+            "width": headers[name].width,
+            "height": headers[name].height,
+            "quality": qualities[name],
+        }
+        for name in decoded
+    ] + [
+        {
+            "finger_name": name,
+            "valid": False,
+            "error": error,
+            "quality": qualities.get(name),
+        }
+        for name, error in errors.items()
+    ]
+
+    total = len(session["fingerprints"])
+    response = {
+        "session_id": session_id,
+        "results": results,
+        "total_collected": total,
+        "remaining": max(0, REQUIRED_FINGERPRINTS_COUNT - total),
+    }
+
+    if _request_flag(request, "analyze") and not response["remaining"]:
+        # Reuse the decoded arrays when this request carried every finger
+        fingerprint_images = None
+        if set(session["fingerprints"]) <= set(decoded):
+            fingerprint_images = [decoded[name] for name in session["fingerprints"]]
+        try:
+            response["analysis"] = _run_analysis(session_id, fingerprint_images)
+        except Exception as e:
+            logger.error(f"❌ Bulk analysis failed for session {session_id}: {e}")
+            response["analysis_error"] = (
+                e.message if isinstance(e, BaseAPIException) else str(e)
+            )
+
+    return response
+
+
 def _validate_session_for_analysis(session_id: str):
     """Validate session exists and has required fingerprints."""
     from .constants import REQUIRED_FINGERPRINTS_COUNT  # noqa: PLC0415
@@ -193,10 +608,10 @@ def _validate_session_for_analysis(session_id: str):
 
 def _get_fingerprint_images(session_mgr, session_id: str):
     """Get and decode fingerprint images from session."""
-    from .utils.image_processing import decode_fingerprints_from_dict  # noqa: PLC0415
+    from .utils.image_processing import decode_fingerprints_from_bytes
 
-    fingerprints_dict = session_mgr.get_fingerprints(session_id)
-    fingerprint_images = decode_fingerprints_from_dict(fingerprints_dict)
+    fingerprints_dict = session_mgr.get_fingerprint_bytes(session_id)
+    fingerprint_images = decode_fingerprints_from_bytes(fingerprints_dict)
     return fingerprint_images
 
 
@@ -223,21 +638,40 @@ def _run_ml_predictions(demographics: dict, fingerprint_images: list):
     return diabetes_result, blood_group_result
 
 
-def _prepare_patient_data_for_gemini(
+def _build_explanation_request(
     demographics: dict, diabetes_result: dict, blood_group_result: dict
 ):
-    """Prepare patient data dictionary for Gemini API."""
+    """Build the analysis summary the explanation generators take."""
     return {
-        **demographics,
-        "pattern_arc": diabetes_result["pattern_counts"]["Arc"],
-        "pattern_whorl": diabetes_result["pattern_counts"]["Whorl"],
-        "pattern_loop": diabetes_result["pattern_counts"]["Loop"],
-        "risk_score": diabetes_result["risk_score"],
-        "risk_level": diabetes_result["risk_level"],
-        "blood_group": blood_group_result["blood_group"],
+        "diabetes_risk_score": diabetes_result["risk_score"],
+        "diabetes_risk_level": diabetes_result["risk_level"],
+        "predicted_blood_group": blood_group_result["blood_group"],
+        "pattern_counts": diabetes_result["pattern_counts"],
+        "bmi": demographics["bmi"],
+        "diabetes_confidence": diabetes_result.get("confidence", 0.0),
     }
 
 
+def _resolve_explanation(session_id: str, predictions: dict, demographics: dict):
+    """Final explanation text for results, waiting on a pending job.
+
+    Waits up to EXPLANATION_RESULTS_DEADLINE_SECONDS for the background job,
+    then falls back to the template explanation.
+    """
+    from .constants import EXPLANATION_RESULTS_DEADLINE_SECONDS
+
+    if predictions.get("explanation_status", "ready") != STATUS_PENDING:
+        return predictions["explanation"]
+
+    text = get_explanation_service().wait(
+        session_id, EXPLANATION_RESULTS_DEADLINE_SECONDS
+    )
+    if text is None:
+        logger.warning(f"🤖 Explanation not ready for {session_id}; using fallback")
+        text = fallback_explanation(predictions["explanation_request"], demographics)
+    return text
+
+
 def _build_predictions_dict(
     diabetes_result: dict, blood_group_result: dict, explanation: str
 ):
@@ -256,107 +690,105 @@ def _build_predictions_dict(
     }
 
 
-@router.post("/{session_id}/analyze", response=AnalysisResponse, tags=["Workflow"])
-def analyze_patient(request, session_id: str):
-    """Step 3 & 4: Run Pattern CNN + Blood Group CNN + Diabetes Model."""
-    import logging  # noqa: PLC0415
-
-    logger = logging.getLogger(__name__)
-
-    try:
-        logger.info(f"🎯 Starting analysis for session {session_id}")
+def _run_analysis(session_id: str, fingerprint_images: Optional[list] = None):
+    """Run ML predictions and the AI explanation, then store the results.
 
-        # Validate session and get required data
-        session, session_mgr = _validate_session_for_analysis(session_id)
+    Raises the API exceptions from validation and prediction; callers map
+    them to responses.
+    """
+    # Validate session and get required data
+    session, session_mgr = _validate_session_for_analysis(session_id)
 
-        # Get fingerprint images
+    # Get fingerprint images (bulk uploads pass the ones they just decoded)
+    if fingerprint_images is None:
         fingerprint_images = _get_fingerprint_images(session_mgr, session_id)
-        logger.info(f"📷 Loaded {len(fingerprint_images)} fingerprint images")
-
-        # Run ML predictions
-        demographics = session["demographics"]
-        logger.info("👤 Patient demographics loaded")
+    logger.info(f"📷 Loaded {len(fingerprint_images)} fingerprint images")
 
-        diabetes_result, blood_group_result = _run_ml_predictions(
-            demographics, fingerprint_images
-        )
-        logger.info(f"✅ ML predictions complete: Risk={diabetes_result['risk_level']}")
+    # Run ML predictions
+    demographics = session["demographics"]
+    logger.info("👤 Patient demographics loaded")
 
-        # Generate AI explanation
-        _prepare_patient_data_for_gemini(
-            demographics, diabetes_result, blood_group_result
-        )
-        gemini = get_gemini_service()
-        # Ensure we use the robust generate_patient_explanation method
-        explanation = gemini.generate_patient_explanation(
-            {
-                "diabetes_risk_score": diabetes_result["risk_score"],
-                "diabetes_risk_level": diabetes_result["risk_level"],
-                "predicted_blood_group": blood_group_result["blood_group"],
-                "pattern_counts": diabetes_result["pattern_counts"],
-                "bmi": demographics["bmi"],
-                "diabetes_confidence": diabetes_result.get("confidence", 0.0),
-            },
-            demographics,
-        )
-       # Sanitize AI-generated content to prevent XSS
-        explanation = sanitize_ai_content(explanation)
-        logger.info("🤖 AI explanation generated and sanitized")
-
-        # Use static facility list to avoid hitting API quota limits
-        # AI facility generation disabled to conserve API calls
-        logger.info(
-            f"🏥 Using static facility recommendations for {diabetes_result['risk_level']} risk"
-        )
-        from .constants import FACILITIES_DB  # noqa: PLC0415
+    diabetes_result, blood_group_result = _run_ml_predictions(
+        demographics, fingerprint_images
+    )
+    logger.info(f"✅ ML predictions complete: Risk={diabetes_result['risk_level']}")
 
-        nearby_facilities = FACILITIES_DB.get("Angeles", [])[
-            :3
-        ]  # Return first 3 from Angeles
-        logger.info(
-            f"✅ Provided {len(nearby_facilities)} static facility recommendations"
-        )
+    # Most inputs are covered by the precomputed corpus; misses are generated
+    # in the background (see explanation_service) and results go out now with
+    # explanation_status=pending
+    explanation_request = _build_explanation_request(
+        demographics, diabetes_result, blood_group_result
+    )
+    corpus_text = get_explanation_corpus().lookup(explanation_request, demographics)
+
+    # Ranked locally from the verified directories; no LLM call. With a kiosk
+    # location, nearer facilities rank higher and labs/blood centers are the
+    # nearest ones
+    location = session.get("location")
+    point = (location["lat"], location["lng"]) if location else None
+    nearby_facilities = get_facility_recommender().recommend(
+        diabetes_result["risk_level"],
+        city=location["city"] if location else None,
+        location=point,
+    )
+    nearby_laboratories = (
+        get_geo_index().nearest(KIND_LABORATORY, *point) if point else []
+    )
+    logger.info(
+        f"🏥 Ranked {len(nearby_facilities)} facilities for {diabetes_result['risk_level']} risk"
+    )
 
-        # Get blood donation centers (only if user is willing)
-        blood_centers = []
-        if demographics.get("willing_to_donate"):
-            from .constants import BLOOD_CENTERS_DB  # noqa: PLC0415
+    # Get blood donation centers (only if user is willing)
+    blood_centers = []
+    if demographics.get("willing_to_donate"):
+        from .constants import BLOOD_CENTERS_DB
 
-            logger.info(
-                "🩸 User willing to donate - providing blood center information"
-            )
-            blood_centers = BLOOD_CENTERS_DB
-            logger.info(f"✅ Provided {len(blood_centers)} blood donation centers")
+        logger.info("🩸 User willing to donate - providing blood center information")
+        if point:
+            blood_centers = get_geo_index().nearest(KIND_BLOOD_CENTER, *point)
         else:
-            logger.info("ℹ️ User not willing to donate - skipping blood centers")  # noqa: RUF001
-
-        # Build and store predictions
-        from .constants import (  # noqa: PLC0415
-            DIABETES_DOCTORS_DB,
-            HOSPITALS_DB,
-            LABORATORIES_DB,
-        )
+            blood_centers = BLOOD_CENTERS_DB
+        logger.info(f"✅ Provided {len(blood_centers)} blood donation centers")
+    else:
+        logger.info("ℹ️ User not willing to donate - skipping blood centers")
 
+    # Build and store predictions
+    if corpus_text:
         predictions = _build_predictions_dict(
-            diabetes_result, blood_group_result, explanation
+            diabetes_result, blood_group_result, sanitize_ai_content(corpus_text)
         )
-        predictions["blood_centers"] = blood_centers
-        predictions["nearby_facilities"] = nearby_facilities
-        # Include verified hospitals database so frontend can render full listings
-        predictions["hospitals_db"] = HOSPITALS_DB
-        # Include diabetes-related laboratories and doctors directories
-        predictions["laboratories_db"] = LABORATORIES_DB
-        predictions["diabetes_doctors_db"] = DIABETES_DOCTORS_DB
-        predictions["willing_to_donate"] = demographics.get("willing_to_donate", False)
-        session_mgr.store_predictions(session_id, predictions)
+        predictions["explanation_status"] = STATUS_READY
+    else:
+        predictions = _build_predictions_dict(diabetes_result, blood_group_result, "")
+        predictions["explanation_status"] = STATUS_PENDING
+    predictions["explanation_request"] = explanation_request
+    # Facilities are {"id", "distance_km"} references; the frontend renders
+    # them (and the full listings) from GET /api/directory at this version
+    directory = get_directory()
+    predictions["directory_version"] = directory.version
+    predictions["blood_centers"] = directory.refs(KIND_BLOOD_CENTER, blood_centers)
+    predictions["nearby_facilities"] = directory.refs(KIND_HOSPITAL, nearby_facilities)
+    predictions["nearby_laboratories"] = directory.refs(
+        KIND_LABORATORY, nearby_laboratories
+    )
+    predictions["willing_to_donate"] = demographics.get("willing_to_donate", False)
+    # Storing predictions also marks the session as completed
+    session_mgr.store_predictions(session_id, predictions)
+    session_mgr.flush()
+    if not corpus_text:
+        get_explanation_service().submit(session_id, explanation_request, demographics)
+
+    logger.info(f"✅ Analysis completed for session {session_id}")
 
-        # Mark session as completed
-        session["completed"] = True
-        session_mgr.sessions[session_id] = session
+    return {"session_id": session_id, **predictions, "bmi": demographics["bmi"]}
 
-        logger.info(f"✅ Analysis completed for session {session_id}")
 
-        return {"session_id": session_id, **predictions, "bmi": demographics["bmi"]}
+@router.post("/{session_id}/analyze", response=AnalysisResponse, tags=["Workflow"])
+def analyze_patient(request, session_id: str):
+    """Step 3 & 4: Run Pattern CNN + Blood Group CNN + Diabetes Model."""
+    try:
+        logger.info(f"🎯 Starting analysis for session {session_id}")
+        return _run_analysis(session_id)
 
     except Exception as e:
         logger.error(f"❌ Analysis failed for session {session_id}: {e}", exc_info=True)
@@ -371,26 +803,90 @@ def analyze_patient(request, session_id: str):
         return JsonResponse({"error": f"Analysis failed: {e!s}"}, status=500)
 
 
-@router.get("/{session_id}/results", response=ResultsResponse, tags=["Workflow"])
-def get_results(request, session_id: str):
-    """Step 5: Get final results and optionally save to database."""
-    session_mgr = get_session_manager()
-    session = session_mgr.get_session(session_id)
-
-    if not session:
+@router.get(
+    "/{session_id}/explanation", response=ExplanationStatusResponse, tags=["Workflow"]
+)
+def get_explanation(request, session_id: str):
+    """Poll the background explanation started by analyze."""
+    job = get_explanation_service().get_job(session_id)
+    if job is not None:
+        return job.to_dict()
+
+    session = get_session_manager().get_session(session_id)
+    if not session or not session.get("predictions"):
         return JsonResponse({"error": "Invalid or expired session"}, status=404)
 
-    if not session.get("completed"):
-        return JsonResponse({"error": "Analysis not completed yet"}, status=400)
-
     predictions = session["predictions"]
-    demographics = session["demographics"]
+    return {
+        "session_id": session_id,
+        "status": predictions.get("explanation_status", "ready"),
+        "explanation": predictions.get("explanation") or None,
+    }
 
-    # ====== AUTO-GENERATE PDF + QR CODE (FOR ALL USERS) ======
-    logger.info(f"[PDF] Auto-generating PDF and QR code for session {session_id}")
-    
-    # Prepare patient data for PDF
-    patient_data = {
+
+def _sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _explanation_events(job):
+    """SSE frames for a job: its chunks as they arrive, then the outcome."""
+    from .constants import EXPLANATION_STREAM_TIMEOUT_SECONDS
+
+    for text in job.follow(EXPLANATION_STREAM_TIMEOUT_SECONDS):
+        yield _sse_event("chunk", {"text": text})
+
+    if job.done.is_set():
+        yield _sse_event("done", job.to_dict())
+    else:
+        yield _sse_event("timeout", job.to_dict())
+
+
+@router.get("/{session_id}/explanation/stream", tags=["Workflow"])
+def stream_explanation(request, session_id: str):
+    """Server-Sent Events feed of the explanation while the LLM writes it.
+
+    Emits ``chunk`` events carrying sanitized text as it arrives, then a
+    ``done`` event with the final status and full explanation. The final text
+    replaces the streamed one: if generation failed part way it is the
+    template fallback.
+    """
+    service = get_explanation_service()
+    job = service.get_job(session_id)
+
+    if job is None:
+        session = get_session_manager().get_session(session_id)
+        if not session or not session.get("predictions"):
+            return JsonResponse({"error": "Invalid or expired session"}, status=404)
+
+        predictions = session["predictions"]
+        if predictions.get("explanation_status", "ready") == STATUS_PENDING:
+            # Job was lost (e.g. a restart); generate it again
+            job = service.submit(
+                session_id,
+                predictions["explanation_request"],
+                session["demographics"],
+            )
+            events = _explanation_events(job)
+        else:
+            outcome = {
+                "session_id": session_id,
+                "status": predictions.get("explanation_status", "ready"),
+                "explanation": predictions.get("explanation") or None,
+                "error": None,
+            }
+            events = iter([_sse_event("done", outcome)])
+    else:
+        events = _explanation_events(job)
+
+    response = StreamingHttpResponse(events, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+def _report_patient_data(demographics: dict, predictions: dict) -> dict:
+    """Patient data the PDF report is rendered from."""
+    return {
         **demographics,
         "pattern_arc": predictions["pattern_counts"]["arc"],
         "pattern_whorl": predictions["pattern_counts"]["whorl"],
@@ -399,78 +895,96 @@ def get_results(request, session_id: str):
         "risk_level": predictions["risk_level"],
         "blood_group": predictions.get("blood_group", "Not analyzed"),
     }
-    
-    # Generate PDF
-    pdf_gen = get_pdf_generator()
-    pdf_bytes = pdf_gen.generate_report(patient_data, predictions["explanation"])
-    logger.info(f"[PDF] Generated PDF report ({len(pdf_bytes)} bytes)")
-    
-    # Save PDF to storage
-    storage = get_storage()
-    filename = f"report_{session_id}.pdf"
-    pdf_url = storage.save_file(pdf_bytes, filename, folder="reports")
-    logger.info(f"[PDF] Saved PDF to storage: {pdf_url}")
-    
-    # Generate QR code with PROXY URL (using Custom Domain)
-    # This ensures the QR code points to api.team3thesis.dev (branding)
-    # which then redirects to the Supabase file
-    public_base = _get_public_base_url(request)
-    proxy_url = f"{public_base}/api/session/{session_id}/download-pdf"
-    
-    qr_bytes = pdf_gen.generate_qr_code(proxy_url)
-    logger.info(f"[QR] Generated QR code for Proxy URL: {proxy_url}")
-    
-    # Save QR code to storage
-    qr_filename = f"qr_{session_id}.png"
-    qr_url = storage.save_file(qr_bytes, qr_filename, folder="qr_codes")
-    logger.info(f"[QR] Saved QR code to storage: {qr_url}")
 
-    record_id = None
-    saved = False
 
-    # DEBUG: Log session state
-    logger.info(f"[DEBUG] get_results called for session_id={session_id}")
-    logger.info(f"[DEBUG] session['consent'] = {session.get('consent')}")
-    logger.info(f"[DEBUG] demographics keys = {list(demographics.keys())}")
-    logger.info(f"[DEBUG] predictions keys = {list(predictions.keys())}")
+def _report_record_data(demographics: dict, predictions: dict) -> dict:
+    """Patient record saved for consenting users."""
+    # Filter out blood_type from demographics (we use blood_group from predictions)
+    demographics_filtered = {
+        k: v for k, v in demographics.items() if k != "blood_type"
+    }
+    return {
+        **demographics_filtered,
+        "pattern_arc": predictions["pattern_counts"]["arc"],
+        "pattern_whorl": predictions["pattern_counts"]["whorl"],
+        "pattern_loop": predictions["pattern_counts"]["loop"],
+        "risk_score": predictions["diabetes_risk"],
+        "risk_level": predictions["risk_level"],
+        "blood_group": predictions["blood_group"],
+        "willing_to_donate": demographics.get(
+            "willing_to_donate", False
+        ),  # Ensure this is passed
+    }
+
+
+def _retire_session(session_id: str) -> None:
+    """Delete a finished session once its report spec is stored."""
+    session_mgr = get_session_manager()
+    session_mgr.delete_session(session_id)
+    session_mgr.flush()
+    get_explanation_service().discard(session_id)
 
-    if session["consent"]:
-        try:
-            storage = get_storage()
 
-            # Filter out blood_type from demographics (we use blood_group from predictions)
-            demographics_filtered = {
-                k: v for k, v in demographics.items() if k != "blood_type"
-            }
+@router.get("/{session_id}/results", response=ResultsResponse, tags=["Workflow"])
+def get_results(request, session_id: str):
+    """Step 5: Get final results; the report artifacts follow in the background.
+
+    Storing the report's render spec, the QR code and the patient record are
+    left to the artifact service; their progress and the saved record id are
+    reported by ``GET /{session_id}/artifacts``. The session is deleted once
+    the spec is stored, so the download link then works from any worker and
+    survives a restart. The artifact URLs are backend proxy URLs derived
+    from the session id, so they are returned before anything is rendered
+    or uploaded.
+    """
+    session_mgr = get_session_manager()
+    session = session_mgr.get_session(session_id)
 
-            record_data = {
-                **demographics_filtered,
-                "pattern_arc": predictions["pattern_counts"]["arc"],
-                "pattern_whorl": predictions["pattern_counts"]["whorl"],
-                "pattern_loop": predictions["pattern_counts"]["loop"],
-                "risk_score": predictions["diabetes_risk"],
-                "risk_level": predictions["risk_level"],
-                "blood_group": predictions["blood_group"],
-                "willing_to_donate": demographics.get(
-                    "willing_to_donate", False
-                ),  # Ensure this is passed
-            }
-            logger.info(
-                f"[SAVE] Attempting to save patient record for session {session_id}..."
-            )
-            logger.info(f"[SAVE] Record data keys: {list(record_data.keys())}")
-            record_id = storage.save_patient_record(record_data)
-            saved = True
-            logger.info(f"[SUCCESS] Successfully saved record ID: {record_id}")
-        except Exception as e:
-            logger.error(f"[FAILED] Failed to save to storage: {e}", exc_info=True)
-            # Continue without saving
+    if not session:
+        return JsonResponse({"error": "Invalid or expired session"}, status=404)
+
+    if not session.get("completed"):
+        return JsonResponse({"error": "Analysis not completed yet"}, status=400)
+
+    predictions = session["predictions"]
+    demographics = session["demographics"]
+    explanation = _resolve_explanation(session_id, predictions, demographics)
+
+    # QR code and download links point at this backend (custom domain
+    # branding); the download proxy serves the PDF once it is rendered.
+    public_base = _get_public_base_url(request)
+    download_url = f"{public_base}/api/session/{session_id}/download-pdf"
+    qr_code_url = f"{public_base}/api/session/{session_id}/qr-code"
+
+    record_data = None
+    if session["consent"]:
+        record_data = _report_record_data(demographics, predictions)
     else:
         logger.warning(
             f"[SKIP] Session {session_id} skipped saving: Consent was {session.get('consent')}"
         )
 
-    session_mgr.delete_session(session_id)
+    spec = build_report_spec(
+        _report_patient_data(demographics, predictions),
+        explanation,
+        session["created_at"],
+    )
+    # A repeated request reuses the queued job. The session only outlives a
+    # job whose spec store failed; that is retried, without saving a record
+    # twice
+    artifacts = get_artifact_service()
+    job = artifacts.get_job(session_id)
+    if job is None or (job.done.is_set() and not job.spec_stored):
+        if job is not None and job.saved:
+            record_data = None
+        job = artifacts.submit(
+            session_id,
+            spec,
+            download_url,
+            record_data=record_data,
+            on_stored=_retire_session,
+        )
+        logger.info(f"[PDF] Queued report spec, QR code and record for {session_id}")
 
     return {
         "session_id": session_id,
@@ -478,13 +992,12 @@ def get_results(request, session_id: str):
         "risk_level": predictions["risk_level"],
         "blood_group": predictions.get("blood_group"),
         "blood_group_confidence": predictions.get("blood_group_confidence"),
-        "explanation": predictions["explanation"],
+        "explanation": explanation,
         "bmi": demographics["bmi"],
-        "saved_to_database": saved,
-        "record_id": record_id,
         # QR Code & PDF Download
-        "qr_code_url": qr_url,
-        "download_url": pdf_url,  # Direct Supabase URL (works after session deleted)
+        "qr_code_url": qr_code_url,
+        "download_url": download_url,
+        "artifact_status": job.status,
         # Include demographics
         "age": demographics.get("age"),
         "weight_kg": demographics.get("weight_kg"),
@@ -496,6 +1009,15 @@ def get_results(request, session_id: str):
     }
 
 
+@router.get("/{session_id}/artifacts", tags=["Workflow"])
+def get_artifacts(request, session_id: str):
+    """Progress of the background PDF, QR code and record save."""
+    job = get_artifact_service().get_job(session_id)
+    if job is None:
+        return JsonResponse({"error": "No report artifacts for session"}, status=404)
+    return job.to_dict()
+
+
 @router.post(
     "/{session_id}/generate-pdf", response=PDFGenerateResponse, tags=["Workflow"]
 )
@@ -508,20 +1030,21 @@ def generate_pdf_report(request, session_id: str):
         return JsonResponse({"error": "Analysis not completed yet"}, status=400)
     predictions = session["predictions"]
     demographics = session["demographics"]
-    patient_data = {
-        **demographics,
-        "pattern_arc": predictions["pattern_counts"]["arc"],
-        "pattern_whorl": predictions["pattern_counts"]["whorl"],
-        "pattern_loop": predictions["pattern_counts"]["loop"],
-        "risk_score": predictions["diabetes_risk"],
-        "risk_level": predictions["risk_level"],
-        "blood_group": predictions.get("blood_group", "Not analyzed"),
-    }
-    pdf_gen = get_pdf_generator()
-    pdf_bytes = pdf_gen.generate_report(patient_data, predictions["explanation"])
+    explanation = _resolve_explanation(session_id, predictions, demographics)
+    spec = build_report_spec(
+        _report_patient_data(demographics, predictions),
+        explanation,
+        session["created_at"],
+    )
+
+    # Same inputs as a previous render are served from the report cache; the
+    # stored spec also lets download-pdf find this report later
+    reports = get_report_service()
+    reports.store_spec(session_id, spec)
+    _, filename = reports.get_report(spec)
     storage = get_storage()
-    filename = f"report_{session_id}.pdf"
-    pdf_url = storage.save_file(pdf_bytes, filename, folder="reports")
+    pdf_url = storage.get_file_url(filename, folder="reports")
+    pdf_gen = get_pdf_generator()
 
     # Use PROXY URL for QR code (consistent branding)
     public_base = _get_public_base_url(request)
@@ -532,79 +1055,123 @@ def generate_pdf_report(request, session_id: str):
     qr_url = storage.save_file(qr_bytes, qr_filename, folder="qr_codes")
     
     # Store PDF URL in session for later retrieval
-    session["pdf_url"] = pdf_url
-    session_mgr._save_sessions()
+    session_mgr.update_session(session_id, pdf_url=pdf_url)
     
     return {
         "success": True,
         "pdf_url": pdf_url,
-        "download_url": download_url,
+        "download_url": proxy_url,
         "qr_code_url": qr_url,
         "message": "PDF generated",
     }
 
 
-@router.get("/{session_id}/download-pdf", auth=None, tags=["Workflow"])
-def download_pdf_report(request, session_id: str):
-    """Public PDF download endpoint (no API key required).
-    
-    Security:
-    - Session ID acts as a secret token (UUID format, hard to guess)
-    - Supabase URLs are signed with 24-hour expiration
-    - File lookup prevents unauthorized access to non-existent files
-    
-    Streams the PDF through the backend to maintain custom domain in browser URL.
+def _qr_response(session_id: str):
+    """Serve the QR code from its background job, waiting briefly for it.
+
+    Rejects session ids that are not UUID-shaped (they end up in storage
+    paths). Returns None when the session has no job (or rendering failed)
+    so the caller falls back to storage.
     """
-    import re
-    import requests
-    from django.http import StreamingHttpResponse
-    
+    from .constants import ARTIFACT_WAIT_SECONDS
+
     # Basic validation: session_id should be UUID format
     # This prevents path traversal attacks
-    if not re.match(r'^[a-f0-9-]{36}$', session_id):
+    if not re.match(r"^[a-f0-9-]{36}$", session_id):
         return JsonResponse({"error": "Invalid session ID"}, status=400)
-    
-    storage = get_storage()
-    filename = f"report_{session_id}.pdf"
 
-    # LocalStorage writes into MEDIA_ROOT/<folder>/<filename>
-    storage_type = type(storage).__name__
-    if storage_type == "LocalStorage":
-        file_path = Path(settings.MEDIA_ROOT) / "reports" / filename
-        if not file_path.exists():
-            return JsonResponse({"error": "PDF not found"}, status=404)
+    job = get_artifact_service().get_job(session_id)
+    if job is None:
+        return None
 
-        response = FileResponse(open(file_path, "rb"), content_type="application/pdf")
-        response["Content-Disposition"] = (
-            f'attachment; filename="health_report_{session_id}.pdf"'
-        )
+    if not job.wait_qr(ARTIFACT_WAIT_SECONDS):
+        response = JsonResponse({"error": "QR code is still being prepared"}, status=503)
+        response["Retry-After"] = "2"
         return response
 
-    # Supabase: Stream the file through backend (keeps custom domain in URL)
+    if job.qr_bytes is None:
+        return None
+    response = HttpResponse(job.qr_bytes, content_type="image/png")
+    response["Content-Disposition"] = f'inline; filename="qr_{session_id}.png"'
+    return response
+
+
+def _report_response(session_id: str):
+    """Serve the session's PDF, rendering it on first download.
+
+    Rejects session ids that are not UUID-shaped. The render spec comes from
+    the in-memory artifact job or, on another worker or after a restart,
+    from storage; the PDF itself from the content-addressed report cache.
+    Reports rendered eagerly before lazy rendering are served from their
+    per-session file. With none of these, a report whose session is still
+    live is being prepared (its spec is stored in the background), so the
+    client is asked to retry; otherwise the report does not exist.
+    """
+    # Basic validation: session_id should be UUID format
+    # This prevents path traversal attacks
+    if not re.match(r"^[a-f0-9-]{36}$", session_id):
+        return JsonResponse({"error": "Invalid session ID"}, status=400)
+
+    reports = get_report_service()
+    job = get_artifact_service().get_job(session_id)
+    spec = job.spec if job is not None else reports.load_spec(session_id)
+
     try:
-        pdf_url = storage.get_file_url(filename, folder="reports")
-        
-        # Fetch file from Supabase
-        file_response = requests.get(pdf_url, stream=True)
-        
-        if file_response.status_code != 200:
-            return JsonResponse({"error": "PDF not found"}, status=404)
-        
-        # Stream the file through Django
-        response = StreamingHttpResponse(
-            file_response.iter_content(chunk_size=8192),
-            content_type="application/pdf"
-        )
-        response["Content-Disposition"] = (
-            f'attachment; filename="health_report_{session_id}.pdf"'
-        )
-        
-        # Copy content length if available
-        if 'content-length' in file_response.headers:
-            response['Content-Length'] = file_response.headers['content-length']
-        
+        if spec is not None:
+            pdf_bytes, _ = reports.get_report(spec)
+        else:
+            pdf_bytes = get_storage().get_file(f"report_{session_id}.pdf")
+    except Exception as e:
+        logger.error(f"[PDF] Failed to render report for {session_id}: {e}")
+        return JsonResponse({"error": "Failed to generate PDF"}, status=500)
+
+    if pdf_bytes is None:
+        if get_session_manager().get_session(session_id) is None:
+            return JsonResponse({"error": "Report not found"}, status=404)
+        response = JsonResponse({"error": "PDF is not available yet"}, status=503)
+        response["Retry-After"] = "2"
+        return response
+
+    reports.mark_downloaded(session_id)
+    response = HttpResponse(pdf_bytes, content_type="application/pdf")
+    response["Content-Disposition"] = (
+        f'attachment; filename="health_report_{session_id}.pdf"'
+    )
+    return response
+
+
+@router.get("/{session_id}/qr-code", auth=None, tags=["Workflow"])
+def download_qr_code(request, session_id: str):
+    """Public QR code image for the report download link (no API key required)."""
+    response = _qr_response(session_id)
+    if response is not None:
         return response
-        
+
+    storage = get_storage()
+    filename = f"qr_{session_id}.png"
+    if type(storage).__name__ == "LocalStorage":
+        file_path = Path(settings.MEDIA_ROOT) / "qr_codes" / filename
+        if not file_path.exists():
+            return JsonResponse({"error": "QR code not found"}, status=404)
+        return FileResponse(open(file_path, "rb"), content_type="image/png")
+
+    try:
+        return HttpResponseRedirect(storage.get_file_url(filename, folder="qr_codes"))
     except Exception as e:
-        logger.error(f"Failed to stream PDF: {e}")
-        return JsonResponse({"error": "PDF not found"}, status=404)
+        logger.error(f"Failed to locate QR code: {e}")
+        return JsonResponse({"error": "QR code not found"}, status=404)
+
+
+@router.get("/{session_id}/download-pdf", auth=None, tags=["Workflow"])
+def download_pdf_report(request, session_id: str):
+    """Public PDF download endpoint (no API key required).
+
+    Security:
+    - Session ID acts as a secret token (UUID format, hard to guess)
+    - Session IDs are validated before any storage lookup
+
+    Served through the backend to maintain custom domain in browser URL.
+    """
+    # Renders the report (or fetches it from the report cache) from its
+    # stored render spec
+    return _report_response(session_id)
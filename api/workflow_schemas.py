@@ -7,6 +7,11 @@ from pydantic import BaseModel, Field
 
 class SessionStartRequest(BaseModel):
     consent: bool = Field(description="User consent to save data")
+    kiosk_id: Optional[str] = Field(
+        None, max_length=64, description="Registered kiosk (see KIOSK_LOCATIONS)"
+    )
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
 
 
 class SessionStartResponse(BaseModel):
@@ -47,6 +52,9 @@ class FingerprintRequest(BaseModel):
         "left_pinky",
     ]
     image: str = Field(description="Base64 encoded fingerprint image")
+    reject_low_quality: bool = Field(
+        False, description="Refuse scans that fail the quality gate"
+    )
 
 
 class FingerprintResponse(BaseModel):
@@ -54,6 +62,16 @@ class FingerprintResponse(BaseModel):
     received: bool
     total_collected: int
     remaining: int
+    quality: Optional[Dict[str, Any]] = None
+
+
+class BulkFingerprintResult(BaseModel):
+    finger_name: str
+    valid: bool
+    error: Optional[str] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    quality: Optional[Dict[str, Any]] = None
 
 
 class AnalysisResponse(BaseModel):
@@ -65,14 +83,32 @@ class AnalysisResponse(BaseModel):
     pattern_counts: Dict[str, int]
     bmi: float
     explanation: str
+    explanation_status: str = "ready"  # "pending" until the background job ends
+    # Facility lists hold {"id", "distance_km"} references into
+    # GET /api/directory/{directory_version}
+    directory_version: str = ""
     nearby_facilities: List[Dict[str, Any]] = []
+    nearby_laboratories: List[Dict[str, Any]] = []  # Only with a kiosk location
     blood_centers: List[Dict[str, Any]] = []  # Only if willing_to_donate = true
-    hospitals_db: List[Dict[str, Any]] = []
-    laboratories_db: List[Dict[str, Any]] = []
-    diabetes_doctors_db: List[Dict[str, Any]] = []
     willing_to_donate: bool = False
 
 
+class BulkFingerprintResponse(BaseModel):
+    session_id: str
+    results: List[BulkFingerprintResult]
+    total_collected: int
+    remaining: int
+    analysis: Optional[AnalysisResponse] = None
+    analysis_error: Optional[str] = None
+
+
+class ExplanationStatusResponse(BaseModel):
+    session_id: str
+    status: str
+    explanation: Optional[str] = None
+    error: Optional[str] = None
+
+
 class ResultsResponse(BaseModel):
     session_id: str
     diabetes_risk: float
@@ -81,11 +117,25 @@ class ResultsResponse(BaseModel):
     blood_group_confidence: Optional[float] = None
     explanation: str
     bmi: float
-    saved_to_database: bool
-    record_id: Optional[str]
+    # Deprecated: the record is saved in the background after results are
+    # returned, so these are always False/None here; see /artifacts
+    saved_to_database: bool = Field(
+        default=False,
+        description="Deprecated (always false): record save is pending; see /artifacts",
+        json_schema_extra={"deprecated": True},
+    )
+    record_id: Optional[str] = Field(
+        default=None,
+        description="Deprecated (always null): see /artifacts for the record id",
+        json_schema_extra={"deprecated": True},
+    )
     # QR Code & PDF Download
     qr_code_url: str = Field(description="URL to QR code image for phone download")
-    download_url: str = Field(description="Direct PDF download URL")
+    download_url: str = Field(description="Backend PDF download URL")
+    artifact_status: str = Field(
+        default="pending",
+        description="PDF/QR/record pipeline status; see /artifacts for progress",
+    )
     # Demographics
     age: Optional[int]
     weight_kg: Optional[float]
@@ -0,0 +1,49 @@
+"""Facility recommendation latency: index build, first ranking, memoized hit.
+
+Builds ``FacilityRecommender`` over the built-in directories, then times a
+cold ranking for each risk level / kiosk city and repeat (memoized) calls.
+The Gemini call this replaced took seconds per request.
+
+Usage:
+    python benchmarks/bench_facility_recommender.py --calls 100000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api.facility_recommender import FacilityRecommender
+
+RISK_LEVELS = ["Low", "Moderate", "High"]
+CITIES = [None, "Angeles", "San Fernando", "Mabalacat"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=100000)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    recommender = FacilityRecommender()
+    build = time.perf_counter() - started
+    print(f"index build: {build * 1e3:.2f} ms ({len(recommender.records)} records)")
+
+    started = time.perf_counter()
+    for risk in RISK_LEVELS:
+        for city in CITIES:
+            recommender.recommend(risk, city)
+    cold = (time.perf_counter() - started) / (len(RISK_LEVELS) * len(CITIES))
+    print(f"cold ranking: {cold * 1e6:.1f} us/call")
+
+    started = time.perf_counter()
+    for i in range(args.calls):
+        recommender.recommend(RISK_LEVELS[i % 3], CITIES[i % 4])
+    warm = (time.perf_counter() - started) / args.calls
+    print(f"memoized:     {warm * 1e6:.2f} us/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Request size and server CPU: JSON/base64 vs raw binary fingerprint upload.
+
+Posts the same PNG scans through ``/fingerprint`` (base64 in JSON) and
+``/fingerprint/raw`` (multipart and octet-stream) with Django's test client
+and reports bytes on the wire and server-side CPU per upload.
+
+Usage:
+    python benchmarks/bench_fingerprint_upload.py --uploads 50 --image-kb 200
+"""
+
+import argparse
+import base64
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from cryptography.fernet import Fernet
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+import django
+
+django.setup()
+
+from django.test import Client  # noqa: E402
+
+import api.session_manager as session_manager_module  # noqa: E402
+
+
+def _scan(image_kb: int) -> bytes:
+    """Noisy grayscale PNG of roughly ``image_kb`` KiB (noise defeats zlib)."""
+    side = int((image_kb * 1024) ** 0.5)
+    pixels = np.random.default_rng(0).integers(0, 256, (side, side), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _json_upload(client, sid, png):
+    body = json.dumps(
+        {"finger_name": "right_thumb", "image": base64.b64encode(png).decode()}
+    ).encode()
+    response = client.post(
+        f"/api/session/{sid}/fingerprint", data=body, content_type="application/json"
+    )
+    return response, len(body)
+
+
+def _octet_upload(client, sid, png):
+    response = client.post(
+        f"/api/session/{sid}/fingerprint/raw?finger_name=right_thumb",
+        data=png,
+        content_type="application/octet-stream",
+    )
+    return response, len(png)
+
+
+def _multipart_upload(client, sid, png):
+    response = client.post(
+        f"/api/session/{sid}/fingerprint/raw",
+        data={"finger_name": "right_thumb", "image": io.BytesIO(png)},
+    )
+    return response, int(response.wsgi_request.META.get("CONTENT_LENGTH") or 0)
+
+
+def run(upload, uploads: int, png: bytes) -> dict:
+    client = Client(HTTP_HOST="localhost", HTTP_X_API_KEY=os.environ["BACKEND_API_KEY"])
+    sid = client.post(
+        "/api/session/start", data={"consent": True}, content_type="application/json"
+    ).json()["session_id"]
+
+    upload(client, sid, png)  # warm-up
+    wire_bytes = 0
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    for _ in range(uploads):
+        response, sent = upload(client, sid, png)
+        assert response.status_code == 200, response.content
+        wire_bytes += sent
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+
+    return {
+        "bytes_per_upload": wire_bytes / uploads,
+        "cpu_ms_per_upload": cpu * 1000 / uploads,
+        "wall_ms_per_upload": wall * 1000 / uploads,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--uploads", type=int, default=50)
+    parser.add_argument("--image-kb", type=int, default=200)
+    args = parser.parse_args()
+
+    png = _scan(args.image_kb)
+    print(f"scan: {len(png) / 1024:.0f} KiB PNG")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["SESSION_STORE_PATH"] = str(Path(tmp) / "session_store.json")
+        os.environ["SESSION_BLOB_DIR"] = str(Path(tmp) / "blobs")
+        os.environ["SESSION_ENCRYPTION_KEY"] = Fernet.generate_key().decode()
+        os.environ["SESSION_FLUSH_INTERVAL_MS"] = "0"
+        os.environ.setdefault("BACKEND_API_KEY", "bench-key")
+
+        for label, upload in (
+            ("json/base64", _json_upload),
+            ("raw multipart", _multipart_upload),
+            ("raw octet-stream", _octet_upload),
+        ):
+            r = run(upload, args.uploads, png)
+            print(
+                f"{label:>17}: {r['bytes_per_upload'] / 1024:7.1f} KiB/request, "
+                f"{r['cpu_ms_per_upload']:6.2f} ms CPU, "
+                f"{r['wall_ms_per_upload']:6.2f} ms wall"
+            )
+
+        session_manager_module.get_session_manager().close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Decode throughput: serial vs pooled decoding of a ten-finger batch.
+
+Decodes a batch of scanner-sized JPEGs the old way (serial ``Image.open`` +
+``np.array`` at full resolution), with the shared ``ImageDecoder`` settings
+the models use (thread pool, full resolution, source mode) and with the
+opt-in reduced-scale mode (JPEG draft decoding straight to grayscale near
+128x128).
+
+Usage:
+    python benchmarks/bench_image_decode.py --batches 20 --side 1600
+"""
+
+import argparse
+import io
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api.constants import MODEL_INPUT_SIZE
+from api.utils.image_processing import ImageDecoder, decode_image_bytes
+
+
+def _scan(side: int, seed: int) -> bytes:
+    rng = np.random.default_rng(seed)
+    pixels = rng.integers(0, 256, (side, side), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).convert("RGB").save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batches", type=int, default=20)
+    parser.add_argument("--side", type=int, default=1600)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    batch = {f"finger_{i}": _scan(args.side, i) for i in range(10)}
+
+    start = time.perf_counter()
+    for _ in range(args.batches):
+        serial = [decode_image_bytes(data) for data in batch.values()]
+    serial_s = (time.perf_counter() - start) / args.batches
+    print(f"serial full-res: {serial_s * 1000:7.1f} ms/batch, shape {serial[0].shape}")
+
+    for label, decoder in (
+        ("pooled full-res", ImageDecoder(max_workers=args.workers)),
+        (
+            "pooled reduced ",
+            ImageDecoder(
+                max_workers=args.workers, target_size=MODEL_INPUT_SIZE, mode="L"
+            ),
+        ),
+    ):
+        start = time.perf_counter()
+        for _ in range(args.batches):
+            pooled, _errors, timings = decoder.decode_many(batch)
+        pooled_s = (time.perf_counter() - start) / args.batches
+        decoder.shutdown()
+        print(
+            f"{label}: {pooled_s * 1000:7.1f} ms/batch, "
+            f"shape {pooled['finger_0'].shape}, "
+            f"max {max(timings.values()):.1f} ms/image ({args.workers} workers)"
+        )
+
+
+if __name__ == "__main__":
+    main()
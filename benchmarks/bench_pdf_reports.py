@@ -0,0 +1,85 @@
+"""PDF report throughput: reports per second on one core.
+
+Renders a typical multi-page report (patient table, results, an AI analysis
+with headings and bullet lists, pattern table) in a single thread, once with
+the shared generator and once with a fresh generator per report, which pays
+for building styles and table styles every time like the pre-template code.
+
+Usage:
+    python benchmarks/bench_pdf_reports.py --reports 200 --rounds 3
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api.pdf_service import PDFReportGenerator
+
+PATIENT = {
+    "age": 45,
+    "gender": "male",
+    "height_cm": 170,
+    "weight_kg": 75,
+    "bmi": 25.95,
+    "pattern_arc": 2,
+    "pattern_whorl": 5,
+    "pattern_loop": 3,
+    "risk_score": 0.42,
+    "risk_level": "Moderate",
+    "blood_group": "O",
+}
+SECTION = (
+    "📊 Understanding Your Results\n\n"
+    "Your fingerprint pattern distribution and BMI place you in the moderate "
+    "risk band. This is a screening estimate, not a diagnosis.\n\n"
+    "- Schedule a fasting blood glucose test within three months\n"
+    "- Aim for 150 minutes of moderate activity each week\n"
+    "- Limit sugary drinks and refined carbohydrates\n\n"
+)
+EXPLANATION = SECTION * 6
+GENERATED_AT = datetime(2025, 12, 22, 10, 0, tzinfo=timezone.utc)
+
+
+def _rate(render, reports: int, rounds: int) -> float:
+    """Best reports/second over ``rounds`` runs of ``reports`` renders."""
+    best = 0.0
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(reports):
+            render()
+        best = max(best, reports / (time.perf_counter() - started))
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reports", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    shared = PDFReportGenerator()
+    pdf = shared.generate_report(PATIENT, EXPLANATION, GENERATED_AT)
+    print(f"report size: {len(pdf) / 1024:.1f} KiB")
+
+    fresh = _rate(
+        lambda: PDFReportGenerator().generate_report(
+            PATIENT, EXPLANATION, GENERATED_AT
+        ),
+        args.reports,
+        args.rounds,
+    )
+    warm = _rate(
+        lambda: shared.generate_report(PATIENT, EXPLANATION, GENERATED_AT),
+        args.reports,
+        args.rounds,
+    )
+    print(f"fresh generator:  {fresh:.1f} reports/s ({1e3 / fresh:.2f} ms/report)")
+    print(f"shared generator: {warm:.1f} reports/s ({1e3 / warm:.2f} ms/report)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Serialization time: stdlib json vs serialization (orjson when installed).
+
+Encodes a realistic analyze response (explanation, facility lists and the
+full catalogs, as analyze responses carried them before /directory) through
+Ninja's default renderer and through FastJSONRenderer, then round-trips a
+session store of N in-flight sessions (ten encrypted fingerprint payloads
+each) the way SessionManager persists it.
+
+Usage:
+    python benchmarks/bench_serialization.py --sessions 20 --repeat 200
+"""
+
+import argparse
+import base64
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+import django
+
+django.setup()
+
+from ninja.renderers import JSONRenderer  # noqa: E402
+
+import serialization  # noqa: E402
+from api.constants import (  # noqa: E402
+    BLOOD_CENTERS_DB,
+    DIABETES_DOCTORS_DB,
+    HOSPITALS_DB,
+    LABORATORIES_DB,
+)
+from api.renderers import FastJSONRenderer  # noqa: E402
+
+EXPLANATION = (
+    "Your fingerprint pattern distribution and BMI place you in the moderate "
+    "risk band. Consider a fasting blood glucose test within three months. "
+) * 20
+
+
+def _analyze_response() -> dict:
+    return {
+        "session_id": str(uuid.uuid4()),
+        "diabetes_risk": 0.42,
+        "risk_level": "Moderate",
+        "blood_group": "O",
+        "blood_group_confidence": 0.91,
+        "pattern_counts": {"arc": 1, "whorl": 5, "loop": 4},
+        "bmi": 24.2,
+        "explanation": EXPLANATION,
+        "explanation_status": "ready",
+        "nearby_facilities": HOSPITALS_DB[:3],
+        "blood_centers": BLOOD_CENTERS_DB,
+        "hospitals_db": HOSPITALS_DB,
+        "laboratories_db": LABORATORIES_DB,
+        "diabetes_doctors_db": DIABETES_DOCTORS_DB,
+        "willing_to_donate": True,
+    }
+
+
+def _session_store(sessions: int, image_kb: int) -> dict:
+    token = base64.urlsafe_b64encode(os.urandom(image_kb * 1024)).decode()
+    now = datetime.now(timezone.utc).isoformat()
+    return {
+        str(uuid.uuid4()): {
+            "consent": True,
+            "location": None,
+            "created_at": now,
+            "expires_at": now,
+            "demographics": {"age": 45, "gender": "male", "bmi": 24.2},
+            "fingerprints": {f"finger_{i}": token for i in range(10)},
+            "predictions": _analyze_response(),
+            "completed": True,
+        }
+        for _ in range(sessions)
+    }
+
+
+def _time(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--image-kb", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    response = _analyze_response()
+    default_renderer, fast_renderer = JSONRenderer(), FastJSONRenderer()
+    size = len(fast_renderer.render(None, response, response_status=200))
+    baseline = _time(
+        lambda: default_renderer.render(None, response, response_status=200),
+        args.repeat,
+    )
+    fast = _time(
+        lambda: fast_renderer.render(None, response, response_status=200),
+        args.repeat,
+    )
+    print(f"backend: {serialization.BACKEND}")
+    print(
+        f"analyze response ({size / 1024:.0f} KiB): "
+        f"json {baseline * 1e6:.0f} us, fast {fast * 1e6:.0f} us "
+        f"({baseline / fast:.1f}x)"
+    )
+
+    store = _session_store(args.sessions, args.image_kb)
+    repeat = max(1, args.repeat // 20)
+    stdlib_payload = json.dumps(store, ensure_ascii=False).encode("utf-8")
+    fast_payload = serialization.dumps(store)
+    dumps_json = _time(
+        lambda: json.dumps(store, ensure_ascii=False).encode("utf-8"), repeat
+    )
+    dumps_fast = _time(lambda: serialization.dumps(store), repeat)
+    loads_json = _time(lambda: json.loads(stdlib_payload.decode("utf-8")), repeat)
+    loads_fast = _time(lambda: serialization.loads(fast_payload), repeat)
+    print(
+        f"session store ({args.sessions} sessions, "
+        f"{len(fast_payload) / 1024 / 1024:.1f} MiB): "
+        f"dumps json {dumps_json * 1e3:.1f} ms, fast {dumps_fast * 1e3:.1f} ms "
+        f"({dumps_json / dumps_fast:.1f}x); "
+        f"loads json {loads_json * 1e3:.1f} ms, fast {loads_fast * 1e3:.1f} ms "
+        f"({loads_json / loads_fast:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
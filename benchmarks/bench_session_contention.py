@@ -0,0 +1,143 @@
+"""Contention benchmark: many kiosks driving SessionManager concurrently.
+
+Each simulated kiosk runs the real workflow mutations (start session,
+demographics, ten fingerprint uploads) against a shared SessionManager and
+records per-operation latency. The "global" mode wraps every mutation in one
+process-wide lock held across the disk write, which is how the manager used
+to behave; "striped" is the current per-session locking model.
+
+Usage:
+    python benchmarks/bench_session_contention.py --kiosks 10 --image-kb 60
+"""
+
+import argparse
+import base64
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from cryptography.fernet import Fernet
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api.session_manager import SessionManager
+
+FINGERS = [
+    "right_thumb",
+    "right_index",
+    "right_middle",
+    "right_ring",
+    "right_pinky",
+    "left_thumb",
+    "left_index",
+    "left_middle",
+    "left_ring",
+    "left_pinky",
+]
+
+
+class GlobalLockSessionManager(SessionManager):
+    """Baseline: one lock around every mutation, including the store write."""
+
+    def __init__(self):
+        super().__init__(lock_stripes=1)
+        self._global_lock = threading.Lock()
+
+    def _mutate(self, session_id, changes):
+        with self._global_lock:
+            return super()._mutate(session_id, changes)
+
+    def create_session(self, consent):
+        with self._global_lock:
+            return super().create_session(consent)
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def run(mode: str, kiosks: int, rounds: int, image_kb: int) -> dict:
+    image = base64.b64encode(os.urandom(image_kb * 1024)).decode()
+    demographics = {"age": 45, "weight_kg": 70, "height_cm": 170, "gender": "male"}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["SESSION_STORE_PATH"] = str(Path(tmp) / "session_store.json")
+        mgr = GlobalLockSessionManager() if mode == "global" else SessionManager()
+
+        latencies: list[float] = []
+        lat_lock = threading.Lock()
+        barrier = threading.Barrier(kiosks)
+
+        def kiosk():
+            local = []
+            barrier.wait()
+            for _ in range(rounds):
+                t0 = time.perf_counter()
+                sid = mgr.create_session(consent=True)
+                local.append(time.perf_counter() - t0)
+
+                t0 = time.perf_counter()
+                mgr.update_demographics(sid, demographics)
+                local.append(time.perf_counter() - t0)
+
+                for finger in FINGERS:
+                    t0 = time.perf_counter()
+                    mgr.add_fingerprint(sid, finger, image)
+                    local.append(time.perf_counter() - t0)
+
+                    # Interleaved reads, as the analyze path would do
+                    mgr.get_session(sid)
+
+                mgr.delete_session(sid)
+            with lat_lock:
+                latencies.extend(local)
+
+        threads = [threading.Thread(target=kiosk) for _ in range(kiosks)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+
+    return {
+        "mode": mode,
+        "ops": len(latencies),
+        "elapsed_s": elapsed,
+        "ops_per_s": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": _percentile(latencies, 95) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--kiosks", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--image-kb", type=int, default=60)
+    args = parser.parse_args()
+
+    os.environ.setdefault("SESSION_ENCRYPTION_KEY", Fernet.generate_key().decode())
+
+    print(
+        f"kiosks={args.kiosks} rounds={args.rounds} image={args.image_kb}KB "
+        f"(ops = create + demographics + 10 fingerprints per round)"
+    )
+    for mode in ("global", "striped"):
+        r = run(mode, args.kiosks, args.rounds, args.image_kb)
+        print(
+            f"{r['mode']:>8}: {r['ops']} ops in {r['elapsed_s']:.2f}s "
+            f"({r['ops_per_s']:.0f} ops/s)  p50={r['p50_ms']:.1f}ms "
+            f"p95={r['p95_ms']:.1f}ms p99={r['p99_ms']:.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Write amplification of session persistence: write-through vs group commit.
+
+Replays the kiosk workflow (start, demographics, ten fingerprint posts a
+short gap apart, analyze + flush, results + delete) for several kiosks and
+reports how many full-store writes and bytes each persistence mode costs.
+
+Usage:
+    python benchmarks/bench_session_persistence.py --kiosks 5 --gap-ms 100
+"""
+
+import argparse
+import base64
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from cryptography.fernet import Fernet
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api.session_manager import SessionManager
+
+FINGERS = [
+    "right_thumb",
+    "right_index",
+    "right_middle",
+    "right_ring",
+    "right_pinky",
+    "left_thumb",
+    "left_index",
+    "left_middle",
+    "left_ring",
+    "left_pinky",
+]
+
+
+def run(flush_interval_ms: int, kiosks: int, gap_s: float, image_kb: int) -> dict:
+    image = base64.b64encode(os.urandom(image_kb * 1024)).decode()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["SESSION_STORE_PATH"] = str(Path(tmp) / "session_store.json")
+        os.environ["SESSION_BLOB_DIR"] = str(Path(tmp) / "blobs")
+        mgr = SessionManager(flush_interval_ms=flush_interval_ms)
+
+        def kiosk():
+            sid = mgr.create_session(consent=True)
+            mgr.update_demographics(sid, {"age": 45, "gender": "male"})
+            for finger in FINGERS:
+                time.sleep(gap_s)
+                mgr.add_fingerprint(sid, finger, image)
+            mgr.store_predictions(sid, {"risk_level": "Low"})
+            mgr.flush()  # analyze barrier
+            mgr.delete_session(sid)
+            mgr.flush()  # get_results barrier
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=kiosk) for _ in range(kiosks)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+        mgr.close()
+
+        metrics = mgr.get_metrics()
+    return {"elapsed_s": elapsed, **metrics}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--kiosks", type=int, default=5)
+    parser.add_argument("--gap-ms", type=int, default=100)
+    parser.add_argument("--image-kb", type=int, default=60)
+    parser.add_argument("--flush-interval-ms", type=int, default=250)
+    args = parser.parse_args()
+
+    os.environ.setdefault("SESSION_ENCRYPTION_KEY", Fernet.generate_key().decode())
+
+    for label, interval in (
+        ("write-through", 0),
+        (f"group commit ({args.flush_interval_ms}ms)", args.flush_interval_ms),
+    ):
+        r = run(interval, args.kiosks, args.gap_ms / 1000, args.image_kb)
+        print(
+            f"{label:>26}: {r['persist_requests']} changes -> "
+            f"{r['store_writes']} writes, {r['store_bytes_written'] / 1024:.0f} KiB "
+            f"(amplification {r['write_amplification']:.2f} writes/change, "
+            f"{r['elapsed_s']:.2f}s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
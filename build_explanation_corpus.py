@@ -0,0 +1,102 @@
+"""Pre-generate patient explanations for every discrete input combination.
+
+Walks the corpus input space (see api/explanation_corpus.py), asks Gemini for
+each explanation the corpus does not have yet and checkpoints the corpus file
+as it goes. Requests take background-priority tokens from the shared Gemini
+rate limiter, so live kiosks keep precedence and a full build runs over
+hours; interrupt it at any time and rerun to resume.
+
+Usage:
+    python build_explanation_corpus.py [--output PATH] [--limit N]
+                                       [--checkpoint-every N]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+import django
+from dotenv import load_dotenv
+
+load_dotenv()
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+django.setup()
+
+from api.constants import LLM_BREAKER_COOLDOWN_SECONDS  # noqa: E402
+from api.exceptions import CircuitOpenError  # noqa: E402
+from api.explanation_corpus import (  # noqa: E402
+    ExplanationCorpus,
+    corpus_key,
+    default_corpus_path,
+    enumerate_corpus_inputs,
+)
+from api.gemini_service import get_gemini_service  # noqa: E402
+from api.rate_limiter import PRIORITY_BACKGROUND  # noqa: E402
+
+logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+logger = logging.getLogger(__name__)
+
+
+def _generate(gemini, analysis_results, demographics):
+    """One explanation, waiting out an open Gemini circuit; None to skip it."""
+    while True:
+        try:
+            # Streaming raises on failure instead of returning the template
+            return "".join(
+                gemini.stream_patient_explanation(
+                    analysis_results, demographics, priority=PRIORITY_BACKGROUND
+                )
+            ).strip()
+        except CircuitOpenError as e:
+            wait = e.details.get("retry_after") or LLM_BREAKER_COOLDOWN_SECONDS
+            logger.warning(f"Gemini circuit open; waiting {wait}s")
+            time.sleep(wait)
+        except Exception as e:
+            key = corpus_key(analysis_results, demographics)
+            logger.error(f"Skipping {key}: {e}")
+            return None
+
+
+def build(output, limit=None, checkpoint_every=25) -> int:
+    """Generate missing entries into the corpus at ``output``; returns count."""
+    corpus = ExplanationCorpus.load(output)
+    gemini = get_gemini_service()
+    points = list(enumerate_corpus_inputs())
+    missing = [p for p in points if corpus_key(*p) not in corpus]
+    logger.info(
+        f"Corpus has {len(corpus)}/{len(points)} explanations; "
+        f"{len(missing)} to generate"
+    )
+
+    generated = 0
+    for analysis_results, demographics in missing[:limit]:
+        text = _generate(gemini, analysis_results, demographics)
+        if text is None:
+            continue
+
+        corpus.add(analysis_results, demographics, text)
+        generated += 1
+        if generated % checkpoint_every == 0:
+            corpus.save(output)
+            logger.info(f"Checkpoint: {len(corpus)}/{len(points)} explanations")
+
+    corpus.save(output)
+    logger.info(f"Generated {generated}; corpus now {len(corpus)}/{len(points)}")
+    return generated
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default=str(default_corpus_path()))
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--checkpoint-every", type=int, default=25)
+    args = parser.parse_args()
+
+    build(args.output, args.limit, args.checkpoint_every)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
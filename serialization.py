@@ -0,0 +1,81 @@
+"""JSON serialization: orjson when installed, stdlib ``json`` otherwise.
+
+Both backends produce compact UTF-8 bytes (no ASCII escaping) and accept a
+``default`` hook for types they cannot encode. NumPy scalars and arrays are
+encoded as plain numbers and lists either way, so ML outputs do not need
+converting first.
+"""
+
+import json
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # Optional; the stdlib fallback is just slower
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+
+def _numpy_default(obj: Any) -> Any:
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(
+    obj: Any,
+    *,
+    default: Optional[Callable[[Any], Any]] = None,
+    indent: bool = False,
+    sort_keys: bool = False,
+    passthrough_datetime: bool = False,
+) -> bytes:
+    """Serialize ``obj`` to UTF-8 JSON bytes.
+
+    Args:
+        obj: Value to encode
+        default: Fallback for unsupported types (after NumPy handling)
+        indent: Pretty-print with two-space indentation
+        sort_keys: Emit object keys in sorted order
+        passthrough_datetime: Hand datetimes to ``default`` instead of
+            orjson's RFC 3339 output (stdlib json always does)
+    """
+
+    def fallback(value):
+        try:
+            return _numpy_default(value)
+        except TypeError:
+            if default is None:
+                raise
+            return default(value)
+
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if passthrough_datetime:
+            option |= orjson.OPT_PASSTHROUGH_DATETIME
+        return orjson.dumps(obj, default=fallback, option=option)
+
+    return json.dumps(
+        obj,
+        default=fallback,
+        ensure_ascii=False,
+        indent=2 if indent else None,
+        separators=None if indent else (",", ":"),
+        sort_keys=sort_keys,
+    ).encode("utf-8")
+
+
+def loads(data: Any) -> Any:
+    """Parse JSON from bytes or str."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -11,6 +11,7 @@ python download_models.py
 echo "Collecting static files..."
 python manage.py collectstatic --noinput
 
-# Start gunicorn
+# Start gunicorn (threaded workers so explanation SSE streams don't block
+# other requests or trip the sync worker timeout)
 echo "Starting gunicorn..."
-exec gunicorn config.wsgi:application --log-file -
+exec gunicorn config.wsgi:application --worker-class gthread --threads "${GUNICORN_THREADS:-8}" --log-file -
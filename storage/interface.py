@@ -29,6 +29,11 @@ class StorageInterface(ABC):
         """Get URL for existing file."""
         pass
 
+    @abstractmethod
+    def get_file(self, filename: str, folder: str = "reports") -> Optional[bytes]:
+        """Download file contents, or None if it does not exist."""
+        pass
+
     @abstractmethod
     def list_records(self, limit: int = 100, offset: int = 0) -> List[Dict]:
         """List patient records with pagination."""
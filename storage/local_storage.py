@@ -11,11 +11,12 @@ defaults to http://localhost:8000.
 
 from __future__ import annotations
 
-import json
 import os
 from datetime import datetime, timezone
 from pathlib import Path
 
+import serialization
+
 from .interface import StorageInterface
 
 
@@ -55,9 +56,7 @@ class LocalStorage(StorageInterface):
         payload = {**record}
         payload.setdefault("created_at", datetime.now(timezone.utc).isoformat())
 
-        record_path.write_text(
-            json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8"
-        )
+        record_path.write_bytes(serialization.dumps(payload, indent=True))
         return str(record_id)
 
     def get_patient_record(self, record_id: str) -> dict | None:
@@ -65,7 +64,7 @@ class LocalStorage(StorageInterface):
         if not record_path.exists():
             return None
         try:
-            return json.loads(record_path.read_text(encoding="utf-8"))
+            return serialization.loads(record_path.read_bytes())
         except Exception:
             return None
 
@@ -86,6 +85,12 @@ class LocalStorage(StorageInterface):
             raise FileNotFoundError(filename)
         return self._file_url(folder, filename)
 
+    def get_file(self, filename: str, folder: str = "reports") -> bytes | None:
+        file_path = self.media_root / folder / filename
+        if not file_path.exists():
+            return None
+        return file_path.read_bytes()
+
     def list_records(self, limit: int = 100, offset: int = 0) -> list[dict]:
         if not self.records_dir.exists():
             return []
@@ -100,7 +105,7 @@ class LocalStorage(StorageInterface):
         records: list[dict] = []
         for path in sliced:
             try:
-                records.append(json.loads(path.read_text(encoding="utf-8")))
+                records.append(serialization.loads(path.read_bytes()))
             except Exception:
                 continue
         return records
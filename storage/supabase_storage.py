@@ -143,6 +143,7 @@ class SupabaseStorage(StorageInterface):
                 file_options={
                     "content-type": content_type,
                     "cache-control": "3600",
+                    "upsert": "true",  # Re-saving a spec/report is not an error
                 }
             )
 
@@ -194,6 +195,13 @@ class SupabaseStorage(StorageInterface):
             logger.error(f"Failed to generate signed URL: {e}")
             raise
 
+    def get_file(self, filename: str, folder: str = "reports") -> bytes | None:
+        try:
+            return self.client.storage.from_(folder).download(filename)
+        except Exception as e:
+            logger.info(f"File not available: {folder}/{filename} ({e})")
+            return None
+
     def list_records(self, limit: int = 100, offset: int = 0) -> list[dict]:
         try:
             response = (
@@ -2,6 +2,7 @@
 
 import os
 import sys
+import tempfile
 
 import django
 import pytest
@@ -12,10 +13,22 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 # Configure Django settings
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
+# Keep the LLM cache, explanation corpus and rate limiter state out of the tree
+_cache_dir = tempfile.mkdtemp(prefix="llm-cache-")
+os.environ["LLM_CACHE_PATH"] = os.path.join(_cache_dir, "llm_cache.sqlite3")
+os.environ["EXPLANATION_CORPUS_PATH"] = os.path.join(_cache_dir, "corpus.json.gz")
+os.environ["RATE_LIMIT_STATE_PATH"] = os.path.join(_cache_dir, "rate_limits.sqlite3")
+
 # Setup Django
 django.setup()
 
 
+@pytest.fixture(autouse=True)
+def _closed_llm_circuits(monkeypatch):
+    """Give every test fresh, closed LLM circuit breakers."""
+    monkeypatch.setattr("api.circuit_breaker._breakers", {})
+
+
 @pytest.fixture
 def mock_session_data():
     """Fixture providing mock session data."""
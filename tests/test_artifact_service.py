@@ -0,0 +1,343 @@
+"""Tests for the background report artifact pipeline."""
+
+import threading
+import uuid
+
+import pytest
+from cryptography.fernet import Fernet
+from django.test import Client
+
+import api.artifact_service as artifact_module
+import api.report_service as report_module
+import api.session_manager as session_manager_module
+from api.artifact_service import (
+    STAGES,
+    STATUS_FAILED,
+    STATUS_PENDING,
+    STATUS_READY,
+    ArtifactService,
+)
+from api.report_service import (
+    ReportService,
+    build_report_spec,
+    spec_filename,
+    spec_hash,
+)
+from api.session_manager import SessionManager
+
+PATIENT = {"age": 40, "gender": "female", "bmi": 24.2, "risk_level": "Moderate"}
+RECORD = {"age": 40, "risk_level": "Moderate"}
+URL = "http://kiosk/api/session/sid/download-pdf"
+SPEC = build_report_spec(PATIENT, "Summary", "2025-12-22T10:00:00+00:00")
+
+
+class FakeGenerator:
+    """PDF generator stand-in whose QR rendering can be held open."""
+
+    def __init__(self, gate=None):
+        self.gate = gate
+        self.reports = 0
+
+    def generate_report(self, patient_data, explanation, generated_at=None):
+        self.reports += 1
+        return f"%PDF {explanation}".encode()
+
+    def generate_qr_code(self, url):
+        if self.gate is not None:
+            self.gate.wait(5)
+        return f"PNG {url}".encode()
+
+
+class FakeStorage:
+    """Records uploads; optionally holds uploads at a barrier or fails inserts."""
+
+    def __init__(self, barrier=None, record_error=None, save_error=None):
+        self.barrier = barrier
+        self.record_error = record_error
+        self.save_error = save_error
+        self.files = {}
+        self.records = []
+
+    def save_file(self, content, filename, folder="reports"):
+        if self.save_error is not None:
+            raise self.save_error
+        if self.barrier is not None:
+            self.barrier.wait()
+        self.files[f"{folder}/{filename}"] = content
+        return f"https://storage/{folder}/{filename}"
+
+    def get_file(self, filename, folder="reports"):
+        return self.files.get(f"{folder}/{filename}")
+
+    def get_file_url(self, filename, folder="reports"):
+        return f"https://storage/{folder}/{filename}"
+
+    def save_patient_record(self, record):
+        if self.barrier is not None:
+            self.barrier.wait()
+        if self.record_error is not None:
+            raise self.record_error
+        self.records.append(record)
+        return f"rec-{len(self.records)}"
+
+
+@pytest.fixture
+def fakes(monkeypatch):
+    """Patch the generator and storage the pipeline and reports use."""
+
+    def install(generator=None, storage=None):
+        generator = generator or FakeGenerator()
+        storage = storage or FakeStorage()
+        for module in (artifact_module, report_module):
+            monkeypatch.setattr(module, "get_pdf_generator", lambda: generator)
+            monkeypatch.setattr(module, "get_storage", lambda: storage)
+        monkeypatch.setattr(report_module, "_report_service", ReportService())
+        return generator, storage
+
+    return install
+
+
+class TestArtifactService:
+    """Tests for ArtifactService."""
+
+    def test_renders_qr_and_saves_with_stage_timings(self, fakes):
+        """Test that every stage runs, is timed and shows up in metrics."""
+        generator, storage = fakes()
+        service = ArtifactService(max_workers=3)
+
+        job = service.submit("sid", SPEC, URL, record_data=RECORD)
+
+        assert job.done.wait(5)
+        assert job.status == STATUS_READY
+        assert job.report_id == spec_hash(SPEC)
+        assert generator.reports == 0
+        assert job.qr_bytes == f"PNG {URL}".encode()
+        assert job.qr_url == "https://storage/qr_codes/qr_sid.png"
+        assert job.record_id == "rec-1"
+        assert storage.records == [RECORD]
+        assert set(job.timings) == set(STAGES)
+        metrics = service.get_metrics()
+        assert metrics["ready"] == 1
+        assert all(metrics["stages"][stage]["count"] == 1 for stage in STAGES)
+
+    def test_uploads_run_in_parallel(self, fakes):
+        """Test that the spec store, QR upload and record insert overlap."""
+        fakes(storage=FakeStorage(barrier=threading.Barrier(3, timeout=5)))
+        service = ArtifactService(max_workers=3)
+
+        job = service.submit("sid", SPEC, URL, record_data=RECORD)
+
+        assert job.done.wait(5)
+        assert job.status == STATUS_READY
+        assert job.errors == {}
+
+    def test_failed_insert_keeps_other_artifacts(self, fakes):
+        """Test that a record failure marks the job failed but keeps the rest."""
+        fakes(storage=FakeStorage(record_error=RuntimeError("db down")))
+        service = ArtifactService(max_workers=3)
+
+        job = service.submit("sid", SPEC, URL, record_data=RECORD)
+
+        assert job.done.wait(5)
+        assert job.status == STATUS_FAILED
+        assert job.errors == {"save_record": "db down"}
+        assert job.to_dict()["saved_to_database"] is False
+        assert job.report_id == spec_hash(SPEC)
+        assert job.qr_bytes is not None
+
+    def test_wait_blocks_until_rendered(self, fakes):
+        """Test that waiters see the QR code as soon as rendering finishes."""
+        gate = threading.Event()
+        fakes(generator=FakeGenerator(gate=gate))
+        service = ArtifactService(max_workers=2)
+
+        job = service.submit("sid", SPEC, URL)
+
+        assert not job.wait_qr(0.05)
+        assert job.status == STATUS_PENDING
+        gate.set()
+        assert job.wait_qr(5)
+
+
+class TestResultsEndpoints:
+    """Tests for get_results and the artifact proxy endpoints."""
+
+    @pytest.fixture
+    def session_mgr(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("SESSION_STORE_PATH", str(tmp_path / "store.json"))
+        monkeypatch.setenv("SESSION_BLOB_DIR", str(tmp_path / "blobs"))
+        monkeypatch.setenv("SESSION_ENCRYPTION_KEY", Fernet.generate_key().decode())
+        monkeypatch.setenv("SESSION_FLUSH_INTERVAL_MS", "0")
+        mgr = SessionManager()
+        monkeypatch.setattr(session_manager_module, "_session_manager", mgr)
+        yield mgr
+        mgr.close()
+
+    @pytest.fixture
+    def client(self, session_mgr, monkeypatch):
+        monkeypatch.setenv("BACKEND_API_KEY", "test-key")
+        monkeypatch.setenv("PUBLIC_BASE_URL", "https://api.example.test")
+        monkeypatch.setattr(artifact_module, "_artifact_service", ArtifactService())
+        return Client(HTTP_HOST="localhost", HTTP_X_API_KEY="test-key")
+
+    @pytest.fixture
+    def completed_session(self, session_mgr):
+        sid = session_mgr.create_session(consent=True)
+        session_mgr.update_demographics(sid, {"age": 40, "gender": "female", "bmi": 24})
+        session_mgr.store_predictions(
+            sid,
+            {
+                "diabetes_risk": 0.42,
+                "risk_level": "Moderate",
+                "blood_group": "O",
+                "pattern_counts": {"arc": 1, "whorl": 5, "loop": 4},
+                "explanation": "Summary",
+                "explanation_status": STATUS_READY,
+            },
+        )
+        return sid
+
+    def test_results_return_before_artifacts(
+        self, client, completed_session, fakes, monkeypatch
+    ):
+        """Test that results come back at once and the QR code is waited on."""
+        gate = threading.Event()
+        generator, storage = fakes(generator=FakeGenerator(gate=gate))
+        monkeypatch.setattr("api.constants.ARTIFACT_WAIT_SECONDS", 0.05)
+        base = f"https://api.example.test/api/session/{completed_session}"
+
+        body = client.get(f"/api/session/{completed_session}/results").json()
+
+        assert body["download_url"] == f"{base}/download-pdf"
+        assert body["qr_code_url"] == f"{base}/qr-code"
+        assert body["artifact_status"] == STATUS_PENDING
+        assert generator.reports == 0
+        pending = client.get(f"/api/session/{completed_session}/qr-code")
+        assert pending.status_code == 503
+        assert pending["Retry-After"]
+
+        gate.set()
+        job = artifact_module.get_artifact_service().get_job(completed_session)
+        assert job.done.wait(5)
+        pdf = client.get(f"/api/session/{completed_session}/download-pdf")
+        qr = client.get(f"/api/session/{completed_session}/qr-code")
+        status = client.get(f"/api/session/{completed_session}/artifacts").json()
+
+        assert pdf.content == b"%PDF Summary"
+        assert pdf["Content-Type"] == "application/pdf"
+        assert generator.reports == 1
+        assert qr.content == f"PNG {base}/download-pdf".encode()
+        assert status["status"] == STATUS_READY
+        assert status["record_id"] == "rec-1"
+        assert storage.records[0]["blood_group"] == "O"
+
+    def test_session_is_retired_once_spec_is_stored(
+        self, client, session_mgr, completed_session, fakes
+    ):
+        """Test that the report survives the session and the artifact job."""
+        _, storage = fakes()
+
+        body = client.get(f"/api/session/{completed_session}/results").json()
+        job = artifact_module.get_artifact_service().get_job(completed_session)
+
+        assert job.done.wait(5)
+        assert f"reports/{spec_filename(completed_session)}" in storage.files
+        assert job.spec_stored
+        assert body["saved_to_database"] is False
+        assert body["record_id"] is None
+        assert session_mgr.get_session(completed_session) is None
+
+    def test_failed_spec_store_keeps_session(
+        self, client, session_mgr, completed_session, fakes
+    ):
+        """Test that results can be retried when the spec cannot be stored."""
+        _, storage = fakes(storage=FakeStorage(save_error=RuntimeError("down")))
+        service = artifact_module.get_artifact_service()
+
+        client.get(f"/api/session/{completed_session}/results")
+        failed = service.get_job(completed_session)
+        assert failed.done.wait(5)
+
+        assert failed.errors["store_spec"] == "down"
+        assert session_mgr.get_session(completed_session) is not None
+
+        storage.save_error = None
+        client.get(f"/api/session/{completed_session}/results")
+        retried = service.get_job(completed_session)
+        assert retried is not failed
+        assert retried.done.wait(5)
+
+        assert retried.status == STATUS_READY
+        assert session_mgr.get_session(completed_session) is None
+        assert len(storage.records) == 1
+
+    def test_proxy_rejects_malformed_session_id(self, client):
+        """Test that non-UUID ids never reach storage lookups."""
+        assert client.get("/api/session/not-a-uuid/qr-code").status_code == 400
+        assert client.get("/api/session/not-a-uuid/download-pdf").status_code == 400
+
+    def test_download_without_spec_is_not_found(self, client, fakes, monkeypatch):
+        """Test that a download with no job, spec or legacy file is a 404."""
+        _, storage = fakes()
+        monkeypatch.setattr("api.workflow_api.get_storage", lambda: storage)
+        legacy = str(uuid.uuid4())
+        storage.files[f"reports/report_{legacy}.pdf"] = b"%PDF legacy"
+
+        missing = client.get(f"/api/session/{uuid.uuid4()}/download-pdf")
+        old = client.get(f"/api/session/{legacy}/download-pdf")
+
+        assert missing.status_code == 404
+        assert old.content == b"%PDF legacy"
+
+    def test_download_before_spec_is_stored_asks_to_retry(
+        self, client, completed_session, fakes, monkeypatch
+    ):
+        """Test that a live session's report is a 503 until its spec exists."""
+        _, storage = fakes()
+        monkeypatch.setattr("api.workflow_api.get_storage", lambda: storage)
+
+        pending = client.get(f"/api/session/{completed_session}/download-pdf")
+
+        assert pending.status_code == 503
+        assert pending["Retry-After"]
+
+    def test_download_on_another_worker_uses_stored_spec(
+        self, client, completed_session, fakes, monkeypatch
+    ):
+        """Test that the PDF renders from storage when this worker has no job."""
+        generator, _ = fakes()
+        client.get(f"/api/session/{completed_session}/results")
+        job = artifact_module.get_artifact_service().get_job(completed_session)
+        assert job.done.wait(5)
+        monkeypatch.setattr(artifact_module, "_artifact_service", ArtifactService())
+
+        pdf = client.get(f"/api/session/{completed_session}/download-pdf")
+
+        assert pdf.content == b"%PDF Summary"
+        assert generator.reports == 1
+
+    def test_unknown_session_has_no_artifacts(self, client):
+        """Test that the status endpoint 404s without a job."""
+        response = client.get(f"/api/session/{uuid.uuid4()}/artifacts")
+
+        assert response.status_code == 404
+
+    def test_generate_pdf_shares_the_report_cache(
+        self, client, completed_session, fakes, monkeypatch
+    ):
+        """Test that generate-pdf and download-pdf render the report once."""
+        generator, storage = fakes()
+        monkeypatch.setattr("api.workflow_api.get_pdf_generator", lambda: generator)
+        monkeypatch.setattr("api.workflow_api.get_storage", lambda: storage)
+
+        response = client.post(f"/api/session/{completed_session}/generate-pdf")
+        again = client.post(f"/api/session/{completed_session}/generate-pdf")
+        pdf = client.get(f"/api/session/{completed_session}/download-pdf")
+
+        body = response.json()
+        assert body["download_url"] == (
+            f"https://api.example.test/api/session/{completed_session}/download-pdf"
+        )
+        assert body["pdf_url"] == again.json()["pdf_url"]
+        assert pdf.content == b"%PDF Summary"
+        assert generator.reports == 1
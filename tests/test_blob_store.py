@@ -0,0 +1,197 @@
+"""Tests for the encrypted fingerprint blob store."""
+
+import base64
+import os
+from types import SimpleNamespace
+
+import pytest
+from cryptography.fernet import Fernet
+
+from api.blob_store import FingerprintBlobStore, derive_blob_key
+from api.exceptions import FingerprintBlobError
+from api.session_manager import SessionManager
+
+
+@pytest.fixture
+def blob_store(tmp_path):
+    """Blob store with a random key."""
+    return FingerprintBlobStore(tmp_path / "blobs", os.urandom(32))
+
+
+class TestFingerprintBlobStore:
+    """Tests for FingerprintBlobStore."""
+
+    def test_round_trip(self, blob_store):
+        """Test that raw bytes come back unchanged."""
+        data = os.urandom(4096)
+        meta = blob_store.put("sess-1", "right_thumb", data)
+
+        assert meta == {"key_id": blob_store.active_key_id, "bytes": 4096}
+        assert blob_store.get("sess-1", "right_thumb") == data
+
+    def test_blob_is_binary_and_compact(self, blob_store, tmp_path):
+        """Test that the sidecar file is ciphertext plus a small header."""
+        data = os.urandom(4096)
+        blob_store.put("sess-1", "right_thumb", data)
+
+        blob = (tmp_path / "blobs" / "sess-1" / "right_thumb.fpb").read_bytes()
+
+        assert blob.startswith(b"FPB1")
+        assert data not in blob
+        assert len(blob) < len(data) + 64
+
+    def test_reads_from_disk_after_restart(self, tmp_path):
+        """Test that a new store instance with the same key reads the blob."""
+        key = os.urandom(32)
+        store = FingerprintBlobStore(tmp_path / "blobs", key)
+        store.put("sess-1", "left_index", b"image-bytes")
+
+        assert (
+            FingerprintBlobStore(tmp_path / "blobs", key).get("sess-1", "left_index")
+            == b"image-bytes"
+        )
+
+    def test_blob_bound_to_session(self, blob_store):
+        """Test that a blob cannot be replayed under another session."""
+        blob = blob_store.seal("sess-1", "right_thumb", b"data")
+
+        with pytest.raises(FingerprintBlobError):
+            blob_store.unseal("sess-2", "right_thumb", blob)
+
+    def test_tampered_blob_rejected(self, blob_store):
+        """Test that modified ciphertext fails authentication."""
+        blob = bytearray(blob_store.seal("sess-1", "right_thumb", b"data"))
+        blob[-1] ^= 0xFF
+
+        with pytest.raises(FingerprintBlobError):
+            blob_store.unseal("sess-1", "right_thumb", bytes(blob))
+
+    def test_truncated_blob_rejected(self, blob_store):
+        """Test that a short sidecar fails cleanly at every cut point."""
+        blob = blob_store.seal("sess-1", "right_thumb", b"data")
+
+        for end in range(len(blob)):
+            with pytest.raises(FingerprintBlobError):
+                blob_store.unseal("sess-1", "right_thumb", blob[:end])
+
+    def test_retired_key_still_decrypts(self, tmp_path):
+        """Test that blobs written under a rotated-out key remain readable."""
+        old_key, new_key = os.urandom(32), os.urandom(32)
+        FingerprintBlobStore(tmp_path, old_key).put("s", "f", b"old")
+
+        rotated = FingerprintBlobStore(tmp_path, new_key, retired_keys=[old_key])
+
+        assert rotated.get("s", "f") == b"old"
+
+    def test_delete_session(self, blob_store):
+        """Test that deleting a session removes its blobs."""
+        blob_store.put("sess-1", "right_thumb", b"data")
+        blob_store.delete_session("sess-1")
+
+        with pytest.raises(FingerprintBlobError):
+            blob_store.get("sess-1", "right_thumb")
+
+
+class TestResidentBudget:
+    """Tests for the memory-budgeted resident cache."""
+
+    @pytest.fixture
+    def small_store(self, tmp_path):
+        blob = len(
+            FingerprintBlobStore(tmp_path, os.urandom(32)).seal("s", "f", b"x" * 100)
+        )
+        return FingerprintBlobStore(
+            tmp_path / "blobs", os.urandom(32), memory_budget_bytes=2 * blob
+        )
+
+    def test_spills_least_recently_used(self, small_store):
+        """Test that exceeding the budget spills the coldest blob."""
+        small_store.put("s", "a", b"a" * 100)
+        small_store.put("s", "b", b"b" * 100)
+        small_store.get("s", "a")
+        small_store.put("s", "c", b"c" * 100)
+
+        metrics = small_store.get_metrics()
+
+        assert metrics["resident_blobs"] == 2
+        assert metrics["spill_events"] == 1
+        assert metrics["resident_bytes"] <= metrics["memory_budget_bytes"]
+        assert ("s", "b") not in small_store._resident
+
+    def test_spilled_blob_faults_back_in(self, small_store):
+        """Test that a spilled blob is read from disk and made resident again."""
+        for name in ("a", "b", "c"):
+            small_store.put("s", name, name.encode() * 100)
+
+        assert small_store.get("s", "a") == b"a" * 100
+        assert small_store.get_metrics()["fault_ins"] == 1
+        assert ("s", "a") in small_store._resident
+
+    def test_read_racing_delete_is_not_readmitted(self, small_store, monkeypatch):
+        """Test that a fault-in finishing after delete_session stays spilled."""
+        for name in ("a", "b", "c"):
+            small_store.put("s", name, name.encode() * 100)
+        blob = small_store._blob_path("s", "a").read_bytes()
+
+        def read_then_delete():
+            small_store.delete_session("s")
+            return blob
+
+        monkeypatch.setattr(
+            small_store,
+            "_blob_path",
+            lambda *_args: SimpleNamespace(read_bytes=read_then_delete),
+        )
+
+        assert small_store.get("s", "a") == b"a" * 100
+        assert small_store.session_resident_bytes("s") == 0
+        assert small_store.get_metrics()["resident_blobs"] == 0
+
+    def test_tracks_bytes_per_session(self, small_store):
+        """Test per-session resident byte accounting."""
+        small_store.put("s1", "a", b"a" * 100)
+        small_store.put("s2", "a", b"a" * 100)
+        small_store.delete_session("s1")
+
+        assert small_store.session_resident_bytes("s1") == 0
+        assert small_store.session_resident_bytes("s2") > 100
+        assert small_store.get_metrics()["resident_sessions"] == 1
+
+
+class TestSessionManagerBlobs:
+    """Tests for SessionManager fingerprint storage via the blob store."""
+
+    @pytest.fixture
+    def session_mgr(self, tmp_path, monkeypatch):
+        key = Fernet.generate_key()
+        monkeypatch.setenv("SESSION_STORE_PATH", str(tmp_path / "store.json"))
+        monkeypatch.setenv("SESSION_BLOB_DIR", str(tmp_path / "blobs"))
+        monkeypatch.setenv("SESSION_ENCRYPTION_KEY", key.decode())
+        monkeypatch.setenv("SESSION_FLUSH_INTERVAL_MS", "0")
+        return SessionManager()
+
+    def test_session_keeps_only_metadata(self, session_mgr):
+        """Test that the session store holds metadata, not image data."""
+        sid = session_mgr.create_session(consent=True)
+        raw = os.urandom(2048)
+        session_mgr.add_fingerprint(sid, "right_thumb", base64.b64encode(raw).decode())
+
+        entry = session_mgr.get_session(sid)["fingerprints"]["right_thumb"]
+
+        assert entry["bytes"] == 2048
+        assert session_mgr.get_fingerprint_bytes(sid) == {"right_thumb": raw}
+
+    def test_legacy_fernet_entries_readable(self, session_mgr):
+        """Test that sessions persisted before the blob store still decode."""
+        sid = session_mgr.create_session(consent=True)
+        b64 = base64.b64encode(b"legacy").decode()
+        legacy = session_mgr.cipher.encrypt(b64.encode()).decode()
+        session_mgr.update_session(sid, fingerprints={"left_thumb": legacy})
+
+        assert session_mgr.get_fingerprint_bytes(sid) == {"left_thumb": b"legacy"}
+        assert session_mgr.get_fingerprints(sid) == {"left_thumb": b64}
+
+    def test_derived_key_is_stable(self):
+        """Test that the derived blob key is deterministic per secret."""
+        secret = Fernet.generate_key()
+        assert derive_blob_key(secret) == derive_blob_key(secret)
@@ -0,0 +1,246 @@
+"""Tests for the persistent LLM response cache."""
+
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+import api.cache_service as cache_module
+from api.cache_service import (
+    PROMPT_PATIENT_EXPLANATION,
+    PROMPT_RISK_EXPLANATION,
+    ResponseCache,
+    patient_explanation_inputs,
+)
+
+ANALYSIS = {
+    "diabetes_risk_score": 0.42,
+    "diabetes_risk_level": "Moderate",
+    "predicted_blood_group": "O",
+    "pattern_counts": {"Arc": 1, "Whorl": 5, "Loop": 4},
+    "bmi": 24.2,
+    "diabetes_confidence": 0.8,
+}
+DEMOGRAPHICS = {"age": 40, "gender": "Female", "bmi": 24.2}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResponseCache(str(tmp_path / "llm_cache.sqlite3"))
+    yield cache
+    cache.close()
+
+
+class TestResponseCache:
+    """Tests for ResponseCache."""
+
+    def test_survives_restart(self, tmp_path):
+        """Test that a new instance on the same file sees stored entries."""
+        path = str(tmp_path / "llm_cache.sqlite3")
+        first = ResponseCache(path)
+        first.store(PROMPT_RISK_EXPLANATION, {"risk_level": "High"}, [{"name": "A"}])
+        first.close()
+
+        second = ResponseCache(path)
+        try:
+            cached = second.lookup(PROMPT_RISK_EXPLANATION, {"risk_level": "High"})
+            assert cached == [{"name": "A"}]
+        finally:
+            second.close()
+
+    def test_lru_eviction_under_byte_budget(self, tmp_path):
+        """Test that the least recently used entry is evicted first."""
+        cache = ResponseCache(str(tmp_path / "c.sqlite3"), max_bytes=250)
+        try:
+            cache.store("p", {"n": 1}, "a" * 100)
+            cache.store("p", {"n": 2}, "b" * 100)
+            cache.lookup("p", {"n": 1})  # 1 is now more recent than 2
+            cache.store("p", {"n": 3}, "c" * 100)
+
+            assert cache.lookup("p", {"n": 2}) is None
+            assert cache.lookup("p", {"n": 1}) == "a" * 100
+            assert cache.lookup("p", {"n": 3}) == "c" * 100
+            assert cache.get_stats()["evictions"] == 1
+            assert cache.get_stats()["bytes"] <= 250
+        finally:
+            cache.close()
+
+    def test_expired_entries_are_misses(self, tmp_path):
+        """Test that entries past their TTL are not returned."""
+        cache = ResponseCache(str(tmp_path / "c.sqlite3"), ttl_minutes=0)
+        try:
+            cache.store("p", {"n": 1}, "stale")
+
+            assert cache.lookup("p", {"n": 1}) is None
+            assert cache.get_stats()["expirations"] == 1
+        finally:
+            cache.close()
+
+    def test_discretized_patient_key(self, cache):
+        """Test that equivalent results share an entry and different ones don't."""
+        cache.store(
+            PROMPT_PATIENT_EXPLANATION,
+            patient_explanation_inputs(ANALYSIS, DEMOGRAPHICS),
+            "Report",
+        )
+
+        same_bucket = {**ANALYSIS, "bmi": 22.9, "diabetes_risk_score": 0.44}
+        other_group = {**ANALYSIS, "predicted_blood_group": "A"}
+
+        assert (
+            cache.lookup(
+                PROMPT_PATIENT_EXPLANATION,
+                patient_explanation_inputs(same_bucket, DEMOGRAPHICS),
+            )
+            == "Report"
+        )
+        assert (
+            cache.lookup(
+                PROMPT_PATIENT_EXPLANATION,
+                patient_explanation_inputs(other_group, DEMOGRAPHICS),
+            )
+            is None
+        )
+
+    def test_hit_rate_stats(self, cache):
+        """Test overall and per-prompt hit rates."""
+        cache.set({"age": 45, "bmi": 28.5, "risk_level": "Moderate"}, "Risk text")
+        cache.get({"age": 47, "bmi": 28.2, "risk_level": "Moderate"})
+        cache.lookup(PROMPT_PATIENT_EXPLANATION, {"risk_level": "Low"})
+
+        stats = cache.get_stats()
+
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+        assert stats["by_prompt"]["risk_explanation"]["hit_rate"] == 1.0
+        assert stats["by_prompt"]["patient_explanation"]["hit_rate"] == 0.0
+
+    def test_get_or_generate_coalesces_concurrent_misses(self, cache):
+        """Test that concurrent misses for one key generate once."""
+        gate = threading.Event()
+        calls = []
+
+        def generate():
+            calls.append(1)
+            gate.wait(5)
+            return "Report"
+
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(
+                    cache.get_or_generate("p", {"n": 1}, generate)
+                )
+            )
+            for _ in range(4)
+        ]
+        for t in threads:
+            t.start()
+        while cache.get_stats()["single_flight"]["coalesced"] < 3:
+            time.sleep(0.005)
+        gate.set()
+        for t in threads:
+            t.join()
+
+        assert calls == [1]
+        assert results == ["Report"] * 4
+        assert cache.lookup("p", {"n": 1}) == "Report"
+
+    def test_get_or_generate_does_not_cache_errors(self, cache):
+        """Test that a failed generation is retried by the next caller."""
+
+        def fail():
+            raise RuntimeError("429")
+
+        with pytest.raises(RuntimeError):
+            cache.get_or_generate("p", {"n": 1}, fail)
+
+        assert cache.get_or_generate("p", {"n": 1}, lambda: "ok") == "ok"
+
+
+class TestGeminiCaching:
+    """Tests that Gemini prompts go through the cache."""
+
+    @pytest.fixture
+    def gemini(self, cache, monkeypatch):
+        from api.gemini_service import GeminiService
+
+        monkeypatch.setattr(cache_module, "_cache_instance", cache)
+        service = GeminiService.__new__(GeminiService)
+        service.model = MagicMock()
+        return service
+
+    def test_patient_explanation_generated_once(self, gemini):
+        """Test that a second equivalent patient skips the LLM."""
+        gemini.model.generate_content.return_value = SimpleNamespace(text=" Report ")
+
+        first = gemini.generate_patient_explanation(ANALYSIS, DEMOGRAPHICS)
+        second = "".join(
+            gemini.stream_patient_explanation({**ANALYSIS, "bmi": 23.0}, DEMOGRAPHICS)
+        )
+
+        assert first == second == "Report"
+        assert gemini.model.generate_content.call_count == 1
+
+    def test_streamed_explanation_is_cached(self, gemini):
+        """Test that a completed stream populates the cache."""
+        gemini.model.generate_content.return_value = [
+            SimpleNamespace(text="Low "),
+            SimpleNamespace(text="risk."),
+        ]
+
+        streamed = "".join(gemini.stream_patient_explanation(ANALYSIS, DEMOGRAPHICS))
+        cached = gemini.generate_patient_explanation(ANALYSIS, DEMOGRAPHICS)
+
+        assert streamed == cached == "Low risk."
+        assert gemini.model.generate_content.call_count == 1
+
+    def test_concurrent_stream_shares_leader_result(self, gemini, cache):
+        """Test that a duplicate stream waits for the in-flight generation."""
+        gate = threading.Event()
+
+        def slow_stream(prompt, stream):
+            yield SimpleNamespace(text="Shared ")
+            gate.wait(5)
+            yield SimpleNamespace(text="report.")
+
+        gemini.model.generate_content.side_effect = slow_stream
+        leader = gemini.stream_patient_explanation(ANALYSIS, DEMOGRAPHICS)
+        assert next(leader) == "Shared "
+
+        follower = []
+        thread = threading.Thread(
+            target=lambda: follower.extend(
+                gemini.stream_patient_explanation(ANALYSIS, DEMOGRAPHICS)
+            )
+        )
+        thread.start()
+        while cache.get_stats()["single_flight"]["coalesced"] < 1:
+            time.sleep(0.005)
+        gate.set()
+        rest = list(leader)
+        thread.join(5)
+
+        assert "Shared " + "".join(rest) == "Shared report."
+        assert follower == ["Shared report."]
+        assert gemini.model.generate_content.call_count == 1
+
+    def test_same_bucket_patients_share_prompt(self, gemini):
+        """Test that a cached report cannot quote another patient's values."""
+        other_analysis = {**ANALYSIS, "diabetes_risk_score": 0.57, "bmi": 22.9}
+        other_demographics = {
+            **DEMOGRAPHICS,
+            "age": 63,
+            "bmi": 22.9,
+            "blood_type": "AB",
+        }
+
+        prompt = gemini._patient_explanation_prompt(ANALYSIS, DEMOGRAPHICS)
+        other = gemini._patient_explanation_prompt(other_analysis, other_demographics)
+
+        assert prompt == other
+        for value in ("40", "63", "24.2", "22.9", "42", "57", "AB"):
+            assert value not in prompt
@@ -0,0 +1,206 @@
+"""Tests for the LLM circuit breaker and latency budget."""
+
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from django.test import Client
+
+import api.cache_service as cache_module
+from api.cache_service import ResponseCache
+from api.circuit_breaker import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    CircuitBreaker,
+    LatencyBudget,
+    get_circuit_breaker,
+)
+from api.exceptions import CircuitOpenError, LatencyBudgetExceededError
+
+ANALYSIS = {
+    "diabetes_risk_score": 0.42,
+    "diabetes_risk_level": "Moderate",
+    "predicted_blood_group": "O",
+    "pattern_counts": {"Arc": 1, "Whorl": 5, "Loop": 4},
+    "bmi": 24.2,
+    "diabetes_confidence": 0.8,
+}
+DEMOGRAPHICS = {"age": 52, "gender": "female"}
+
+
+def _fail():
+    raise RuntimeError("boom")
+
+
+def _trip(breaker, times):
+    for _ in range(times):
+        with pytest.raises(RuntimeError):
+            breaker.call(_fail)
+
+
+class TestCircuitBreaker:
+    """Tests for CircuitBreaker state transitions."""
+
+    def test_opens_after_threshold_and_fails_fast(self):
+        """Test that consecutive failures open it and calls are refused."""
+        breaker = CircuitBreaker("svc", failure_threshold=2, cooldown_seconds=60)
+        _trip(breaker, 2)
+        fn = MagicMock()
+
+        with pytest.raises(CircuitOpenError) as exc_info:
+            breaker.call(fn)
+
+        fn.assert_not_called()
+        assert breaker.state == STATE_OPEN
+        assert exc_info.value.status_code == 503
+        assert exc_info.value.details["retry_after"] == 60
+        assert breaker.get_metrics()["rejected"] == 1
+
+    def test_success_resets_failure_count(self):
+        """Test that only consecutive failures count."""
+        breaker = CircuitBreaker("svc", failure_threshold=2)
+        _trip(breaker, 1)
+        assert breaker.call(lambda: "ok") == "ok"
+        _trip(breaker, 1)
+
+        assert breaker.state == STATE_CLOSED
+
+    def test_half_open_admits_one_probe(self):
+        """Test that after the cool-down a single probe decides the state."""
+        breaker = CircuitBreaker("svc", failure_threshold=1, cooldown_seconds=0.05)
+        _trip(breaker, 1)
+        time.sleep(0.06)
+        assert breaker.state == STATE_HALF_OPEN
+
+        with breaker.guard():
+            with pytest.raises(CircuitOpenError):
+                breaker.call(lambda: "second")
+
+        assert breaker.state == STATE_CLOSED
+
+    def test_failed_probe_reopens(self):
+        breaker = CircuitBreaker("svc", failure_threshold=3, cooldown_seconds=0.05)
+        _trip(breaker, 3)
+        time.sleep(0.06)
+        _trip(breaker, 1)
+
+        assert breaker.state == STATE_OPEN
+        assert breaker.get_metrics()["times_opened"] == 2
+
+    def test_retry_hint_extends_cooldown(self):
+        """Test that a provider's retry hint keeps the circuit open longer."""
+        breaker = CircuitBreaker(
+            "svc", failure_threshold=1, cooldown_seconds=0.01, retry_after=lambda e: 30
+        )
+        _trip(breaker, 1)
+        time.sleep(0.02)
+
+        assert breaker.state == STATE_OPEN
+        assert breaker.get_metrics()["retry_after_seconds"] > 29
+
+    def test_abandoned_stream_is_not_a_failure(self):
+        """Test that a client closing a stream early does not count."""
+        breaker = CircuitBreaker("svc", failure_threshold=1)
+
+        def stream():
+            with breaker.guard():
+                yield "a"
+                yield "b"
+
+        chunks = stream()
+        next(chunks)
+        chunks.close()
+
+        assert breaker.state == STATE_CLOSED
+        assert breaker.get_metrics()["failures"] == 0
+
+
+class TestLatencyBudget:
+    """Tests for LatencyBudget."""
+
+    def test_spent_budget_raises(self):
+        budget = LatencyBudget("svc", seconds=0.01)
+        assert budget.remaining() > 0
+        assert not budget.allows(1)
+
+        time.sleep(0.02)
+        with pytest.raises(LatencyBudgetExceededError):
+            budget.remaining()
+
+
+class TestGeminiBreaker:
+    """Tests for the breaker around Gemini calls."""
+
+    @pytest.fixture
+    def gemini(self, monkeypatch):
+        from api.gemini_service import GeminiService
+
+        monkeypatch.setattr(cache_module, "_cache_instance", ResponseCache())
+        monkeypatch.setattr(
+            GeminiService, "_acquire_slot", staticmethod(lambda priority=None: None)
+        )
+        service = GeminiService.__new__(GeminiService)
+        service.model = MagicMock()
+        return service
+
+    def test_quota_errors_open_circuit_without_sleeping(self, gemini, monkeypatch):
+        """Test that 429s fall back at once and then stop reaching Gemini."""
+        monkeypatch.setattr(time, "sleep", MagicMock(side_effect=AssertionError))
+        gemini.model.generate_content.side_effect = RuntimeError(
+            "429 Quota exceeded, retry in 45s"
+        )
+
+        for _ in range(4):
+            text = gemini.generate_patient_explanation(ANALYSIS, DEMOGRAPHICS)
+            assert "Health Assessment Summary" in text
+
+        assert gemini.model.generate_content.call_count == 3
+        metrics = gemini.breaker.get_metrics()
+        assert metrics["state"] == STATE_OPEN
+        assert metrics["retry_after_seconds"] > 45
+
+    def test_short_retry_hint_is_retried_within_budget(self, gemini, monkeypatch):
+        """Test that a 429 whose wait fits the budget is still retried."""
+        monkeypatch.setattr(time, "sleep", MagicMock())
+        gemini.model.generate_content.side_effect = [
+            RuntimeError("429 Quota exceeded, retry in 0.5s"),
+            SimpleNamespace(text=" Report "),
+        ]
+
+        text = gemini.generate_patient_explanation(ANALYSIS, DEMOGRAPHICS)
+
+        assert text == "Report"
+        time.sleep.assert_called_once_with(1.5)
+
+    def test_slow_call_is_cut_off_at_budget(self, gemini, monkeypatch):
+        """Test that a hung Gemini call falls back once the budget is spent."""
+        monkeypatch.setattr("api.circuit_breaker.LLM_LATENCY_BUDGET_SECONDS", 0.05)
+        gemini.model.generate_content.side_effect = lambda prompt: time.sleep(0.5)
+
+        started = time.monotonic()
+        text = gemini.generate_patient_explanation(ANALYSIS, DEMOGRAPHICS)
+
+        assert "Health Assessment Summary" in text
+        assert time.monotonic() - started < 0.4
+        assert (
+            "LatencyBudgetExceededError" in gemini.breaker.get_metrics()["last_error"]
+        )
+
+
+class TestHealthReportsCircuits:
+    """Tests for exposing breaker state."""
+
+    def test_health_and_metrics_show_state(self, monkeypatch):
+        monkeypatch.setenv("BACKEND_API_KEY", "test-key")
+        client = Client(HTTP_HOST="localhost", HTTP_X_API_KEY="test-key")
+        breaker = get_circuit_breaker("Gemini", failure_threshold=1)
+        _trip(breaker, 1)
+
+        health = client.get("/api/health").json()
+        metrics = client.get("/api/metrics").json()
+
+        assert health["llm_circuits"] == {"Gemini": STATE_OPEN}
+        assert metrics["llm_circuits"]["Gemini"]["state"] == STATE_OPEN
+        assert metrics["llm_circuits"]["Gemini"]["last_error"] == "RuntimeError: boom"
@@ -0,0 +1,115 @@
+"""Tests for the versioned reference directory."""
+
+import gzip
+import json
+
+import pytest
+from django.test import Client
+
+from api.constants import BLOOD_CENTERS_DB, HOSPITALS_DB
+from api.directory import Directory, get_directory
+from api.geo_index import KIND_DOCTOR, KIND_HOSPITAL
+
+HOSPITALS = [
+    {"name": "St. Jude Hospital", "city": "Angeles"},
+    {"name": "St Jude Hospital", "city": "Guagua"},
+    {"name": "General", "city": "Angeles"},
+]
+DOCTORS = [{"name": "Dr. A", "city": "Angeles", "clinic": "General"}]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("BACKEND_API_KEY", "test-key")
+    return Client(HTTP_HOST="localhost", HTTP_X_API_KEY="test-key")
+
+
+class TestDirectory:
+    """Tests for building the directory."""
+
+    def test_ids_are_unique_and_resolve_copies(self):
+        directory = Directory(
+            {KIND_HOSPITAL: HOSPITALS, KIND_DOCTOR: DOCTORS}, {"General": DOCTORS}
+        )
+        document = json.loads(directory.body)
+
+        assert [h["id"] for h in document["hospitals"]] == [
+            "hospital:st-jude-hospital-angeles",
+            "hospital:st-jude-hospital-guagua",
+            "hospital:general",
+        ]
+        assert document["hospitals"][2]["doctor_ids"] == ["doctor:dr-a"]
+        assert directory.refs(
+            KIND_HOSPITAL, [{**HOSPITALS[2], "distance_km": 1.5}]
+        ) == [{"id": "hospital:general", "distance_km": 1.5}]
+
+    def test_version_follows_content(self):
+        first = Directory({KIND_HOSPITAL: HOSPITALS})
+        same = Directory({KIND_HOSPITAL: [dict(h) for h in HOSPITALS]})
+        changed = Directory({KIND_HOSPITAL: HOSPITALS[:2]})
+
+        assert first.version == same.version != changed.version
+        assert json.loads(gzip.decompress(first.gzip_body)) == json.loads(first.body)
+
+    def test_built_in_directory_covers_every_catalog(self):
+        document = json.loads(get_directory().body)
+
+        assert len(document["hospitals"]) == len(HOSPITALS_DB)
+        assert len(document["blood_centers"]) == len(BLOOD_CENTERS_DB)
+        ids = [e["id"] for v in document.values() if isinstance(v, list) for e in v]
+        assert len(ids) == len(set(ids))
+
+
+class TestDirectoryEndpoint:
+    """Tests for GET /api/directory."""
+
+    def test_serves_json_with_validators(self, client):
+        response = client.get("/api/directory")
+
+        directory = get_directory()
+        assert response.status_code == 200
+        assert response.content == directory.body
+        assert response["ETag"] == directory.etag
+        assert response["Cache-Control"].startswith("private, max-age=")
+        assert response["X-Directory-Version"] == directory.version
+
+    def test_gzip_when_accepted(self, client):
+        response = client.get("/api/directory", HTTP_ACCEPT_ENCODING="br, gzip")
+
+        assert response["Content-Encoding"] == "gzip"
+        assert response["ETag"] == get_directory().gzip_etag
+        assert gzip.decompress(response.content) == get_directory().body
+
+    def test_gzip_q_values(self, client):
+        def encoding(accept):
+            response = client.get("/api/directory", HTTP_ACCEPT_ENCODING=accept)
+            return response.get("Content-Encoding")
+
+        assert encoding("gzip;q=0.8, br") == "gzip"
+        assert encoding("gzip; q=0.5") == "gzip"
+        assert encoding("gzip;q=0") is None
+        assert encoding("gzip;q=0.0") is None
+        assert encoding("identity") is None
+
+    def test_matching_etag_is_not_modified(self, client):
+        etag = client.get("/api/directory")["ETag"]
+
+        response = client.get("/api/directory", HTTP_IF_NONE_MATCH=f"W/{etag}")
+
+        assert response.status_code == 304
+        assert response.content == b""
+
+    def test_stale_etag_gets_body(self, client):
+        response = client.get("/api/directory", HTTP_IF_NONE_MATCH='"stale"')
+
+        assert response.status_code == 200
+
+    def test_versioned_url_is_immutable(self, client):
+        version = get_directory().version
+
+        response = client.get(f"/api/directory/{version}")
+        missing = client.get("/api/directory/0000")
+
+        assert "immutable" in response["Cache-Control"]
+        assert missing.status_code == 404
+        assert missing.json()["version"] == version
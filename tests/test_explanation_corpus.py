@@ -0,0 +1,180 @@
+"""Tests for the precomputed explanation corpus."""
+
+import gzip
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+from cryptography.fernet import Fernet
+
+import api.explanation_corpus as corpus_module
+import api.session_manager as session_manager_module
+from api.constants import FINGER_NAMES
+from api.explanation_corpus import (
+    ExplanationCorpus,
+    corpus_key,
+    enumerate_corpus_inputs,
+)
+from api.explanation_service import STATUS_PENDING, STATUS_READY
+from api.gemini_service import GeminiService
+from api.session_manager import SessionManager
+
+ANALYSIS = {
+    "diabetes_risk_score": 0.42,
+    "diabetes_risk_level": "Moderate",
+    "predicted_blood_group": "O",
+    "pattern_counts": {"Arc": 1, "Whorl": 5, "Loop": 4},
+    "bmi": 24.2,
+    "diabetes_confidence": 0.8,
+}
+DEMOGRAPHICS = {"age": 52, "gender": "female", "bmi": 24.2}
+
+
+class FakeGemini:
+    def __init__(self):
+        self.calls = 0
+
+    def stream_patient_explanation(self, analysis_results, demographics, priority):
+        self.calls += 1
+        self.priority = priority
+        yield f"Report for {analysis_results['diabetes_risk_level']}"
+
+
+class TestCorpusSpace:
+    """Tests for enumerating the discrete input space."""
+
+    def test_every_point_has_a_distinct_key(self):
+        """Test that the enumeration covers each key exactly once."""
+        keys = [corpus_key(*point) for point in enumerate_corpus_inputs()]
+
+        # 66 pattern splits x 3 risk levels x 4 blood groups x 4 genders x 4 BMI bands
+        assert len(keys) == 66 * 3 * 4 * 4 * 4
+        assert len(set(keys)) == len(keys)
+
+    def test_live_inputs_map_onto_the_space(self):
+        """Test that real analysis inputs land on an enumerated key."""
+        keys = {corpus_key(*point) for point in enumerate_corpus_inputs()}
+
+        assert corpus_key(ANALYSIS, DEMOGRAPHICS) in keys
+
+    def test_corpus_prompt_matches_live_prompt(self):
+        """Test that a corpus entry is generated from the live patient's prompt."""
+        point = next(
+            p
+            for p in enumerate_corpus_inputs()
+            if corpus_key(*p) == corpus_key(ANALYSIS, DEMOGRAPHICS)
+        )
+
+        assert GeminiService._patient_explanation_prompt(
+            *point
+        ) == GeminiService._patient_explanation_prompt(ANALYSIS, DEMOGRAPHICS)
+
+
+class TestExplanationCorpus:
+    """Tests for loading and looking up the corpus."""
+
+    def test_round_trip_and_lookup(self, tmp_path):
+        """Test that a saved corpus serves equivalent inputs."""
+        path = tmp_path / "corpus.json.gz"
+        corpus = ExplanationCorpus()
+        corpus.add(ANALYSIS, DEMOGRAPHICS, "Stored report")
+        corpus.save(path)
+
+        loaded = ExplanationCorpus.load(path)
+        same_band = {**ANALYSIS, "bmi": 21.0, "diabetes_risk_score": 0.55}
+
+        assert loaded.lookup(same_band, DEMOGRAPHICS) == "Stored report"
+        assert loaded.lookup({**ANALYSIS, "predicted_blood_group": "B"}, {}) is None
+        assert loaded.get_stats()["hit_rate"] == 0.5
+
+    def test_stale_prompt_version_is_ignored(self, tmp_path):
+        """Test that a corpus for another prompt version is not served."""
+        path = tmp_path / "corpus.json.gz"
+        with gzip.open(path, "wt") as f:
+            json.dump({"prompt_version": -1, "entries": {"k": "old"}}, f)
+
+        assert len(ExplanationCorpus.load(path)) == 0
+
+    def test_missing_file_gives_empty_corpus(self, tmp_path):
+        assert len(ExplanationCorpus.load(tmp_path / "absent.json.gz")) == 0
+
+
+class TestBuildCorpus:
+    """Tests for the offline build job."""
+
+    def test_build_is_resumable(self, tmp_path):
+        """Test that a rerun only generates the entries still missing."""
+        import build_explanation_corpus
+
+        path = tmp_path / "corpus.json.gz"
+        gemini = FakeGemini()
+        with patch.object(
+            build_explanation_corpus, "get_gemini_service", return_value=gemini
+        ):
+            assert build_explanation_corpus.build(path, limit=3) == 3
+            assert build_explanation_corpus.build(path, limit=2) == 2
+
+        assert gemini.calls == 5
+        assert gemini.priority == "background"
+        assert len(ExplanationCorpus.load(path)) == 5
+
+
+class TestAnalyzeUsesCorpus:
+    """Tests for serving analyze from the corpus."""
+
+    @pytest.fixture
+    def session_id(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("SESSION_STORE_PATH", str(tmp_path / "store.json"))
+        monkeypatch.setenv("SESSION_BLOB_DIR", str(tmp_path / "blobs"))
+        monkeypatch.setenv("SESSION_ENCRYPTION_KEY", Fernet.generate_key().decode())
+        monkeypatch.setenv("SESSION_FLUSH_INTERVAL_MS", "0")
+        mgr = SessionManager()
+        monkeypatch.setattr(session_manager_module, "_session_manager", mgr)
+
+        sid = mgr.create_session(consent=True)
+        mgr.update_demographics(sid, DEMOGRAPHICS)
+        for name in FINGER_NAMES:
+            mgr.add_fingerprint(sid, name, "aGVsbG8=")
+        yield sid
+        mgr.close()
+
+    @pytest.fixture
+    def ml_results(self):
+        diabetes = {
+            "risk_score": ANALYSIS["diabetes_risk_score"],
+            "risk_level": ANALYSIS["diabetes_risk_level"],
+            "confidence": 0.8,
+            "pattern_counts": ANALYSIS["pattern_counts"],
+        }
+        blood = {"blood_group": "O", "confidence": 0.9}
+        with patch(
+            "api.workflow_api._run_ml_predictions", return_value=(diabetes, blood)
+        ):
+            yield
+
+    def _analyze(self, session_id, corpus, monkeypatch):
+        from api.workflow_api import _run_analysis
+
+        monkeypatch.setattr(corpus_module, "_corpus", corpus)
+        service = MagicMock()
+        with patch("api.workflow_api.get_explanation_service", return_value=service):
+            result = _run_analysis(session_id, fingerprint_images=[])
+        return result, service
+
+    def test_corpus_hit_skips_llm(self, session_id, ml_results, monkeypatch):
+        """Test that a covered input is answered without an LLM job."""
+        corpus = ExplanationCorpus()
+        corpus.add(ANALYSIS, DEMOGRAPHICS, "Precomputed <b>report</b>")
+
+        result, service = self._analyze(session_id, corpus, monkeypatch)
+
+        assert result["explanation_status"] == STATUS_READY
+        assert result["explanation"] == "Precomputed &lt;b&gt;report&lt;/b&gt;"
+        service.submit.assert_not_called()
+
+    def test_corpus_miss_queues_job(self, session_id, ml_results, monkeypatch):
+        """Test that an uncovered input falls through to the LLM."""
+        result, service = self._analyze(session_id, ExplanationCorpus(), monkeypatch)
+
+        assert result["explanation_status"] == STATUS_PENDING
+        service.submit.assert_called_once()
@@ -0,0 +1,319 @@
+"""Tests for background explanation generation."""
+
+import json
+import threading
+from unittest.mock import patch
+
+import pytest
+from cryptography.fernet import Fernet
+
+import api.session_manager as session_manager_module
+from api.explanation_service import (
+    STATUS_FAILED,
+    STATUS_PENDING,
+    STATUS_READY,
+    ExplanationService,
+    fallback_explanation,
+)
+from api.security_utils import StreamingSanitizer, sanitize_ai_content
+from api.session_manager import SessionManager
+from api.workflow_api import _resolve_explanation
+
+ANALYSIS = {
+    "diabetes_risk_score": 0.42,
+    "diabetes_risk_level": "Moderate",
+    "predicted_blood_group": "O",
+    "pattern_counts": {"Arc": 1, "Whorl": 5, "Loop": 4},
+    "bmi": 24.2,
+    "diabetes_confidence": 0.8,
+}
+DEMOGRAPHICS = {"age": 40, "gender": "Female", "bmi": 24.2}
+
+
+class FakeGemini:
+    """Stand-in for GeminiService that streams its text and can be held open."""
+
+    def __init__(self, text="Your result", gate=None, chunk_size=4, error=None):
+        self.text = text
+        self.gate = gate
+        self.chunk_size = chunk_size
+        self.error = error
+
+    def stream_patient_explanation(self, analysis_results, demographics, priority=None):
+        for i in range(0, len(self.text), self.chunk_size):
+            if self.gate is not None and i + self.chunk_size >= len(self.text):
+                self.gate.wait(5)
+            yield self.text[i : i + self.chunk_size]
+        if self.error is not None:
+            raise self.error
+
+
+@pytest.fixture
+def session_mgr(tmp_path, monkeypatch):
+    """Shared session manager on a temporary store."""
+    monkeypatch.setenv("SESSION_STORE_PATH", str(tmp_path / "store.json"))
+    monkeypatch.setenv("SESSION_BLOB_DIR", str(tmp_path / "blobs"))
+    monkeypatch.setenv("SESSION_ENCRYPTION_KEY", Fernet.generate_key().decode())
+    monkeypatch.setenv("SESSION_FLUSH_INTERVAL_MS", "0")
+    mgr = SessionManager()
+    monkeypatch.setattr(session_manager_module, "_session_manager", mgr)
+    yield mgr
+    mgr.close()
+
+
+@pytest.fixture
+def pending_session(session_mgr):
+    sid = session_mgr.create_session(consent=True)
+    session_mgr.store_predictions(
+        sid,
+        {
+            "explanation": "",
+            "explanation_status": STATUS_PENDING,
+            "explanation_request": ANALYSIS,
+        },
+    )
+    return sid
+
+
+class TestExplanationService:
+    """Tests for ExplanationService."""
+
+    def test_job_writes_sanitized_text_to_session(self, session_mgr, pending_session):
+        """Test that a finished job updates the session predictions."""
+        service = ExplanationService(max_workers=1)
+        with patch(
+            "api.gemini_service.get_gemini_service",
+            return_value=FakeGemini("<b>Low risk</b>"),
+        ):
+            service.submit(pending_session, ANALYSIS, DEMOGRAPHICS)
+            text = service.wait(pending_session, timeout=5)
+
+        predictions = session_mgr.get_session(pending_session)["predictions"]
+        assert text == "&lt;b&gt;Low risk&lt;/b&gt;"
+        assert predictions["explanation"] == text
+        assert predictions["explanation_status"] == STATUS_READY
+
+    def test_unavailable_llm_uses_fallback(self, session_mgr, pending_session):
+        """Test that a service error yields the template explanation."""
+        service = ExplanationService(max_workers=1)
+        with patch(
+            "api.gemini_service.get_gemini_service",
+            side_effect=ValueError("Missing GEMINI_API_KEY"),
+        ):
+            service.submit(pending_session, ANALYSIS, DEMOGRAPHICS)
+            text = service.wait(pending_session, timeout=5)
+
+        job = service.get_job(pending_session)
+        assert job.status == STATUS_FAILED
+        assert "Moderate" in text
+
+    def test_failed_session_write_still_finishes_job(
+        self, session_mgr, pending_session, monkeypatch
+    ):
+        """Test that waiters are released when recording the result fails."""
+        service = ExplanationService(max_workers=1)
+
+        def fail(*_args):
+            raise RuntimeError("store down")
+
+        monkeypatch.setattr(session_mgr, "update_predictions", fail)
+        with patch(
+            "api.gemini_service.get_gemini_service",
+            return_value=FakeGemini("Low risk"),
+        ):
+            job = service.submit(pending_session, ANALYSIS, DEMOGRAPHICS)
+
+            assert job.done.wait(5)
+        assert service.wait(pending_session, timeout=1) == "Low risk"
+
+    def test_fallback_is_sanitized(self, session_mgr, pending_session):
+        """Test that the template explanation is sanitized like LLM output."""
+        service = ExplanationService(max_workers=1)
+        analysis = {**ANALYSIS, "predicted_blood_group": "<script>x</script>O"}
+        with patch(
+            "api.gemini_service.get_gemini_service",
+            side_effect=ValueError("Missing GEMINI_API_KEY"),
+        ):
+            service.submit(pending_session, analysis, DEMOGRAPHICS)
+            text = service.wait(pending_session, timeout=5)
+
+        assert "<script>" not in text
+        assert "blood group: O" in text
+        assert text == fallback_explanation(analysis, DEMOGRAPHICS)
+
+    def test_wait_times_out_while_pending(self, session_mgr, pending_session):
+        """Test that wait returns None before the job finishes."""
+        gate = threading.Event()
+        service = ExplanationService(max_workers=1)
+        with patch(
+            "api.gemini_service.get_gemini_service",
+            return_value=FakeGemini(gate=gate),
+        ):
+            job = service.submit(pending_session, ANALYSIS, DEMOGRAPHICS)
+
+            assert service.wait(pending_session, timeout=0.05) is None
+            assert service.submit(pending_session, ANALYSIS, DEMOGRAPHICS) is job
+
+            gate.set()
+            assert service.wait(pending_session, timeout=5) == "Your result"
+
+    def test_follow_yields_chunks_as_they_arrive(self, session_mgr, pending_session):
+        """Test that a follower sees the first chunk before the job finishes."""
+        gate = threading.Event()
+        service = ExplanationService(max_workers=1)
+        with patch(
+            "api.gemini_service.get_gemini_service",
+            return_value=FakeGemini("Low risk overall.", gate=gate),
+        ):
+            job = service.submit(pending_session, ANALYSIS, DEMOGRAPHICS)
+            chunks = job.follow(timeout=5)
+
+            first = next(chunks)
+            assert not job.done.is_set()
+
+            gate.set()
+            rest = list(chunks)
+
+        assert first + "".join(rest) == "Low risk overall."
+        assert job.status == STATUS_READY
+
+    def test_error_mid_stream_falls_back(self, session_mgr, pending_session):
+        """Test that a stream that breaks off is replaced by the template."""
+        service = ExplanationService(max_workers=1)
+        with patch(
+            "api.gemini_service.get_gemini_service",
+            return_value=FakeGemini("Partial text", error=RuntimeError("reset")),
+        ):
+            service.submit(pending_session, ANALYSIS, DEMOGRAPHICS)
+            text = service.wait(pending_session, timeout=5)
+
+        predictions = session_mgr.get_session(pending_session)["predictions"]
+        assert predictions["explanation_status"] == STATUS_FAILED
+        assert predictions["explanation"] == text
+        assert "Health Assessment Summary" in text
+
+
+class TestResolveExplanation:
+    """Tests for the get_results explanation deadline."""
+
+    def test_falls_back_after_deadline(self, session_mgr, pending_session, monkeypatch):
+        """Test that results never wait past the deadline."""
+        monkeypatch.setattr("api.constants.EXPLANATION_RESULTS_DEADLINE_SECONDS", 0.05)
+        predictions = session_mgr.get_session(pending_session)["predictions"]
+
+        text = _resolve_explanation(pending_session, predictions, DEMOGRAPHICS)
+
+        assert "Health Assessment Summary" in text
+
+    def test_ready_explanation_returned_directly(self):
+        """Test that a stored explanation is used without waiting."""
+        predictions = {"explanation": "Done", "explanation_status": STATUS_READY}
+
+        assert _resolve_explanation("sid", predictions, DEMOGRAPHICS) == "Done"
+
+
+class TestStreamingSanitizer:
+    """Tests for incremental sanitization of streamed text."""
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "Keep <script>alert(1)</script> out",
+            "Hover onclick = steal() here",
+            "Line one\\nLine two & <b>three</b>",
+            "Risk < 20% and > 5%",
+        ],
+    )
+    @pytest.mark.parametrize("size", [1, 2, 3, 7])
+    def test_matches_whole_text_sanitization(self, text, size):
+        """Test that chunked output equals sanitizing the whole text."""
+        sanitizer = StreamingSanitizer()
+        out = "".join(
+            sanitizer.feed(text[i : i + size]) for i in range(0, len(text), size)
+        )
+        out += sanitizer.flush()
+
+        assert out == sanitize_ai_content(text)
+
+    def test_releases_complete_words_immediately(self):
+        """Test that only the trailing partial word is held back."""
+        sanitizer = StreamingSanitizer()
+
+        assert sanitizer.feed("Your risk is lo") == "Your risk is "
+        assert sanitizer.flush() == "lo"
+
+
+class TestExplanationStream:
+    """Tests for the SSE explanation endpoint."""
+
+    @pytest.fixture
+    def client(self, session_mgr, monkeypatch):
+        from django.test import Client
+
+        import api.explanation_service as explanation_module
+
+        monkeypatch.setenv("BACKEND_API_KEY", "test-key")
+        service = ExplanationService(max_workers=1)
+        monkeypatch.setattr(explanation_module, "_explanation_service", service)
+        return Client(HTTP_HOST="localhost", HTTP_X_API_KEY="test-key")
+
+    @staticmethod
+    def _events(response):
+        body = b"".join(response.streaming_content).decode()
+        events = []
+        for frame in body.strip().split("\n\n"):
+            event, data = frame.split("\n")
+            events.append((event[len("event: ") :], json.loads(data[len("data: ") :])))
+        return events
+
+    def test_streams_chunks_then_done(self, client, session_mgr, pending_session):
+        """Test that chunks are pushed as SSE events and the text persisted."""
+        with patch(
+            "api.gemini_service.get_gemini_service",
+            return_value=FakeGemini("Low risk, <i>keep active</i>."),
+        ):
+            response = client.get(f"/api/session/{pending_session}/explanation/stream")
+            events = self._events(response)
+
+        assert response["Content-Type"] == "text/event-stream"
+        chunks = [data["text"] for event, data in events if event == "chunk"]
+        final = sanitize_ai_content("Low risk, <i>keep active</i>.")
+        assert "".join(chunks) == final
+        assert events[-1] == (
+            "done",
+            {
+                "session_id": pending_session,
+                "status": STATUS_READY,
+                "explanation": final,
+                "error": None,
+            },
+        )
+        predictions = session_mgr.get_session(pending_session)["predictions"]
+        assert predictions["explanation"] == final
+
+    def test_finished_explanation_sent_as_done(self, client, session_mgr):
+        """Test that a stored explanation is replayed as a single event."""
+        sid = session_mgr.create_session(consent=True)
+        session_mgr.store_predictions(
+            sid, {"explanation": "Done", "explanation_status": STATUS_READY}
+        )
+
+        events = self._events(client.get(f"/api/session/{sid}/explanation/stream"))
+
+        assert events == [
+            (
+                "done",
+                {
+                    "session_id": sid,
+                    "status": STATUS_READY,
+                    "explanation": "Done",
+                    "error": None,
+                },
+            )
+        ]
+
+    def test_unknown_session(self, client):
+        """Test that a missing session is a 404."""
+        response = client.get("/api/session/missing/explanation/stream")
+
+        assert response.status_code == 404
@@ -0,0 +1,141 @@
+"""Tests for the deterministic facility recommender."""
+
+from api.constants import HOSPITALS_DB
+from api.facility_recommender import (
+    KIND_LABORATORY,
+    FacilityRecommender,
+    get_facility_recommender,
+    normalize_city,
+)
+
+HOSPITALS = [
+    {
+        "name": "Central General Hospital",
+        "type": "General Hospital (DOH Level III)",
+        "city": "San Fernando",
+        "emergency": True,
+        "verification_status": "verified",
+    },
+    {
+        "name": "Northside Medical Center",
+        "type": "Medical Center",
+        "city": "Angeles",
+        "verification_status": "verified",
+    },
+    {
+        "name": "Eastside Diabetes Clinic",
+        "type": "Diabetes Clinic",
+        "city": "Angeles",
+    },
+    {
+        "name": "Westside ENT Clinic",
+        "type": "ENT Clinic",
+        "city": "Angeles",
+        "verification_status": "verified",
+    },
+]
+LABORATORIES = [{"name": "Quick Lab", "type": "Laboratory", "city": "Angeles"}]
+DOCTORS = [
+    {"name": "Dr. A", "clinic": "Room 1, NMC, Angeles City", "city": "Angeles"},
+    {"name": "Dr. B", "clinic": "Room 2, Northside Medical Center", "city": "Angeles"},
+    {"name": "Dr. C", "clinic": "Private practice, Guagua", "city": "Guagua"},
+]
+
+
+def _recommender():
+    return FacilityRecommender(HOSPITALS, LABORATORIES, DOCTORS)
+
+
+def _names(facilities):
+    return [f["name"] for f in facilities]
+
+
+class TestFacilityIndex:
+    """Tests for the precomputed indexes."""
+
+    def test_indexes_by_city_category_and_specialty(self):
+        recommender = _recommender()
+        names = {
+            key: {recommender.records[rid]["entry"]["name"] for rid in ids}
+            for key, ids in recommender.by_specialty.items()
+        }
+
+        assert len(recommender.by_city["angeles"]) == 6
+        assert recommender.by_category["general_hospital"] == [0]
+        assert names["diabetes"] == {
+            "Eastside Diabetes Clinic",
+            "Dr. A",
+            "Dr. B",
+            "Dr. C",
+        }
+        assert names["ent"] == {"Westside ENT Clinic"}
+        assert recommender.emergency == {0}
+
+    def test_doctors_are_linked_by_name_or_acronym(self):
+        recommender = _recommender()
+
+        assert recommender.recommend("low", city="Angeles")[0]["doctors"] == [
+            "Dr. A",
+            "Dr. B",
+        ]
+
+    def test_normalize_city(self):
+        assert normalize_city("Angeles City") == "angeles"
+        assert normalize_city("City of San Fernando") == "san fernando"
+        assert normalize_city("") is None
+
+
+class TestRecommend:
+    """Tests for risk-aware ranking."""
+
+    def test_high_risk_prefers_emergency_care(self):
+        recommender = FacilityRecommender(HOSPITALS, LABORATORIES, [])
+
+        assert _names(recommender.recommend("High", limit=1)) == [
+            "Central General Hospital"
+        ]
+        assert _names(recommender.recommend("Low", limit=1)) == [
+            "Northside Medical Center"
+        ]
+
+    def test_moderate_risk_prefers_diabetes_care(self):
+        ranked = _names(_recommender().recommend("Moderate"))
+
+        assert ranked[0] == "Northside Medical Center"
+        assert "Westside ENT Clinic" not in ranked
+
+    def test_kiosk_city_ranks_local_facilities_first(self):
+        ranked = _names(_recommender().recommend("High", city="Angeles City"))
+
+        assert ranked[0] == "Northside Medical Center"
+        assert "Central General Hospital" in ranked
+
+    def test_without_city_picks_are_spread_across_cities(self):
+        ranked = _recommender().recommend("Low", limit=2)
+
+        assert {f["city"] for f in ranked} == {"Angeles", "San Fernando"}
+
+    def test_other_kinds_and_unknown_risk(self):
+        recommender = _recommender()
+
+        assert _names(recommender.recommend("High", kind=KIND_LABORATORY)) == [
+            "Quick Lab"
+        ]
+        assert recommender.recommend("Unknown") == recommender.recommend("moderate")
+
+    def test_results_are_memoized_and_deterministic(self):
+        recommender = _recommender()
+        first = recommender.recommend("High")
+
+        assert recommender.recommend("high") == first
+        assert len(recommender._memo) == 1
+        assert _recommender().recommend("High") == first
+
+    def test_returns_directory_entries_only(self):
+        """Test that recommendations carry real data and nothing invented."""
+        known = {h["name"]: h for h in HOSPITALS_DB}
+
+        for risk in ("Low", "Moderate", "High"):
+            for facility in get_facility_recommender().recommend(risk):
+                extra = set(facility) - set(known[facility["name"]])
+                assert extra == {"doctors"}
@@ -0,0 +1,187 @@
+"""Tests for the nearest-facility geo index and kiosk locations."""
+
+import json
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+from cryptography.fernet import Fernet
+from django.test import Client
+
+import api.explanation_corpus as corpus_module
+import api.session_manager as session_manager_module
+from api.constants import BLOOD_CENTERS_DB, HOSPITALS_DB, LABORATORIES_DB
+from api.directory import get_directory
+from api.exceptions import UnknownKioskError, ValidationError
+from api.explanation_corpus import ExplanationCorpus
+from api.facility_recommender import FacilityRecommender
+from api.geo_index import (
+    KIND_BLOOD_CENTER,
+    KIND_LABORATORY,
+    GeoIndex,
+    coordinates,
+    get_geo_index,
+    haversine_km,
+    resolve_location,
+)
+
+ANGELES = (15.1452, 120.5951)  # AUF Medical Center
+SAN_FERNANDO = (15.0290, 120.6935)
+
+PLACES = [
+    {"name": "far", "lat": 15.5, "lng": 121.0},
+    {"name": "near", "lat": 15.15, "lng": 120.6},
+    {"name": "nowhere"},
+    {"name": "middle", "lat": 15.3, "lng": 120.7},
+]
+
+
+class TestHaversine:
+    """Tests for the vectorized distance."""
+
+    def test_known_distance(self):
+        """Test Angeles to San Fernando (about 17 km) and zero distance."""
+        lat, lng = coordinates([{"lat": ANGELES[0], "lng": ANGELES[1]}])
+
+        assert haversine_km(lat, lng, *ANGELES)[0] == pytest.approx(0.0)
+        assert haversine_km(lat, lng, *SAN_FERNANDO)[0] == pytest.approx(16.9, abs=0.3)
+
+    def test_missing_coordinates_are_nan(self):
+        lat, lng = coordinates(PLACES)
+
+        assert np.isnan(haversine_km(lat, lng, *ANGELES)[2])
+
+
+class TestGeoIndex:
+    """Tests for GeoIndex.nearest."""
+
+    def test_nearest_first_with_distance(self):
+        index = GeoIndex({"place": PLACES})
+
+        nearest = index.nearest("place", *ANGELES, k=2)
+
+        assert [p["name"] for p in nearest] == ["near", "middle"]
+        assert nearest[0]["distance_km"] < nearest[1]["distance_km"]
+        assert "distance_km" not in PLACES[1]
+
+    def test_unlocated_entries_are_skipped(self):
+        index = GeoIndex({"place": PLACES})
+
+        assert len(index.nearest("place", *ANGELES, k=10)) == 3
+        assert index.nearest("other", *ANGELES) == []
+
+    def test_built_in_index_covers_every_catalog(self):
+        index = get_geo_index()
+
+        assert len(index.entries[KIND_LABORATORY]) == len(LABORATORIES_DB)
+        assert len(index.entries[KIND_BLOOD_CENTER]) == len(BLOOD_CENTERS_DB)
+        labs = index.nearest(KIND_LABORATORY, *SAN_FERNANDO)
+        assert {lab["city"] for lab in labs} == {"San Fernando"}
+
+
+class TestResolveLocation:
+    """Tests for kiosk id / coordinate resolution."""
+
+    def test_kiosk_id(self):
+        location = resolve_location("auf-angeles")
+
+        assert location["city"] == "Angeles"
+        assert (location["lat"], location["lng"]) == ANGELES
+
+    def test_coordinates_override_kiosk(self):
+        location = resolve_location("auf-angeles", *SAN_FERNANDO)
+
+        assert location["kiosk_id"] == "auf-angeles"
+        assert (location["lat"], location["lng"]) == SAN_FERNANDO
+
+    def test_errors(self):
+        assert resolve_location() is None
+        with pytest.raises(UnknownKioskError):
+            resolve_location("mars-base")
+        with pytest.raises(ValidationError):
+            resolve_location(latitude=15.0)
+
+
+class TestRecommenderProximity:
+    """Tests for distance-aware facility ranking."""
+
+    def test_location_ranks_nearby_hospitals_first(self):
+        recommender = FacilityRecommender()
+
+        near_sf = recommender.recommend("Low", location=SAN_FERNANDO)
+        near_angeles = recommender.recommend("Low", location=ANGELES)
+
+        assert near_sf[0]["city"] == "San Fernando"
+        assert near_angeles[0]["city"] == "Angeles"
+        assert all("distance_km" in h for h in near_sf)
+        assert "distance_km" not in HOSPITALS_DB[0]
+
+
+class TestKioskWorkflow:
+    """Tests for kiosk locations in the session workflow."""
+
+    @pytest.fixture
+    def client(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("SESSION_STORE_PATH", str(tmp_path / "store.json"))
+        monkeypatch.setenv("SESSION_BLOB_DIR", str(tmp_path / "blobs"))
+        monkeypatch.setenv("SESSION_ENCRYPTION_KEY", Fernet.generate_key().decode())
+        monkeypatch.setenv("SESSION_FLUSH_INTERVAL_MS", "0")
+        monkeypatch.setenv("BACKEND_API_KEY", "test-key")
+        monkeypatch.setattr(session_manager_module, "_session_manager", None)
+        yield Client(HTTP_HOST="localhost", HTTP_X_API_KEY="test-key")
+        if session_manager_module._session_manager is not None:
+            session_manager_module._session_manager.close()
+
+    def _start(self, client, **data):
+        return client.post(
+            "/api/session/start",
+            data={"consent": True, **data},
+            content_type="application/json",
+        )
+
+    def test_unknown_kiosk_is_rejected(self, client):
+        response = self._start(client, kiosk_id="mars-base")
+
+        assert response.status_code == 400
+        assert "kiosk_id" in response.json()["error"]
+
+    def test_analysis_uses_kiosk_location(self, client, monkeypatch):
+        """Test that labs and blood centers are the nearest to the kiosk."""
+        sid = self._start(client, kiosk_id="auf-angeles").json()["session_id"]
+        mgr = session_manager_module.get_session_manager()
+        mgr.update_demographics(
+            sid, {"age": 52, "gender": "female", "bmi": 24.2, "willing_to_donate": True}
+        )
+        monkeypatch.setattr(corpus_module, "_corpus", ExplanationCorpus())
+        diabetes = {
+            "risk_score": 0.42,
+            "risk_level": "Moderate",
+            "confidence": 0.8,
+            "pattern_counts": {"Arc": 1, "Whorl": 5, "Loop": 4},
+        }
+        blood = {"blood_group": "O", "confidence": 0.9}
+
+        from api.workflow_api import _run_analysis
+
+        with (
+            patch(
+                "api.workflow_api._run_ml_predictions", return_value=(diabetes, blood)
+            ),
+            patch("api.workflow_api.get_explanation_service", return_value=MagicMock()),
+            patch("api.workflow_api._validate_session_for_analysis") as validate,
+        ):
+            validate.return_value = (mgr.get_session(sid), mgr)
+            result = _run_analysis(sid, fingerprint_images=[])
+
+        directory = json.loads(get_directory().body)
+        by_id = {
+            entry["id"]: entry
+            for section in directory.values()
+            if isinstance(section, list)
+            for entry in section
+        }
+        assert by_id[result["nearby_facilities"][0]["id"]]["city"] == "Angeles"
+        labs = [by_id[ref["id"]] for ref in result["nearby_laboratories"]]
+        assert {lab["city"] for lab in labs} == {"Angeles"}
+        assert len(result["blood_centers"]) == 3
+        assert all(ref["distance_km"] < 5 for ref in result["blood_centers"])
@@ -7,11 +7,21 @@ import numpy as np
 import pytest
 from PIL import Image
 
-from api.exceptions import InvalidImageError, NoValidImagesError
+from api.constants import MODEL_INPUT_SIZE
+from api.exceptions import ImageSizeLimitError, InvalidImageError, NoValidImagesError
+from api.utils import image_processing
 from api.utils.image_processing import (
+    ImageDecoder,
+    assess_fingerprint_quality,
+    base64_to_bytes,
     decode_base64_image,
     decode_base64_images,
     decode_fingerprints_from_dict,
+    decode_image_bytes,
+    decode_images_bytes,
+    decode_images_parallel,
+    get_quality_decoder,
+    validate_image_header,
 )
 
 
@@ -90,6 +100,16 @@ class TestDecodeBase64Images:
         # Should return 2 valid images
         assert len(result) == 2
 
+    def test_decode_skips_oversized(self, monkeypatch):
+        """Test that one oversized image does not abort the batch."""
+        monkeypatch.setattr(image_processing, "MAX_IMAGE_SIZE_BYTES", 1024)
+        small = self.create_test_image(size=(8, 8))
+        big = base64.b64encode(b"\0" * 4096).decode("utf-8")
+
+        result = decode_base64_images([small, big])
+
+        assert len(result) == 1
+
     def test_decode_all_invalid(self):
         """Test decoding when all images are invalid."""
         invalid_images = ["invalid1", "invalid2", "invalid3"]
@@ -121,3 +141,199 @@ class TestDecodeFingerprintsFromDict:
 
         assert len(result) == 3
         assert all(isinstance(img, np.ndarray) for img in result)
+
+
+class TestDecodeImagesParallel:
+    """Tests for decode_images_parallel function."""
+
+    def create_test_image(self):
+        """Helper to create a test image as raw PNG bytes."""
+        img = Image.new("L", (120, 80), color=128)
+        buffer = io.BytesIO()
+        img.save(buffer, format="PNG")
+        return buffer.getvalue()
+
+    def test_decodes_valid_and_reports_invalid(self):
+        """Test that each name maps to an array or an error message."""
+        images = {f"finger_{i}": self.create_test_image() for i in range(6)}
+        images["broken"] = b"not an image"
+
+        decoded, errors, headers = decode_images_parallel(images)
+
+        assert set(decoded) == {f"finger_{i}" for i in range(6)}
+        assert decoded["finger_0"].shape == (80, 120)
+        assert list(errors) == ["broken"]
+        assert headers["finger_0"].to_dict()["width"] == 120
+
+    def test_empty_input(self):
+        """Test that no images yields empty results."""
+        assert decode_images_parallel({}) == ({}, {}, {})
+
+
+class TestImageDecoder:
+    """Tests for the ImageDecoder class."""
+
+    @pytest.fixture
+    def decoder(self):
+        decoder = ImageDecoder(max_workers=2)
+        yield decoder
+        decoder.shutdown()
+
+    def create_jpeg(self, size=(1024, 1024)):
+        """Helper to create an RGB JPEG as raw bytes."""
+        img = Image.new("RGB", size, color=(90, 120, 150))
+        buffer = io.BytesIO()
+        img.save(buffer, format="JPEG")
+        return buffer.getvalue()
+
+    def test_model_path_matches_full_resolution_decode(self, decoder):
+        """Test that model-bound arrays are unchanged by the pooled decoder."""
+        gray = Image.new("L", (300, 200), color=90)
+        buffer = io.BytesIO()
+        gray.save(buffer, format="PNG")
+        images = {"rgb": self.create_jpeg(), "gray": buffer.getvalue()}
+
+        decoded, _errors, _timings = decoder.decode_many(images)
+
+        for name, data in images.items():
+            expected = np.array(Image.open(io.BytesIO(data)))
+            np.testing.assert_array_equal(decoded[name], expected)
+        assert decoded["rgb"].shape == (1024, 1024, 3)  # Blood group needs RGB
+        assert decode_images_bytes([images["rgb"]])[0].shape == (1024, 1024, 3)
+
+    def test_jpeg_decoded_at_reduced_scale_on_request(self):
+        """Test that opting in draft-decodes large JPEGs close to the model size."""
+        decoder = ImageDecoder(max_workers=1, target_size=MODEL_INPUT_SIZE, mode="L")
+        try:
+            result = decoder.decode(self.create_jpeg())
+            small = decoder.decode(self.create_jpeg(size=(100, 60)))
+        finally:
+            decoder.shutdown()
+
+        assert result.ndim == 2  # Decoded straight to grayscale
+        assert 128 <= result.shape[0] <= 256
+        assert 128 <= result.shape[1] <= 256
+        assert small.shape == (60, 100)  # Never upscaled
+
+    def test_quality_gate_decodes_reduced_grayscale(self):
+        """Test that the quality gate's decoder skips the full-size decode."""
+        decoded, _errors, headers = decode_images_parallel(
+            {"thumb": self.create_jpeg()}, get_quality_decoder()
+        )
+
+        assert decoded["thumb"].ndim == 2
+        assert decoded["thumb"].shape[0] <= 256
+        assert headers["thumb"].width == 1024
+        assert assess_fingerprint_quality(decoded["thumb"])["score"] >= 0
+
+    def test_decode_many_reports_timings(self, decoder):
+        """Test per-image timings and errors from a batch decode."""
+        images = {"a": self.create_jpeg(), "b": self.create_jpeg(), "c": b"junk"}
+
+        decoded, errors, timings = decoder.decode_many(images)
+
+        assert set(decoded) == {"a", "b"}
+        assert set(errors) == {"c"}
+        assert set(timings) == {"a", "b"}
+        assert all(ms >= 0 for ms in timings.values())
+
+
+class TestValidateImageHeader:
+    """Tests for header-only validation."""
+
+    def create_png(self, size=(64, 48)):
+        """Helper to create a grayscale PNG as raw bytes."""
+        buffer = io.BytesIO()
+        Image.new("L", size, color=200).save(buffer, format="PNG")
+        return buffer.getvalue()
+
+    def test_reads_format_size_and_mode(self):
+        """Test that the header is read without decoding pixels."""
+        header = validate_image_header(self.create_png())
+
+        assert header.to_dict()["format"] == "PNG"
+        assert (header.width, header.height, header.mode) == (64, 48, "L")
+
+    def test_rejects_unknown_signature(self):
+        """Test that garbage is rejected by magic-byte sniffing."""
+        with pytest.raises(InvalidImageError, match="signature"):
+            validate_image_header(b"GIF89a" + b"\x00" * 64)
+
+    def test_rejects_truncated_header(self):
+        """Test that a valid signature with a broken header is rejected."""
+        with pytest.raises(InvalidImageError):
+            validate_image_header(self.create_png()[:12])
+
+    def test_rejects_oversized_dimensions(self, monkeypatch):
+        """Test that declared dimensions are checked before decode."""
+        monkeypatch.setattr(image_processing, "MAX_IMAGE_DIMENSION", 32)
+
+        with pytest.raises(InvalidImageError, match="size"):
+            validate_image_header(self.create_png())
+
+    def test_base64_length_checked_before_decode(self, monkeypatch):
+        """Test that oversized base64 is refused without decoding it."""
+        monkeypatch.setattr(image_processing, "MAX_IMAGE_SIZE_BYTES", 1000)
+
+        with pytest.raises(ImageSizeLimitError):
+            base64_to_bytes("A" * 4000)
+
+    def test_header_handed_to_decoder(self):
+        """Test that the decoder reuses the verified header's image."""
+        data = self.create_png()
+        header = validate_image_header(data)
+
+        result = decode_image_bytes(data, header=header)
+
+        assert result.shape == (48, 64)
+
+
+def _ridges(size=512, period=32):
+    """Synthetic fingerprint-like ridge pattern."""
+    yy, xx = np.mgrid[0:size, 0:size]
+    phase = 2 * np.pi * (xx * np.cos(0.5) + yy * np.sin(0.5)) / period
+    return (127 + 100 * np.sin(phase)).astype(np.uint8)
+
+
+class TestAssessFingerprintQuality:
+    """Tests for the fingerprint quality gate."""
+
+    def test_clean_ridges_acceptable(self):
+        """Test that a sharp, full, coherent ridge pattern passes."""
+        quality = assess_fingerprint_quality(_ridges())
+
+        assert quality["acceptable"] is True
+        assert quality["issues"] == []
+        assert quality["score"] > 0.9
+
+    def test_blurred_scan_rejected(self):
+        """Test that heavy blur fails sharpness and contrast."""
+        import cv2
+
+        quality = assess_fingerprint_quality(cv2.GaussianBlur(_ridges(), (0, 0), 12))
+
+        assert quality["acceptable"] is False
+        assert "sharpness" in quality["issues"]
+        assert "contrast" in quality["issues"]
+
+    def test_partial_scan_low_coverage(self):
+        """Test that a scan with most of the pad missing fails coverage."""
+        image = _ridges()
+        image[:, 180:] = 230
+
+        quality = assess_fingerprint_quality(image)
+
+        assert quality["issues"] == ["coverage"]
+
+    def test_noise_has_no_ridge_coherence(self):
+        """Test that sensor noise fails orientation coherence."""
+        noise = np.random.default_rng(0).integers(0, 256, (512, 512), dtype=np.uint8)
+
+        assert "coherence" in assess_fingerprint_quality(noise)["issues"]
+
+    def test_color_input(self):
+        """Test that RGB input is scored like its grayscale equivalent."""
+        gray = _ridges()
+        color = np.stack([gray] * 3, axis=-1)
+
+        assert assess_fingerprint_quality(color) == assess_fingerprint_quality(gray)
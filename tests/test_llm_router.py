@@ -0,0 +1,179 @@
+"""Tests for hedged LLM routing."""
+
+import time
+
+import pytest
+
+import api.cache_service as cache_module
+from api.cache_service import ResponseCache
+from api.exceptions import LLMUnavailableError
+from api.llm_router import LatencyHistogram, LLMProvider, LLMRouter
+
+ANALYSIS = {
+    "diabetes_risk_score": 0.42,
+    "diabetes_risk_level": "Moderate",
+    "predicted_blood_group": "O",
+    "pattern_counts": {"Arc": 1, "Whorl": 5, "Loop": 4},
+    "bmi": 24.2,
+    "diabetes_confidence": 0.8,
+}
+DEMOGRAPHICS = {"age": 52, "gender": "female"}
+
+
+class FakeProvider(LLMProvider):
+    """Local provider with injectable latency, failure and quota."""
+
+    def __init__(self, name, text=None, delay=0.0, error=None, headroom=1.0):
+        self.name = name
+        self.text = text if text is not None else f"Report from {name}."
+        self.delay = delay
+        self.error = error
+        self.headroom = headroom
+        self.calls = 0
+        self.closed = False
+
+    def stream_patient_explanation(self, analysis_results, demographics, priority):
+        self.calls += 1
+        try:
+            time.sleep(self.delay)
+            if self.error is not None:
+                raise self.error
+            for word in self.text.split(" "):
+                yield word + " "
+        except GeneratorExit:
+            self.closed = True
+            raise
+
+    def quota_headroom(self):
+        return self.headroom
+
+
+@pytest.fixture(autouse=True)
+def cache(monkeypatch):
+    cache = ResponseCache()
+    monkeypatch.setattr(cache_module, "_cache_instance", cache)
+    return cache
+
+
+def _router(*providers, **kwargs):
+    kwargs.setdefault("weights", {})
+    kwargs.setdefault("default_delay", 0.05)
+    kwargs.setdefault("min_delay", 0.01)
+    return LLMRouter(list(providers), **kwargs)
+
+
+def _explain(router):
+    return "".join(router.stream_patient_explanation(ANALYSIS, DEMOGRAPHICS)).strip()
+
+
+class TestLatencyHistogram:
+    """Tests for LatencyHistogram."""
+
+    def test_quantiles_interpolate_within_buckets(self):
+        histogram = LatencyHistogram()
+        for i in range(100):
+            histogram.observe((i + 0.5) / 100)
+
+        assert histogram.quantile(0.9) == pytest.approx(0.9)
+        assert histogram.quantile(0.5) == pytest.approx(0.5)
+        assert histogram.snapshot()["count"] == 100
+
+    def test_empty_histogram_has_no_quantile(self):
+        assert LatencyHistogram().quantile(0.9) is None
+
+
+class TestLLMRouter:
+    """Tests for routing, hedging and failover."""
+
+    def test_fast_primary_is_not_hedged(self):
+        """Test that an answer within the hedge delay never calls the backup."""
+        primary, backup = FakeProvider("a"), FakeProvider("b")
+        router = _router(primary, backup, default_delay=1)
+
+        assert _explain(router) == "Report from a."
+        assert backup.calls == 0
+        assert router.get_metrics()["hedges"] == 0
+
+    def test_slow_primary_is_hedged(self):
+        """Test that the backup is asked after the delay and its answer wins."""
+        primary = FakeProvider("a", delay=1.0)
+        backup = FakeProvider("b")
+        router = _router(primary, backup)
+
+        started = time.monotonic()
+        text = _explain(router)
+
+        assert text == "Report from b."
+        assert time.monotonic() - started < 0.5
+        metrics = router.get_metrics()
+        assert metrics["hedges"] == 1
+        assert metrics["hedge_wins"] == 1
+        assert metrics["providers"]["a"]["abandoned"] == 1
+
+    def test_abandoned_primary_is_closed(self):
+        """Test that the losing stream is stopped once it produces output."""
+        primary = FakeProvider("a", delay=0.2)
+        router = _router(primary, FakeProvider("b"))
+
+        _explain(router)
+        deadline = time.monotonic() + 2
+        while not primary.closed and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert primary.closed
+
+    def test_failure_fails_over_at_once(self):
+        """Test that a primary error does not wait for the hedge delay."""
+        primary = FakeProvider("a", error=RuntimeError("429 quota"))
+        router = _router(primary, FakeProvider("b"), default_delay=5)
+
+        started = time.monotonic()
+        text = _explain(router)
+
+        assert text == "Report from b."
+        assert time.monotonic() - started < 1
+        assert router.get_metrics()["failovers"] == 1
+        assert router.get_metrics()["providers"]["a"]["errors"] == 1
+
+    def test_all_providers_failing_raises(self):
+        router = _router(
+            FakeProvider("a", error=RuntimeError("down")),
+            FakeProvider("b", error=ValueError("also down")),
+        )
+
+        with pytest.raises((RuntimeError, ValueError)):
+            _explain(router)
+
+    def test_quota_headroom_reorders_providers(self):
+        """Test that a preferred provider low on quota loses the primary slot."""
+        preferred = FakeProvider("a", headroom=0.2)
+        other = FakeProvider("b")
+        router = _router(preferred, other, weights={"a": 3.0, "b": 1.0})
+
+        assert [p.name for p in router.rank()] == ["b", "a"]
+        preferred.headroom = 1.0
+        assert [p.name for p in router.rank()] == ["a", "b"]
+
+    def test_no_quota_anywhere_raises(self):
+        router = _router(FakeProvider("a", headroom=0), FakeProvider("b", headroom=0))
+
+        with pytest.raises(LLMUnavailableError):
+            _explain(router)
+
+    def test_hedge_delay_follows_p90(self):
+        """Test that enough samples replace the default delay with the p90."""
+        router = _router(FakeProvider("a"), min_samples=10, max_delay=10)
+        histogram = router._latency["a"]["first_chunk"]
+        for _ in range(10):
+            histogram.observe(2.5)
+
+        assert router.hedge_delay(router.providers[0]) == pytest.approx(2.9)
+
+    def test_uncached_provider_answer_is_cached(self, cache):
+        """Test that an answer from a non-caching provider is stored."""
+        provider = FakeProvider("a")
+        router = _router(provider)
+
+        assert _explain(router) == _explain(router) == "Report from a."
+        assert provider.calls == 1
+        assert cache.get_stats()["by_prompt"]["patient_explanation"]["hits"] == 1
@@ -0,0 +1,50 @@
+"""Tests for PDF report generation."""
+
+from datetime import datetime, timezone
+
+import api.pdf_service as pdf_module
+from api.pdf_service import PDFReportGenerator
+
+PATIENT = {
+    "age": 45,
+    "gender": "male",
+    "height_cm": 170,
+    "weight_kg": 75,
+    "bmi": 25.95,
+    "pattern_arc": 2,
+    "pattern_whorl": 5,
+    "pattern_loop": 3,
+    "risk_score": 0.42,
+    "risk_level": "Moderate",
+    "blood_group": "O",
+}
+EXPLANATION = (
+    "📊 Understanding Your Results\n\n"
+    "Your pattern distribution places you in the moderate risk band.\n\n"
+    "- Schedule a fasting blood glucose test\n"
+    "- Stay active\n\n"
+) * 8
+GENERATED_AT = datetime(2025, 12, 22, 10, 0, tzinfo=timezone.utc)
+
+
+class TestPDFReportGenerator:
+    """Tests for the shared report template."""
+
+    def test_page_chrome_is_one_form_across_pages(self):
+        """Test that the static header/footer is drawn once and reused."""
+        pdf = PDFReportGenerator().generate_report(PATIENT, EXPLANATION, GENERATED_AT)
+
+        assert pdf.startswith(b"%PDF")
+        assert pdf.count(b"/Type /Page\n") > 1
+        assert pdf.count(b"/Subtype /Form") == 1
+
+    def test_styles_are_built_once_per_generator(self, monkeypatch):
+        """Test that rendering does not rebuild the stylesheet."""
+        generator = PDFReportGenerator()
+        calls = []
+        monkeypatch.setattr(pdf_module, "getSampleStyleSheet", lambda: calls.append(1))
+
+        generator.generate_report(PATIENT, EXPLANATION, GENERATED_AT)
+        generator.generate_report(PATIENT, "", GENERATED_AT)
+
+        assert calls == []
@@ -0,0 +1,108 @@
+"""Tests for the token-bucket rate limiter."""
+
+import asyncio
+import time
+
+import pytest
+
+import api.rate_limiter as rate_limiter_module
+from api.rate_limiter import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    MemoryBucketStore,
+    SQLiteBucketStore,
+    TokenBucketLimiter,
+)
+
+
+def _limiter(rpm=60, burst=2, store=None, reserve=0):
+    return TokenBucketLimiter(
+        "test",
+        requests_per_minute=rpm,
+        burst=burst,
+        store=store or MemoryBucketStore(),
+        background_reserve=reserve,
+    )
+
+
+class TestTokenBucketLimiter:
+    """Tests for TokenBucketLimiter."""
+
+    def test_try_acquire_is_non_blocking(self):
+        """Test that the burst is admitted and the next call refused at once."""
+        limiter = _limiter(rpm=1, burst=2)
+
+        started = time.monotonic()
+        results = [limiter.try_acquire() for _ in range(3)]
+
+        assert results == [True, True, False]
+        assert time.monotonic() - started < 0.5
+        assert limiter.get_metrics()["by_priority"]["interactive"]["rejected"] == 1
+
+    def test_acquire_waits_for_refill(self):
+        """Test that acquire sleeps until a token refills and records it."""
+        limiter = _limiter(rpm=1200, burst=1)  # one token every 50ms
+        assert limiter.try_acquire()
+
+        assert limiter.acquire(timeout=2)
+
+        stats = limiter.get_metrics()["by_priority"]["interactive"]
+        assert stats["acquired"] == 2
+        assert stats["throttled_seconds"] >= 0.03
+
+    def test_acquire_gives_up_at_deadline(self):
+        """Test that a deadline-bounded acquire returns False in time."""
+        limiter = _limiter(rpm=1, burst=1)
+        assert limiter.try_acquire()
+
+        started = time.monotonic()
+        assert limiter.acquire(timeout=0.05) is False
+        assert time.monotonic() - started < 0.5
+
+    def test_async_acquire(self):
+        """Test that the awaitable acquire admits and refuses like acquire."""
+        limiter = _limiter(rpm=1, burst=1)
+
+        assert asyncio.run(limiter.acquire_async(timeout=0.05)) is True
+        assert asyncio.run(limiter.acquire_async(timeout=0.05)) is False
+
+    def test_background_cannot_take_reserved_tokens(self):
+        """Test that interactive calls keep the reserve for themselves."""
+        limiter = _limiter(rpm=1, burst=3, reserve=2)
+
+        assert limiter.try_acquire(PRIORITY_BACKGROUND)
+        assert not limiter.try_acquire(PRIORITY_BACKGROUND)
+        assert limiter.try_acquire(PRIORITY_INTERACTIVE)
+        assert limiter.try_acquire(PRIORITY_INTERACTIVE)
+        assert not limiter.try_acquire(PRIORITY_INTERACTIVE)
+
+    def test_sqlite_state_is_shared_between_limiters(self, tmp_path):
+        """Test that limiters on one file (e.g. two workers) share the bucket."""
+        path = str(tmp_path / "rate_limits.sqlite3")
+        first = _limiter(rpm=1, burst=2, store=SQLiteBucketStore(path))
+        second = _limiter(rpm=1, burst=2, store=SQLiteBucketStore(path))
+
+        assert first.try_acquire()
+        assert second.try_acquire()
+        assert not first.try_acquire()
+        assert not second.try_acquire()
+        assert second.available_tokens() < 1
+
+
+class TestGeminiAdmission:
+    """Tests for how Gemini calls take tokens."""
+
+    def test_interactive_call_raises_after_deadline(self, monkeypatch):
+        """Test that an exhausted bucket surfaces RateLimitExceeded."""
+        from api.exceptions import RateLimitExceeded
+        from api.gemini_service import GeminiService
+
+        limiter = _limiter(rpm=1, burst=1)
+        assert limiter.try_acquire()
+        monkeypatch.setattr(rate_limiter_module, "_gemini_rate_limiter", limiter)
+        monkeypatch.setattr(
+            "api.constants.GEMINI_INTERACTIVE_ACQUIRE_TIMEOUT_SECONDS", 0.01
+        )
+
+        with pytest.raises(RateLimitExceeded):
+            GeminiService._acquire_slot(PRIORITY_INTERACTIVE)
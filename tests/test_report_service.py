@@ -0,0 +1,138 @@
+"""Tests for lazy, content-addressed report rendering."""
+
+import threading
+import time
+
+import pytest
+
+import api.report_service as report_module
+from api.report_service import (
+    ReportService,
+    build_report_spec,
+    spec_filename,
+    spec_hash,
+)
+from storage.local_storage import LocalStorage
+
+PATIENT = {"age": 40, "gender": "female", "bmi": 24.2, "risk_level": "Moderate"}
+GENERATED_AT = "2025-12-22T10:00:00+00:00"
+
+
+class CountingGenerator:
+    """PDF generator stand-in that counts renders and can be held open."""
+
+    def __init__(self, gate=None):
+        self.gate = gate
+        self.renders = 0
+        self._lock = threading.Lock()
+
+    def generate_report(self, patient_data, explanation, generated_at=None):
+        with self._lock:
+            self.renders += 1
+        if self.gate is not None:
+            self.gate.wait(5)
+        return f"%PDF {explanation} {generated_at:%Y-%m-%d}".encode()
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    monkeypatch.setenv("LOCAL_MEDIA_ROOT", str(tmp_path))
+    storage = LocalStorage()
+    monkeypatch.setattr(report_module, "get_storage", lambda: storage)
+    return storage
+
+
+@pytest.fixture
+def generator(monkeypatch):
+    generator = CountingGenerator()
+    monkeypatch.setattr(report_module, "get_pdf_generator", lambda: generator)
+    return generator
+
+
+class TestReportSpec:
+    """Tests for render specs."""
+
+    def test_spec_is_stored_encrypted(self, storage):
+        service = ReportService()
+        spec = build_report_spec(PATIENT, "Confidential summary", GENERATED_AT)
+
+        digest = service.store_spec("sid", spec)
+
+        stored = storage.get_file(spec_filename("sid"), folder="reports")
+        assert b"Confidential" not in stored
+        assert service.load_spec("sid") == spec
+        assert digest == spec_hash(spec)
+        assert service.load_spec("other") is None
+
+    def test_hash_covers_every_input(self, monkeypatch):
+        spec = build_report_spec(PATIENT, "Summary", GENERATED_AT)
+        monkeypatch.setattr(report_module, "REPORT_TEMPLATE_VERSION", 2)
+
+        assert spec_hash(spec) == spec_hash(dict(reversed(spec.items())))
+        assert spec_hash(spec) != spec_hash({**spec, "explanation": "Other"})
+        assert spec_hash(spec) != spec_hash(
+            build_report_spec(PATIENT, "Summary", GENERATED_AT)
+        )
+
+
+class TestReportCache:
+    """Tests for rendering through the storage-backed cache."""
+
+    def test_identical_spec_is_a_cache_hit(self, storage, generator):
+        service = ReportService()
+        spec = build_report_spec(PATIENT, "Summary", GENERATED_AT)
+
+        first, filename = service.get_report(spec)
+        second, _ = service.get_report(
+            build_report_spec(PATIENT, "Summary", GENERATED_AT)
+        )
+
+        assert first == second == b"%PDF Summary 2025-12-22"
+        assert filename == f"report_{spec_hash(spec)}.pdf"
+        assert storage.get_file(filename) == first
+        assert generator.renders == 1
+        assert service.get_metrics()["cache_hits"] == 1
+
+    def test_concurrent_first_downloads_render_once(self, storage, generator):
+        generator.gate = threading.Event()
+        service = ReportService()
+        spec = build_report_spec(PATIENT, "Summary", GENERATED_AT)
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(service.get_report(spec)))
+            for _ in range(4)
+        ]
+
+        for thread in threads:
+            thread.start()
+        time.sleep(0.05)
+        generator.gate.set()
+        for thread in threads:
+            thread.join(5)
+
+        assert generator.renders == 1
+        assert len({pdf for pdf, _ in results}) == 1
+        assert len(results) == 4
+
+
+class TestDownloadMetrics:
+    """Tests for never-downloaded accounting."""
+
+    def test_reports_settle_as_never_downloaded(self, storage, monkeypatch):
+        service = ReportService()
+        spec = build_report_spec(PATIENT, "Summary", GENERATED_AT)
+        for session_id in ("a", "b", "c"):
+            service.store_spec(session_id, spec)
+        service.mark_downloaded("a")
+        service.mark_downloaded("a")
+
+        before = service.get_metrics()
+        monkeypatch.setattr(report_module, "REPORT_DOWNLOAD_WINDOW_HOURS", 0)
+        after = service.get_metrics()
+
+        assert before["prepared"] == 3
+        assert before["downloaded"] == 1
+        assert before["awaiting_download"] == 2
+        assert after["never_downloaded"] == 2
+        assert after["awaiting_download"] == 0
+        assert after["never_downloaded_ratio"] == round(2 / 3, 3)
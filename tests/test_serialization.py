@@ -0,0 +1,113 @@
+"""Tests for the JSON serialization layer."""
+
+import json
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import numpy as np
+import pytest
+from django.test import Client
+from ninja.renderers import JSONRenderer
+from pydantic import BaseModel
+
+import serialization
+from api.api import api
+from api.renderers import FastJSONRenderer
+from storage.local_storage import LocalStorage
+
+PAYLOAD = {
+    "name": "Ospital Ning Angeles",
+    "note": "Niño — café",
+    "score": np.float32(0.5),
+    "counts": np.array([1, 2, 3]),
+    "nested": {"ok": True, "none": None},
+}
+
+
+class Model(BaseModel):
+    level: str
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("BACKEND_API_KEY", "test-key")
+    return Client(HTTP_HOST="localhost", HTTP_X_API_KEY="test-key")
+
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request, monkeypatch):
+    if request.param == "json":
+        monkeypatch.setattr(serialization, "orjson", None)
+    elif serialization.orjson is None:
+        pytest.skip("orjson not installed")
+    return request.param
+
+
+class TestSerialization:
+    """Tests for dumps/loads under both backends."""
+
+    def test_round_trip_with_numpy(self, backend):
+        data = serialization.dumps(PAYLOAD)
+
+        assert isinstance(data, bytes)
+        assert "Niño".encode() in data
+        assert serialization.loads(data) == {
+            **PAYLOAD,
+            "score": 0.5,
+            "counts": [1, 2, 3],
+        }
+
+    def test_compact_and_indented(self, backend):
+        assert serialization.dumps({"a": 1}) == b'{"a":1}'
+        assert serialization.dumps({"a": 1}, indent=True) == b'{\n  "a": 1\n}'
+        assert serialization.dumps({"b": 1, "a": 2}, sort_keys=True) == (
+            b'{"a":2,"b":1}'
+        )
+
+    def test_default_hook_and_unsupported_types(self, backend):
+        assert serialization.dumps(Decimal("1.5"), default=str) == b'"1.5"'
+        with pytest.raises(TypeError):
+            serialization.dumps(object())
+
+
+class TestFastJSONRenderer:
+    """Tests for the Ninja renderer."""
+
+    def test_matches_default_renderer(self, backend):
+        data = {
+            "when": datetime(2025, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc),
+            "amount": Decimal("1.25"),
+            "id": uuid.UUID(int=1),
+            "model": Model(level="High"),
+            "items": [1, "two", None],
+        }
+
+        fast = FastJSONRenderer().render(None, data, response_status=200)
+        default = JSONRenderer().render(None, data, response_status=200)
+
+        assert json.loads(fast) == json.loads(default)
+
+    def test_api_responses_use_it(self, client):
+        response = client.get("/api/metrics")
+
+        assert isinstance(api.renderer, FastJSONRenderer)
+        assert response["Content-Type"].startswith("application/json")
+        assert "llm_router" in response.json()
+
+
+class TestLocalStorageRecords:
+    """Tests for record persistence through the serializer."""
+
+    def test_record_round_trip(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("LOCAL_MEDIA_ROOT", str(tmp_path))
+        storage = LocalStorage()
+
+        record_id = storage.save_patient_record(
+            {"id": "r1", "risk_score": np.float64(0.42), "name": "José"}
+        )
+
+        record = storage.get_patient_record(record_id)
+        assert record["risk_score"] == 0.42
+        assert record["name"] == "José"
+        assert storage.list_records() == [record]
@@ -0,0 +1,239 @@
+"""Tests for the session manager."""
+
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from cryptography.fernet import Fernet
+
+from api.session_manager import SessionManager
+
+
+@pytest.fixture
+def session_mgr(tmp_path, monkeypatch):
+    """SessionManager backed by a temporary store."""
+    monkeypatch.setenv("SESSION_STORE_PATH", str(tmp_path / "session_store.json"))
+    monkeypatch.setenv("SESSION_BLOB_DIR", str(tmp_path / "session_blobs"))
+    monkeypatch.setenv("SESSION_ENCRYPTION_KEY", Fernet.generate_key().decode())
+    monkeypatch.setenv("SESSION_FLUSH_INTERVAL_MS", "0")
+    mgr = SessionManager()
+    yield mgr
+    mgr.close()
+
+
+def _expire(mgr, session_id, seconds_ago=60):
+    """Move a session's deadline into the past."""
+    past = datetime.now(timezone.utc) - timedelta(seconds=seconds_ago)
+    mgr.sessions[session_id]["expires_at"] = past.isoformat()
+    mgr._index_session(session_id, mgr.sessions[session_id])
+
+
+class TestSessionExpiry:
+    """Tests for the expiry index and sweeper."""
+
+    def test_sweep_evicts_only_expired(self, session_mgr):
+        """Test that sweeping removes expired sessions and keeps live ones."""
+        live = session_mgr.create_session(consent=True)
+        expired = session_mgr.create_session(consent=True)
+        _expire(session_mgr, expired)
+
+        assert session_mgr.sweep_expired() == 1
+        assert expired not in session_mgr.sessions
+        assert live in session_mgr.sessions
+
+    def test_sweep_writes_store_once(self, session_mgr, monkeypatch):
+        """Test that a batch of evictions is persisted with one write."""
+        ids = [session_mgr.create_session(consent=True) for _ in range(5)]
+        for sid in ids:
+            _expire(session_mgr, sid)
+
+        writes = []
+        monkeypatch.setattr(session_mgr, "_save_sessions", lambda: writes.append(1))
+
+        assert session_mgr.sweep_expired() == 5
+        assert len(writes) == 1
+
+    def test_sweep_keeps_session_refreshed_mid_sweep(self, session_mgr):
+        """Test that a refresh racing the sweep is not lost."""
+        sid = session_mgr.create_session(consent=True)
+        _expire(session_mgr, sid)
+        stripe = session_mgr._session_lock(sid)
+        future = datetime.now(timezone.utc) + timedelta(hours=1)
+
+        class RefreshFirst:
+            """Lands a refresh after the heap pop, before the stripe lock."""
+
+            def __enter__(self):
+                session_mgr.sessions[sid] = {
+                    **session_mgr.sessions[sid],
+                    "expires_at": future.isoformat(),
+                }
+                return stripe.__enter__()
+
+            def __exit__(self, *exc):
+                return stripe.__exit__(*exc)
+
+        session_mgr._session_lock = lambda session_id: RefreshFirst()
+
+        assert session_mgr.sweep_expired() == 0
+        del session_mgr._session_lock
+        assert session_mgr.get_session(sid) is not None
+        assert session_mgr.sweep_expired(now=future.timestamp() + 1) == 1
+
+    def test_deleted_session_leaves_stale_heap_entry(self, session_mgr):
+        """Test that stale heap entries are skipped."""
+        sid = session_mgr.create_session(consent=True)
+        session_mgr.delete_session(sid)
+
+        assert session_mgr.sweep_expired(now=time.time() + 7200) == 0
+
+    def test_get_session_rejects_expired(self, session_mgr):
+        """Test that get_session does not return an expired session."""
+        sid = session_mgr.create_session(consent=True)
+        _expire(session_mgr, sid)
+
+        assert session_mgr.get_session(sid) is None
+
+    def test_background_sweeper(self, session_mgr):
+        """Test that the sweeper thread evicts without explicit calls."""
+        sid = session_mgr.create_session(consent=True)
+        _expire(session_mgr, sid)
+
+        session_mgr.start_sweeper(interval_seconds=0.01)
+        deadline = time.time() + 2
+        while sid in session_mgr.sessions and time.time() < deadline:
+            time.sleep(0.01)
+
+        assert sid not in session_mgr.sessions
+
+    def test_metrics(self, session_mgr):
+        """Test live session, bytes held and eviction metrics."""
+        sid = session_mgr.create_session(consent=True)
+        session_mgr.add_fingerprint(sid, "right_thumb", "aGVsbG8=")
+        other = session_mgr.create_session(consent=True)
+        _expire(session_mgr, other)
+        session_mgr.sweep_expired()
+
+        metrics = session_mgr.get_metrics()
+
+        assert metrics["live_sessions"] == 1
+        assert metrics["bytes_held"] > 0
+        assert metrics["evictions_per_minute"] == 1
+        assert metrics["evictions_total"] == 1
+
+
+class TestSessionConcurrency:
+    """Tests for per-session locking and copy-on-write snapshots."""
+
+    def test_concurrent_fingerprints_same_session(self, session_mgr):
+        """Test that concurrent uploads to one session are not lost."""
+        sid = session_mgr.create_session(consent=True)
+        fingers = [f"finger_{i}" for i in range(10)]
+
+        threads = [
+            threading.Thread(
+                target=session_mgr.add_fingerprint, args=(sid, name, "aGVsbG8=")
+            )
+            for name in fingers
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert set(session_mgr.get_session(sid)["fingerprints"]) == set(fingers)
+
+    def test_delete_during_upload_leaves_no_blob(self, session_mgr, monkeypatch):
+        """Test that a blob written for a session deleted meanwhile is removed."""
+        single = session_mgr.create_session(consent=True)
+        bulk = session_mgr.create_session(consent=True)
+        store = session_mgr.blob_store
+        put = store.put
+
+        def delete_then_put(session_id, *args):
+            session_mgr.delete_session(session_id)
+            return put(session_id, *args)
+
+        monkeypatch.setattr(store, "put", delete_then_put)
+
+        assert session_mgr.add_fingerprint(single, "right_thumb", "aGVsbG8=") is None
+        assert session_mgr.add_fingerprints_bytes(bulk, {"left_thumb": b"x"}) is None
+        for sid in (single, bulk):
+            assert store.session_resident_bytes(sid) == 0
+            assert not store._session_dir(sid).exists()
+
+    def test_snapshot_not_mutated_by_updates(self, session_mgr):
+        """Test that a snapshot returned earlier is never modified in place."""
+        sid = session_mgr.create_session(consent=True)
+        snapshot = session_mgr.get_session(sid)
+
+        updated = session_mgr.add_fingerprint(sid, "right_thumb", "aGVsbG8=")
+        session_mgr.update_session(sid, consent=False)
+
+        assert snapshot["fingerprints"] == {}
+        assert snapshot["consent"] is True
+        assert len(updated["fingerprints"]) == 1
+        assert session_mgr.get_session(sid)["consent"] is False
+
+    def test_store_round_trip(self, session_mgr):
+        """Test that the persisted store reloads into a new manager."""
+        sid = session_mgr.create_session(consent=True)
+        session_mgr.update_demographics(sid, {"age": 30})
+
+        reloaded = SessionManager()
+
+        assert reloaded.get_session(sid)["demographics"] == {"age": 30}
+
+
+class TestGroupCommit:
+    """Tests for write-coalescing persistence."""
+
+    @pytest.fixture
+    def coalescing_mgr(self, session_mgr):
+        mgr = SessionManager(flush_interval_ms=60_000, flush_max_pending=1000)
+        yield mgr
+        mgr.close()
+
+    def test_mutations_coalesce_until_flush(self, coalescing_mgr):
+        """Test that many mutations produce a single write at the barrier."""
+        sid = coalescing_mgr.create_session(consent=True)
+        for i in range(10):
+            coalescing_mgr.add_fingerprint(sid, f"finger_{i}", "aGVsbG8=")
+
+        assert coalescing_mgr.get_metrics()["store_writes"] == 0
+
+        coalescing_mgr.flush()
+        metrics = coalescing_mgr.get_metrics()
+
+        assert metrics["store_writes"] == 1
+        assert metrics["persist_requests"] == 11
+        assert SessionManager().get_session(sid) is not None
+
+    def test_flush_without_changes_is_noop(self, coalescing_mgr):
+        """Test that a clean store is not rewritten."""
+        coalescing_mgr.flush()
+        assert coalescing_mgr.get_metrics()["store_writes"] == 0
+
+    def test_background_writer_flushes_after_max_pending(self, session_mgr):
+        """Test that reaching the pending threshold triggers a write."""
+        mgr = SessionManager(flush_interval_ms=60_000, flush_max_pending=3)
+        try:
+            for _ in range(3):
+                mgr.create_session(consent=True)
+
+            deadline = time.time() + 2
+            while mgr.get_metrics()["store_writes"] == 0 and time.time() < deadline:
+                time.sleep(0.01)
+
+            assert mgr.get_metrics()["store_writes"] == 1
+        finally:
+            mgr.close()
+
+    def test_sync_mode_writes_every_change(self, session_mgr):
+        """Test that an interval of 0 keeps write-through behaviour."""
+        sid = session_mgr.create_session(consent=True)
+        session_mgr.update_demographics(sid, {"age": 30})
+
+        assert session_mgr.get_metrics()["store_writes"] == 2
+        assert session_mgr.get_metrics()["write_amplification"] == 1.0
@@ -0,0 +1,75 @@
+"""Tests for single-flight request coalescing."""
+
+import threading
+import time
+
+import pytest
+
+from api.single_flight import SingleFlight
+
+
+def _run_concurrently(target, count):
+    results = [None] * count
+
+    def worker(i):
+        results[i] = target()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for t in threads:
+        t.start()
+    return threads, results
+
+
+class TestSingleFlight:
+    """Tests for SingleFlight."""
+
+    def test_concurrent_callers_share_one_call(self):
+        """Test that duplicates wait on the leader instead of calling again."""
+        flight = SingleFlight()
+        gate = threading.Event()
+        calls = []
+
+        def work():
+            calls.append(1)
+            gate.wait(5)
+            return "shared"
+
+        threads, results = _run_concurrently(lambda: flight.do("k", work), 5)
+        while flight.get_metrics()["coalesced"] < 4:
+            time.sleep(0.005)
+        gate.set()
+        for t in threads:
+            t.join()
+
+        assert calls == [1]
+        assert results == ["shared"] * 5
+        assert flight.get_metrics() == {
+            "in_flight": 0,
+            "leaders": 1,
+            "coalesced": 4,
+            "coalesce_rate": 0.8,
+        }
+
+    def test_error_reaches_waiters_and_is_not_remembered(self):
+        """Test that a failed flight propagates and the next call retries."""
+        flight = SingleFlight()
+        future, leader = flight.acquire("k")
+        waiter, is_leader = flight.acquire("k")
+
+        flight.resolve("k", future, error=ValueError("quota"))
+
+        assert leader and not is_leader
+        with pytest.raises(ValueError):
+            waiter.result(0)
+        assert flight.do("k", lambda: "fresh") == "fresh"
+
+    def test_abandoned_leader_fails_waiters(self):
+        """Test that a non-Exception exit is surfaced as a RuntimeError."""
+        flight = SingleFlight()
+        future, _ = flight.acquire("k")
+        waiter, _ = flight.acquire("k")
+
+        flight.resolve("k", future, error=GeneratorExit())
+
+        with pytest.raises(RuntimeError):
+            waiter.result(0)
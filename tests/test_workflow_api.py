@@ -1,14 +1,20 @@
 """Tests for workflow API endpoints."""
 
+import base64
+import io
+import zipfile
 from unittest.mock import Mock, patch
 
 import pytest
+from cryptography.fernet import Fernet
 from django.test import Client, TestCase
+from PIL import Image
 
+import api.session_manager as session_manager_module
 from api.exceptions import IncompleteFingerprintsError, SessionNotFoundError
 from api.workflow_api import (
+    _build_explanation_request,
     _build_predictions_dict,
-    _prepare_patient_data_for_gemini,
     _validate_session_for_analysis,
 )
 
@@ -16,8 +22,8 @@ from api.workflow_api import (
 class TestWorkflowHelperFunctions:
     """Tests for workflow API helper functions."""
 
-    def test_prepare_patient_data_for_gemini(self):
-        """Test patient data preparation for Gemini API."""
+    def test_build_explanation_request(self):
+        """Test the analysis summary passed to the explanation generators."""
         demographics = {"age": 45, "gender": "Male", "bmi": 28.5}
 
         diabetes_result = {
@@ -28,19 +34,16 @@ class TestWorkflowHelperFunctions:
 
         blood_group_result = {"blood_group": "O+", "confidence": 0.89}
 
-        result = _prepare_patient_data_for_gemini(
+        result = _build_explanation_request(
             demographics, diabetes_result, blood_group_result
         )
 
-        assert result["age"] == 45
-        assert result["gender"] == "Male"
         assert result["bmi"] == 28.5
-        assert result["pattern_arc"] == 2
-        assert result["pattern_whorl"] == 5
-        assert result["pattern_loop"] == 3
-        assert result["risk_score"] == 0.65
-        assert result["risk_level"] == "Moderate"
-        assert result["blood_group"] == "O+"
+        assert result["pattern_counts"] == {"Arc": 2, "Whorl": 5, "Loop": 3}
+        assert result["diabetes_risk_score"] == 0.65
+        assert result["diabetes_risk_level"] == "Moderate"
+        assert result["predicted_blood_group"] == "O+"
+        assert result["diabetes_confidence"] == 0.0
 
     def test_build_predictions_dict(self):
         """Test building predictions dictionary."""
@@ -138,3 +141,323 @@ class TestWorkflowAPIEndpoints(TestCase):
         # Just showing the structure
         # assert response.status_code == 200
         # assert 'session_id' in response.json()
+
+
+@pytest.fixture
+def api_client(tmp_path, monkeypatch):
+    """Test client with a fresh session manager on a temporary store."""
+    monkeypatch.setenv("SESSION_STORE_PATH", str(tmp_path / "store.json"))
+    monkeypatch.setenv("SESSION_BLOB_DIR", str(tmp_path / "blobs"))
+    monkeypatch.setenv("SESSION_ENCRYPTION_KEY", Fernet.generate_key().decode())
+    monkeypatch.setenv("SESSION_FLUSH_INTERVAL_MS", "0")
+    monkeypatch.setenv("SESSION_SWEEP_INTERVAL_SECONDS", "0")
+    monkeypatch.setenv("BACKEND_API_KEY", "test-key")
+    monkeypatch.setattr(session_manager_module, "_session_manager", None)
+
+    yield Client(HTTP_HOST="localhost", HTTP_X_API_KEY="test-key")
+
+    if session_manager_module._session_manager is not None:
+        session_manager_module._session_manager.close()
+
+
+def _png_bytes(size=(64, 64)):
+    buffer = io.BytesIO()
+    Image.new("L", size, color=128).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _start_session(client):
+    response = client.post(
+        "/api/session/start", data={"consent": True}, content_type="application/json"
+    )
+    return response.json()["session_id"]
+
+
+class TestRawFingerprintUpload:
+    """Tests for the binary fingerprint upload endpoint."""
+
+    def test_octet_stream_upload(self, api_client):
+        """Test that raw bytes are stored without base64."""
+        sid = _start_session(api_client)
+        png = _png_bytes()
+
+        response = api_client.post(
+            f"/api/session/{sid}/fingerprint/raw?finger_name=right_thumb",
+            data=png,
+            content_type="application/octet-stream",
+        )
+
+        assert response.status_code == 200
+        assert response.json()["total_collected"] == 1
+        stored = session_manager_module.get_session_manager().get_fingerprint_bytes(sid)
+        assert stored == {"right_thumb": png}
+
+    def test_multipart_upload(self, api_client):
+        """Test multipart/form-data with an image file and finger_name field."""
+        sid = _start_session(api_client)
+
+        response = api_client.post(
+            f"/api/session/{sid}/fingerprint/raw",
+            data={
+                "finger_name": "left_index",
+                "image": io.BytesIO(_png_bytes()),
+            },
+        )
+
+        assert response.status_code == 200
+        assert response.json()["finger_name"] == "left_index"
+
+    def test_rejects_unknown_finger(self, api_client):
+        """Test that finger_name is validated."""
+        sid = _start_session(api_client)
+
+        response = api_client.post(
+            f"/api/session/{sid}/fingerprint/raw?finger_name=toe",
+            data=_png_bytes(),
+            content_type="application/octet-stream",
+        )
+
+        assert response.status_code == 422
+
+    def test_finger_name_checked_before_body(self, api_client):
+        """Test that an unknown finger is refused before the body is read."""
+        sid = _start_session(api_client)
+
+        response = api_client.post(
+            f"/api/session/{sid}/fingerprint/raw",
+            data={"finger_name": "toe"},
+        )
+
+        assert response.status_code == 422
+        assert "finger_name" in response.json()["error"]
+
+    def test_rejects_oversized_body(self, api_client, monkeypatch):
+        """Test that bodies past the image size limit are refused."""
+        monkeypatch.setattr("api.constants.MAX_IMAGE_SIZE_BYTES", 1024)
+        sid = _start_session(api_client)
+
+        response = api_client.post(
+            f"/api/session/{sid}/fingerprint/raw?finger_name=right_thumb",
+            data=b"x" * 4096,
+            content_type="application/octet-stream",
+        )
+
+        assert response.status_code == 413
+
+
+FINGERS = [
+    "right_thumb",
+    "right_index",
+    "right_middle",
+    "right_ring",
+    "right_pinky",
+    "left_thumb",
+    "left_index",
+    "left_middle",
+    "left_ring",
+    "left_pinky",
+]
+
+
+class TestFingerprintValidation:
+    """Tests for header validation on the JSON upload endpoint."""
+
+    def test_json_upload_rejects_non_image(self, api_client):
+        """Test that garbage is rejected before it reaches the session."""
+        sid = _start_session(api_client)
+
+        response = api_client.post(
+            f"/api/session/{sid}/fingerprint",
+            data={"finger_name": "right_thumb", "image": "aGVsbG8="},
+            content_type="application/json",
+        )
+
+        assert response.status_code == 400
+        session = session_manager_module.get_session_manager().get_session(sid)
+        assert session["fingerprints"] == {}
+
+
+class TestFingerprintQualityGate:
+    """Tests for the upload-time quality gate."""
+
+    def test_quality_reported(self, api_client):
+        """Test that the per-finger quality report is returned."""
+        sid = _start_session(api_client)
+
+        response = api_client.post(
+            f"/api/session/{sid}/fingerprint/raw?finger_name=right_thumb",
+            data=_png_bytes(),
+            content_type="application/octet-stream",
+        )
+
+        quality = response.json()["quality"]
+        assert response.status_code == 200
+        assert quality["acceptable"] is False  # Flat gray has no ridges
+        assert "score" in quality
+
+    def test_reject_low_quality(self, api_client):
+        """Test that rejection refuses the scan and does not store it."""
+        sid = _start_session(api_client)
+
+        response = api_client.post(
+            f"/api/session/{sid}/fingerprint",
+            data={
+                "finger_name": "right_thumb",
+                "image": base64.b64encode(_png_bytes()).decode(),
+                "reject_low_quality": True,
+            },
+            content_type="application/json",
+        )
+
+        assert response.status_code == 422
+        assert "coverage" in response.json()["quality"]["issues"]
+        session = session_manager_module.get_session_manager().get_session(sid)
+        assert session["fingerprints"] == {}
+
+    def test_bulk_reject_low_quality(self, api_client):
+        """Test that bulk uploads mark rejected fingers invalid."""
+        sid = _start_session(api_client)
+
+        response = api_client.post(
+            f"/api/session/{sid}/fingerprints?reject_low_quality=true",
+            data={"right_thumb": io.BytesIO(_png_bytes())},
+        )
+
+        result = response.json()["results"][0]
+        assert result["valid"] is False
+        assert result["quality"]["acceptable"] is False
+        assert response.json()["total_collected"] == 0
+
+
+class TestBulkFingerprintUpload:
+    """Tests for the bulk ten-finger upload endpoint."""
+
+    def test_multipart_stores_all_with_one_write(self, api_client):
+        """Test that ten fingers are stored with a single session write."""
+        sid = _start_session(api_client)
+        mgr = session_manager_module.get_session_manager()
+        writes_before = mgr.get_metrics()["store_writes"]
+
+        response = api_client.post(
+            f"/api/session/{sid}/fingerprints",
+            data={name: io.BytesIO(_png_bytes()) for name in FINGERS},
+        )
+
+        body = response.json()
+        assert response.status_code == 200
+        assert body["total_collected"] == 10
+        assert body["remaining"] == 0
+        assert all(r["valid"] for r in body["results"])
+        assert mgr.get_metrics()["store_writes"] - writes_before == 1
+        assert set(mgr.get_fingerprint_bytes(sid)) == set(FINGERS)
+
+    def test_reports_invalid_fingers(self, api_client):
+        """Test per-finger validation results for bad images and names."""
+        sid = _start_session(api_client)
+
+        response = api_client.post(
+            f"/api/session/{sid}/fingerprints",
+            data={
+                "right_thumb": io.BytesIO(_png_bytes()),
+                "left_thumb": io.BytesIO(b"not an image"),
+                "big_toe": io.BytesIO(_png_bytes()),
+            },
+        )
+
+        results = {r["finger_name"]: r for r in response.json()["results"]}
+        assert results["right_thumb"]["valid"] is True
+        assert results["left_thumb"]["valid"] is False
+        assert results["big_toe"]["valid"] is False
+        assert response.json()["total_collected"] == 1
+
+    def test_zip_archive(self, api_client):
+        """Test that a zip of <finger>.png members is accepted."""
+        sid = _start_session(api_client)
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as zf:
+            for name in FINGERS[:3]:
+                zf.writestr(f"{name}.png", _png_bytes())
+
+        response = api_client.post(
+            f"/api/session/{sid}/fingerprints",
+            data=archive.getvalue(),
+            content_type="application/zip",
+        )
+
+        assert response.status_code == 200
+        assert response.json()["total_collected"] == 3
+
+    def test_zip_skips_unknown_and_duplicate_members(self, api_client):
+        """Test that unknown members are never read and duplicates rejected."""
+        sid = _start_session(api_client)
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as zf:
+            zf.writestr("right_thumb.png", _png_bytes())
+            zf.writestr("left_thumb.png", _png_bytes())
+            zf.writestr("left_thumb.jpg", _png_bytes())
+            zf.writestr("notes.txt", b"x")
+
+        with patch("zipfile.ZipFile.read", autospec=True) as read:
+            read.return_value = _png_bytes()
+            response = api_client.post(
+                f"/api/session/{sid}/fingerprints",
+                data=archive.getvalue(),
+                content_type="application/zip",
+            )
+
+        read_names = [call.args[1].filename for call in read.call_args_list]
+        results = {r["finger_name"]: r for r in response.json()["results"]}
+        assert "notes.txt" not in read_names
+        assert "Duplicate" in results["left_thumb"]["error"]
+        assert "Unknown" in results["notes"]["error"]
+        assert response.json()["total_collected"] == 1
+
+    def test_zip_rejects_too_many_members(self, api_client):
+        """Test that archives with more members than fingers are refused."""
+        sid = _start_session(api_client)
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as zf:
+            for i in range(len(FINGERS) + 1):
+                zf.writestr(f"extra_{i}.png", b"x")
+
+        response = api_client.post(
+            f"/api/session/{sid}/fingerprints",
+            data=archive.getvalue(),
+            content_type="application/zip",
+        )
+
+        assert response.status_code == 400
+
+    def test_zip_rejects_large_uncompressed_total(self, api_client, monkeypatch):
+        """Test that a highly compressible archive is refused before reading."""
+        monkeypatch.setattr("api.constants.MAX_IMAGE_SIZE_BYTES", 1024)
+        sid = _start_session(api_client)
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+            for name in FINGERS:
+                zf.writestr(f"{name}.png", b"\0" * 1100)
+
+        with patch("zipfile.ZipFile.read") as read:
+            response = api_client.post(
+                f"/api/session/{sid}/fingerprints",
+                data=archive.getvalue(),
+                content_type="application/zip",
+            )
+
+        assert response.status_code == 413
+        read.assert_not_called()
+
+    def test_analyze_flag_runs_analysis(self, api_client):
+        """Test that analyze=true starts inference with the decoded images."""
+        sid = _start_session(api_client)
+
+        with patch("api.workflow_api._run_analysis") as run_analysis:
+            run_analysis.side_effect = RuntimeError("models unavailable")
+            response = api_client.post(
+                f"/api/session/{sid}/fingerprints?analyze=true",
+                data={name: io.BytesIO(_png_bytes()) for name in FINGERS},
+            )
+
+        images = run_analysis.call_args.args[1]
+        assert len(images) == 10
+        assert response.json()["analysis_error"] == "models unavailable"